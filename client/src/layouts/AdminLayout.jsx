@@ -12,6 +12,7 @@ import MobilePerformanceOptimizer from '../components/MobilePerformanceOptimizer
 import AnimationOptimizer from '../components/AnimationOptimizer';
 import CrossPlatformStandardizer from '../components/CrossPlatformStandardizer';
 import { getProfilePicUrl, getProfilePicFallback } from '../utils/image';
+import { getEventStreamUrl } from '../utils/eventStream';
 
 const AdminLayout = () => {
     const { logout } = useAuth();
@@ -152,7 +153,7 @@ const AdminLayout = () => {
         let es;
         const connect = () => {
             try {
-                es = new EventSource('/api/attendance/events');
+                es = new EventSource(getEventStreamUrl());
                 es.onmessage = (e) => {
                     try {
                         const data = JSON.parse(e.data || '{}');
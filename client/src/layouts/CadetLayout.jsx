@@ -12,6 +12,7 @@ import SafeAreaManager, { SafeAreaProvider, FixedElement } from '../components/S
 import MobilePerformanceOptimizer from '../components/MobilePerformanceOptimizer';
 import AnimationOptimizer from '../components/AnimationOptimizer';
 import CrossPlatformStandardizer from '../components/CrossPlatformStandardizer';
+import { getEventStreamUrl } from '../utils/eventStream';
 
 const CadetLayout = () => {
     const { logout, user } = useAuth();
@@ -175,7 +176,7 @@ const CadetLayout = () => {
         let es;
         const connect = () => {
             try {
-                es = new EventSource('/api/attendance/events');
+                es = new EventSource(getEventStreamUrl());
                 es.onmessage = (e) => {
                     try {
                         const data = JSON.parse(e.data || '{}');
@@ -12,6 +12,7 @@ import AnimationOptimizer from '../components/AnimationOptimizer';
 import CrossPlatformStandardizer from '../components/CrossPlatformStandardizer';
 import { cacheSingleton } from '../utils/db';
 import { getProfilePicUrl, getProfilePicFallback } from '../utils/image';
+import { getEventStreamUrl } from '../utils/eventStream';
 function urlBase64ToUint8Array(base64String) {
     const padding = '='.repeat((4 - base64String.length % 4) % 4);
     const base64 = (base64String + padding)
@@ -177,7 +178,7 @@ const StaffLayout = () => {
         let es;
         const connect = () => {
             try {
-                es = new EventSource('/api/attendance/events');
+                es = new EventSource(getEventStreamUrl());
                 es.onmessage = (e) => {
                     try {
                         const data = JSON.parse(e.data || '{}');
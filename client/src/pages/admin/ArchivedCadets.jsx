@@ -4,6 +4,7 @@ import { Search, ChevronLeft, Trash2, RefreshCw, KeyRound } from 'lucide-react';
 import { toast } from 'react-hot-toast';
 import { cacheSingleton, clearCache } from '../../utils/db';
 import ResponsiveTable from '../../components/ResponsiveTable';
+import { getEventStreamUrl } from '../../utils/eventStream';
 
 const ArchivedCadets = () => {
   const [cadets, setCadets] = useState([]);
@@ -42,7 +43,7 @@ const ArchivedCadets = () => {
     let es;
     const connect = () => {
       try {
-        es = new EventSource('/api/attendance/events');
+        es = new EventSource(getEventStreamUrl());
         es.onmessage = (e) => {
           try {
             const data = JSON.parse(e.data || '{}');
@@ -25,6 +25,7 @@ import { PHILIPPINE_RELIGIONS } from '../../constants/religions';
 import ResponsiveTable from '../../components/ResponsiveTable';
 import MobileModalManager from '../../components/MobileModalManager';
 import { MobileFormLayout, FormField, MobileInput, MobileSelect, FormActions } from '../../components/MobileFormLayout';
+import { getEventStreamUrl } from '../../utils/eventStream';
 
 const Cadets = () => {
     const [cadets, setCadets] = useState([]);
@@ -146,7 +147,7 @@ const Cadets = () => {
         let es;
         const connect = () => {
             try {
-                es = new EventSource('/api/attendance/events');
+                es = new EventSource(getEventStreamUrl());
                 es.onmessage = (e) => {
                     try {
                         const data = JSON.parse(e.data || '{}');
@@ -10,6 +10,7 @@ import { Link } from 'react-router-dom';
 import { getSingleton, cacheSingleton } from '../../utils/db';
 import WeatherAdvisory from '../../components/WeatherAdvisory';
 import ChartWrapper from '../../components/ChartWrapper';
+import { getEventStreamUrl } from '../../utils/eventStream';
 
 const STATUS_COLORS = {
     Ongoing: '#06b6d4', // cyan-500
@@ -65,7 +66,7 @@ const Dashboard = () => {
         let es;
         const connect = () => {
             try {
-                es = new EventSource('/api/attendance/events');
+                es = new EventSource(getEventStreamUrl());
                 es.onmessage = (e) => {
                     try {
                         const data = JSON.parse(e.data || '{}');
@@ -12,6 +12,7 @@ import 'jspdf-autotable';
 import html2canvas from 'html2canvas';
 import { addReportHeader, addReportFooter, addSignatories } from '../../utils/pdf';
 import ChartWrapper from '../../components/ChartWrapper';
+import { getEventStreamUrl } from '../../utils/eventStream';
 
 // Refined Color Scheme
 const COLORS = {
@@ -212,7 +213,7 @@ const DataAnalysis = () => {
         let es;
         const connect = () => {
             try {
-                es = new EventSource('/api/attendance/events');
+                es = new EventSource(getEventStreamUrl());
                 es.onmessage = (e) => {
                     try {
                         const data = JSON.parse(e.data || '{}');
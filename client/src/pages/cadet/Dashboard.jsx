@@ -5,6 +5,7 @@ import { Calendar, AlertCircle, User, Info, Link } from 'lucide-react';
 import ExcuseLetterSubmission from '../../components/ExcuseLetterSubmission';
 import { cacheData, getCachedData, getSingleton, cacheSingleton } from '../../utils/db';
 import { useAuth } from '../../context/AuthContext';
+import { getEventStreamUrl } from '../../utils/eventStream';
 
 const CadetDashboard = () => {
     const navigate = useNavigate();
@@ -153,7 +154,7 @@ const CadetDashboard = () => {
         let es;
         const connectSSE = () => {
             try {
-                es = new EventSource('/api/attendance/events');
+                es = new EventSource(getEventStreamUrl());
                 es.onopen = () => setEsConnected(true);
                 es.onmessage = async (e) => {
                     try {
@@ -0,0 +1,14 @@
+/**
+ * Server-Sent Events endpoint URL.
+ * The stream is served by the Django Channels (ASGI) service; the WSGI web
+ * service only answers /api/events/ with missed events (short polling).
+ */
+
+/**
+ * Builds the URL for an EventSource connection.
+ * @returns {string} - Absolute URL of /api/events/ on the events service
+ */
+export const getEventStreamUrl = () => {
+    const base = import.meta.env.VITE_EVENTS_URL || import.meta.env.VITE_API_URL || '';
+    return `${base.replace(/\/$/, '')}/api/events/`;
+};
@@ -0,0 +1,273 @@
+"""
+Bulk attendance engine.
+
+Writes many attendance records without per-row signals: records are
+inserted/updated in batches, Grades.attendance_present is recomputed for
+the affected cadets with one set-based UPDATE, and one batch of SyncEvents
+(one per changed cadet and training day) is emitted. Used by the bulk create endpoint,
+CSV import and core.bulk_operations.
+"""
+import logging
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.constants import OnConflict
+from django.db.models.sql import InsertQuery
+from django.db.models.functions import Coalesce
+from apps.attendance.models import AttendanceRecord
+from apps.cadets.models import Grades
+from apps.system.models import SyncEvent
+from apps.system.audit import record_audit
+from apps.messaging.websocket_utils import broadcast_attendance_update, publish_sync_event
+from core.cache import invalidate_grades_cache
+
+logger = logging.getLogger(__name__)
+
+UPDATABLE_FIELDS = ['status', 'time_in', 'time_out']
+
+
+def recompute_attendance_present(cadet_ids):
+    """
+    Recompute Grades.attendance_present from attendance records.
+    
+    Missing Grades rows are created first, then every affected row is
+    updated with a single UPDATE using a correlated COUNT subquery.
+    
+    Args:
+        cadet_ids: IDs of the cadets to recompute
+    
+    Returns:
+        Number of Grades rows updated
+    """
+    cadet_ids = list(set(cadet_ids))
+    if not cadet_ids:
+        return 0
+    
+    existing = set(
+        Grades.objects.filter(cadet_id__in=cadet_ids).values_list('cadet_id', flat=True)
+    )
+    missing = [Grades(cadet_id=cadet_id) for cadet_id in cadet_ids if cadet_id not in existing]
+    if missing:
+        Grades.objects.bulk_create(missing, ignore_conflicts=True)
+    
+    present_count = AttendanceRecord.objects.filter(
+        cadet_id=OuterRef('cadet_id'),
+        status='present'
+    ).order_by().values('cadet_id').annotate(count=Count('id')).values('count')
+    
+    return Grades.objects.filter(cadet_id__in=cadet_ids).update(
+        attendance_present=Coalesce(
+            Subquery(present_count, output_field=IntegerField()),
+            Value(0)
+        )
+    )
+
+
+def _emit_attendance_events(records):
+    """
+    Emit one SyncEvent and one broadcast per changed (cadet, training day).
+    
+    Args:
+        records: Changed attendance records, at most one per
+            (cadet_id, training_day_id)
+    """
+    attendance_present = dict(
+        Grades.objects.filter(
+            cadet_id__in={record.cadet_id for record in records}
+        ).values_list('cadet_id', 'attendance_present')
+    )
+    
+    events = []
+    for record in records:
+        cadet_id = record.cadet_id
+        attendance_data = {
+            'training_day_id': record.training_day_id,
+            'status': record.status,
+            'attendance_present': attendance_present.get(cadet_id, 0),
+            'time_in': record.time_in.isoformat() if hasattr(record.time_in, 'isoformat') else record.time_in,
+            'time_out': record.time_out.isoformat() if hasattr(record.time_out, 'isoformat') else record.time_out,
+        }
+        broadcast_attendance_update(cadet_id, attendance_data)
+        events.append(SyncEvent(
+            event_type='attendance_update',
+            cadet_id=cadet_id,
+            payload=attendance_data
+        ))
+    
+    # bulk_create skips post_save, so publish to SSE subscribers explicitly
+    for event in SyncEvent.objects.bulk_create(events):
+        if event.pk:
+            publish_sync_event(event)
+
+
+def _audit_payload(record):
+    """Audit payload of an attendance record written in bulk."""
+    return {
+        'training_day_id': record.training_day_id,
+        'cadet_id': record.cadet_id,
+        'status': record.status,
+        'time_in': str(record.time_in) if record.time_in else None,
+        'time_out': str(record.time_out) if record.time_out else None,
+    }
+
+
+def _merge_existing(record, row, update_existing, result):
+    """Apply an input row to an existing record and file it as updated or skipped."""
+    if not update_existing:
+        result['skipped'].append(record)
+        return
+    
+    changed = False
+    for field in UPDATABLE_FIELDS:
+        value = row.get(field)
+        if value is not None and value != getattr(record, field):
+            setattr(record, field, value)
+            changed = True
+    
+    if changed:
+        result['updated'].append(record)
+    else:
+        result['skipped'].append(record)
+
+
+def _insert_ignoring_conflicts(records, batch_size):
+    """
+    Insert new records, leaving out those another writer created first.
+    
+    Whether a row was inserted is decided by its key, not its values: on
+    backends with INSERT ... RETURNING the statement skips conflicting
+    rows (ON CONFLICT DO NOTHING) and returns the keys it did insert;
+    elsewhere each row is inserted in its own savepoint and a unique
+    violation marks it as taken. Bypasses model signals like bulk_create.
+    
+    Args:
+        records: Unsaved AttendanceRecord instances
+        batch_size: Number of rows per INSERT statement
+    
+    Returns:
+        The records this call inserted, with primary keys set
+    """
+    opts = AttendanceRecord._meta
+    using = AttendanceRecord.objects.db
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    returning_fields = [opts.pk, opts.get_field('training_day'), opts.get_field('cadet')]
+    
+    def insert(batch, on_conflict=None):
+        query = InsertQuery(AttendanceRecord, on_conflict=on_conflict)
+        query.insert_values(fields, batch)
+        return query.get_compiler(using=using).execute_sql(returning_fields)
+    
+    inserted = []
+    if connections[using].features.can_return_rows_from_bulk_insert:
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            by_key = {(record.training_day_id, record.cadet_id): record for record in batch}
+            for pk, training_day_id, cadet_id in insert(batch, OnConflict.IGNORE):
+                record = by_key[(training_day_id, cadet_id)]
+                record.pk = pk
+                record._state.adding = False
+                record._state.db = using
+                inserted.append(record)
+        return inserted
+    
+    for record in records:
+        try:
+            with transaction.atomic(using=using):
+                rows = insert([record])
+        except IntegrityError:
+            continue
+        record.pk = rows[0][0]
+        record._state.adding = False
+        record._state.db = using
+        inserted.append(record)
+    return inserted
+
+
+def bulk_upsert_attendance(rows, update_existing=False, batch_size=500):
+    """
+    Create (and optionally update) attendance records in bulk.
+    
+    Rows are keyed by (training_day_id, cadet_id); duplicates within the
+    input keep the last row.
+    
+    Args:
+        rows: Iterable of dicts with training_day_id, cadet_id, status and
+            optional time_in/time_out
+        update_existing: Update records that already exist instead of
+            skipping them
+        batch_size: Number of rows per INSERT/UPDATE statement
+    
+    Returns:
+        Dict with 'created' and 'updated' record lists and 'skipped', a
+        list of existing records that were left unchanged
+    """
+    rows_by_key = {}
+    for row in rows:
+        rows_by_key[(row['training_day_id'], row['cadet_id'])] = row
+    
+    result = {'created': [], 'updated': [], 'skipped': []}
+    if not rows_by_key:
+        return result
+    
+    training_day_ids = {key[0] for key in rows_by_key}
+    cadet_ids = {key[1] for key in rows_by_key}
+    
+    with transaction.atomic():
+        existing = {
+            (record.training_day_id, record.cadet_id): record
+            for record in AttendanceRecord.objects.filter(
+                training_day_id__in=training_day_ids,
+                cadet_id__in=cadet_ids
+            )
+        }
+        
+        to_create = []
+        for key, row in rows_by_key.items():
+            record = existing.get(key)
+            if record is None:
+                to_create.append(AttendanceRecord(
+                    training_day_id=key[0],
+                    cadet_id=key[1],
+                    status=row['status'],
+                    time_in=row.get('time_in'),
+                    time_out=row.get('time_out')
+                ))
+            else:
+                _merge_existing(record, row, update_existing, result)
+        
+        if to_create:
+            # A concurrent submission or QR scan may insert the same
+            # (training_day, cadet) after the read above; those rows are
+            # not inserted here and are handled as existing records
+            result['created'] = _insert_ignoring_conflicts(to_create, batch_size)
+            created_keys = {(record.training_day_id, record.cadet_id) for record in result['created']}
+            lost_keys = {
+                (record.training_day_id, record.cadet_id) for record in to_create
+            } - created_keys
+            if lost_keys:
+                for record in AttendanceRecord.objects.filter(
+                    training_day_id__in={key[0] for key in lost_keys},
+                    cadet_id__in={key[1] for key in lost_keys}
+                ):
+                    key = (record.training_day_id, record.cadet_id)
+                    if key in lost_keys:
+                        _merge_existing(record, rows_by_key[key], update_existing, result)
+        
+        if result['updated']:
+            AttendanceRecord.objects.bulk_update(result['updated'], UPDATABLE_FIELDS, batch_size=batch_size)
+        
+        changed_records = result['created'] + result['updated']
+        if changed_records:
+            recompute_attendance_present({record.cadet_id for record in changed_records})
+            _emit_attendance_events(changed_records)
+            invalidate_grades_cache()
+            
+            for record in result['created']:
+                record_audit('attendance_records', 'CREATE', record.pk, payload=_audit_payload(record))
+            for record in result['updated']:
+                record_audit('attendance_records', 'UPDATE', record.pk, payload=_audit_payload(record))
+    
+    logger.info(
+        f"Bulk attendance: {len(result['created'])} created, "
+        f"{len(result['updated'])} updated, {len(result['skipped'])} skipped"
+    )
+    return result
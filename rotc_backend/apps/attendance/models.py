@@ -3,6 +3,7 @@ Attendance models for ROTC Backend.
 Includes TrainingDay, AttendanceRecord, StaffAttendanceRecord, and ExcuseLetter models.
 """
 from django.db import models
+from core.field_tracking import FieldTrackingMixin
 from apps.cadets.models import Cadet
 
 
@@ -26,7 +27,7 @@ class TrainingDay(models.Model):
         return f"{self.title} - {self.date}"
 
 
-class AttendanceRecord(models.Model):
+class AttendanceRecord(FieldTrackingMixin, models.Model):
     """
     Cadet attendance record for training days.
     Matches the 'attendance_records' table from Node.js backend.
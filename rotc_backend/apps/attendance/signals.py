@@ -1,24 +1,34 @@
 """
 Signal handlers for attendance app.
 """
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from .models import AttendanceRecord, ExcuseLetter
+from .models import TrainingDay, AttendanceRecord, ExcuseLetter
 from apps.cadets.models import Grades
+from apps.grading.counters import update_grade_counters, increment, decrement
 from apps.system.models import SyncEvent
 from apps.messaging.websocket_utils import broadcast_attendance_update
+from core.cache import invalidate_training_day_cache
+
+
+@receiver(post_save, sender=TrainingDay)
+@receiver(post_delete, sender=TrainingDay)
+def invalidate_training_day_on_change(sender, instance, **kwargs):
+    """Invalidate cached training day lists and metadata on any change (including admin edits)."""
+    invalidate_training_day_cache()
 
 
 @receiver(pre_save, sender=AttendanceRecord)
 def track_attendance_status_change(sender, instance, **kwargs):
     """Track previous status before update to handle grade changes."""
-    if instance.pk:
+    if instance.pk and not instance.is_tracked:
+        # Instance built by hand with a pk: no snapshot to diff against
         try:
             instance._previous_status = AttendanceRecord.objects.get(pk=instance.pk).status
         except AttendanceRecord.DoesNotExist:
             instance._previous_status = None
     else:
-        instance._previous_status = None
+        instance._previous_status = instance.get_previous_value('status')
 
 
 @receiver(post_save, sender=AttendanceRecord)
@@ -27,56 +37,44 @@ def update_attendance_grade(sender, instance, created, **kwargs):
     Update cadet's attendance_present count when attendance status changes.
     Increment when status='present', decrement when changing from 'present' to other status.
     """
-    try:
-        grades = Grades.objects.get(cadet=instance.cadet)
-    except Grades.DoesNotExist:
-        # If grades don't exist, create them
-        grades = Grades.objects.create(cadet=instance.cadet)
-    
     previous_status = getattr(instance, '_previous_status', None)
     current_status = instance.status
     
-    attendance_changed = False
+    # Only a change into or out of 'present' affects the counter
+    was_present = not created and previous_status == 'present'
+    is_present = current_status == 'present'
+    if was_present == is_present:
+        return
     
-    if created:
-        # New attendance record
-        if current_status == 'present':
-            grades.attendance_present += 1
-            grades.save()
-            attendance_changed = True
+    if is_present:
+        grades = update_grade_counters(instance.cadet_id, attendance_present=increment('attendance_present', 1))
     else:
-        # Updated attendance record
-        if previous_status != current_status:
-            # Status changed
-            if previous_status == 'present' and current_status != 'present':
-                # Changed from present to something else - decrement
-                if grades.attendance_present > 0:
-                    grades.attendance_present -= 1
-                    grades.save()
-                    attendance_changed = True
-            elif previous_status != 'present' and current_status == 'present':
-                # Changed from non-present to present - increment
-                grades.attendance_present += 1
-                grades.save()
-                attendance_changed = True
+        grades = update_grade_counters(instance.cadet_id, attendance_present=decrement('attendance_present', 1))
     
-    # Broadcast attendance update via WebSocket if attendance count changed
-    if attendance_changed:
-        attendance_data = {
-            'training_day_id': instance.training_day.id,
-            'status': current_status,
-            'attendance_present': grades.attendance_present,
-            'time_in': instance.time_in.isoformat() if instance.time_in else None,
-            'time_out': instance.time_out.isoformat() if instance.time_out else None,
-        }
-        broadcast_attendance_update(instance.cadet.id, attendance_data)
-        
-        # Create sync event for real-time updates
-        SyncEvent.objects.create(
-            event_type='attendance_update',
-            cadet_id=instance.cadet.id,
-            payload=attendance_data
+    if grades is None:
+        # If grades don't exist, create them
+        grades = Grades.objects.create(
+            cadet_id=instance.cadet_id,
+            attendance_present=1 if is_present else 0
         )
+        grades = {'attendance_present': grades.attendance_present}
+    
+    # Broadcast attendance update via WebSocket
+    attendance_data = {
+        'training_day_id': instance.training_day_id,
+        'status': current_status,
+        'attendance_present': grades['attendance_present'],
+        'time_in': instance.time_in.isoformat() if instance.time_in else None,
+        'time_out': instance.time_out.isoformat() if instance.time_out else None,
+    }
+    broadcast_attendance_update(instance.cadet_id, attendance_data)
+    
+    # Create sync event for real-time updates
+    SyncEvent.objects.create(
+        event_type='attendance_update',
+        cadet_id=instance.cadet_id,
+        payload=attendance_data
+    )
 
 
 @receiver(post_save, sender=ExcuseLetter)
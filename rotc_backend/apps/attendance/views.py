@@ -6,6 +6,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.http import Http404
 from django.utils import timezone
 import hashlib
 import json
@@ -17,16 +18,34 @@ from .serializers import (
     BulkAttendanceSerializer, QRCheckInSerializer
 )
 from apps.cadets.models import Cadet
+from apps.attendance.bulk import bulk_upsert_attendance
 from apps.authentication.permissions import IsAdmin, IsAdminOrTrainingStaff
+from core.pagination import KeysetPagination
 from core.cache import (
     generate_cache_key,
-    get_cached_data,
-    set_cached_data,
-    get_cache_ttl,
+    get_or_set_cached_data,
+    get_hot_cached_data,
     invalidate_training_day_cache,
 )
 
 
+def get_training_day_metadata(training_day_id):
+    """
+    Get the immutable metadata of a training day via the two-tier cache.
+    
+    Returns:
+        Dict with id, date and title, or None if the training day does not exist
+    """
+    def build_metadata():
+        return TrainingDay.objects.filter(id=training_day_id).values('id', 'date', 'title').first()
+    
+    return get_hot_cached_data(
+        generate_cache_key('training_days:meta', tags=(), id=training_day_id),
+        build_metadata,
+        'training_days',
+    )
+
+
 class TrainingDayViewSet(viewsets.ModelViewSet):
     """ViewSet for TrainingDay model."""
     queryset = TrainingDay.objects.all()
@@ -41,20 +60,13 @@ class TrainingDayViewSet(viewsets.ModelViewSet):
         """List training days with caching."""
         cache_key = generate_cache_key('training_days:list')
         
-        # Try to get from cache
-        cached_response = get_cached_data(cache_key)
-        if cached_response is not None:
-            return Response(cached_response, status=status.HTTP_200_OK)
+        def build_training_days():
+            return self.get_serializer(self.get_queryset(), many=True).data
         
-        # Cache miss - fetch from database
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        # Read-through cache: only one worker rebuilds an expired list
+        data = get_or_set_cached_data(cache_key, build_training_days, 'training_days')
         
-        # Cache the response
-        ttl = get_cache_ttl('training_days')
-        set_cached_data(cache_key, serializer.data, ttl)
-        
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(data, status=status.HTTP_200_OK)
     
     def create(self, request, *args, **kwargs):
         """Create training day and invalidate cache."""
@@ -96,6 +108,7 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
     queryset = AttendanceRecord.objects.all()
     serializer_class = AttendanceRecordSerializer
     permission_classes = [IsAuthenticated, IsAdminOrTrainingStaff]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Get attendance records, optionally filtered by training_day_id."""
@@ -110,7 +123,7 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
-        """Bulk create attendance records for multiple cadets using bulk_create."""
+        """Bulk create attendance records for multiple cadets using the bulk attendance engine."""
         serializer = BulkAttendanceSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
@@ -122,40 +135,25 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
         
         training_day = TrainingDay.objects.get(id=training_day_id)
         
-        # Get existing attendance records to avoid duplicates
-        existing_cadet_ids = set(
-            AttendanceRecord.objects.filter(
-                training_day_id=training_day_id,
-                cadet_id__in=cadet_ids
-            ).values_list('cadet_id', flat=True)
-        )
-        
-        # Create attendance records for cadets without existing records
-        records_to_create = []
-        for cadet_id in cadet_ids:
-            if cadet_id not in existing_cadet_ids:
-                records_to_create.append(
-                    AttendanceRecord(
-                        training_day=training_day,
-                        cadet_id=cadet_id,
-                        status=status_value,
-                        time_in=time_in,
-                        time_out=time_out
-                    )
-                )
-        
-        # Bulk create records
-        created_records = AttendanceRecord.objects.bulk_create(
-            records_to_create,
-            batch_size=100
+        # Insert without per-row signals; grades and sync events are updated in bulk
+        result = bulk_upsert_attendance(
+            {
+                'training_day_id': training_day.id,
+                'cadet_id': cadet_id,
+                'status': status_value,
+                'time_in': time_in,
+                'time_out': time_out
+            }
+            for cadet_id in cadet_ids
         )
+        created_records = result['created']
         
         # Serialize created records
         response_serializer = AttendanceRecordSerializer(created_records, many=True)
         
         return Response({
             'created': len(created_records),
-            'skipped': len(existing_cadet_ids),
+            'skipped': len(result['skipped']),
             'records': response_serializer.data
         }, status=status.HTTP_201_CREATED)
     
@@ -169,9 +167,11 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
         cadet_id = serializer.validated_data['cadet_id']
         qr_code = serializer.validated_data['qr_code']
         
-        # Validate QR code
-        training_day = TrainingDay.objects.get(id=training_day_id)
-        qr_data = f"{training_day.id}:{training_day.date}:{training_day.title}"
+        # Validate QR code (training day metadata is served from the local cache)
+        training_day = get_training_day_metadata(training_day_id)
+        if training_day is None:
+            raise Http404('Training day not found')
+        qr_data = f"{training_day['id']}:{training_day['date']}:{training_day['title']}"
         expected_qr = hashlib.sha256(qr_data.encode()).hexdigest()[:16]
         
         if qr_code != expected_qr:
@@ -195,7 +195,7 @@ class AttendanceRecordViewSet(viewsets.ModelViewSet):
         else:
             # Create new attendance record
             record = AttendanceRecord.objects.create(
-                training_day=training_day,
+                training_day_id=training_day_id,
                 cadet_id=cadet_id,
                 status='present',
                 time_in=timezone.now().time()
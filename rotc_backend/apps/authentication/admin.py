@@ -3,6 +3,7 @@ from django.contrib.auth.hashers import make_password
 from django.utils.html import format_html
 from .models import User, UserSettings
 from .admin_utils import is_admin_user
+from core.cache import invalidate_user_cache
 
 
 class UserSettingsInline(admin.StackedInline):
@@ -59,12 +60,18 @@ class UserAdmin(admin.ModelAdmin):
     def approve_users(self, request, queryset):
         """Bulk approve users"""
         updated = queryset.update(is_approved=True)
+        # queryset.update() skips signals, so drop cached rows explicitly
+        for username in queryset.values_list('username', flat=True):
+            invalidate_user_cache(username)
         self.message_user(request, f'{updated} user(s) approved successfully.')
     approve_users.short_description = 'Approve selected users'
     
     def unapprove_users(self, request, queryset):
         """Bulk unapprove users"""
         updated = queryset.update(is_approved=False)
+        # queryset.update() skips signals, so drop cached rows explicitly
+        for username in queryset.values_list('username', flat=True):
+            invalidate_user_cache(username)
         self.message_user(request, f'{updated} user(s) unapproved.')
     unapprove_users.short_description = 'Unapprove selected users'
     
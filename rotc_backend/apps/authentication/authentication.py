@@ -0,0 +1,54 @@
+"""
+DRF authentication classes for ROTC Backend.
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from apps.authentication.user_cache import get_cached_auth_user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that avoids per-request user queries.
+    
+    If EnhancedJWTAuthenticationMiddleware already authenticated the request,
+    its result is reused as-is. Otherwise the token is validated normally and
+    the user is resolved through the user/claims cache instead of the DB.
+    """
+    
+    def authenticate(self, request):
+        """Reuse the middleware's result, falling back to full authentication."""
+        # DRF wraps the Django request; the middleware stores on the original
+        http_request = getattr(request, '_request', request)
+        auth_result = getattr(http_request, 'jwt_auth_result', None)
+        if auth_result is not None:
+            return auth_result
+        return super().authenticate(request)
+    
+    def get_user(self, validated_token):
+        """Resolve the token's user from the cache, with the same checks as simplejwt."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+        
+        user = get_cached_auth_user(user_id, validated_token.get(api_settings.JTI_CLAIM))
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+        
+        return user
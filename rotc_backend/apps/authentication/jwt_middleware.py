@@ -1,10 +1,11 @@
 """
 Enhanced JWT Authentication Middleware with comprehensive error handling.
 """
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError, AuthenticationFailed
 from rest_framework.exceptions import AuthenticationFailed as DRFAuthenticationFailed
 from apps.authentication.models import User
+from apps.authentication.authentication import CachedJWTAuthentication
+from apps.authentication.user_cache import get_cached_user
 from django.http import JsonResponse
 import logging
 import uuid
@@ -19,7 +20,7 @@ class EnhancedJWTAuthenticationMiddleware:
     
     def __init__(self, get_response):
         self.get_response = get_response
-        self.jwt_auth = JWTAuthentication()
+        self.jwt_auth = CachedJWTAuthentication()
     
     def __call__(self, request):
         """Process the request and attach authenticated user."""
@@ -37,9 +38,14 @@ class EnhancedJWTAuthenticationMiddleware:
             if auth_result is not None:
                 django_user, token = auth_result
                 
+                # Let DRF's CachedJWTAuthentication reuse this result
+                request.jwt_auth_result = auth_result
+                
                 # Fetch the actual User from our custom model using username
                 try:
-                    custom_user = User.objects.get(username=django_user.username)
+                    custom_user = get_cached_user(django_user.username)
+                    if custom_user is None:
+                        raise User.DoesNotExist
                     request.user = custom_user
                     request.auth_user = custom_user
                     request.auth_token = token
@@ -1,10 +1,13 @@
 """
 Signal handlers for authentication app.
-Automatically creates UserSettings when a User is created.
+Automatically creates UserSettings when a User is created and keeps the
+cached user rows in sync.
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.contrib.auth.models import User as DjangoUser
 from apps.authentication.models import User, UserSettings
+from core.cache import invalidate_user_cache, invalidate_auth_user_cache
 
 
 @receiver(post_save, sender=User)
@@ -22,3 +25,21 @@ def create_user_settings(sender, instance, created, **kwargs):
             compact_mode=False,
             primary_color='blue',
         )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Invalidate the cached row of a user whenever it is saved or deleted.
+    """
+    invalidate_user_cache(instance.username)
+
+
+@receiver(post_save, sender=DjangoUser)
+@receiver(post_delete, sender=DjangoUser)
+def invalidate_cached_auth_user(sender, instance, **kwargs):
+    """
+    Invalidate cached JWT user resolutions when the Django auth user changes.
+    """
+    invalidate_auth_user_cache(instance.pk)
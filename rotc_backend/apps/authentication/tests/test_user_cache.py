@@ -0,0 +1,103 @@
+"""
+Unit tests for cached JWT user resolution.
+"""
+from unittest.mock import patch
+from django.http import HttpResponse
+from django.test import TestCase, RequestFactory
+from django.contrib.auth.models import User as DjangoUser
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from apps.authentication.models import User
+from apps.authentication.authentication import CachedJWTAuthentication
+from apps.authentication.jwt_middleware import EnhancedJWTAuthenticationMiddleware
+from apps.authentication.user_cache import get_cached_user
+from core import cache as core_cache
+from core.cache import clear_all_cache
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    """Test cases for the user/claims cache used by JWT authentication."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        clear_all_cache()
+        self.factory = RequestFactory()
+        self.custom_user = User.objects.create(
+            username='cacheuser',
+            email='cache@example.com',
+            password='$2b$10$test',
+            role='admin',
+            is_approved=True
+        )
+        self.django_user = DjangoUser.objects.create_user(
+            username='cacheuser',
+            email='cache@example.com'
+        )
+        self.token = RefreshToken.for_user(self.django_user).access_token
+        self.auth = CachedJWTAuthentication()
+
+    def _request(self):
+        return self.factory.get('/api/auth/profile', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    def test_steady_state_needs_no_user_queries(self):
+        """Once warm, resolving a token's users does not hit the database."""
+        self.auth.authenticate(self._request())
+        get_cached_user('cacheuser')
+
+        with self.assertNumQueries(0):
+            django_user, _ = self.auth.authenticate(self._request())
+            custom_user = get_cached_user('cacheuser')
+
+        self.assertEqual(django_user.pk, self.django_user.pk)
+        self.assertEqual(custom_user.pk, self.custom_user.pk)
+
+    def test_middleware_result_is_reused(self):
+        """DRF authentication returns the middleware's result without re-validating."""
+        request = self._request()
+        captured = {}
+
+        def get_response(req):
+            captured['auth_result'] = req.jwt_auth_result
+            return HttpResponse()
+
+        EnhancedJWTAuthenticationMiddleware(get_response)(request)
+
+        with self.assertNumQueries(0):
+            result = self.auth.authenticate(request)
+        self.assertIs(result, captured['auth_result'])
+        self.assertEqual(request.auth_user.pk, self.custom_user.pk)
+
+    def test_user_changes_invalidate_cache(self):
+        """Saving the custom user is visible on the next lookup."""
+        get_cached_user('cacheuser')
+        self.custom_user.is_approved = False
+        self.custom_user.save()
+        self.assertFalse(get_cached_user('cacheuser').is_approved)
+
+    def test_inactive_auth_user_rejected(self):
+        """Deactivating the Django user invalidates the cached resolution."""
+        self.auth.authenticate(self._request())
+        self.django_user.is_active = False
+        self.django_user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate(self._request())
+
+    def test_password_hashes_are_not_cached(self):
+        """Cached snapshots leave out password hashes, which stay deferred."""
+        self.django_user.set_password('secret-pass')
+        self.django_user.save()
+        
+        with patch.object(core_cache, 'set_cached_data', wraps=core_cache.set_cached_data) as set_cached:
+            django_user, _ = self.auth.authenticate(self._request())
+            custom_user = get_cached_user('cacheuser')
+        
+        stored = [repr(call.args[1]) for call in set_cached.call_args_list]
+        self.assertEqual(len(stored), 2)
+        for value in stored:
+            self.assertNotIn(self.django_user.password, value)
+            self.assertNotIn(self.custom_user.password, value)
+        
+        self.assertIn('password', django_user.get_deferred_fields())
+        self.assertIn('password', custom_user.get_deferred_fields())
+        self.assertTrue(django_user.is_active)
+        self.assertEqual(custom_user.role, 'admin')
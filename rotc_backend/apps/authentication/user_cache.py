@@ -0,0 +1,92 @@
+"""
+Two-tier cache for authenticated user rows.
+
+The custom User row and the Django auth user behind each JWT are needed on
+nearly every request, so they are kept in the per-worker local cache (backed
+by the shared cache) as plain tuples of field values and rebuilt into fresh
+instances per request. Signal handlers invalidate the entries whenever the
+underlying rows change.
+
+Password hashes are never cached: they are left out of the snapshots and
+the rebuilt instances load them from the database only if accessed.
+"""
+from django.contrib.auth.models import User as DjangoUser
+from core.cache import generate_cache_key, get_hot_cached_data
+from apps.authentication.models import User
+
+# Fields of the custom User kept in the shared cache
+USER_CACHED_FIELDS = [
+    field.attname for field in User._meta.concrete_fields if field.attname != 'password'
+]
+
+# Fields of the Django auth user needed by authentication and permission checks
+AUTH_USER_CACHED_FIELDS = ['id', 'username', 'is_active', 'is_staff', 'is_superuser']
+
+
+def _get_cached_row(model, field_names, cache_key, tag, **lookup):
+    """
+    Look up a single row through the two-tier cache.
+    
+    Fields not in field_names are deferred on the returned instance.
+    
+    Returns:
+        A new model instance per call (safe to modify and save), or None
+    """
+    # from_db() expects the loaded values in model field order
+    field_names = [
+        field.attname for field in model._meta.concrete_fields if field.attname in field_names
+    ]
+    
+    def build_snapshot():
+        row = model.objects.filter(**lookup).values_list(*field_names).first()
+        return tuple(row) if row is not None else None
+    
+    snapshot = get_hot_cached_data(cache_key, build_snapshot, tag)
+    if snapshot is None:
+        return None
+    
+    return model.from_db('default', field_names, snapshot)
+
+
+def get_cached_user(username):
+    """
+    Get a User by username using the two-tier cache.
+    
+    Args:
+        username: Username to look up
+    
+    Returns:
+        User instance, or None if no such user exists
+    """
+    return _get_cached_row(
+        User,
+        USER_CACHED_FIELDS,
+        generate_cache_key('user:row', tags=(), username=username, fields=USER_CACHED_FIELDS),
+        f'users:{username}',
+        username=username,
+    )
+
+
+def get_cached_auth_user(user_id, jti=None):
+    """
+    Get the Django auth user a JWT refers to using the two-tier cache.
+    
+    Entries are keyed by user id and token jti so each issued token resolves
+    independently, and invalidated per user id.
+    
+    Args:
+        user_id: Value of the token's user id claim
+        jti: Token jti claim (optional)
+    
+    Returns:
+        Django User instance, or None if no such user exists
+    """
+    return _get_cached_row(
+        DjangoUser,
+        AUTH_USER_CACHED_FIELDS,
+        generate_cache_key(
+            'auth:user', tags=(), user_id=user_id, jti=jti, fields=AUTH_USER_CACHED_FIELDS
+        ),
+        f'auth_users:{user_id}',
+        id=user_id,
+    )
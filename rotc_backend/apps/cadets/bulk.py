@@ -0,0 +1,91 @@
+"""
+Bulk cadet update engine.
+
+Applies many field updates to cadets without per-row saves: the cadets
+are loaded with one query, validated in memory, and written with a
+single bulk_update over the union of the fields that actually changed.
+Bulk writes skip model signals, so audit entries are recorded here;
+cache invalidation is left to the caller so a multi-chunk job can do it
+once.
+"""
+import logging
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from apps.cadets.models import Cadet
+from apps.system.audit import record_audit, serialize_changes
+from apps.system.signals import sanitize_payload
+
+logger = logging.getLogger(__name__)
+
+# Fields that cannot be changed through a bulk update
+PROTECTED_FIELDS = {'id', 'created_at'}
+UPDATABLE_FIELDS = {
+    field.attname for field in Cadet._meta.concrete_fields
+    if field.attname not in PROTECTED_FIELDS
+}
+
+
+def apply_cadet_updates(updates, user_id=None):
+    """
+    Apply a list of cadet updates with one bulk_update.
+    
+    Args:
+        updates: List of dicts with cadet_id and fields to update
+        user_id: ID of the user performing the update (for audit logs)
+    
+    Returns:
+        dict: updated_ids, errors (list of messages) and the fields written
+    """
+    errors = []
+    cadet_ids = set()
+    for update in updates:
+        if update.get('cadet_id'):
+            cadet_ids.add(update['cadet_id'])
+    
+    cadets = Cadet.objects.in_bulk(cadet_ids)
+    changed = {}
+    
+    for update in updates:
+        cadet_id = update.get('cadet_id')
+        if not cadet_id:
+            errors.append("Error updating cadet unknown: Missing cadet_id")
+            continue
+        
+        cadet = cadets.get(cadet_id)
+        if cadet is None:
+            errors.append(f"Error updating cadet {cadet_id}: Cadet matching query does not exist.")
+            continue
+        
+        fields = [field for field in update if field != 'cadet_id' and field in UPDATABLE_FIELDS]
+        previous = {field: getattr(cadet, field) for field in fields}
+        try:
+            for field in fields:
+                setattr(cadet, field, update[field])
+            cadet.clean_fields(exclude=['id'])
+        except ValidationError as e:
+            for field, value in previous.items():
+                setattr(cadet, field, value)
+            errors.append(f"Error updating cadet {cadet_id}: {'; '.join(e.messages)}")
+            continue
+        
+        changed[cadet_id] = cadet
+    
+    # Only columns that differ from the loaded values are written
+    diffs = {cadet_id: cadet.changed_fields for cadet_id, cadet in changed.items()}
+    fields = sorted({field for diff in diffs.values() for field in diff})
+    dirty = [changed[cadet_id] for cadet_id, diff in diffs.items() if diff]
+    
+    if dirty:
+        with transaction.atomic():
+            Cadet.objects.bulk_update(dirty, fields, batch_size=500)
+            for cadet in dirty:
+                payload = sanitize_payload(cadet)
+                payload['changed_fields'] = serialize_changes(cadet)
+                record_audit('cadets', 'UPDATE', cadet.pk, user_id=user_id, payload=payload)
+    
+    logger.info(f"Bulk updated {len(dirty)} cadets ({', '.join(fields) or 'no fields'})")
+    return {
+        'updated_ids': list(changed),
+        'errors': errors,
+        'fields': fields,
+    }
@@ -3,9 +3,10 @@ Cadet and Grades models for ROTC Backend.
 Matches the 'cadets' and 'grades' tables from Node.js backend.
 """
 from django.db import models
+from core.field_tracking import FieldTrackingMixin
 
 
-class Cadet(models.Model):
+class Cadet(FieldTrackingMixin, models.Model):
     """
     Cadet model with comprehensive profile information.
     Matches the 'cadets' table from Node.js backend.
@@ -57,7 +58,7 @@ class Cadet(models.Model):
         return f"{self.first_name} {self.last_name} ({self.student_id})"
 
 
-class Grades(models.Model):
+class Grades(FieldTrackingMixin, models.Model):
     """
     Grades model for tracking cadet academic and performance scores.
     Matches the 'grades' table from Node.js backend.
@@ -5,7 +5,6 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django.db.models import Q
 from apps.cadets.models import Cadet, Grades
 from apps.cadets.serializers import (
@@ -14,23 +13,24 @@ from apps.cadets.serializers import (
     CadetCreateSerializer,
 )
 from apps.authentication.permissions import IsAdmin, IsApproved
+from core.pagination import KeysetPagination
 from core.cache import (
     generate_cache_key,
-    get_cached_data,
-    set_cached_data,
-    get_cache_ttl,
+    get_or_set_cached_data,
     invalidate_cadet_cache,
 )
 
 
-class CadetPagination(PageNumberPagination):
-    """Custom pagination for cadet list."""
+class CadetPagination(KeysetPagination):
+    """Custom pagination for cadet list; keyset pagination when ?cursor= is given."""
     page_size = 50
     page_size_query_param = 'limit'
     max_page_size = 100
     
     def get_paginated_response(self, data):
         """Return paginated response with total count."""
+        if self.cursor_mode:
+            return Response({'results': data, 'page': None, **self.get_cursor_metadata()})
         return Response({
             'results': data,
             'page': self.page.number,
@@ -59,70 +59,70 @@ def cadet_list_create(request):
             'search': request.query_params.get('search', ''),
             'page': request.query_params.get('page', '1'),
             'limit': request.query_params.get('limit', '50'),
+            'cursor': request.query_params.get('cursor'),
+            'include_total': request.query_params.get('include_total', ''),
         }
         
         cache_key = generate_cache_key('cadets:list', **cache_params)
         
-        # Try to get from cache
-        cached_response = get_cached_data(cache_key)
-        if cached_response is not None:
-            return Response(cached_response, status=status.HTTP_200_OK)
-        
-        # Cache miss - fetch from database
-        queryset = Cadet.objects.filter(is_archived=False).select_related('grades')
-        
-        # Filtering
-        company = request.query_params.get('company')
-        if company:
-            queryset = queryset.filter(company=company)
-        
-        platoon = request.query_params.get('platoon')
-        if platoon:
-            queryset = queryset.filter(platoon=platoon)
-        
-        course = request.query_params.get('course')
-        if course:
-            queryset = queryset.filter(course=course)
-        
-        year_level = request.query_params.get('year_level')
-        if year_level:
-            queryset = queryset.filter(year_level=year_level)
-        
-        status_filter = request.query_params.get('status')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        # Search by name or student_id
-        search = request.query_params.get('search')
-        if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(student_id__icontains=search)
-            )
-        
-        # Order by created_at descending
-        queryset = queryset.order_by('-created_at')
-        
-        # Pagination
-        paginator = CadetPagination()
-        page = paginator.paginate_queryset(queryset, request)
-        
-        if page is not None:
-            serializer = CadetWithGradesSerializer(page, many=True)
-            response_data = {
-                'results': serializer.data,
-                'page': paginator.page.number,
-                'limit': paginator.page_size,
-                'total': paginator.page.paginator.count,
-            }
-        else:
+        def build_cadet_list():
+            queryset = Cadet.objects.filter(is_archived=False).select_related('grades')
+            
+            # Filtering
+            company = request.query_params.get('company')
+            if company:
+                queryset = queryset.filter(company=company)
+            
+            platoon = request.query_params.get('platoon')
+            if platoon:
+                queryset = queryset.filter(platoon=platoon)
+            
+            course = request.query_params.get('course')
+            if course:
+                queryset = queryset.filter(course=course)
+            
+            year_level = request.query_params.get('year_level')
+            if year_level:
+                queryset = queryset.filter(year_level=year_level)
+            
+            status_filter = request.query_params.get('status')
+            if status_filter:
+                queryset = queryset.filter(status=status_filter)
+            
+            # Search by name or student_id
+            search = request.query_params.get('search')
+            if search:
+                queryset = queryset.filter(
+                    Q(first_name__icontains=search) |
+                    Q(last_name__icontains=search) |
+                    Q(student_id__icontains=search)
+                )
+            
+            # Order by created_at descending
+            queryset = queryset.order_by('-created_at')
+            
+            # Pagination
+            paginator = CadetPagination()
+            page = paginator.paginate_queryset(queryset, request)
+            
+            if paginator.cursor_mode:
+                serializer = CadetWithGradesSerializer(page, many=True)
+                return {'results': serializer.data, 'page': None, **paginator.get_cursor_metadata()}
+            
+            if page is not None:
+                serializer = CadetWithGradesSerializer(page, many=True)
+                return {
+                    'results': serializer.data,
+                    'page': paginator.page.number,
+                    'limit': paginator.page_size,
+                    'total': paginator.page.paginator.count,
+                }
+            
             serializer = CadetWithGradesSerializer(queryset, many=True)
-            response_data = serializer.data
+            return serializer.data
         
-        # Cache the response
-        ttl = get_cache_ttl('cadet_list')
-        set_cached_data(cache_key, response_data, ttl)
+        # Read-through cache: only one worker rebuilds an expired list
+        response_data = get_or_set_cached_data(cache_key, build_cadet_list, 'cadet_list')
         
         return Response(response_data, status=status.HTTP_200_OK)
     
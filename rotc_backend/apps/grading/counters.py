@@ -0,0 +1,89 @@
+"""
+Atomic maintenance of Grades counters.
+
+Counters (merit/demerit points, attendance_present) are changed with a
+single UPDATE using F() expressions, so concurrent check-ins and
+merit/demerit entries never overwrite each other. On PostgreSQL and
+SQLite the new row comes back from the same statement with RETURNING;
+elsewhere it is read back in the same transaction, while the UPDATE still
+holds its row lock.
+"""
+import logging
+from django.db import connections, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.sql import UpdateQuery
+from apps.cadets.models import Grades
+from apps.system.audit import record_audit
+
+logger = logging.getLogger(__name__)
+
+
+def increment(field, amount):
+    """Expression adding amount to a counter field."""
+    return F(field) + amount
+
+
+def decrement(field, amount):
+    """Expression subtracting amount from a counter field, never below zero."""
+    return Greatest(F(field) - amount, Value(0))
+
+
+def supports_update_returning(connection):
+    """Whether UPDATE ... RETURNING is available (PostgreSQL, SQLite 3.35+)."""
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35, 0)
+    return False
+
+
+def _update_returning(queryset, values, fields):
+    """Run the UPDATE with a RETURNING clause; return the row or None."""
+    connection = connections[queryset.db]
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    update_sql, params = query.get_compiler(queryset.db).as_sql()
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    
+    with connection.cursor() as cursor:
+        cursor.execute(f'{update_sql} RETURNING {columns}', params)
+        return cursor.fetchone()
+
+
+def update_grade_counters(cadet_id, **values):
+    """
+    Atomically update a cadet's Grades row and return the new values.
+    
+    Args:
+        cadet_id: ID of the cadet whose grades change
+        **values: Field name to value or expression (see increment/decrement)
+    
+    Returns:
+        Dict of the updated Grades fields (by attname), or None if the cadet
+        has no Grades row
+    """
+    queryset = Grades.objects.filter(cadet_id=cadet_id)
+    fields = Grades._meta.concrete_fields
+    attnames = [field.attname for field in fields]
+    
+    if supports_update_returning(connections[queryset.db]):
+        row = _update_returning(queryset, values, fields)
+        if row is None:
+            return None
+        grades = dict(zip(attnames, row))
+    else:
+        with transaction.atomic(using=queryset.db):
+            if not queryset.update(**values):
+                return None
+            # Nobody else can change the row until this transaction commits
+            grades = queryset.values(*attnames).first()
+    
+    # The row is updated without save(), so record the grades audit entry here
+    record_audit(
+        table_name='grades',
+        operation='UPDATE',
+        record_id=grades['id'],
+        payload={key: value for key, value in grades.items() if key != 'id'}
+    )
+    return grades
@@ -6,7 +6,9 @@ from django.dispatch import receiver
 from django.db import transaction
 from apps.grading.models import MeritDemeritLog
 from apps.cadets.models import Grades
-from apps.system.models import AuditLog, SyncEvent
+from apps.system.models import SyncEvent
+from apps.system.audit import record_audit, serialize_changes
+from apps.grading.counters import update_grade_counters, increment, decrement
 from core.cache import invalidate_grades_cache
 from apps.messaging.websocket_utils import broadcast_grade_update, broadcast_exam_score_update
 import json
@@ -15,7 +17,8 @@ import json
 @receiver(pre_save, sender=Grades)
 def track_exam_score_changes(sender, instance, **kwargs):
     """Track previous exam scores before update to detect changes."""
-    if instance.pk:
+    if instance.pk and not instance.is_tracked:
+        # Instance built by hand with a pk: no snapshot to diff against
         try:
             previous = Grades.objects.get(pk=instance.pk)
             instance._previous_prelim = previous.prelim_score
@@ -26,9 +29,9 @@ def track_exam_score_changes(sender, instance, **kwargs):
             instance._previous_midterm = None
             instance._previous_final = None
     else:
-        instance._previous_prelim = None
-        instance._previous_midterm = None
-        instance._previous_final = None
+        instance._previous_prelim = instance.get_previous_value('prelim_score')
+        instance._previous_midterm = instance.get_previous_value('midterm_score')
+        instance._previous_final = instance.get_previous_value('final_score')
 
 
 @receiver(post_save, sender=Grades)
@@ -65,12 +68,12 @@ def broadcast_exam_score_changes(sender, instance, created, **kwargs):
                 'final_score': instance.final_score,
                 'changed_scores': changed_scores,
             }
-            broadcast_exam_score_update(instance.cadet.id, exam_data)
+            broadcast_exam_score_update(instance.cadet_id, exam_data)
             
             # Create sync event for real-time updates
             SyncEvent.objects.create(
                 event_type='exam_score_update',
-                cadet_id=instance.cadet.id,
+                cadet_id=instance.cadet_id,
                 payload=exam_data
             )
 
@@ -81,91 +84,84 @@ def update_grades_on_merit_demerit_save(sender, instance, created, **kwargs):
     Automatically update Grades when a MeritDemeritLog is created or updated.
     """
     if created:
-        # Get the cadet's grades
-        try:
-            grades = Grades.objects.get(cadet=instance.cadet)
-            
-            # Update merit or demerit points
-            if instance.type == 'merit':
-                grades.merit_points += instance.points
-            elif instance.type == 'demerit':
-                grades.demerit_points += instance.points
-            
-            grades.save()
-            
-            # Invalidate grades cache
-            invalidate_grades_cache(instance.cadet.id)
-            
-            # Prepare grade data for broadcasting
-            grade_data = {
-                'type': instance.type,
-                'points': instance.points,
-                'merit_points': grades.merit_points,
-                'demerit_points': grades.demerit_points,
-                'reason': instance.reason,
-                'attendance_present': grades.attendance_present,
-                'prelim_score': grades.prelim_score,
-                'midterm_score': grades.midterm_score,
-                'final_score': grades.final_score,
-            }
-            
-            # Broadcast grade update via WebSocket
-            broadcast_grade_update(instance.cadet.id, grade_data)
-            
-            # Create sync event for real-time updates
-            SyncEvent.objects.create(
-                event_type='grade_update',
-                cadet_id=instance.cadet.id,
-                payload=grade_data
-            )
-            
-        except Grades.DoesNotExist:
-            pass
-
-
-@receiver(post_delete, sender=MeritDemeritLog)
-def update_grades_on_merit_demerit_delete(sender, instance, **kwargs):
-    """
-    Automatically update Grades when a MeritDemeritLog is deleted.
-    """
-    try:
-        grades = Grades.objects.get(cadet=instance.cadet)
-        
-        # Reverse the merit or demerit points
+        # Atomically add the merit or demerit points
         if instance.type == 'merit':
-            grades.merit_points = max(0, grades.merit_points - instance.points)
+            grades = update_grade_counters(instance.cadet_id, merit_points=increment('merit_points', instance.points))
         elif instance.type == 'demerit':
-            grades.demerit_points = max(0, grades.demerit_points - instance.points)
+            grades = update_grade_counters(instance.cadet_id, demerit_points=increment('demerit_points', instance.points))
+        else:
+            return
         
-        grades.save()
+        if grades is None:
+            return
         
         # Invalidate grades cache
-        invalidate_grades_cache(instance.cadet.id)
+        invalidate_grades_cache(instance.cadet_id)
         
         # Prepare grade data for broadcasting
         grade_data = {
-            'type': f'{instance.type}_deleted',
+            'type': instance.type,
             'points': instance.points,
-            'merit_points': grades.merit_points,
-            'demerit_points': grades.demerit_points,
-            'attendance_present': grades.attendance_present,
-            'prelim_score': grades.prelim_score,
-            'midterm_score': grades.midterm_score,
-            'final_score': grades.final_score,
+            'merit_points': grades['merit_points'],
+            'demerit_points': grades['demerit_points'],
+            'reason': instance.reason,
+            'attendance_present': grades['attendance_present'],
+            'prelim_score': grades['prelim_score'],
+            'midterm_score': grades['midterm_score'],
+            'final_score': grades['final_score'],
         }
         
         # Broadcast grade update via WebSocket
-        broadcast_grade_update(instance.cadet.id, grade_data)
+        broadcast_grade_update(instance.cadet_id, grade_data)
         
         # Create sync event for real-time updates
         SyncEvent.objects.create(
             event_type='grade_update',
-            cadet_id=instance.cadet.id,
+            cadet_id=instance.cadet_id,
             payload=grade_data
         )
-        
-    except Grades.DoesNotExist:
-        pass
+
+
+@receiver(post_delete, sender=MeritDemeritLog)
+def update_grades_on_merit_demerit_delete(sender, instance, **kwargs):
+    """
+    Automatically update Grades when a MeritDemeritLog is deleted.
+    """
+    # Atomically reverse the merit or demerit points
+    if instance.type == 'merit':
+        grades = update_grade_counters(instance.cadet_id, merit_points=decrement('merit_points', instance.points))
+    elif instance.type == 'demerit':
+        grades = update_grade_counters(instance.cadet_id, demerit_points=decrement('demerit_points', instance.points))
+    else:
+        return
+    
+    if grades is None:
+        return
+    
+    # Invalidate grades cache
+    invalidate_grades_cache(instance.cadet_id)
+    
+    # Prepare grade data for broadcasting
+    grade_data = {
+        'type': f'{instance.type}_deleted',
+        'points': instance.points,
+        'merit_points': grades['merit_points'],
+        'demerit_points': grades['demerit_points'],
+        'attendance_present': grades['attendance_present'],
+        'prelim_score': grades['prelim_score'],
+        'midterm_score': grades['midterm_score'],
+        'final_score': grades['final_score'],
+    }
+    
+    # Broadcast grade update via WebSocket
+    broadcast_grade_update(instance.cadet_id, grade_data)
+    
+    # Create sync event for real-time updates
+    SyncEvent.objects.create(
+        event_type='grade_update',
+        cadet_id=instance.cadet_id,
+        payload=grade_data
+    )
 
 
 @receiver(post_save, sender=Grades)
@@ -179,20 +175,24 @@ def create_audit_log_on_grades_save(sender, instance, created, **kwargs):
     # For now, we'll use a placeholder
     user_id = None
     
-    AuditLog.objects.create(
+    payload = {
+        'cadet_id': instance.cadet_id,
+        'attendance_present': instance.attendance_present,
+        'merit_points': instance.merit_points,
+        'demerit_points': instance.demerit_points,
+        'prelim_score': instance.prelim_score,
+        'midterm_score': instance.midterm_score,
+        'final_score': instance.final_score,
+    }
+    if not created:
+        payload['changed_fields'] = serialize_changes(instance)
+    
+    record_audit(
         table_name='grades',
         operation=operation,
         record_id=instance.id,
         user_id=user_id,
-        payload={
-            'cadet_id': instance.cadet.id,
-            'attendance_present': instance.attendance_present,
-            'merit_points': instance.merit_points,
-            'demerit_points': instance.demerit_points,
-            'prelim_score': instance.prelim_score,
-            'midterm_score': instance.midterm_score,
-            'final_score': instance.final_score,
-        }
+        payload=payload
     )
 
 
@@ -202,13 +202,13 @@ def create_audit_log_on_merit_demerit_save(sender, instance, created, **kwargs):
     Create audit log entry when MeritDemeritLog is created.
     """
     if created:
-        AuditLog.objects.create(
+        record_audit(
             table_name='merit_demerit_logs',
             operation='CREATE',
             record_id=instance.id,
             user_id=instance.issued_by_user_id,
             payload={
-                'cadet_id': instance.cadet.id,
+                'cadet_id': instance.cadet_id,
                 'type': instance.type,
                 'points': instance.points,
                 'reason': instance.reason,
@@ -18,6 +18,7 @@ from core.cache import (
     get_cached_data,
     set_cached_data,
     get_cache_ttl,
+    get_or_set_cached_data,
     invalidate_grades_cache,
 )
 
@@ -31,20 +32,14 @@ def grades_list(request):
     """
     cache_key = generate_cache_key('grades:list')
     
-    # Try to get from cache
-    cached_response = get_cached_data(cache_key)
-    if cached_response is not None:
-        return Response(cached_response, status=status.HTTP_200_OK)
+    def build_grades_list():
+        grades = Grades.objects.select_related('cadet').all()
+        return GradesDetailSerializer(grades, many=True).data
     
-    # Cache miss - fetch from database
-    grades = Grades.objects.select_related('cadet').all()
-    serializer = GradesDetailSerializer(grades, many=True)
+    # Read-through cache: only one worker rebuilds an expired list
+    data = get_or_set_cached_data(cache_key, build_grades_list, 'grades')
     
-    # Cache the response
-    ttl = get_cache_ttl('grades')
-    set_cached_data(cache_key, serializer.data, ttl)
-    
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @api_view(['GET', 'PUT'])
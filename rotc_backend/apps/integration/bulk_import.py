@@ -0,0 +1,561 @@
+"""
+Set-based import engine for CSV cadet, grades and attendance data
+
+Rows are processed in chunks. For each chunk every referenced cadet,
+grades row and training day is loaded with one query, rows are validated
+in memory (per-row errors go to ImportResult as before), and the changes
+are written with bulk_create/bulk_update. Bulk writes skip model signals,
+so audit entries, grade sync events and cache invalidation are issued
+here once per chunk.
+"""
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from apps.cadets.models import Cadet, Grades
+from apps.attendance.models import AttendanceRecord, TrainingDay
+from apps.attendance.bulk import bulk_upsert_attendance
+from apps.system.audit import record_audit, serialize_changes
+from apps.system.models import SyncEvent
+from apps.system.signals import sanitize_payload
+from apps.messaging.websocket_utils import broadcast_exam_score_update, publish_sync_event
+from core.cache import invalidate_cadet_cache, invalidate_grades_cache
+from .importers import CSVImporter, DataMergeStrategy, ImportResult, ROTCMISImporter
+
+logger = logging.getLogger(__name__)
+
+# Rows validated and written per transaction
+IMPORT_CHUNK_SIZE = 500
+
+REQUIRED_HEADERS = {
+    'cadets': ['student_id', 'first_name', 'last_name'],
+    'grades': ['student_id'],
+    'attendance': ['student_id', 'training_day_id', 'status'],
+}
+
+# Fields that cannot be set from an import row
+CADET_PROTECTED_FIELDS = {'id', 'student_id', 'created_at'}
+CADET_UPDATABLE_FIELDS = [
+    field.attname for field in Cadet._meta.concrete_fields
+    if field.attname not in CADET_PROTECTED_FIELDS
+]
+
+GRADE_FIELDS = {
+    'attendance_present': int,
+    'merit_points': int,
+    'demerit_points': int,
+    'prelim_score': float,
+    'midterm_score': float,
+    'final_score': float,
+}
+EXAM_SCORE_FIELDS = ['prelim_score', 'midterm_score', 'final_score']
+
+# Cadet columns written by a ROTCMIS sync (missing values are cleared,
+# matching the per-record update_or_create it replaces)
+ROTCMIS_UPSERT_FIELDS = [
+    'first_name', 'last_name', 'middle_name', 'suffix_name', 'company', 'platoon',
+    'course', 'year_level', 'status', 'email', 'contact_number', 'birthdate',
+    'birthplace', 'age', 'height', 'weight', 'blood_type', 'address',
+    'civil_status', 'nationality', 'gender', 'rotc_unit', 'mobilization_center',
+]
+
+
+def _validation_message(error: ValidationError) -> str:
+    """Flatten a ValidationError into one message"""
+    if hasattr(error, 'message_dict'):
+        return '; '.join(
+            f"{field}: {' '.join(messages)}" for field, messages in error.message_dict.items()
+        )
+    return ' '.join(error.messages)
+
+
+def _validation_field(error: ValidationError, default: str) -> str:
+    """Field name to report for a ValidationError"""
+    if hasattr(error, 'message_dict') and len(error.message_dict) == 1:
+        return next(iter(error.message_dict))
+    return default
+
+
+def _new_cadet(student_id: str, row: Dict[str, Any]) -> Cadet:
+    """Build an unsaved Cadet from an import row"""
+    return Cadet(
+        student_id=student_id,
+        first_name=row.get('first_name', ''),
+        last_name=row.get('last_name', ''),
+        middle_name=row.get('middle_name', ''),
+        company=row.get('company', ''),
+        platoon=row.get('platoon', ''),
+        course=row.get('course', ''),
+        year_level=int(row['year_level']) if row.get('year_level') else None,
+        status=row.get('status') or 'Ongoing',
+        email=row.get('email', ''),
+        contact_number=row.get('contact_number', '')
+    )
+
+
+def _insert_new_cadets(cadets: List[Cadet]) -> List[Cadet]:
+    """
+    Insert new cadets, falling back to one savepoint per row on a conflict
+    
+    A cadet created concurrently since the lookup makes the batch INSERT
+    fail on the unique student_id; the rows are then inserted one by one
+    so only the conflicting ones are left out.
+    
+    Returns:
+        The cadets that were not inserted
+    """
+    try:
+        with transaction.atomic():
+            Cadet.objects.bulk_create(cadets, batch_size=IMPORT_CHUNK_SIZE)
+        return []
+    except IntegrityError:
+        pass
+    
+    conflicts = []
+    for cadet in cadets:
+        try:
+            with transaction.atomic():
+                Cadet.objects.bulk_create([cadet])
+        except IntegrityError:
+            conflicts.append(cadet)
+    return conflicts
+
+
+def import_cadet_rows(rows: List[Dict[str, Any]], merge_strategy: str, result: ImportResult,
+                      start_row: int = 1) -> None:
+    """
+    Import one chunk of cadet rows
+    
+    Args:
+        rows: Parsed CSV rows
+        merge_strategy: skip, update or error for existing cadets
+        result: ImportResult to record successes, errors and warnings in
+        start_row: Row number of the first row (for error reporting)
+    """
+    parsed = []
+    for offset, row in enumerate(rows):
+        student_id = (row.get('student_id') or '').strip()
+        if not student_id:
+            result.add_error(start_row + offset, 'student_id', 'student_id is required')
+            continue
+        parsed.append((start_row + offset, row, student_id))
+    
+    cadets = {
+        cadet.student_id: cadet
+        for cadet in Cadet.objects.filter(student_id__in={item[2] for item in parsed})
+    }
+    to_create = {}
+    new_rows = {}
+    to_update = {}
+    update_fields = set()
+    outcomes = []
+    
+    for row_num, row, student_id in parsed:
+        cadet = cadets.get(student_id)
+        
+        if cadet is None:
+            try:
+                cadet = _new_cadet(student_id, row)
+                cadet.clean_fields(exclude=['id'])
+            except ValidationError as e:
+                result.add_error(row_num, _validation_field(e, 'exception'), _validation_message(e), row)
+                continue
+            except Exception as e:
+                result.add_error(row_num, 'exception', str(e), row)
+                continue
+            
+            # Later rows for the same student_id see this cadet as existing
+            cadets[student_id] = to_create[student_id] = cadet
+            new_rows[student_id] = (row_num, row)
+            outcomes.append((row_num, cadet, True))
+            continue
+        
+        try:
+            if not DataMergeStrategy.should_update(merge_strategy, cadet, row):
+                result.add_warning(f"Skipped existing cadet: {student_id}")
+                continue
+        except ValidationError as e:
+            result.add_error(row_num, 'exception', str(e), row)
+            continue
+        
+        previous = {attname: getattr(cadet, attname) for attname in CADET_UPDATABLE_FIELDS}
+        changed = [key for key, value in row.items() if key in CADET_UPDATABLE_FIELDS and value]
+        try:
+            for key in changed:
+                setattr(cadet, key, row[key])
+            cadet.clean_fields(exclude=['id'])
+        except ValidationError as e:
+            for attname, value in previous.items():
+                setattr(cadet, attname, value)
+            result.add_error(row_num, _validation_field(e, 'exception'), _validation_message(e), row)
+            continue
+        
+        if cadet.pk:
+            to_update[student_id] = cadet
+            update_fields.update(changed)
+        outcomes.append((row_num, cadet, False))
+    
+    with transaction.atomic():
+        if to_create:
+            created = list(to_create.values())
+            if merge_strategy == DataMergeStrategy.UPDATE:
+                # A cadet created concurrently since the lookup is updated instead
+                Cadet.objects.bulk_create(
+                    created,
+                    batch_size=IMPORT_CHUNK_SIZE,
+                    update_conflicts=True,
+                    unique_fields=['student_id'],
+                    update_fields=CADET_UPDATABLE_FIELDS
+                )
+            else:
+                conflicts = _insert_new_cadets(created)
+                if conflicts:
+                    # Created concurrently since the lookup: handled like
+                    # any existing cadet under this merge strategy
+                    existing = Cadet.objects.in_bulk(
+                        [cadet.student_id for cadet in conflicts], field_name='student_id'
+                    )
+                    for cadet in conflicts:
+                        del to_create[cadet.student_id]
+                        row_num, row = new_rows[cadet.student_id]
+                        try:
+                            DataMergeStrategy.should_update(
+                                merge_strategy, existing.get(cadet.student_id, cadet), row
+                            )
+                            result.add_warning(f"Skipped existing cadet: {cadet.student_id}")
+                        except ValidationError as e:
+                            result.add_error(row_num, 'exception', str(e), row)
+                    outcomes = [outcome for outcome in outcomes if outcome[1].pk]
+                    created = list(to_create.values())
+            Grades.objects.bulk_create(
+                [Grades(cadet_id=cadet.pk) for cadet in created],
+                ignore_conflicts=True
+            )
+        
+        if to_update:
+            Cadet.objects.bulk_update(list(to_update.values()), sorted(update_fields), batch_size=IMPORT_CHUNK_SIZE)
+        
+        for cadet in to_create.values():
+            record_audit('cadets', 'CREATE', cadet.pk, payload=sanitize_payload(cadet))
+        for cadet in to_update.values():
+            payload = sanitize_payload(cadet)
+            payload['changed_fields'] = serialize_changes(cadet)
+            record_audit('cadets', 'UPDATE', cadet.pk, payload=payload)
+    
+    for row_num, cadet, created in outcomes:
+        result.add_success(cadet.pk, created=created)
+    
+    if to_create or to_update:
+        invalidate_cadet_cache()
+
+
+def import_grade_rows(rows: List[Dict[str, Any]], merge_strategy: str, result: ImportResult,
+                      start_row: int = 1) -> None:
+    """
+    Import one chunk of grades rows
+    
+    Grades are always updated (as before, merge_strategy does not apply);
+    cadets without a Grades row get one.
+    
+    Args:
+        rows: Parsed CSV rows
+        merge_strategy: Unused, accepted for a uniform importer signature
+        result: ImportResult to record successes and errors in
+        start_row: Row number of the first row (for error reporting)
+    """
+    parsed = []
+    for offset, row in enumerate(rows):
+        row_num = start_row + offset
+        student_id = (row.get('student_id') or '').strip()
+        if not student_id:
+            result.add_error(row_num, 'student_id', 'student_id is required')
+            continue
+        
+        try:
+            values = {
+                field: convert(row[field])
+                for field, convert in GRADE_FIELDS.items()
+                if row.get(field)
+            }
+        except (TypeError, ValueError) as e:
+            result.add_error(row_num, 'exception', str(e), row)
+            continue
+        parsed.append((row_num, row, student_id, values))
+    
+    cadet_ids = dict(
+        Cadet.objects.filter(student_id__in={item[2] for item in parsed}).values_list('student_id', 'id')
+    )
+    grades = {
+        grade.cadet_id: grade
+        for grade in Grades.objects.filter(cadet_id__in=cadet_ids.values())
+    }
+    to_create = {}
+    update_fields = set()
+    outcomes = []
+    
+    for row_num, row, student_id, values in parsed:
+        cadet_id = cadet_ids.get(student_id)
+        if cadet_id is None:
+            result.add_error(row_num, 'student_id', f'Cadet not found: {student_id}')
+            continue
+        
+        grade = grades.get(cadet_id)
+        created = grade is None
+        if grade is None:
+            grade = grades[cadet_id] = to_create[cadet_id] = Grades(cadet_id=cadet_id)
+        
+        for field, value in values.items():
+            setattr(grade, field, value)
+        if not created:
+            update_fields.update(values)
+        outcomes.append((row_num, grade, created))
+    
+    to_update = [grade for grade in grades.values() if grade.pk and grade.changed_fields]
+    
+    with transaction.atomic():
+        if to_create:
+            Grades.objects.bulk_create(list(to_create.values()), batch_size=IMPORT_CHUNK_SIZE)
+        if to_update:
+            Grades.objects.bulk_update(to_update, sorted(update_fields), batch_size=IMPORT_CHUNK_SIZE)
+        
+        events = []
+        for grade in list(to_create.values()) + to_update:
+            created = grade.cadet_id in to_create
+            changes = {} if created else serialize_changes(grade)
+            payload = {
+                'cadet_id': grade.cadet_id,
+                **{field: getattr(grade, field) for field in GRADE_FIELDS},
+            }
+            if not created:
+                payload['changed_fields'] = changes
+            record_audit('grades', 'CREATE' if created else 'UPDATE', grade.pk, payload=payload)
+            
+            changed_scores = {
+                field: getattr(grade, field) for field in EXAM_SCORE_FIELDS if field in changes
+            }
+            if changed_scores:
+                exam_data = {
+                    **{field: getattr(grade, field) for field in EXAM_SCORE_FIELDS},
+                    'changed_scores': changed_scores,
+                }
+                broadcast_exam_score_update(grade.cadet_id, exam_data)
+                events.append(SyncEvent(
+                    event_type='exam_score_update',
+                    cadet_id=grade.cadet_id,
+                    payload=exam_data
+                ))
+        
+        # bulk_create skips post_save, so publish to SSE subscribers explicitly
+        for event in SyncEvent.objects.bulk_create(events):
+            if event.pk:
+                publish_sync_event(event)
+    
+    for row_num, grade, created in outcomes:
+        result.add_success(grade.pk, created=created)
+    
+    if to_create or to_update:
+        invalidate_grades_cache()
+
+
+def import_attendance_rows(rows: List[Dict[str, Any]], merge_strategy: str, result: ImportResult,
+                           start_row: int = 1) -> None:
+    """
+    Import one chunk of attendance rows through the bulk attendance engine
+    
+    Args:
+        rows: Parsed CSV rows
+        merge_strategy: skip, update or error for existing records
+        result: ImportResult to record successes and errors in
+        start_row: Row number of the first row (for error reporting)
+    """
+    parsed = []
+    for offset, row in enumerate(rows):
+        row_num = start_row + offset
+        try:
+            student_id = row.get('student_id', '').strip()
+            training_day_id = row.get('training_day_id', '').strip()
+            status_value = row.get('status', '').strip()
+            
+            if not all([student_id, training_day_id, status_value]):
+                result.add_error(row_num, 'required_fields', 'Missing required fields')
+                continue
+            
+            parsed.append((row_num, row, student_id, int(training_day_id), status_value))
+        
+        except Exception as e:
+            result.add_error(row_num, 'exception', str(e), row)
+    
+    cadet_ids = dict(
+        Cadet.objects.filter(student_id__in={item[2] for item in parsed}).values_list('student_id', 'id')
+    )
+    training_day_ids = set(
+        TrainingDay.objects.filter(id__in={item[3] for item in parsed}).values_list('id', flat=True)
+    )
+    
+    attendance_rows = []
+    row_keys = []
+    for row_num, row, student_id, training_day_id, status_value in parsed:
+        if student_id not in cadet_ids:
+            result.add_error(row_num, 'student_id', f'Cadet not found: {student_id}')
+            continue
+        if training_day_id not in training_day_ids:
+            result.add_error(row_num, 'training_day_id', f'Training day not found: {training_day_id}')
+            continue
+        
+        key = (training_day_id, cadet_ids[student_id])
+        
+        # Validate (and convert) the row before the bulk write, so one bad
+        # value is reported for its row instead of failing the chunk
+        record = AttendanceRecord(
+            training_day_id=key[0],
+            cadet_id=key[1],
+            status=status_value,
+            time_in=row.get('time_in') or None,
+            time_out=row.get('time_out') or None
+        )
+        try:
+            record.clean_fields(exclude=['id', 'training_day', 'cadet', 'created_at'])
+        except ValidationError as e:
+            result.add_error(row_num, _validation_field(e, 'exception'), _validation_message(e), row)
+            continue
+        
+        attendance_rows.append({
+            'training_day_id': key[0],
+            'cadet_id': key[1],
+            'status': record.status,
+            'time_in': record.time_in,
+            'time_out': record.time_out,
+        })
+        row_keys.append((row_num, row, key))
+    
+    try:
+        outcome = bulk_upsert_attendance(
+            attendance_rows,
+            update_existing=(merge_strategy == DataMergeStrategy.UPDATE)
+        )
+    except Exception as e:
+        logger.error(f"Bulk attendance write failed for rows starting at {start_row}: {str(e)}")
+        for row_num, row, _ in row_keys:
+            result.add_error(row_num, 'exception', str(e), row)
+        return
+    
+    records = {}
+    for created, group in ((True, 'created'), (False, 'updated'), (False, 'skipped')):
+        for record in outcome[group]:
+            records[(record.training_day_id, record.cadet_id)] = (record, created)
+    
+    for row_num, row, key in row_keys:
+        record, created = records[key]
+        if not created and merge_strategy == DataMergeStrategy.ERROR:
+            result.add_error(row_num, 'exception', f"Duplicate record found: {record}", row)
+            continue
+        result.add_success(record.id, created=created)
+
+
+CHUNK_IMPORTERS = {
+    'cadets': import_cadet_rows,
+    'grades': import_grade_rows,
+    'attendance': import_attendance_rows,
+}
+
+
+def import_csv_chunks(entity_type: str, chunks: Iterable[List[Dict[str, Any]]], merge_strategy: str,
+                      result: Optional[ImportResult] = None,
+                      on_chunk: Optional[Callable[[int, ImportResult], None]] = None) -> ImportResult:
+    """
+    Import CSV rows chunk by chunk as they are parsed
+    
+    Only one chunk is held in memory at a time, so the source can be a
+    streaming reader over a file larger than worker memory.
+    
+    Args:
+        entity_type: cadets, grades or attendance
+        chunks: Iterable of row lists (e.g. a CSVChunkReader)
+        merge_strategy: skip, update or error
+        result: ImportResult to add to (a new one by default)
+        on_chunk: Called with (rows processed so far, result) after each chunk
+    
+    Returns:
+        ImportResult with per-row errors
+    """
+    if result is None:
+        result = ImportResult()
+    
+    import_chunk = CHUNK_IMPORTERS[entity_type]
+    rows_processed = 0
+    for rows in chunks:
+        if rows_processed == 0:
+            is_valid, missing = CSVImporter.validate_headers(rows, REQUIRED_HEADERS[entity_type])
+            if not is_valid:
+                result.add_error(0, 'headers', f"Missing required headers: {', '.join(missing)}")
+                return result
+        
+        import_chunk(rows, merge_strategy, result, start_row=rows_processed + 1)
+        rows_processed += len(rows)
+        if on_chunk is not None:
+            on_chunk(rows_processed, result)
+    
+    logger.info(
+        f"Imported {rows_processed} {entity_type} CSV rows: "
+        f"{result.success_count} succeeded, {result.error_count} failed"
+    )
+    return result
+
+
+def upsert_rotcmis_cadets(records: List[Dict[str, Any]], result: ImportResult, start_row: int = 1) -> None:
+    """
+    Upsert one batch of ROTCMIS cadet records
+    
+    Records are normalized and validated in memory, then written with a
+    single INSERT ... ON CONFLICT (student_id) DO UPDATE. Missing Grades
+    rows for the batch are created with one more statement.
+    
+    Args:
+        records: Raw ROTCMIS cadet dictionaries
+        result: ImportResult to record successes and errors in
+        start_row: Position of the first record (for error reporting)
+    """
+    cadets = {}
+    for offset, record in enumerate(records):
+        data = ROTCMISImporter.normalize_cadet_data(record)
+        student_id = data['student_id'] = str(data.get('student_id') or '').strip()
+        if not student_id:
+            result.add_error(start_row + offset, 'student_id', 'Missing student_id', record)
+            continue
+        
+        try:
+            cadet = Cadet(**{
+                key: value for key, value in data.items()
+                if key == 'student_id' or key in ROTCMIS_UPSERT_FIELDS
+            })
+            cadet.clean_fields(exclude=['id'])
+        except ValidationError as e:
+            result.add_error(start_row + offset, _validation_field(e, 'validation'), _validation_message(e), record)
+            continue
+        except Exception as e:
+            result.add_error(start_row + offset, 'exception', str(e), record)
+            continue
+        
+        # ON CONFLICT cannot touch the same row twice in one statement
+        cadets[student_id] = cadet
+    
+    if not cadets:
+        return
+    
+    existing = set(Cadet.objects.filter(student_id__in=cadets).values_list('student_id', flat=True))
+    with transaction.atomic():
+        Cadet.objects.bulk_create(
+            list(cadets.values()),
+            update_conflicts=True,
+            unique_fields=['student_id'],
+            update_fields=ROTCMIS_UPSERT_FIELDS
+        )
+        ids = dict(Cadet.objects.filter(student_id__in=cadets).values_list('student_id', 'id'))
+        Grades.objects.bulk_create(
+            [Grades(cadet_id=cadet_id) for cadet_id in ids.values()],
+            ignore_conflicts=True
+        )
+    
+    for student_id in cadets:
+        result.add_success(ids[student_id], created=student_id not in existing)
@@ -1,14 +1,25 @@
 """
 Export utilities for generating CSV and Excel files
+
+CSVExporter/ExcelExporter work on materialised lists of dicts. The
+Streaming* exporters and NDJSONExporter consume any iterable of row
+tuples (typically values_list(...).iterator()) and never hold more than
+one row in memory.
 """
 import csv
 import io
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import json
+import tempfile
+from datetime import date, datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
 
 
 class CSVExporter:
@@ -212,3 +223,161 @@ class ExcelExporter:
                 ws.column_dimensions[column_letter].width = adjusted_width
         
         return wb
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of storing it"""
+    
+    def write(self, value):
+        return value
+
+
+def _cell_value(value: Any) -> Any:
+    """Format a value the same way as the list based exporters"""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+class StreamingCSVExporter:
+    """CSV export from an iterable of row tuples, one line at a time"""
+    
+    @staticmethod
+    def iter_lines(rows: Iterable[Sequence[Any]], headers: List[str]) -> Iterator[str]:
+        """
+        Generate CSV lines for the header and each row
+        
+        Args:
+            rows: Iterable of row tuples in headers order
+            headers: Column names
+            
+        Yields:
+            CSV-encoded lines
+        """
+        writer = csv.writer(Echo())
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow(row)
+    
+    @staticmethod
+    def export_to_response(rows: Iterable[Sequence[Any]], filename: str, headers: List[str]) -> StreamingHttpResponse:
+        """
+        Stream rows to the client as a CSV download
+        
+        Args:
+            rows: Iterable of row tuples in headers order
+            filename: Name of the CSV file
+            headers: Column names
+            
+        Returns:
+            StreamingHttpResponse with CSV content
+        """
+        response = StreamingHttpResponse(StreamingCSVExporter.iter_lines(rows, headers), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class NDJSONExporter:
+    """Newline-delimited JSON export, one object per row"""
+    
+    @staticmethod
+    def iter_lines(rows: Iterable[Sequence[Any]], headers: List[str]) -> Iterator[str]:
+        """
+        Generate one JSON object per row
+        
+        Args:
+            rows: Iterable of row tuples in headers order
+            headers: Keys of each object
+            
+        Yields:
+            JSON lines terminated by a newline
+        """
+        for row in rows:
+            item = {}
+            for header, value in zip(headers, row):
+                item[header] = value.isoformat() if isinstance(value, (date, datetime)) else value
+            yield json.dumps(item, default=str) + '\n'
+    
+    @staticmethod
+    def export_to_response(rows: Iterable[Sequence[Any]], filename: str, headers: List[str]) -> StreamingHttpResponse:
+        """
+        Stream rows to the client as an NDJSON download
+        
+        Args:
+            rows: Iterable of row tuples in headers order
+            filename: Name of the NDJSON file
+            headers: Keys of each object
+            
+        Returns:
+            StreamingHttpResponse with NDJSON content
+        """
+        response = StreamingHttpResponse(NDJSONExporter.iter_lines(rows, headers), content_type=NDJSON_CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class StreamingExcelExporter:
+    """Excel export using openpyxl write-only mode"""
+    
+    @staticmethod
+    def write_workbook(rows: Iterable[Sequence[Any]], output, headers: List[str],
+                       sheet_name: str = "Sheet1") -> int:
+        """
+        Write rows to an .xlsx file without keeping them in memory
+        
+        Column widths are sized from the headers, since write-only sheets
+        cannot be measured after the rows are written.
+        
+        Args:
+            rows: Iterable of row tuples in headers order
+            output: Path or binary file object to save the workbook to
+            headers: Column names
+            sheet_name: Name of the worksheet
+            
+        Returns:
+            Number of data rows written
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=sheet_name)
+        
+        for col_num, header in enumerate(headers, 1):
+            ws.column_dimensions[get_column_letter(col_num)].width = min(max(len(str(header)) + 2, 12), 50)
+        
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = ExcelExporter.HEADER_FONT
+            cell.fill = ExcelExporter.HEADER_FILL
+            cell.alignment = ExcelExporter.HEADER_ALIGNMENT
+            header_cells.append(cell)
+        ws.append(header_cells)
+        
+        row_count = 0
+        for row in rows:
+            ws.append([_cell_value(value) for value in row])
+            row_count += 1
+        
+        wb.save(output)
+        return row_count
+    
+    @staticmethod
+    def export_to_response(rows: Iterable[Sequence[Any]], filename: str, headers: List[str],
+                           sheet_name: str = "Sheet1") -> FileResponse:
+        """
+        Export rows to Excel and stream the file from a temporary file
+        
+        Args:
+            rows: Iterable of row tuples in headers order
+            filename: Name of the Excel file
+            headers: Column names
+            sheet_name: Name of the worksheet
+            
+        Returns:
+            FileResponse with Excel content; the temporary file is removed
+            when the response is closed
+        """
+        output = tempfile.TemporaryFile()
+        StreamingExcelExporter.write_workbook(rows, output, headers, sheet_name)
+        output.seek(0)
+        
+        return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
@@ -0,0 +1,168 @@
+"""
+Export row sources shared by the export views and background export task
+"""
+import logging
+import tempfile
+from datetime import datetime
+from django.core.files import File
+from django.db.models import Value
+from django.db.models.functions import Concat
+
+from apps.cadets.models import Cadet, Grades
+from apps.attendance.models import AttendanceRecord
+from apps.activities.models import Activity
+from .storage import get_data_file_storage
+from .exporters import (
+    NDJSONExporter,
+    StreamingCSVExporter,
+    StreamingExcelExporter,
+    NDJSON_CONTENT_TYPE,
+    XLSX_CONTENT_TYPE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'excel': XLSX_CONTENT_TYPE,
+    'ndjson': NDJSON_CONTENT_TYPE,
+}
+EXPORT_EXTENSIONS = {'csv': 'csv', 'excel': 'xlsx', 'ndjson': 'ndjson'}
+
+
+def get_export_rows(entity_type, filters):
+    """
+    Get the rows to export for an entity type and filters
+    
+    Args:
+        entity_type: cadets, grades, attendance or activities
+        filters: Validated ExportFilterSerializer data
+    
+    Returns:
+        Tuple of (values_list queryset, header names, file name without
+        extension); rows are tuples in header order
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    if entity_type == 'cadets':
+        queryset = Cadet.objects.filter(is_archived=False)
+        
+        if filters.get('company'):
+            queryset = queryset.filter(company=filters['company'])
+        if filters.get('platoon'):
+            queryset = queryset.filter(platoon=filters['platoon'])
+        if filters.get('status'):
+            queryset = queryset.filter(status=filters['status'])
+        
+        headers = [
+            'id', 'student_id', 'first_name', 'last_name', 'middle_name',
+            'company', 'platoon', 'course', 'year_level', 'status',
+            'email', 'contact_number', 'created_at'
+        ]
+        rows = queryset.values_list(*headers)
+        filename = f"cadets_export_{timestamp}"
+    
+    elif entity_type == 'grades':
+        queryset = Grades.objects.all()
+        
+        if filters.get('company'):
+            queryset = queryset.filter(cadet__company=filters['company'])
+        if filters.get('platoon'):
+            queryset = queryset.filter(cadet__platoon=filters['platoon'])
+        
+        headers = [
+            'cadet_id', 'student_id', 'name', 'company', 'platoon',
+            'attendance_present', 'merit_points', 'demerit_points',
+            'prelim_score', 'midterm_score', 'final_score'
+        ]
+        rows = queryset.annotate(
+            name=Concat('cadet__first_name', Value(' '), 'cadet__last_name')
+        ).values_list(
+            'cadet_id', 'cadet__student_id', 'name', 'cadet__company', 'cadet__platoon',
+            'attendance_present', 'merit_points', 'demerit_points',
+            'prelim_score', 'midterm_score', 'final_score'
+        )
+        filename = f"grades_export_{timestamp}"
+    
+    elif entity_type == 'attendance':
+        queryset = AttendanceRecord.objects.all()
+        
+        if filters.get('date_from'):
+            queryset = queryset.filter(training_day__date__gte=filters['date_from'])
+        if filters.get('date_to'):
+            queryset = queryset.filter(training_day__date__lte=filters['date_to'])
+        if filters.get('company'):
+            queryset = queryset.filter(cadet__company=filters['company'])
+        if filters.get('platoon'):
+            queryset = queryset.filter(cadet__platoon=filters['platoon'])
+        
+        headers = [
+            'id', 'training_day__date', 'training_day__title',
+            'cadet__student_id', 'cadet__first_name', 'cadet__last_name',
+            'status', 'time_in', 'time_out', 'created_at'
+        ]
+        rows = queryset.values_list(*headers)
+        filename = f"attendance_export_{timestamp}"
+    
+    elif entity_type == 'activities':
+        queryset = Activity.objects.all()
+        
+        if filters.get('date_from'):
+            queryset = queryset.filter(date__gte=filters['date_from'])
+        if filters.get('date_to'):
+            queryset = queryset.filter(date__lte=filters['date_to'])
+        
+        headers = ['id', 'title', 'description', 'date', 'type', 'created_at']
+        rows = queryset.values_list(*headers)
+        filename = f"activities_export_{timestamp}"
+    
+    else:
+        raise ValueError(f"Unsupported entity type: {entity_type}")
+    
+    return rows.order_by('pk'), headers, filename
+
+
+def write_export_file(entity_type, filters, export_format):
+    """
+    Write an export to default storage without holding it in memory
+    
+    Args:
+        entity_type: cadets, grades, attendance or activities
+        filters: Validated ExportFilterSerializer data
+        export_format: 'csv', 'excel' or 'ndjson'
+    
+    Returns:
+        Dict with storage_name, file_name and record_count
+    """
+    rows, headers, filename = get_export_rows(entity_type, filters)
+    file_name = f"{filename}.{EXPORT_EXTENSIONS[export_format]}"
+    record_count = 0
+    
+    def counted_rows():
+        nonlocal record_count
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            record_count += 1
+            yield row
+    
+    with tempfile.TemporaryFile() as output:
+        if export_format == 'excel':
+            StreamingExcelExporter.write_workbook(
+                counted_rows(), output, headers, sheet_name=entity_type.capitalize()
+            )
+        else:
+            exporter = NDJSONExporter if export_format == 'ndjson' else StreamingCSVExporter
+            for line in exporter.iter_lines(counted_rows(), headers):
+                output.write(line.encode('utf-8'))
+        
+        output.seek(0)
+        storage_name = get_data_file_storage().save(f"exports/{file_name}", File(output, name=file_name))
+    
+    logger.info(f"Wrote {entity_type} export {storage_name}")
+    return {
+        'storage_name': storage_name,
+        'file_name': file_name,
+        'record_count': record_count,
+    }
@@ -3,7 +3,7 @@ Import utilities for processing ROTCMIS data and CSV imports
 """
 import csv
 import io
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Iterator, Tuple, Optional
 from datetime import datetime
 from django.db import transaction
 from django.core.exceptions import ValidationError
@@ -150,6 +150,10 @@ class ROTCMISImporter:
             'gender': 'gender',
             'language_spoken': 'language_spoken',
             'languageSpoken': 'language_spoken',
+            'rotc_unit': 'rotc_unit',
+            'rotcUnit': 'rotc_unit',
+            'mobilization_center': 'mobilization_center',
+            'mobilizationCenter': 'mobilization_center',
         }
         
         for source_key, target_key in field_mapping.items():
@@ -215,6 +219,74 @@ class CSVImporter:
         return len(missing) == 0, missing
 
 
+class CSVChunkReader:
+    """
+    Streaming CSV reader that yields rows in chunks
+    
+    The file is decoded incrementally through a TextIOWrapper, so neither
+    the raw upload nor the parsed rows are ever held in memory as a whole.
+    Works with in-memory and temporary-file uploads as well as any binary
+    file object (e.g. a file opened from storage).
+    
+    Usage:
+        reader = CSVChunkReader(uploaded_file, chunk_size=500)
+        for rows in reader:
+            ...
+            progress = reader.bytes_read / reader.total_bytes
+    """
+    
+    def __init__(self, file, chunk_size: int = 500, encoding: str = 'utf-8-sig'):
+        """
+        Args:
+            file: Django UploadedFile/File or binary file object
+            chunk_size: Number of rows per chunk
+            encoding: Text encoding (utf-8-sig also strips a BOM)
+        """
+        self.file = getattr(file, 'file', file)
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.total_bytes = getattr(file, 'size', None)
+        self.bytes_read = 0
+        self.rows_read = 0
+        self.fieldnames: Optional[List[str]] = None
+    
+    def __iter__(self) -> Iterator[List[Dict[str, Any]]]:
+        if hasattr(self.file, 'seek'):
+            self.file.seek(0)
+        
+        text = io.TextIOWrapper(self.file, encoding=self.encoding, newline='')
+        try:
+            reader = csv.DictReader(text)
+            self.fieldnames = reader.fieldnames
+            chunk = []
+            for row in reader:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    yield self._emit(chunk)
+                    chunk = []
+            if chunk:
+                yield self._emit(chunk)
+        finally:
+            # Leave the underlying file open for its owner
+            text.detach()
+    
+    def _emit(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Update progress counters for a chunk about to be yielded"""
+        self.rows_read += len(chunk)
+        try:
+            self.bytes_read = self.file.tell()
+        except (AttributeError, OSError, ValueError):
+            pass
+        return chunk
+    
+    @property
+    def percent(self) -> Optional[int]:
+        """Approximate progress through the file, if its size is known"""
+        if not self.total_bytes:
+            return None
+        return min(100, int(self.bytes_read * 100 / self.total_bytes))
+
+
 class DataMergeStrategy:
     """Strategies for merging imported data with existing records"""
     
@@ -0,0 +1,14 @@
+"""
+Storage for import uploads and export files
+"""
+from django.core.files.storage import storages
+
+
+def get_data_file_storage():
+    """
+    Storage for files handed between the web process and Celery workers
+    
+    Returns the 'data_files' entry of STORAGES. The default storage is not
+    used because in production it only accepts images.
+    """
+    return storages['data_files']
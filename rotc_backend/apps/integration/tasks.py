@@ -10,9 +10,13 @@ import logging
 from apps.cadets.models import Cadet, Grades
 from apps.system.models import AuditLog
 from .importers import ROTCMISImporter, ImportResult, DataMergeStrategy
+from .storage import get_data_file_storage
 
 logger = logging.getLogger(__name__)
 
+# How long background export results stay downloadable (seconds)
+EXPORT_RESULT_TIMEOUT = 86400
+
 
 @shared_task(bind=True, max_retries=3)
 def import_rotcmis_data(self, data: List[Dict[str, Any]], user_id: int, 
@@ -156,6 +160,140 @@ def import_rotcmis_data(self, data: List[Dict[str, Any]], user_id: int,
         raise self.retry(exc=e, countdown=60)
 
 
+@shared_task(bind=True)
+def import_csv_file(self, storage_name: str, entity_type: str, merge_strategy: str,
+                    user_id: int) -> Dict[str, Any]:
+    """
+    Import a large CSV upload in the background, streaming it chunk by chunk
+    
+    Progress is published in the cache under import_task_<id> for the
+    import_status endpoint; 'progress' is the percentage of the file read.
+    
+    Args:
+        storage_name: Name of the uploaded file in default storage
+        entity_type: cadets, grades or attendance
+        merge_strategy: Strategy for handling existing records (skip, update, error)
+        user_id: ID of user performing the import
+        
+    Returns:
+        Dictionary with import results
+    """
+    from .bulk_import import IMPORT_CHUNK_SIZE, import_csv_chunks
+    from .importers import CSVChunkReader
+    
+    task_id = self.request.id
+    cache.set(f'import_task_{task_id}', {
+        'status': 'processing',
+        'progress': 0,
+        'total': None,
+        'rows_processed': 0,
+        'success_count': 0,
+        'error_count': 0
+    }, timeout=3600)
+    
+    try:
+        with get_data_file_storage().open(storage_name, 'rb') as csv_file:
+            reader = CSVChunkReader(csv_file, chunk_size=IMPORT_CHUNK_SIZE)
+            
+            def report_progress(rows_processed, result):
+                cache.set(f'import_task_{task_id}', {
+                    'status': 'processing',
+                    'progress': reader.percent or 0,
+                    'total': None,
+                    'rows_processed': rows_processed,
+                    'success_count': result.success_count,
+                    'error_count': result.error_count
+                }, timeout=3600)
+            
+            result = import_csv_chunks(entity_type, reader, merge_strategy, on_chunk=report_progress)
+        
+        final_result = result.to_dict()
+        cache.set(f'import_task_{task_id}', {
+            'status': 'completed',
+            'progress': 100,
+            'total': reader.rows_read,
+            'rows_processed': reader.rows_read,
+            **final_result
+        }, timeout=3600)
+        
+        AuditLog.objects.create(
+            table_name=entity_type,
+            operation='CSV_IMPORT',
+            record_id=0,
+            user_id=user_id,
+            payload={
+                'total_records': reader.rows_read,
+                'success_count': result.success_count,
+                'error_count': result.error_count,
+                'merge_strategy': merge_strategy,
+                'async': True
+            }
+        )
+        
+        return final_result
+    
+    except Exception as e:
+        logger.error(f"CSV import task {task_id} failed: {str(e)}")
+        cache.set(f'import_task_{task_id}', {
+            'status': 'failed',
+            'error': str(e),
+            'progress': 0,
+            'total': None
+        }, timeout=3600)
+        return {'status': 'failed', 'error': str(e)}
+    
+    finally:
+        get_data_file_storage().delete(storage_name)
+
+
+@shared_task(bind=True)
+def generate_export_file(self, params: Dict[str, Any], export_format: str, user_id: int) -> Dict[str, Any]:
+    """
+    Generate a large export in the background and store it for download
+    
+    Args:
+        params: Export query parameters (as given to the export endpoint)
+        export_format: 'csv', 'excel' or 'ndjson'
+        user_id: ID of user requesting the export
+    
+    Returns:
+        Dictionary with the export status
+    """
+    from .exports import write_export_file
+    from .serializers import ExportFilterSerializer
+    
+    task_id = self.request.id
+    cache.set(f'export_task_{task_id}', {
+        'status': 'processing',
+        'format': export_format,
+        'user_id': user_id
+    }, timeout=EXPORT_RESULT_TIMEOUT)
+    
+    try:
+        serializer = ExportFilterSerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+        filters = serializer.validated_data
+        
+        export = write_export_file(filters['entity_type'], filters, export_format)
+        task_data = {
+            'status': 'completed',
+            'format': export_format,
+            'user_id': user_id,
+            **export
+        }
+    except Exception as e:
+        logger.error(f"Export task {task_id} failed: {str(e)}")
+        task_data = {
+            'status': 'failed',
+            'format': export_format,
+            'user_id': user_id,
+            'error': str(e)
+        }
+    
+    cache.set(f'export_task_{task_id}', task_data, timeout=EXPORT_RESULT_TIMEOUT)
+    return task_data
+
+
 @shared_task
 def cleanup_old_import_tasks():
     """
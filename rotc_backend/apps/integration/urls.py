@@ -13,4 +13,7 @@ urlpatterns = [
     # Export endpoints
     path('export/excel', views.export_excel, name='export-excel'),
     path('export/csv', views.export_csv, name='export-csv'),
+    path('export/ndjson', views.export_ndjson, name='export-ndjson'),
+    path('export/status/<str:task_id>', views.export_status, name='export-status'),
+    path('export/download/<str:task_id>', views.export_download, name='export-download'),
 ]
@@ -5,16 +5,17 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
 from django.core.cache import cache
 from django.db.models import Q
-from datetime import datetime
+from django.http import FileResponse
+from django.urls import reverse
+from itertools import chain
 import logging
 
 from apps.authentication.permissions import IsAdmin
-from apps.cadets.models import Cadet, Grades
+from apps.cadets.models import Cadet
 from apps.grading.models import MeritDemeritLog
-from apps.attendance.models import AttendanceRecord, TrainingDay
-from apps.activities.models import Activity
 from apps.system.models import AuditLog
 
 from .serializers import (
@@ -23,9 +24,12 @@ from .serializers import (
     ExportFilterSerializer,
     CSVImportSerializer
 )
-from .tasks import import_rotcmis_data
-from .importers import ROTCMISImporter, ImportResult, CSVImporter, DataMergeStrategy
-from .exporters import CSVExporter, ExcelExporter
+from .tasks import import_rotcmis_data, import_csv_file, generate_export_file
+from .importers import ROTCMISImporter, ImportResult, CSVChunkReader, DataMergeStrategy
+from .bulk_import import CHUNK_IMPORTERS, IMPORT_CHUNK_SIZE, import_csv_chunks
+from .exporters import NDJSONExporter, StreamingCSVExporter, StreamingExcelExporter
+from .storage import get_data_file_storage
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_CONTENT_TYPES, EXPORT_EXTENSIONS, get_export_rows
 
 logger = logging.getLogger(__name__)
 
@@ -213,44 +217,12 @@ def export_excel(request):
     - company: Filter by company (optional)
     - platoon: Filter by platoon (optional)
     - status: Filter by status (optional)
+    - async: Generate the file in the background (optional; automatic above
+      EXPORT_ASYNC_THRESHOLD rows)
     
-    Returns: Excel file download
+    Returns: Excel file download, or 202 with a task ID for background exports
     """
-    serializer = ExportFilterSerializer(data=request.query_params)
-    if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    entity_type = serializer.validated_data['entity_type']
-    filters = serializer.validated_data
-    
-    try:
-        data, filename = _get_export_data(entity_type, filters)
-        
-        # Log export operation
-        AuditLog.objects.create(
-            table_name=entity_type,
-            operation='EXPORT',
-            record_id=None,
-            user_id=request.user.id,
-            payload={
-                'format': 'excel',
-                'filters': filters,
-                'record_count': len(data)
-            }
-        )
-        
-        return ExcelExporter.export_to_response(
-            data,
-            f"{filename}.xlsx",
-            sheet_name=entity_type.capitalize()
-        )
-    
-    except Exception as e:
-        logger.error(f"Error exporting to Excel: {str(e)}")
-        return Response(
-            {'error': f'Export failed: {str(e)}'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+    return _export(request, 'excel')
 
 
 @api_view(['GET'])
@@ -263,39 +235,82 @@ def export_csv(request):
     
     Query parameters: Same as export_excel
     
-    Returns: CSV file download
+    Returns: Streamed CSV file download, or 202 with a task ID for background exports
     """
-    serializer = ExportFilterSerializer(data=request.query_params)
-    if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    return _export(request, 'csv')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def export_ndjson(request):
+    """
+    Export data as newline-delimited JSON
     
-    entity_type = serializer.validated_data['entity_type']
-    filters = serializer.validated_data
+    GET /api/export/ndjson?entity_type=grades
     
-    try:
-        data, filename = _get_export_data(entity_type, filters)
-        
-        # Log export operation
-        AuditLog.objects.create(
-            table_name=entity_type,
-            operation='EXPORT',
-            record_id=None,
-            user_id=request.user.id,
-            payload={
-                'format': 'csv',
-                'filters': filters,
-                'record_count': len(data)
-            }
+    Query parameters: Same as export_excel
+    
+    Returns: Streamed NDJSON download, or 202 with a task ID for background exports
+    """
+    return _export(request, 'ndjson')
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def export_status(request, task_id):
+    """
+    Get status of a background export task
+    
+    GET /api/export/status/<task_id>
+    
+    Response:
+    {
+        "task_id": "abc-123",
+        "status": "completed",
+        "record_count": 120000,
+        "download_url": "/api/export/download/abc-123"
+    }
+    """
+    task_data = cache.get(f'export_task_{task_id}')
+    
+    if not task_data:
+        return Response(
+            {'error': 'Task not found or expired'},
+            status=status.HTTP_404_NOT_FOUND
         )
-        
-        return CSVExporter.export_to_response(data, f"{filename}.csv")
     
-    except Exception as e:
-        logger.error(f"Error exporting to CSV: {str(e)}")
+    response_data = {'task_id': task_id, **task_data}
+    response_data.pop('storage_name', None)
+    if task_data.get('status') == 'completed':
+        response_data['download_url'] = reverse('export-download', args=[task_id])
+    
+    return Response(response_data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin])
+def export_download(request, task_id):
+    """
+    Download the file produced by a background export task
+    
+    GET /api/export/download/<task_id>
+    
+    Returns: The export file
+    """
+    task_data = cache.get(f'export_task_{task_id}')
+    
+    if not task_data or task_data.get('status') != 'completed':
         return Response(
-            {'error': f'Export failed: {str(e)}'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            {'error': 'Export not found, expired or not finished'},
+            status=status.HTTP_404_NOT_FOUND
         )
+    
+    return FileResponse(
+        get_data_file_storage().open(task_data['storage_name'], 'rb'),
+        as_attachment=True,
+        filename=task_data['file_name'],
+        content_type=EXPORT_CONTENT_TYPES[task_data['format']]
+    )
 
 
 @api_view(['POST'])
@@ -326,37 +341,45 @@ def import_csv(request):
     entity_type = serializer.validated_data['entity_type']
     merge_strategy = serializer.validated_data['merge_strategy']
     
+    if entity_type not in CHUNK_IMPORTERS:
+        return Response(
+            {'error': f'Unsupported entity type: {entity_type}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     try:
-        # Parse CSV
-        data = CSVImporter.parse_csv_file(csv_file)
+        # Large files are imported by a worker; progress via import_status
+        if csv_file.size > settings.CSV_IMPORT_ASYNC_BYTES:
+            storage_name = get_data_file_storage().save(f"imports/{csv_file.name}", csv_file)
+            task = import_csv_file.delay(storage_name, entity_type, merge_strategy, request.user.id)
+            return Response({
+                'task_id': task.id,
+                'status': 'processing',
+                'message': f'Import started for {csv_file.name}',
+                'status_url': reverse('import-status', args=[task.id])
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        # Parse and import chunk by chunk instead of loading the whole file
+        reader = CSVChunkReader(csv_file, chunk_size=IMPORT_CHUNK_SIZE)
+        chunks = iter(reader)
+        first_chunk = next(chunks, None)
         
-        if not data:
+        if first_chunk is None:
             return Response(
                 {'error': 'CSV file is empty'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Process based on entity type
-        if entity_type == 'cadets':
-            result = _import_cadets_from_csv(data, merge_strategy, request.user.id)
-        elif entity_type == 'grades':
-            result = _import_grades_from_csv(data, merge_strategy, request.user.id)
-        elif entity_type == 'attendance':
-            result = _import_attendance_from_csv(data, merge_strategy, request.user.id)
-        else:
-            return Response(
-                {'error': f'Unsupported entity type: {entity_type}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        result = import_csv_chunks(entity_type, chain([first_chunk], chunks), merge_strategy)
         
         # Log import operation
         AuditLog.objects.create(
             table_name=entity_type,
             operation='CSV_IMPORT',
-            record_id=None,
+            record_id=0,
             user_id=request.user.id,
             payload={
-                'total_records': len(data),
+                'total_records': reader.rows_read,
                 'success_count': result.success_count,
                 'error_count': result.error_count,
                 'merge_strategy': merge_strategy
@@ -375,245 +398,70 @@ def import_csv(request):
 
 # Helper functions
 
-def _get_export_data(entity_type, filters):
-    """Get data for export based on entity type and filters"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    if entity_type == 'cadets':
-        queryset = Cadet.objects.filter(is_archived=False)
-        
-        if filters.get('company'):
-            queryset = queryset.filter(company=filters['company'])
-        if filters.get('platoon'):
-            queryset = queryset.filter(platoon=filters['platoon'])
-        if filters.get('status'):
-            queryset = queryset.filter(status=filters['status'])
-        
-        data = list(queryset.values(
-            'id', 'student_id', 'first_name', 'last_name', 'middle_name',
-            'company', 'platoon', 'course', 'year_level', 'status',
-            'email', 'contact_number', 'created_at'
-        ))
-        filename = f"cadets_export_{timestamp}"
-    
-    elif entity_type == 'grades':
-        queryset = Grades.objects.select_related('cadet').all()
-        
-        if filters.get('company'):
-            queryset = queryset.filter(cadet__company=filters['company'])
-        if filters.get('platoon'):
-            queryset = queryset.filter(cadet__platoon=filters['platoon'])
-        
-        data = []
-        for grade in queryset:
-            data.append({
-                'cadet_id': grade.cadet.id,
-                'student_id': grade.cadet.student_id,
-                'name': f"{grade.cadet.first_name} {grade.cadet.last_name}",
-                'company': grade.cadet.company,
-                'platoon': grade.cadet.platoon,
-                'attendance_present': grade.attendance_present,
-                'merit_points': grade.merit_points,
-                'demerit_points': grade.demerit_points,
-                'prelim_score': grade.prelim_score,
-                'midterm_score': grade.midterm_score,
-                'final_score': grade.final_score
-            })
-        filename = f"grades_export_{timestamp}"
-    
-    elif entity_type == 'attendance':
-        queryset = AttendanceRecord.objects.select_related('cadet', 'training_day').all()
-        
-        if filters.get('date_from'):
-            queryset = queryset.filter(training_day__date__gte=filters['date_from'])
-        if filters.get('date_to'):
-            queryset = queryset.filter(training_day__date__lte=filters['date_to'])
-        if filters.get('company'):
-            queryset = queryset.filter(cadet__company=filters['company'])
-        if filters.get('platoon'):
-            queryset = queryset.filter(cadet__platoon=filters['platoon'])
-        
-        data = list(queryset.values(
-            'id', 'training_day__date', 'training_day__title',
-            'cadet__student_id', 'cadet__first_name', 'cadet__last_name',
-            'status', 'time_in', 'time_out', 'created_at'
-        ))
-        filename = f"attendance_export_{timestamp}"
-    
-    elif entity_type == 'activities':
-        queryset = Activity.objects.all()
-        
-        if filters.get('date_from'):
-            queryset = queryset.filter(date__gte=filters['date_from'])
-        if filters.get('date_to'):
-            queryset = queryset.filter(date__lte=filters['date_to'])
-        
-        data = list(queryset.values(
-            'id', 'title', 'description', 'date', 'type', 'created_at'
-        ))
-        filename = f"activities_export_{timestamp}"
+def _export(request, export_format):
+    """
+    Validate export filters and stream the export, or hand it to Celery
     
-    else:
-        raise ValueError(f"Unsupported entity type: {entity_type}")
+    Args:
+        request: DRF request with the export query parameters
+        export_format: 'csv', 'excel' or 'ndjson'
     
-    return data, filename
-
-
-def _import_cadets_from_csv(data, merge_strategy, user_id):
-    """Import cadets from CSV data"""
-    result = ImportResult()
-    
-    # Validate required headers
-    required_headers = ['student_id', 'first_name', 'last_name']
-    is_valid, missing = CSVImporter.validate_headers(data, required_headers)
+    Returns:
+        Streaming file response, or 202 response with the export task ID
+    """
+    serializer = ExportFilterSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    if not is_valid:
-        result.add_error(0, 'headers', f"Missing required headers: {', '.join(missing)}")
-        return result
+    entity_type = serializer.validated_data['entity_type']
+    filters = serializer.validated_data
     
-    for idx, row in enumerate(data):
-        try:
-            student_id = row.get('student_id', '').strip()
-            if not student_id:
-                result.add_error(idx + 1, 'student_id', 'student_id is required')
-                continue
-            
-            # Check for existing cadet
-            try:
-                existing_cadet = Cadet.objects.get(student_id=student_id)
-                
-                if DataMergeStrategy.should_update(merge_strategy, existing_cadet, row):
-                    # Update existing
-                    for key, value in row.items():
-                        if hasattr(existing_cadet, key) and value:
-                            setattr(existing_cadet, key, value)
-                    existing_cadet.save()
-                    result.add_success(existing_cadet.id, created=False)
-                else:
-                    result.add_warning(f"Skipped existing cadet: {student_id}")
-            
-            except Cadet.DoesNotExist:
-                # Create new cadet
-                cadet_data = {
-                    'student_id': student_id,
-                    'first_name': row.get('first_name', ''),
-                    'last_name': row.get('last_name', ''),
-                    'middle_name': row.get('middle_name', ''),
-                    'company': row.get('company', ''),
-                    'platoon': row.get('platoon', ''),
-                    'course': row.get('course', ''),
-                    'year_level': int(row['year_level']) if row.get('year_level') else None,
-                    'status': row.get('status', 'Ongoing'),
-                    'email': row.get('email', ''),
-                    'contact_number': row.get('contact_number', '')
-                }
-                cadet = Cadet.objects.create(**cadet_data)
-                result.add_success(cadet.id, created=True)
+    try:
+        rows, headers, filename = get_export_rows(entity_type, filters)
+        record_count = rows.count()
+        run_async = (
+            request.query_params.get('async', '').lower() in ('1', 'true')
+            or record_count > settings.EXPORT_ASYNC_THRESHOLD
+        )
         
-        except Exception as e:
-            result.add_error(idx + 1, 'exception', str(e), row)
-    
-    return result
-
-
-def _import_grades_from_csv(data, merge_strategy, user_id):
-    """Import grades from CSV data"""
-    result = ImportResult()
-    
-    required_headers = ['student_id']
-    is_valid, missing = CSVImporter.validate_headers(data, required_headers)
-    
-    if not is_valid:
-        result.add_error(0, 'headers', f"Missing required headers: {', '.join(missing)}")
-        return result
-    
-    for idx, row in enumerate(data):
-        try:
-            student_id = row.get('student_id', '').strip()
-            if not student_id:
-                result.add_error(idx + 1, 'student_id', 'student_id is required')
-                continue
-            
-            # Find cadet
-            try:
-                cadet = Cadet.objects.get(student_id=student_id)
-                grade, created = Grades.objects.get_or_create(cadet=cadet)
-                
-                # Update grade fields
-                if row.get('attendance_present'):
-                    grade.attendance_present = int(row['attendance_present'])
-                if row.get('merit_points'):
-                    grade.merit_points = int(row['merit_points'])
-                if row.get('demerit_points'):
-                    grade.demerit_points = int(row['demerit_points'])
-                if row.get('prelim_score'):
-                    grade.prelim_score = float(row['prelim_score'])
-                if row.get('midterm_score'):
-                    grade.midterm_score = float(row['midterm_score'])
-                if row.get('final_score'):
-                    grade.final_score = float(row['final_score'])
-                
-                grade.save()
-                result.add_success(grade.id, created=created)
-            
-            except Cadet.DoesNotExist:
-                result.add_error(idx + 1, 'student_id', f'Cadet not found: {student_id}')
+        # Log export operation
+        AuditLog.objects.create(
+            table_name=entity_type,
+            operation='EXPORT',
+            record_id=0,
+            user_id=request.user.id,
+            payload={
+                'format': export_format,
+                'filters': filters,
+                'record_count': record_count,
+                'async': run_async
+            }
+        )
         
-        except Exception as e:
-            result.add_error(idx + 1, 'exception', str(e), row)
-    
-    return result
-
-
-def _import_attendance_from_csv(data, merge_strategy, user_id):
-    """Import attendance from CSV data"""
-    result = ImportResult()
-    
-    required_headers = ['student_id', 'training_day_id', 'status']
-    is_valid, missing = CSVImporter.validate_headers(data, required_headers)
-    
-    if not is_valid:
-        result.add_error(0, 'headers', f"Missing required headers: {', '.join(missing)}")
-        return result
-    
-    for idx, row in enumerate(data):
-        try:
-            student_id = row.get('student_id', '').strip()
-            training_day_id = row.get('training_day_id', '').strip()
-            status_value = row.get('status', '').strip()
-            
-            if not all([student_id, training_day_id, status_value]):
-                result.add_error(idx + 1, 'required_fields', 'Missing required fields')
-                continue
-            
-            # Find cadet and training day
-            try:
-                cadet = Cadet.objects.get(student_id=student_id)
-                training_day = TrainingDay.objects.get(id=int(training_day_id))
-                
-                # Create or update attendance record
-                attendance, created = AttendanceRecord.objects.get_or_create(
-                    cadet=cadet,
-                    training_day=training_day,
-                    defaults={'status': status_value}
-                )
-                
-                if not created and DataMergeStrategy.should_update(merge_strategy, attendance, row):
-                    attendance.status = status_value
-                    if row.get('time_in'):
-                        attendance.time_in = row['time_in']
-                    if row.get('time_out'):
-                        attendance.time_out = row['time_out']
-                    attendance.save()
-                
-                result.add_success(attendance.id, created=created)
-            
-            except Cadet.DoesNotExist:
-                result.add_error(idx + 1, 'student_id', f'Cadet not found: {student_id}')
-            except TrainingDay.DoesNotExist:
-                result.add_error(idx + 1, 'training_day_id', f'Training day not found: {training_day_id}')
+        if run_async:
+            task = generate_export_file.delay(request.query_params.dict(), export_format, request.user.id)
+            return Response({
+                'task_id': task.id,
+                'status': 'processing',
+                'message': f'Export started for {record_count} records',
+                'status_url': reverse('export-status', args=[task.id])
+            }, status=status.HTTP_202_ACCEPTED)
         
-        except Exception as e:
-            result.add_error(idx + 1, 'exception', str(e), row)
+        # Rows are read from a server-side cursor and written one at a time
+        rows = rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        file_name = f"{filename}.{EXPORT_EXTENSIONS[export_format]}"
+        
+        if export_format == 'excel':
+            return StreamingExcelExporter.export_to_response(
+                rows, file_name, headers, sheet_name=entity_type.capitalize()
+            )
+        if export_format == 'ndjson':
+            return NDJSONExporter.export_to_response(rows, file_name, headers)
+        return StreamingCSVExporter.export_to_response(rows, file_name, headers)
     
-    return result
+    except Exception as e:
+        logger.error(f"Error exporting to {export_format}: {str(e)}")
+        return Response(
+            {'error': f'Export failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -15,6 +15,7 @@ from .serializers import (
     PushSubscriptionSerializer
 )
 from apps.authentication.permissions import IsAdmin
+from core.pagination import KeysetPagination
 
 
 class AdminMessageViewSet(viewsets.ModelViewSet):
@@ -103,6 +104,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         """Get notifications for current user."""
@@ -1,58 +1,102 @@
 """
 Utility functions for WebSocket broadcasting.
 Provides functions to broadcast updates to connected clients via Django Channels.
+
+Group messages are buffered per transaction (core.commit_buffer) and sent
+once on commit, or straight away outside a transaction. Each flush is a
+single async_to_sync call gathering all group_send coroutines, and
+identical payloads to the same group are only sent once.
 """
+import asyncio
+import json
 import logging
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from core.commit_buffer import CommitBuffer
 
 logger = logging.getLogger(__name__)
 
+STAFF_ROLES = ['admin', 'training_staff']
 
-def broadcast_grade_update(cadet_id, grade_data):
+SSE_STAFF_GROUP = 'sse_staff'
+
+
+def _message_key(group, message):
+    """Deduplication key of a group message."""
+    return (group, json.dumps(message, sort_keys=True, default=str))
+
+
+def send_group_messages(sends):
     """
-    Broadcast grade update to relevant users.
+    Send group messages concurrently in one event-loop pass.
     
     Args:
-        cadet_id: ID of the cadet whose grades were updated
-        grade_data: Dictionary containing updated grade information
+        sends: Iterable of (group, message) tuples
+    
+    Returns:
+        Number of messages sent
+    
+    Raises:
+        Any error from the channel layer
     """
     channel_layer = get_channel_layer()
     
     if not channel_layer:
         logger.warning("Channel layer not configured, skipping WebSocket broadcast")
-        return
+        return 0
     
-    try:
-        # Broadcast to the specific cadet
-        async_to_sync(channel_layer.group_send)(
-            f'cadet_{cadet_id}',
-            {
-                'type': 'grade_update',
-                'data': {
-                    'cadet_id': cadet_id,
-                    **grade_data
-                }
-            }
-        )
-        
-        # Broadcast to admins and training staff
-        for role in ['admin', 'training_staff']:
-            async_to_sync(channel_layer.group_send)(
-                f'role_{role}',
-                {
-                    'type': 'grade_update',
-                    'data': {
-                        'cadet_id': cadet_id,
-                        **grade_data
-                    }
-                }
-            )
-        
-        logger.info(f"Broadcasted grade update for cadet {cadet_id}")
+    unique = {}
+    for group, message in sends:
+        unique.setdefault(_message_key(group, message), (group, message))
     
-    except Exception as e:
-        logger.error(f"Error broadcasting grade update: {e}")
+    if not unique:
+        return 0
+    
+    async def send_all():
+        await asyncio.gather(*(
+            channel_layer.group_send(group, message) for group, message in unique.values()
+        ))
+    
+    async_to_sync(send_all)()
+    return len(unique)
+
+
+def _flush_broadcasts(sends):
+    """Send the group messages buffered for a committed transaction."""
+    count = send_group_messages(sends)
+    if count:
+        logger.info(f"Broadcasted {count} WebSocket message(s)")
+
+
+broadcast_buffer = CommitBuffer(_flush_broadcasts, name='WebSocket broadcasts')
+
+
+def _cadet_and_staff_sends(cadet_id, message):
+    """Build sends of one message to a cadet and to admins/training staff."""
+    sends = []
+    if cadet_id:
+        sends.append((f'cadet_{cadet_id}', message))
+    for role in STAFF_ROLES:
+        sends.append((f'role_{role}', message))
+    return sends
+
+
+def broadcast_grade_update(cadet_id, grade_data):
+    """
+    Broadcast grade update to relevant users.
+    
+    Args:
+        cadet_id: ID of the cadet whose grades were updated
+        grade_data: Dictionary containing updated grade information
+    """
+    message = {
+        'type': 'grade_update',
+        'data': {
+            'cadet_id': cadet_id,
+            **grade_data
+        }
+    }
+    broadcast_buffer.add(*_cadet_and_staff_sends(cadet_id, message))
 
 
 def broadcast_attendance_update(cadet_id, attendance_data):
@@ -63,42 +107,14 @@ def broadcast_attendance_update(cadet_id, attendance_data):
         cadet_id: ID of the cadet whose attendance was updated
         attendance_data: Dictionary containing updated attendance information
     """
-    channel_layer = get_channel_layer()
-    
-    if not channel_layer:
-        logger.warning("Channel layer not configured, skipping WebSocket broadcast")
-        return
-    
-    try:
-        # Broadcast to the specific cadet
-        async_to_sync(channel_layer.group_send)(
-            f'cadet_{cadet_id}',
-            {
-                'type': 'attendance_update',
-                'data': {
-                    'cadet_id': cadet_id,
-                    **attendance_data
-                }
-            }
-        )
-        
-        # Broadcast to admins and training staff
-        for role in ['admin', 'training_staff']:
-            async_to_sync(channel_layer.group_send)(
-                f'role_{role}',
-                {
-                    'type': 'attendance_update',
-                    'data': {
-                        'cadet_id': cadet_id,
-                        **attendance_data
-                    }
-                }
-            )
-        
-        logger.info(f"Broadcasted attendance update for cadet {cadet_id}")
-    
-    except Exception as e:
-        logger.error(f"Error broadcasting attendance update: {e}")
+    message = {
+        'type': 'attendance_update',
+        'data': {
+            'cadet_id': cadet_id,
+            **attendance_data
+        }
+    }
+    broadcast_buffer.add(*_cadet_and_staff_sends(cadet_id, message))
 
 
 def broadcast_exam_score_update(cadet_id, exam_data):
@@ -109,42 +125,14 @@ def broadcast_exam_score_update(cadet_id, exam_data):
         cadet_id: ID of the cadet whose exam scores were updated
         exam_data: Dictionary containing updated exam score information
     """
-    channel_layer = get_channel_layer()
-    
-    if not channel_layer:
-        logger.warning("Channel layer not configured, skipping WebSocket broadcast")
-        return
-    
-    try:
-        # Broadcast to the specific cadet
-        async_to_sync(channel_layer.group_send)(
-            f'cadet_{cadet_id}',
-            {
-                'type': 'exam_score_update',
-                'data': {
-                    'cadet_id': cadet_id,
-                    **exam_data
-                }
-            }
-        )
-        
-        # Broadcast to admins and training staff
-        for role in ['admin', 'training_staff']:
-            async_to_sync(channel_layer.group_send)(
-                f'role_{role}',
-                {
-                    'type': 'exam_score_update',
-                    'data': {
-                        'cadet_id': cadet_id,
-                        **exam_data
-                    }
-                }
-            )
-        
-        logger.info(f"Broadcasted exam score update for cadet {cadet_id}")
-    
-    except Exception as e:
-        logger.error(f"Error broadcasting exam score update: {e}")
+    message = {
+        'type': 'exam_score_update',
+        'data': {
+            'cadet_id': cadet_id,
+            **exam_data
+        }
+    }
+    broadcast_buffer.add(*_cadet_and_staff_sends(cadet_id, message))
 
 
 def broadcast_notification(user_id, notification_data):
@@ -155,25 +143,11 @@ def broadcast_notification(user_id, notification_data):
         user_id: ID of the user to receive the notification
         notification_data: Dictionary containing notification information
     """
-    channel_layer = get_channel_layer()
-    
-    if not channel_layer:
-        logger.warning("Channel layer not configured, skipping WebSocket broadcast")
-        return
-    
-    try:
-        async_to_sync(channel_layer.group_send)(
-            f'user_{user_id}',
-            {
-                'type': 'notification',
-                'data': notification_data
-            }
-        )
-        
-        logger.info(f"Broadcasted notification to user {user_id}")
-    
-    except Exception as e:
-        logger.error(f"Error broadcasting notification: {e}")
+    message = {
+        'type': 'notification',
+        'data': notification_data
+    }
+    broadcast_buffer.add((f'user_{user_id}', message))
 
 
 def broadcast_message(recipient_ids, message_data):
@@ -184,26 +158,20 @@ def broadcast_message(recipient_ids, message_data):
         recipient_ids: List of user IDs to receive the message
         message_data: Dictionary containing message information
     """
-    channel_layer = get_channel_layer()
-    
-    if not channel_layer:
-        logger.warning("Channel layer not configured, skipping WebSocket broadcast")
-        return
-    
-    try:
-        for user_id in recipient_ids:
-            async_to_sync(channel_layer.group_send)(
-                f'user_{user_id}',
-                {
-                    'type': 'message',
-                    'data': message_data
-                }
-            )
-        
-        logger.info(f"Broadcasted message to {len(recipient_ids)} users")
-    
-    except Exception as e:
-        logger.error(f"Error broadcasting message: {e}")
+    message = {
+        'type': 'message',
+        'data': message_data
+    }
+    broadcast_buffer.add(*[(f'user_{user_id}', message) for user_id in recipient_ids])
+
+
+def _sync_event_message(event_type, payload):
+    """Build the WebSocket message for a sync event."""
+    return {
+        'type': 'sync_event',
+        'event_type': event_type,
+        'data': payload
+    }
 
 
 def broadcast_sync_event(event_type, cadet_id, payload):
@@ -216,39 +184,70 @@ def broadcast_sync_event(event_type, cadet_id, payload):
         cadet_id: ID of the cadet (if applicable)
         payload: Event payload data
     """
-    channel_layer = get_channel_layer()
+    broadcast_buffer.add(*_cadet_and_staff_sends(cadet_id, _sync_event_message(event_type, payload)))
+
+
+def broadcast_sync_events(events):
+    """
+    Broadcast a batch of sync events in a single event-loop pass.
     
-    if not channel_layer:
-        logger.warning("Channel layer not configured, skipping WebSocket broadcast")
-        return
+    Uses the same groups and message format as broadcast_sync_event, but
+    sends immediately and raises on errors so the caller can leave the
+    batch for a retry.
+    
+    Args:
+        events: Iterable of (event_type, cadet_id, payload) tuples
+    """
+    sends = []
+    for event_type, cadet_id, payload in events:
+        sends.extend(_cadet_and_staff_sends(cadet_id, _sync_event_message(event_type, payload)))
     
-    try:
-        # Broadcast to the specific cadet if cadet_id is provided
-        if cadet_id:
-            async_to_sync(channel_layer.group_send)(
-                f'cadet_{cadet_id}',
-                {
-                    'type': 'sync_event',
-                    'event_type': event_type,
-                    'data': payload
-                }
-            )
-        
-        # Broadcast to admins and training staff
-        for role in ['admin', 'training_staff']:
-            async_to_sync(channel_layer.group_send)(
-                f'role_{role}',
-                {
-                    'type': 'sync_event',
-                    'event_type': event_type,
-                    'data': payload
-                }
-            )
-        
-        logger.info(f"Broadcasted sync event: {event_type}")
+    count = send_group_messages(sends)
+    if count:
+        logger.info(f"Broadcasted {count} sync event messages")
+
+
+def get_sse_groups(role, cadet_id=None):
+    """
+    Get the channel layer groups an SSE connection subscribes to.
+    
+    Admins and training staff see every sync event; cadets only see their own.
+    
+    Args:
+        role: Role of the connected user
+        cadet_id: Cadet ID of the connected user (if a cadet)
     
-    except Exception as e:
-        logger.error(f"Error broadcasting sync event: {e}")
+    Returns:
+        List of group names
+    """
+    if role in STAFF_ROLES:
+        return [SSE_STAFF_GROUP]
+    if role == 'cadet' and cadet_id:
+        return [f'sse_cadet_{cadet_id}']
+    return []
+
+
+def publish_sync_event(event):
+    """
+    Push a newly written sync event to SSE subscribers.
+    
+    Args:
+        event: SyncEvent instance
+    """
+    message = {
+        'type': 'sse.event',
+        'id': event.id,
+        'event_type': event.event_type,
+        'cadet_id': event.cadet_id,
+        'data': event.payload,
+        'timestamp': event.created_at.isoformat()
+    }
+    
+    sends = [(SSE_STAFF_GROUP, message)]
+    if event.cadet_id:
+        sends.append((f'sse_cadet_{event.cadet_id}', message))
+    
+    broadcast_buffer.add(*sends)
 
 
 def broadcast_system_settings_update(key, value):
@@ -259,27 +258,14 @@ def broadcast_system_settings_update(key, value):
         key: Setting key that was updated
         value: New value of the setting
     """
-    channel_layer = get_channel_layer()
-    
-    if not channel_layer:
-        logger.warning("Channel layer not configured, skipping WebSocket broadcast")
-        return
-    
-    try:
-        # Broadcast to all roles (admin, cadet, training_staff)
-        for role in ['admin', 'cadet', 'training_staff']:
-            async_to_sync(channel_layer.group_send)(
-                f'role_{role}',
-                {
-                    'type': 'system_settings_update',
-                    'data': {
-                        'key': key,
-                        'value': value
-                    }
-                }
-            )
-        
-        logger.info(f"Broadcasted system settings update: {key}")
-    
-    except Exception as e:
-        logger.error(f"Error broadcasting system settings update: {e}")
+    message = {
+        'type': 'system_settings_update',
+        'data': {
+            'key': key,
+            'value': value
+        }
+    }
+    # Broadcast to all roles (admin, cadet, training_staff)
+    broadcast_buffer.add(*[
+        (f'role_{role}', message) for role in ['admin', 'cadet', 'training_staff']
+    ])
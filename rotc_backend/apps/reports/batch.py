@@ -0,0 +1,145 @@
+"""
+Parallel batch rendering of cadet profile PDFs.
+
+ReportLab rendering is CPU-bound, so profiles are rendered across a
+process pool instead of one after another in the Celery worker. Cadets
+are loaded up front (with grades) and pickled to the render processes,
+which never touch the database. Finished PDFs are written into a single
+ZIP archive as they complete so only the PDFs in flight are held in
+memory.
+
+The pool comes from billiard (Celery's fork of multiprocessing) rather
+than concurrent.futures: prefork worker children are daemonic, and the
+standard library refuses to start child processes from a daemonic one.
+"""
+import logging
+import os
+import zipfile
+from billiard.pool import Pool
+from django.conf import settings
+from django.utils.text import get_valid_filename
+from .generators import CadetProfilePDFGenerator
+
+logger = logging.getLogger(__name__)
+
+
+def get_render_workers():
+    """Number of render processes to use (PDF_RENDER_WORKERS, default CPU count up to 4)."""
+    workers = getattr(settings, 'PDF_RENDER_WORKERS', None)
+    if workers is None:
+        workers = min(4, os.cpu_count() or 1)
+    return max(1, int(workers))
+
+
+def _init_render_worker():
+    """Make sure Django is configured in render processes that were spawned."""
+    import django
+    from django.apps import apps
+    
+    if not apps.ready:
+        django.setup()
+
+
+def render_cadet_profile(cadet):
+    """
+    Render one cadet profile PDF.
+    
+    Args:
+        cadet: Cadet instance with grades already loaded
+    
+    Returns:
+        bytes: PDF content
+    """
+    return CadetProfilePDFGenerator().generate(cadet).getvalue()
+
+
+def _render_indexed_profile(item):
+    """Render one (index, cadet) pair in a pool process, returning the error instead of raising."""
+    index, cadet = item
+    try:
+        return index, render_cadet_profile(cadet), None
+    except Exception as e:
+        return index, None, e
+
+
+def render_cadet_profiles(cadets, workers=None):
+    """
+    Render cadet profile PDFs, in parallel when more than one worker is used.
+    
+    Results are yielded in completion order, not input order.
+    
+    Args:
+        cadets: Cadet instances with grades already loaded
+        workers: Number of render processes (see get_render_workers)
+    
+    Yields:
+        tuple: (cadet, pdf_bytes, error) where exactly one of pdf_bytes
+        and error is None
+    """
+    cadets = list(cadets)
+    if workers is None:
+        workers = get_render_workers()
+    workers = min(workers, len(cadets))
+    
+    if workers <= 1:
+        for cadet in cadets:
+            try:
+                yield cadet, render_cadet_profile(cadet), None
+            except Exception as e:
+                yield cadet, None, e
+        return
+    
+    # Forked workers inherit the configured Django; the initializer covers
+    # spawn/forkserver start methods
+    pool = Pool(processes=workers, initializer=_init_render_worker)
+    try:
+        for index, pdf_bytes, error in pool.imap_unordered(_render_indexed_profile, enumerate(cadets)):
+            yield cadets[index], pdf_bytes, error
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def profile_file_name(cadet):
+    """Name of a cadet's profile PDF inside a batch archive."""
+    return get_valid_filename(f"cadet_profile_{cadet.student_id}.pdf")
+
+
+def write_profiles_zip(cadets, output, workers=None, on_progress=None):
+    """
+    Render cadet profiles and write them into a ZIP archive.
+    
+    Args:
+        cadets: Cadet instances with grades already loaded
+        output: Writable binary file object for the archive
+        workers: Number of render processes (see get_render_workers)
+        on_progress: Called with (completed, total) after each PDF
+    
+    Returns:
+        tuple: (list of rendered entries, list of error messages)
+    """
+    cadets = list(cadets)
+    rendered = []
+    errors = []
+    
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for completed, (cadet, pdf_bytes, error) in enumerate(render_cadet_profiles(cadets, workers), start=1):
+            if error is not None:
+                error_msg = f"Error generating PDF for cadet {cadet.id}: {str(error)}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+            else:
+                file_name = profile_file_name(cadet)
+                archive.writestr(file_name, pdf_bytes)
+                rendered.append({
+                    'cadet_id': cadet.id,
+                    'student_id': cadet.student_id,
+                    'name': f"{cadet.first_name} {cadet.last_name}",
+                    'file_name': file_name
+                })
+            
+            if on_progress is not None:
+                on_progress(completed, len(cadets))
+    
+    return rendered, errors
@@ -0,0 +1,246 @@
+"""
+Content-addressed cache for rendered PDF reports.
+
+A report's cache key is a SHA-256 fingerprint of the data it is rendered
+from (the rows the generator reads, plus the report parameters), not of
+the request filters alone. Any change to the underlying grades,
+attendance or cadet rows produces a different key, so a cached report is
+never stale, and a report whose data has not changed is served without
+rendering, however long ago it was built.
+
+Rendered bytes are kept in file storage rather than in the cache backend:
+the 'reports' entry of STORAGES when configured (e.g. object storage),
+otherwise a local directory (REPORT_CACHE_DIR). The local directory is
+meant for development only: it is not shared between the web and worker
+processes of a deployment. Because keys never expire on their own, the
+prune_report_cache task removes old files and keeps the cache under a
+size limit.
+"""
+import hashlib
+import json
+import logging
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage, storages
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Bump when generator output changes so previously rendered files are not reused
+REPORT_CACHE_VERSION = 1
+
+REPORT_CACHE_PREFIX = 'report_cache'
+
+# Reports stored more recently than this (seconds) are never pruned, so a
+# finished report job stays downloadable for as long as the job is kept
+REPORT_CACHE_KEEP_RECENT = 86400
+
+
+def get_report_storage():
+    """Storage backend for rendered reports."""
+    if 'reports' in settings.STORAGES:
+        return storages['reports']
+    return FileSystemStorage(location=settings.REPORT_CACHE_DIR)
+
+
+def _dumps(value):
+    return json.dumps(value, sort_keys=True, default=str, separators=(',', ':'))
+
+
+def report_fingerprint(report_type, params, rows):
+    """
+    Fingerprint the inputs of a report.
+    
+    Rows are hashed one at a time, so they can be a queryset iterator
+    for reports too large to hold in memory.
+    
+    Args:
+        report_type: Report name (e.g. 'grades')
+        params: Parameters that change the output (filters, limit, ...)
+        rows: Iterable of the data rows the report is rendered from, in output order
+    
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256(_dumps([REPORT_CACHE_VERSION, report_type, params]).encode())
+    for row in rows:
+        digest.update(b'\n')
+        digest.update(_dumps(row).encode())
+    return digest.hexdigest()
+
+
+def _report_path(report_type, fingerprint):
+    return f"{REPORT_CACHE_PREFIX}/{report_type}/{fingerprint[:2]}/{fingerprint}.pdf"
+
+
+def get_cached_report(report_type, fingerprint):
+    """
+    Get rendered report bytes for a fingerprint.
+    
+    Returns:
+        bytes or None if the report has not been rendered (or is incomplete)
+    """
+    storage = get_report_storage()
+    name = _report_path(report_type, fingerprint)
+    try:
+        if not storage.exists(name):
+            return None
+        with storage.open(name, 'rb') as report_file:
+            pdf_bytes = report_file.read()
+    except Exception as e:
+        logger.warning(f"Report cache read error for {name}: {str(e)}")
+        return None
+    
+    # A file still being written by another worker is treated as a miss
+    if not pdf_bytes.rstrip().endswith(b'%%EOF'):
+        return None
+    return pdf_bytes
+
+
+def open_cached_report(report_type, fingerprint):
+    """
+    Open a rendered report for streaming.
+    
+    Only the end of the file is read to check that it is complete.
+    
+    Returns:
+        Open binary file (the caller closes it) or None on a miss
+    """
+    storage = get_report_storage()
+    name = _report_path(report_type, fingerprint)
+    try:
+        if not storage.exists(name):
+            return None
+        report_file = storage.open(name, 'rb')
+    except Exception as e:
+        logger.warning(f"Report cache read error for {name}: {str(e)}")
+        return None
+    
+    try:
+        report_file.seek(max(0, report_file.size - 1024))
+        complete = b'%%EOF' in report_file.read()
+        report_file.seek(0)
+    except Exception as e:
+        logger.warning(f"Report cache read error for {name}: {str(e)}")
+        complete = False
+    
+    if not complete:
+        report_file.close()
+        return None
+    return report_file
+
+
+def store_report(report_type, fingerprint, pdf_bytes):
+    """
+    Store rendered report bytes under their fingerprint.
+    
+    Existing files are left alone: the same fingerprint always renders the
+    same report.
+    """
+    storage = get_report_storage()
+    name = _report_path(report_type, fingerprint)
+    try:
+        if not storage.exists(name):
+            storage.save(name, ContentFile(pdf_bytes))
+    except Exception as e:
+        logger.warning(f"Report cache write error for {name}: {str(e)}")
+
+
+def store_report_file(report_type, fingerprint, report_file):
+    """
+    Store a rendered report from a file object without reading it into memory.
+    
+    The file is rewound before saving.
+    """
+    storage = get_report_storage()
+    name = _report_path(report_type, fingerprint)
+    try:
+        if not storage.exists(name):
+            report_file.seek(0)
+            storage.save(name, File(report_file, name=name))
+    except Exception as e:
+        logger.warning(f"Report cache write error for {name}: {str(e)}")
+
+
+def _modified_time(storage, name):
+    # Not every storage backend can report it (e.g. Cloudinary)
+    try:
+        return storage.get_modified_time(name)
+    except NotImplementedError:
+        return None
+
+
+def _iter_report_files(storage):
+    """Yield (name, size, modified time or None) for every stored report."""
+    try:
+        report_types = storage.listdir(REPORT_CACHE_PREFIX)[0]
+    except FileNotFoundError:
+        return
+    
+    for report_type in report_types:
+        type_dir = f"{REPORT_CACHE_PREFIX}/{report_type}"
+        for prefix in storage.listdir(type_dir)[0]:
+            prefix_dir = f"{type_dir}/{prefix}"
+            for file_name in storage.listdir(prefix_dir)[1]:
+                name = f"{prefix_dir}/{file_name}"
+                yield name, storage.size(name) or 0, _modified_time(storage, name)
+
+
+def prune_report_cache(max_age_days=None, max_bytes=None):
+    """
+    Delete old rendered reports and keep the cache under a size limit.
+    
+    Reports are removed oldest first while they are older than
+    max_age_days or the cache is larger than max_bytes. Reports stored in
+    the last REPORT_CACHE_KEEP_RECENT seconds are kept. When the storage
+    cannot report modification times, its reports are only removed to
+    get under the size limit.
+    
+    Args:
+        max_age_days: Maximum age (default: REPORT_CACHE_MAX_AGE_DAYS)
+        max_bytes: Maximum total size (default: REPORT_CACHE_MAX_BYTES)
+    
+    Returns:
+        dict: Deleted file count, bytes freed and bytes remaining
+    """
+    if max_age_days is None:
+        max_age_days = settings.REPORT_CACHE_MAX_AGE_DAYS
+    if max_bytes is None:
+        max_bytes = settings.REPORT_CACHE_MAX_BYTES
+    
+    storage = get_report_storage()
+    now = timezone.now()
+    # Unknown modification times sort first, then oldest first
+    files = sorted(
+        _iter_report_files(storage),
+        key=lambda item: (item[2] is not None, item[2] or now)
+    )
+    total_bytes = sum(size for _, size, _ in files)
+    deleted = 0
+    freed_bytes = 0
+    
+    for name, size, modified in files:
+        age = (now - modified).total_seconds() if modified is not None else None
+        if age is not None and age < REPORT_CACHE_KEEP_RECENT:
+            break
+        expired = age is not None and age > max_age_days * 86400
+        if not expired and total_bytes <= max_bytes:
+            # Files of unknown age come first; later ones may still be expired
+            if age is None:
+                continue
+            break
+        
+        try:
+            storage.delete(name)
+        except Exception as e:
+            logger.warning(f"Report cache delete error for {name}: {str(e)}")
+            continue
+        deleted += 1
+        freed_bytes += size
+        total_bytes -= size
+    
+    logger.info(
+        f"Pruned {deleted} cached reports ({freed_bytes} bytes), "
+        f"{total_bytes} bytes remaining"
+    )
+    return {'deleted': deleted, 'freed_bytes': freed_bytes, 'remaining_bytes': total_bytes}
@@ -5,76 +5,71 @@ import io
 import logging
 from datetime import datetime
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image as RLImage, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, Image as RLImage, PageBreak
+from reportlab.lib.enums import TA_LEFT, TA_RIGHT
 from reportlab.graphics.shapes import Drawing
 from reportlab.graphics.barcode.qr import QrCodeWidget
 from reportlab.graphics import renderPDF
 from django.utils import timezone
+from .styles import PAGE_TEMPLATE, get_style_registry
 
 logger = logging.getLogger(__name__)
 
+# Values rendered by GradeReportPDFGenerator.generate_from_rows, in order
+GRADE_REPORT_FIELDS = (
+    'id', 'student_id', 'first_name', 'last_name',
+    'grades__attendance_present', 'grades__merit_points', 'grades__demerit_points',
+    'grades__prelim_score', 'grades__midterm_score', 'grades__final_score',
+)
+
+
+def attendance_summary_rows(training_days):
+    """
+    Per-day attendance counts for training days, as one annotated query.
+    
+    Args:
+        training_days: TrainingDay queryset (unsliced)
+    
+    Returns:
+        values_list queryset of (id, date, title, present, absent, late, excused, total)
+    """
+    from django.db.models import Count, Q
+    
+    return training_days.annotate(
+        present=Count('attendance_records', filter=Q(attendance_records__status='present')),
+        absent=Count('attendance_records', filter=Q(attendance_records__status='absent')),
+        late=Count('attendance_records', filter=Q(attendance_records__status='late')),
+        excused=Count('attendance_records', filter=Q(attendance_records__status='excused')),
+        total=Count('attendance_records')
+    ).values_list('id', 'date', 'title', 'present', 'absent', 'late', 'excused', 'total')
+
 
 class PDFGenerator:
     """Base class for PDF generation with common utilities."""
     
-    def __init__(self, pagesize=letter):
+    def __init__(self, pagesize=letter, output=None):
         self.pagesize = pagesize
-        self.buffer = io.BytesIO()
-        self.styles = getSampleStyleSheet()
+        # Any writable binary file (e.g. a temporary file for large reports)
+        self.buffer = output if output is not None else io.BytesIO()
+        self.registry = get_style_registry()
+        self.styles = self.registry.stylesheet
         self._setup_custom_styles()
     
     def _setup_custom_styles(self):
-        """Set up custom paragraph styles."""
-        self.title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a237e'),
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
-        self.subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#283593'),
-            spaceAfter=20,
-            alignment=TA_CENTER
-        )
-        
-        self.section_header_style = ParagraphStyle(
-            'SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#1a237e'),
-            spaceAfter=12,
-            spaceBefore=12,
-            fontName='Helvetica-Bold'
-        )
-        
-        self.footer_style = ParagraphStyle(
-            'Footer',
-            parent=self.styles['Normal'],
-            fontSize=8,
-            alignment=TA_CENTER,
-            textColor=colors.grey
-        )
+        """Set up custom paragraph styles (shared, see apps.reports.styles)."""
+        paragraph_styles = self.registry.paragraph_styles
+        self.title_style = paragraph_styles['title']
+        self.subtitle_style = paragraph_styles['subtitle']
+        self.section_header_style = paragraph_styles['section_header']
+        self.footer_style = paragraph_styles['footer']
     
     def create_document(self, title=None):
         """Create a new PDF document."""
         self.doc = SimpleDocTemplate(
             self.buffer,
             pagesize=self.pagesize,
-            rightMargin=0.75*inch,
-            leftMargin=0.75*inch,
-            topMargin=0.75*inch,
-            bottomMargin=0.75*inch
+            **PAGE_TEMPLATE
         )
         self.elements = []
         
@@ -104,29 +99,44 @@ class PDFGenerator:
         """Add a page break."""
         self.elements.append(PageBreak())
     
-    def create_table(self, data, col_widths=None, style=None):
+    def create_table(self, data, col_widths=None, style=None, repeat_rows=0):
         """Create a formatted table."""
         if style is None:
-            style = TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ])
+            style = self.registry.table_styles['default']
         
-        table = Table(data, colWidths=col_widths)
+        table = Table(data, colWidths=col_widths, repeatRows=repeat_rows)
         table.setStyle(style)
         return table
     
-    def add_table(self, data, col_widths=None, style=None):
+    def add_table(self, data, col_widths=None, style=None, repeat_rows=0):
         """Add a table to the document."""
-        table = self.create_table(data, col_widths, style)
+        table = self.create_table(data, col_widths, style, repeat_rows)
         self.elements.append(table)
     
+    def add_table_blocks(self, header, rows, rows_per_block, col_widths=None, style=None):
+        """
+        Add rows as a sequence of fixed-size tables.
+        
+        Laying out one huge table gets slower with every page it is split
+        across; small blocks are laid out independently. Rows may be any
+        iterable (e.g. a queryset iterator) and are consumed once.
+        
+        Returns:
+            Number of rows added
+        """
+        count = 0
+        block = []
+        for row in rows:
+            block.append(row)
+            if len(block) >= rows_per_block:
+                self.add_table([header] + block, col_widths, style, repeat_rows=1)
+                count += len(block)
+                block = []
+        if block or not count:
+            self.add_table([header] + block, col_widths, style, repeat_rows=1)
+            count += len(block)
+        return count
+    
     def add_footer(self, text=None):
         """Add a footer with generation timestamp."""
         if text is None:
@@ -238,47 +248,76 @@ class CadetProfilePDFGenerator(PDFGenerator):
 class GradeReportPDFGenerator(PDFGenerator):
     """Generate grade report PDFs."""
     
-    def generate(self, cadets, filters=None):
-        """Generate a grades report PDF."""
+    HEADER = ['Student ID', 'Name', 'Attendance', 'Merit', 'Demerit', 'Prelim', 'Midterm', 'Final']
+    COL_WIDTHS = [1*inch, 1.5*inch, 0.8*inch, 0.6*inch, 0.7*inch, 0.6*inch, 0.7*inch, 0.6*inch]
+    
+    # Table rows per block (about one page)
+    ROWS_PER_BLOCK = 30
+    
+    def _title(self, filters):
         title = "Grades Report"
         if filters:
             if filters.get('company'):
                 title += f" - Company {filters['company']}"
             if filters.get('platoon'):
                 title += f" - Platoon {filters['platoon']}"
+        return title
+    
+    @staticmethod
+    def _score(value):
+        return str(value) if value is not None else '-'
+    
+    def generate(self, cadets, filters=None):
+        """Generate a grades report PDF."""
+        rows = (
+            [
+                cadet.student_id,
+                f"{cadet.first_name} {cadet.last_name}",
+                str(cadet.grades.attendance_present),
+                str(cadet.grades.merit_points),
+                str(cadet.grades.demerit_points),
+                self._score(cadet.grades.prelim_score),
+                self._score(cadet.grades.midterm_score),
+                self._score(cadet.grades.final_score),
+            ]
+            for cadet in cadets if hasattr(cadet, 'grades')
+        )
+        return self._build_report(rows, filters)
+    
+    def generate_from_rows(self, rows, filters=None):
+        """
+        Generate a grades report PDF from GRADE_REPORT_FIELDS value rows.
         
-        self.create_document(title)
-        
-        # Create grades table
-        data = [['Student ID', 'Name', 'Attendance', 'Merit', 'Demerit', 'Prelim', 'Midterm', 'Final']]
-        
-        for cadet in cadets:
-            if hasattr(cadet, 'grades'):
-                data.append([
-                    cadet.student_id,
-                    f"{cadet.first_name} {cadet.last_name}",
-                    str(cadet.grades.attendance_present),
-                    str(cadet.grades.merit_points),
-                    str(cadet.grades.demerit_points),
-                    str(cadet.grades.prelim_score) if cadet.grades.prelim_score is not None else '-',
-                    str(cadet.grades.midterm_score) if cadet.grades.midterm_score is not None else '-',
-                    str(cadet.grades.final_score) if cadet.grades.final_score is not None else '-',
-                ])
-        
-        col_widths = [1*inch, 1.5*inch, 0.8*inch, 0.6*inch, 0.7*inch, 0.6*inch, 0.7*inch, 0.6*inch]
-        
-        style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ])
-        
-        self.add_table(data, col_widths, style)
+        Intended for full reports: rows can be a values_list().iterator(),
+        so cadets are never loaded as model instances.
+        """
+        table_rows = (
+            [
+                student_id,
+                f"{first_name} {last_name}",
+                str(attendance_present),
+                str(merit_points),
+                str(demerit_points),
+                self._score(prelim_score),
+                self._score(midterm_score),
+                self._score(final_score),
+            ]
+            for (_, student_id, first_name, last_name, attendance_present, merit_points,
+                 demerit_points, prelim_score, midterm_score, final_score) in rows
+            # Cadets without a grades row
+            if attendance_present is not None
+        )
+        return self._build_report(table_rows, filters)
+    
+    def _build_report(self, rows, filters):
+        self.create_document(self._title(filters))
+        self.add_table_blocks(
+            self.HEADER,
+            rows,
+            self.ROWS_PER_BLOCK,
+            self.COL_WIDTHS,
+            self.registry.table_styles['grades']
+        )
         self.add_footer()
         
         return self.build()
@@ -287,6 +326,10 @@ class GradeReportPDFGenerator(PDFGenerator):
 class AttendanceReportPDFGenerator(PDFGenerator):
     """Generate attendance report PDFs."""
     
+    HEADER = ['Date', 'Title', 'Present', 'Absent', 'Late', 'Excused', 'Total']
+    COL_WIDTHS = [1*inch, 2*inch, 0.8*inch, 0.8*inch, 0.6*inch, 0.8*inch, 0.7*inch]
+    ROWS_PER_BLOCK = 30
+    
     def generate(self, training_days, filters=None):
         """Generate an attendance report PDF."""
         from apps.attendance.models import AttendanceRecord
@@ -323,21 +366,48 @@ class AttendanceReportPDFGenerator(PDFGenerator):
         
         col_widths = [1*inch, 2*inch, 0.8*inch, 0.8*inch, 0.6*inch, 0.8*inch, 0.7*inch]
         
-        style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ])
+        style = self.registry.table_styles['attendance']
         
         self.add_table(data, col_widths, style)
         self.add_footer()
         
         return self.build()
+    
+    def generate_from_rows(self, rows, filters=None):
+        """
+        Generate an attendance report PDF from attendance_summary_rows().
+        
+        Counts come from the rows instead of one aggregate query per
+        training day, and rows are laid out in fixed-size blocks.
+        """
+        title = "Attendance Report"
+        if filters:
+            if filters.get('date_from') and filters.get('date_to'):
+                title += f" ({filters['date_from']} to {filters['date_to']})"
+        
+        self.create_document(title)
+        table_rows = (
+            [
+                training_date.strftime('%Y-%m-%d'),
+                training_title[:30],
+                str(present),
+                str(absent),
+                str(late),
+                str(excused),
+                str(total),
+            ]
+            for _, training_date, training_title, present, absent, late, excused, total in rows
+        )
+        self.add_table_blocks(
+            self.HEADER,
+            table_rows,
+            self.ROWS_PER_BLOCK,
+            self.COL_WIDTHS,
+            self.registry.table_styles['attendance']
+        )
+        self.add_footer()
+        
+        return self.build()
 
 
 class CertificatePDFGenerator(PDFGenerator):
@@ -379,7 +449,7 @@ class CertificatePDFGenerator(PDFGenerator):
             self.add_spacer(1)
         
         # Signature line
-        sig_style = ParagraphStyle('Signature', parent=self.styles['Normal'], alignment=TA_CENTER)
+        sig_style = self.registry.paragraph_styles['signature']
         self.elements.append(Paragraph("_________________________", sig_style))
         self.elements.append(Paragraph("Authorized Signature", sig_style))
         
@@ -0,0 +1,457 @@
+"""
+Asynchronous report jobs.
+
+One path for reports that are too slow to render inside a request:
+submit a job, poll its status, download the PDF. Jobs are rendered by
+the generators in apps.reports.generators and stored in the report cache
+(apps.reports.cache), so a job whose data has not changed since the
+report was last rendered finishes without rendering.
+
+Job state lives in the Django cache (like background exports):
+
+- report_job_{job_id}: the job (status, params, file name, ...)
+- report_job_request_{key}: the job currently running for a request, so
+  identical requests submitted while it is queued or running share it
+- report_jobs_user_{user_id}: the user's recent job IDs, used to cap how
+  many jobs one user can have running at once
+"""
+import hashlib
+import json
+import logging
+import tempfile
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from apps.activities.models import Activity
+from apps.attendance.models import TrainingDay
+from apps.cadets.models import Cadet
+from apps.messaging.models import Notification
+from apps.system.models import AuditLog
+from .cache import open_cached_report, report_fingerprint, store_report_file
+from .generators import (
+    AttendanceReportPDFGenerator,
+    CadetProfilePDFGenerator,
+    CertificatePDFGenerator,
+    GradeReportPDFGenerator,
+    GRADE_REPORT_FIELDS,
+    attendance_summary_rows
+)
+
+logger = logging.getLogger(__name__)
+
+# How long job status and results stay available (seconds)
+REPORT_JOB_TIMEOUT = 86400
+
+# Rows fetched per database round trip while fingerprinting and rendering
+REPORT_ITERATOR_CHUNK_SIZE = 2000
+
+ACTIVE_STATUSES = ('queued', 'processing')
+
+# Accepted parameters per report type
+REPORT_JOB_PARAMS = {
+    'cadet_profile': ('cadet_id',),
+    'grades': ('company', 'platoon', 'limit'),
+    'attendance': ('date_from', 'date_to', 'limit'),
+    'certificate': ('activity_id', 'cadet_name'),
+}
+REQUIRED_PARAMS = {
+    'cadet_profile': ('cadet_id',),
+    'certificate': ('activity_id', 'cadet_name'),
+}
+INTEGER_PARAMS = ('cadet_id', 'activity_id', 'limit')
+
+
+class ReportJobError(Exception):
+    """A report job request is invalid (unknown type, bad parameters, missing object)."""
+
+
+class ReportJobLimitExceeded(ReportJobError):
+    """The user already has the maximum number of report jobs running."""
+
+
+def _job_key(job_id):
+    return f'report_job_{job_id}'
+
+
+def _user_jobs_key(user_id):
+    return f'report_jobs_user_{user_id}'
+
+
+def _request_key(report_type, params):
+    payload = json.dumps([report_type, params], sort_keys=True, separators=(',', ':'))
+    return f"report_job_request_{hashlib.sha256(payload.encode()).hexdigest()}"
+
+
+def normalize_report_params(report_type, params):
+    """
+    Validate report job parameters.
+    
+    Unknown and empty parameters are dropped and IDs/limits converted to
+    integers, so equivalent requests produce identical parameters.
+    
+    Raises:
+        ReportJobError: Unknown report type or invalid parameters
+    """
+    if report_type not in REPORT_JOB_PARAMS:
+        raise ReportJobError(
+            f"Unsupported report type: {report_type}. "
+            f"Supported types: {', '.join(REPORT_JOB_PARAMS)}"
+        )
+    
+    normalized = {}
+    for name in REPORT_JOB_PARAMS[report_type]:
+        value = (params or {}).get(name)
+        if value in (None, ''):
+            continue
+        if name in INTEGER_PARAMS:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ReportJobError(f"{name} must be an integer")
+            if value < 1:
+                raise ReportJobError(f"{name} must be positive")
+        else:
+            value = str(value)
+        normalized[name] = value
+    
+    missing = [name for name in REQUIRED_PARAMS.get(report_type, ()) if name not in normalized]
+    if missing:
+        raise ReportJobError(f"Missing required parameters: {', '.join(missing)}")
+    
+    return normalized
+
+
+def cadet_report_row(cadet):
+    """Values a cadet profile PDF is rendered from."""
+    row = [getattr(cadet, field.attname) for field in cadet._meta.concrete_fields]
+    grades = getattr(cadet, 'grades', None)
+    if grades is not None:
+        row.extend(getattr(grades, field.attname) for field in grades._meta.concrete_fields)
+    return row
+
+
+def certificate_verification_code(activity, cadet_name):
+    """Verification code printed on an achievement certificate."""
+    verification_data = f"{activity.id}:{cadet_name}:{activity.date}"
+    return hashlib.sha256(verification_data.encode()).hexdigest()[:16].upper()
+
+
+def _iterate(rows):
+    return lambda: rows.iterator(chunk_size=REPORT_ITERATOR_CHUNK_SIZE)
+
+
+def get_report_spec(report_type, params):
+    """
+    Describe how to fingerprint and render a report.
+    
+    Fingerprint inputs match the synchronous report views, so jobs and
+    views share rendered files.
+    
+    Args:
+        report_type: One of REPORT_JOB_PARAMS
+        params: Parameters from normalize_report_params
+    
+    Returns:
+        dict: fingerprint_params, rows (callable returning a fresh iterable
+        of the report rows), render (callable taking the output file),
+        file_name, record_id (for the audit log) and record_count (callable
+        returning the number of rows)
+    
+    Raises:
+        ReportJobError: The cadet or activity does not exist
+    """
+    if report_type == 'cadet_profile':
+        try:
+            cadet = Cadet.objects.select_related('grades').get(id=params['cadet_id'])
+        except Cadet.DoesNotExist:
+            raise ReportJobError(f"Cadet with ID {params['cadet_id']} not found")
+        return {
+            'fingerprint_params': {},
+            'rows': lambda: cadet_report_row(cadet),
+            'render': lambda output: CadetProfilePDFGenerator(output=output).generate(cadet),
+            'file_name': f"cadet_profile_{cadet.student_id}.pdf",
+            'record_id': cadet.id,
+            'record_count': lambda: 1,
+        }
+    
+    if report_type == 'certificate':
+        try:
+            activity = Activity.objects.get(id=params['activity_id'])
+        except Activity.DoesNotExist:
+            raise ReportJobError(f"Activity with ID {params['activity_id']} not found")
+        cadet_name = params['cadet_name']
+        return {
+            'fingerprint_params': {'cadet_name': cadet_name},
+            'rows': lambda: [activity.id, activity.title, activity.date, activity.description],
+            'render': lambda output: CertificatePDFGenerator(output=output).generate(
+                activity, cadet_name, certificate_verification_code(activity, cadet_name)
+            ),
+            'file_name': f"certificate_{cadet_name.replace(' ', '_')}_{activity.id}.pdf",
+            'record_id': activity.id,
+            'record_count': lambda: 1,
+        }
+    
+    if report_type == 'grades':
+        filters = {'company': params.get('company'), 'platoon': params.get('platoon')}
+        queryset = Cadet.objects.filter(is_archived=False)
+        if filters['company']:
+            queryset = queryset.filter(company=filters['company'])
+        if filters['platoon']:
+            queryset = queryset.filter(platoon=filters['platoon'])
+        
+        rows = queryset.order_by('id').values_list(*GRADE_REPORT_FIELDS)
+        if params.get('limit'):
+            rows = rows[:params['limit']]
+        iterate = _iterate(rows)
+        return {
+            'fingerprint_params': {**filters, 'full': True, **_limit_param(params)},
+            'rows': iterate,
+            'render': lambda output: GradeReportPDFGenerator(output=output).generate_from_rows(
+                iterate(), filters
+            ),
+            'file_name': f"grades_report_{filters['company'] or 'all'}_{filters['platoon'] or 'all'}_full.pdf",
+            'record_id': 0,
+            'record_count': rows.count,
+        }
+    
+    filters = {'date_from': params.get('date_from'), 'date_to': params.get('date_to')}
+    queryset = TrainingDay.objects.all()
+    if filters['date_from']:
+        queryset = queryset.filter(date__gte=filters['date_from'])
+    if filters['date_to']:
+        queryset = queryset.filter(date__lte=filters['date_to'])
+    
+    rows = attendance_summary_rows(queryset.order_by('-date', 'id'))
+    if params.get('limit'):
+        rows = rows[:params['limit']]
+    iterate = _iterate(rows)
+    return {
+        'fingerprint_params': {**filters, 'full': True, **_limit_param(params)},
+        'rows': iterate,
+        'render': lambda output: AttendanceReportPDFGenerator(output=output).generate_from_rows(
+            iterate(), filters
+        ),
+        'file_name': f"attendance_report_{filters['date_from'] or 'all'}_{filters['date_to'] or 'all'}_full.pdf",
+        'record_id': 0,
+        'record_count': rows.count,
+    }
+
+
+def _limit_param(params):
+    return {'limit': params['limit']} if params.get('limit') else {}
+
+
+def fingerprint_report_spec(report_type, spec):
+    """Fingerprint the data a report spec renders."""
+    return report_fingerprint(report_type, spec['fingerprint_params'], spec['rows']())
+
+
+def render_report_spec(report_type, spec, fingerprint):
+    """
+    Make sure the report for fingerprint is in the report cache.
+    
+    The report is rendered into a temporary file, not memory, and only
+    when it is not cached already.
+    
+    Returns:
+        bool: Whether the report was rendered
+    """
+    cached = open_cached_report(report_type, fingerprint)
+    if cached is not None:
+        cached.close()
+        return False
+    
+    with tempfile.TemporaryFile() as output:
+        spec['render'](output)
+        store_report_file(report_type, fingerprint, output)
+    
+    stored = open_cached_report(report_type, fingerprint)
+    if stored is None:
+        raise RuntimeError('Rendered report could not be stored')
+    stored.close()
+    return True
+
+
+def get_report_job(job_id):
+    """Get a report job's state, or None if it does not exist or expired."""
+    return cache.get(_job_key(job_id))
+
+
+def _save_job(job):
+    cache.set(_job_key(job['job_id']), job, timeout=REPORT_JOB_TIMEOUT)
+
+
+def _active_job_count(user_id):
+    job_ids = cache.get(_user_jobs_key(user_id), [])
+    jobs = cache.get_many([_job_key(job_id) for job_id in job_ids])
+    return sum(1 for job in jobs.values() if job['status'] in ACTIVE_STATUSES)
+
+
+def _remember_user_job(user_id, job_id):
+    job_ids = cache.get(_user_jobs_key(user_id), [])
+    # Only recent jobs can still be active
+    job_ids = (job_ids + [job_id])[-20:]
+    cache.set(_user_jobs_key(user_id), job_ids, timeout=REPORT_JOB_TIMEOUT)
+
+
+def _find_active_job(request_key):
+    job_id = cache.get(request_key)
+    if job_id is None:
+        return None
+    job = get_report_job(job_id)
+    if job is None or job['status'] not in ACTIVE_STATUSES:
+        return None
+    return job
+
+
+def submit_report_job(report_type, params, user_id, enforce_limit=True):
+    """
+    Queue a report job, or join the identical job already queued or running.
+    
+    Args:
+        report_type: One of REPORT_JOB_PARAMS
+        params: Report parameters (see normalize_report_params)
+        user_id: ID of the user requesting the report
+        enforce_limit: Apply the REPORT_JOBS_PER_USER cap
+    
+    Returns:
+        tuple: (job dict, whether a new job was created)
+    
+    Raises:
+        ReportJobError: Invalid request
+        ReportJobLimitExceeded: The user has too many jobs running
+    """
+    from .tasks import generate_report_job
+    
+    params = normalize_report_params(report_type, params)
+    request_key = _request_key(report_type, params)
+    
+    existing = _find_active_job(request_key)
+    if existing is not None:
+        logger.info(f"Report job {existing['job_id']} reused for {report_type} request")
+        return existing, False
+    
+    if enforce_limit and _active_job_count(user_id) >= settings.REPORT_JOBS_PER_USER:
+        raise ReportJobLimitExceeded(
+            f"You already have {settings.REPORT_JOBS_PER_USER} report jobs running. "
+            f"Wait for one to finish before starting another."
+        )
+    
+    # Fail fast on a missing cadet or activity
+    get_report_spec(report_type, params)
+    
+    job = {
+        'job_id': uuid.uuid4().hex,
+        'report_type': report_type,
+        'params': params,
+        'user_id': user_id,
+        'status': 'queued',
+        'request_key': request_key,
+        'created_at': timezone.now().isoformat(),
+    }
+    _save_job(job)
+    
+    # add() is atomic: of two identical requests racing here, one job wins
+    if not cache.add(request_key, job['job_id'], timeout=REPORT_JOB_TIMEOUT):
+        existing = _find_active_job(request_key)
+        if existing is not None:
+            cache.delete(_job_key(job['job_id']))
+            return existing, False
+        cache.set(request_key, job['job_id'], timeout=REPORT_JOB_TIMEOUT)
+    
+    _remember_user_job(user_id, job['job_id'])
+    
+    try:
+        generate_report_job.apply_async(args=[job['job_id']], task_id=job['job_id'])
+    except Exception as e:
+        job.update(status='failed', error=f"Could not queue report job: {str(e)}")
+        _save_job(job)
+        _release_request(job)
+        raise
+    
+    logger.info(f"Queued report job {job['job_id']} ({report_type}) for user {user_id}")
+    return job, True
+
+
+def _release_request(job):
+    # Only release the request if a newer job has not taken it over
+    if cache.get(job['request_key']) == job['job_id']:
+        cache.delete(job['request_key'])
+
+
+def run_report_job(job_id):
+    """
+    Render a queued report job (called by the generate_report_job task).
+    
+    Returns:
+        dict: Final job state, or None if the job expired
+    """
+    job = get_report_job(job_id)
+    if job is None:
+        logger.warning(f"Report job {job_id} not found or expired")
+        return None
+    
+    report_type = job['report_type']
+    job.update(status='processing', started_at=timezone.now().isoformat())
+    _save_job(job)
+    
+    try:
+        spec = get_report_spec(report_type, job['params'])
+        fingerprint = fingerprint_report_spec(report_type, spec)
+        rendered = render_report_spec(report_type, spec, fingerprint)
+        
+        job.update(
+            status='completed',
+            fingerprint=fingerprint,
+            file_name=spec['file_name'],
+            rendered=rendered,
+            finished_at=timezone.now().isoformat()
+        )
+        
+        if rendered:
+            AuditLog.objects.create(
+                table_name='reports',
+                operation='CREATE',
+                record_id=spec['record_id'],
+                user_id=job['user_id'],
+                payload={
+                    'report_type': report_type,
+                    'params': job['params'],
+                    'job_id': job_id,
+                    'generated_at': job['finished_at']
+                }
+            )
+        
+        try:
+            Notification.objects.create(
+                user_id=job['user_id'],
+                message=f"Your {report_type.replace('_', ' ')} report is ready",
+                type='report_ready'
+            )
+        except Exception as e:
+            logger.warning(f"Could not notify user {job['user_id']} about report job {job_id}: {str(e)}")
+        
+        logger.info(f"Report job {job_id} completed ({'rendered' if rendered else 'cached'})")
+    
+    except Exception as e:
+        logger.error(f"Report job {job_id} failed: {str(e)}", exc_info=True)
+        job.update(status='failed', error=str(e), finished_at=timezone.now().isoformat())
+    
+    finally:
+        _save_job(job)
+        _release_request(job)
+    
+    return job
+
+
+def open_report_job_file(job):
+    """
+    Open the PDF of a completed job.
+    
+    Returns:
+        Open binary file or None if the job is not completed or the file is gone
+    """
+    if job is None or job.get('status') != 'completed':
+        return None
+    return open_cached_report(job['report_type'], job['fingerprint'])
@@ -0,0 +1,84 @@
+"""
+Management command to benchmark per-PDF render time of the report generators.
+Uses unsaved sample objects, so it does not touch the database.
+"""
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from apps.activities.models import Activity
+from apps.cadets.models import Cadet, Grades
+from apps.reports.generators import CadetProfilePDFGenerator, CertificatePDFGenerator, GradeReportPDFGenerator
+from apps.reports.styles import get_style_registry
+
+
+def sample_cadet(index=0):
+    cadet = Cadet(
+        id=index + 1,
+        student_id=f'2024-{index:05d}',
+        first_name='Juan',
+        last_name=f'Dela Cruz {index}',
+        company='Alpha',
+        platoon='1',
+        course='BSIT',
+        year_level=2,
+        status='Ongoing',
+        birthdate=date(2004, 1, 1),
+    )
+    cadet.grades = Grades(cadet=cadet, attendance_present=12, merit_points=5, prelim_score=88.5)
+    return cadet
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks per-PDF render time for cadet profiles, grade reports and certificates'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='PDFs rendered per generator (default: 50)',
+        )
+        parser.add_argument(
+            '--grade-rows',
+            type=int,
+            default=100,
+            help='Cadets listed in each grade report (default: 100)',
+        )
+        parser.add_argument(
+            '--cold-styles',
+            action='store_true',
+            help='Rebuild the style registry before every PDF (the behaviour before styles were shared)',
+        )
+    
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        cold = options['cold_styles']
+        cadets = [sample_cadet(index) for index in range(options['grade_rows'])]
+        activity = Activity(id=1, title='Field Training Exercise', description='Annual field training.', date=date(2024, 3, 1))
+        
+        cases = [
+            ('Cadet profile', lambda: CadetProfilePDFGenerator().generate(cadets[0])),
+            (f"Grade report ({len(cadets)} rows)", lambda: GradeReportPDFGenerator().generate(cadets, {'company': 'Alpha'})),
+            ('Certificate', lambda: CertificatePDFGenerator().generate(activity, 'Juan Dela Cruz', 'ABCDEF0123456789')),
+        ]
+        
+        mode = 'cold (registry rebuilt per PDF)' if cold else 'shared registry'
+        self.stdout.write(f'Rendering {iterations} PDFs per generator, {mode}')
+        
+        for name, render in cases:
+            # Warm up imports and fonts outside the measurement
+            render()
+            timings = []
+            for _ in range(iterations):
+                if cold:
+                    get_style_registry.cache_clear()
+                start = time.perf_counter()
+                render()
+                timings.append((time.perf_counter() - start) * 1000)
+            
+            timings.sort()
+            mean = sum(timings) / len(timings)
+            median = timings[len(timings) // 2]
+            self.stdout.write(self.style.SUCCESS(
+                f'{name:<28} mean {mean:7.2f} ms  median {median:7.2f} ms  min {timings[0]:7.2f} ms'
+            ))
@@ -0,0 +1,111 @@
+"""
+Shared ReportLab style registry for PDF generators.
+
+Building the sample stylesheet, the custom paragraph styles and the table
+styles is a noticeable part of rendering a small PDF, and the result is
+the same for every document. The registry is built once per process and
+shared by all generator instances. Its mappings are read-only; styles
+must be treated as immutable (derive a new ParagraphStyle with parent=...
+instead of changing a shared one).
+"""
+from functools import lru_cache
+from types import MappingProxyType
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import TableStyle
+
+# Standard Type 1 fonts (no embedding or registration needed)
+FONTS = MappingProxyType({
+    'regular': 'Helvetica',
+    'bold': 'Helvetica-Bold',
+})
+
+# Margins used for every SimpleDocTemplate
+PAGE_TEMPLATE = MappingProxyType({
+    'rightMargin': 0.75*inch,
+    'leftMargin': 0.75*inch,
+    'topMargin': 0.75*inch,
+    'bottomMargin': 0.75*inch,
+})
+
+
+def _table_style(align, font_size, padding):
+    """Grey header row, beige body and a black grid."""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), align),
+        ('FONTNAME', (0, 0), (-1, 0), FONTS['bold']),
+        ('FONTSIZE', (0, 0), (-1, -1), font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), padding),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+
+class StyleRegistry:
+    """Read-only collection of paragraph and table styles."""
+    
+    __slots__ = ('stylesheet', 'paragraph_styles', 'table_styles')
+    
+    def __init__(self):
+        sample = getSampleStyleSheet()
+        stylesheet = {name: sample[name] for name in list(sample.byName) + list(sample.byAlias)}
+        
+        paragraph_styles = {
+            'title': ParagraphStyle(
+                'CustomTitle',
+                parent=stylesheet['Heading1'],
+                fontSize=24,
+                textColor=colors.HexColor('#1a237e'),
+                spaceAfter=30,
+                alignment=TA_CENTER,
+                fontName=FONTS['bold']
+            ),
+            'subtitle': ParagraphStyle(
+                'CustomSubtitle',
+                parent=stylesheet['Heading2'],
+                fontSize=16,
+                textColor=colors.HexColor('#283593'),
+                spaceAfter=20,
+                alignment=TA_CENTER
+            ),
+            'section_header': ParagraphStyle(
+                'SectionHeader',
+                parent=stylesheet['Heading2'],
+                fontSize=14,
+                textColor=colors.HexColor('#1a237e'),
+                spaceAfter=12,
+                spaceBefore=12,
+                fontName=FONTS['bold']
+            ),
+            'footer': ParagraphStyle(
+                'Footer',
+                parent=stylesheet['Normal'],
+                fontSize=8,
+                alignment=TA_CENTER,
+                textColor=colors.grey
+            ),
+            'signature': ParagraphStyle('Signature', parent=stylesheet['Normal'], alignment=TA_CENTER),
+        }
+        
+        table_styles = {
+            'default': _table_style('LEFT', 10, 12),
+            'grades': _table_style('CENTER', 8, 8),
+            'attendance': _table_style('CENTER', 9, 8),
+        }
+        
+        object.__setattr__(self, 'stylesheet', MappingProxyType(stylesheet))
+        object.__setattr__(self, 'paragraph_styles', MappingProxyType(paragraph_styles))
+        object.__setattr__(self, 'table_styles', MappingProxyType(table_styles))
+    
+    def __setattr__(self, name, value):
+        raise AttributeError('StyleRegistry is read-only')
+
+
+@lru_cache(maxsize=None)
+def get_style_registry():
+    """Return the process-wide style registry, building it on first use."""
+    return StyleRegistry()
@@ -2,6 +2,7 @@
 Celery tasks for batch PDF generation.
 """
 import logging
+import tempfile
 from celery import shared_task
 from django.core.cache import cache
 from django.utils import timezone
@@ -9,7 +10,7 @@ import cloudinary.uploader
 from apps.cadets.models import Cadet
 from apps.system.models import AuditLog
 from apps.messaging.models import Notification
-from .generators import CadetProfilePDFGenerator, GradeReportPDFGenerator
+from .batch import write_profiles_zip
 
 logger = logging.getLogger(__name__)
 
@@ -19,62 +20,55 @@ def batch_generate_cadet_pdfs(self, cadet_ids, user_id):
     """
     Generate PDF reports for multiple cadets in batch.
     
+    Profiles are rendered in parallel (see apps.reports.batch), bundled
+    into one ZIP archive and uploaded once. Progress is published as
+    PROGRESS task state.
+    
     Args:
         cadet_ids: List of cadet IDs to generate PDFs for
         user_id: ID of the user requesting the batch generation
     
     Returns:
-        dict: Batch generation results with URLs
+        dict: Batch generation results with the URL of the ZIP bundle
     """
     try:
         logger.info(f"Starting batch PDF generation for {len(cadet_ids)} cadets")
         
-        results = []
-        success_count = 0
-        error_count = 0
-        errors = []
+        # One query for every cadet and its grades
+        cadets = Cadet.objects.select_related('grades').in_bulk(cadet_ids)
+        errors = [f"Cadet {cadet_id} not found" for cadet_id in cadet_ids if cadet_id not in cadets]
+        for error_msg in errors:
+            logger.error(error_msg)
         
-        for cadet_id in cadet_ids:
-            try:
-                # Get cadet with grades
-                cadet = Cadet.objects.select_related('grades').get(id=cadet_id)
-                
-                # Generate PDF
-                generator = CadetProfilePDFGenerator()
-                pdf_buffer = generator.generate(cadet)
-                pdf_buffer.seek(0)
-                
-                # Upload to Cloudinary
+        def report_progress(completed, total):
+            self.update_state(state='PROGRESS', meta={'current': completed, 'total': total})
+        
+        bundle = None
+        with tempfile.TemporaryFile() as archive:
+            results, render_errors = write_profiles_zip(
+                cadets.values(),
+                archive,
+                on_progress=report_progress
+            )
+            errors.extend(render_errors)
+            
+            # Upload the whole batch once
+            if results:
+                archive.seek(0)
                 upload_result = cloudinary.uploader.upload(
-                    pdf_buffer,
+                    archive,
                     folder="rotc/reports/batch",
                     resource_type='raw',
-                    public_id=f"cadet_profile_{cadet.student_id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}",
-                    format='pdf'
+                    public_id=f"cadet_profiles_{timezone.now().strftime('%Y%m%d_%H%M%S')}",
+                    format='zip'
                 )
-                
-                results.append({
-                    'cadet_id': cadet_id,
-                    'student_id': cadet.student_id,
-                    'name': f"{cadet.first_name} {cadet.last_name}",
+                bundle = {
                     'url': upload_result['secure_url'],
                     'public_id': upload_result['public_id']
-                })
-                
-                success_count += 1
-                logger.info(f"Generated PDF for cadet {cadet_id}")
-                
-            except Cadet.DoesNotExist:
-                error_count += 1
-                error_msg = f"Cadet {cadet_id} not found"
-                logger.error(error_msg)
-                errors.append(error_msg)
-                
-            except Exception as e:
-                error_count += 1
-                error_msg = f"Error generating PDF for cadet {cadet_id}: {str(e)}"
-                logger.error(error_msg)
-                errors.append(error_msg)
+                }
+        
+        success_count = len(results)
+        error_count = len(errors)
         
         # Log the batch operation
         AuditLog.objects.create(
@@ -103,6 +97,7 @@ def batch_generate_cadet_pdfs(self, cadet_ids, user_id):
             'success_count': success_count,
             'error_count': error_count,
             'total': len(cadet_ids),
+            'bundle': bundle,
             'results': results,
             'errors': errors[:10]  # Limit to first 10 errors
         }
@@ -259,3 +254,42 @@ def batch_generate_certificates(self, activity_id, cadet_names, user_id):
             pass
         
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+
+
+@shared_task(bind=True)
+def generate_report_job(self, job_id):
+    """
+    Render a report job submitted with apps.reports.jobs.submit_report_job.
+    
+    The Celery task ID is the job ID; status and the finished PDF are
+    read through the report job endpoints.
+    
+    Args:
+        job_id: ID of the report job
+    
+    Returns:
+        dict: Final job status
+    """
+    from .jobs import run_report_job
+    
+    job = run_report_job(job_id)
+    if job is None:
+        return {'job_id': job_id, 'status': 'expired'}
+    return {'job_id': job_id, 'status': job['status'], 'error': job.get('error')}
+
+
+@shared_task(name='prune_report_cache')
+def prune_report_cache_task(max_age_days=None, max_bytes=None):
+    """
+    Delete old cached reports and keep the report cache under its size limit.
+    
+    Args:
+        max_age_days: Maximum age (default: REPORT_CACHE_MAX_AGE_DAYS)
+        max_bytes: Maximum total size (default: REPORT_CACHE_MAX_BYTES)
+    
+    Returns:
+        dict: Deleted file count, bytes freed and bytes remaining
+    """
+    from .cache import prune_report_cache
+    
+    return prune_report_cache(max_age_days, max_bytes)
@@ -20,4 +20,9 @@ urlpatterns = [
     # Batch PDF generation
     path('batch/cadets', views.batch_cadet_pdfs, name='batch-cadet-pdfs'),
     path('batch/certificates', views.batch_certificates, name='batch-certificates'),
+    
+    # Report jobs
+    path('jobs', views.report_jobs, name='report-jobs'),
+    path('jobs/<str:job_id>', views.report_job_status, name='report-job-status'),
+    path('jobs/<str:job_id>/download', views.report_job_download, name='report-job-download'),
 ]
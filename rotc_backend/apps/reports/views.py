@@ -2,9 +2,10 @@
 API views for PDF report generation.
 """
 import logging
-import hashlib
-from django.http import HttpResponse, JsonResponse
-from django.core.cache import cache
+import tempfile
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -18,21 +19,116 @@ from .generators import (
     CadetProfilePDFGenerator,
     GradeReportPDFGenerator,
     AttendanceReportPDFGenerator,
-    CertificatePDFGenerator
+    CertificatePDFGenerator,
+    GRADE_REPORT_FIELDS,
+    attendance_summary_rows
+)
+from .jobs import (
+    ReportJobError,
+    ReportJobLimitExceeded,
+    cadet_report_row,
+    certificate_verification_code,
+    fingerprint_report_spec,
+    get_report_job,
+    get_report_spec,
+    normalize_report_params,
+    open_report_job_file,
+    submit_report_job
+)
+from .cache import (
+    get_cached_report,
+    open_cached_report,
+    report_fingerprint,
+    store_report,
+    store_report_file
 )
 from .tasks import batch_generate_cadet_pdfs, batch_generate_certificates
 
 logger = logging.getLogger(__name__)
 
 
-def get_cache_key(report_type, **kwargs):
-    """Generate a cache key for PDF reports."""
-    key_parts = [report_type]
-    for k, v in sorted(kwargs.items()):
-        key_parts.append(f"{k}:{v}")
-    key_string = "|".join(key_parts)
-    hash_key = hashlib.md5(key_string.encode()).hexdigest()
-    return f"pdf_report:{hash_key}"
+def attendance_report_rows(training_days, limit):
+    """Per-day attendance counts for an attendance report, in one query."""
+    return list(attendance_summary_rows(training_days)[:limit])
+
+
+def is_full_report(request):
+    """Whether a report request asks for every matching row (?full=true)."""
+    return request.GET.get('full', '').lower() in ('1', 'true', 'yes')
+
+
+def is_async_report(request):
+    """Whether a report request asks to be rendered as a report job (?async=true)."""
+    return request.GET.get('async', '').lower() in ('1', 'true', 'yes')
+
+
+def queue_report_job(request, report_type, params):
+    """
+    Submit a report job for a request and describe it in a 202 response.
+    
+    Returns:
+        JsonResponse: 202 with the job ID and status URL, 400 for invalid
+        parameters or 429 when the user has too many jobs running
+    """
+    try:
+        job, created = submit_report_job(report_type, params, request.user.id)
+    except ReportJobLimitExceeded as e:
+        return JsonResponse({
+            'error': True,
+            'message': str(e)
+        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    except ReportJobError as e:
+        return JsonResponse({
+            'error': True,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return JsonResponse({
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'deduplicated': not created,
+        'message': f'Report job queued for {report_type} report' if created
+        else f'Joined the {report_type} report job already in progress',
+        'status_url': reverse('report-job-status', args=[job['job_id']])
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+def stream_chunked_report(report_type, fingerprint, render, filename):
+    """
+    Serve a full report from the report cache, rendering it on a miss.
+    
+    The PDF is rendered into a temporary file instead of memory and
+    streamed back with a FileResponse, which closes the file when done.
+    
+    Args:
+        report_type: Report name used in the cache path
+        fingerprint: report_fingerprint() of the report rows
+        render: Callable taking the writable output file
+        filename: Download file name
+    
+    Returns:
+        tuple: (FileResponse, whether the report was rendered)
+    """
+    report_file = open_cached_report(report_type, fingerprint)
+    rendered = report_file is None
+    
+    if rendered:
+        report_file = tempfile.TemporaryFile()
+        try:
+            render(report_file)
+            store_report_file(report_type, fingerprint, report_file)
+            report_file.seek(0)
+        except Exception:
+            report_file.close()
+            raise
+    
+    response = FileResponse(
+        report_file,
+        as_attachment=True,
+        filename=filename,
+        content_type='application/pdf'
+    )
+    return response, rendered
 
 
 @api_view(['GET'])
@@ -47,16 +143,6 @@ def cadet_profile_pdf(request, cadet_id):
         PDF file with cadet profile information
     """
     try:
-        # Check cache first
-        cache_key = get_cache_key('cadet_profile', cadet_id=cadet_id)
-        cached_pdf = cache.get(cache_key)
-        
-        if cached_pdf:
-            logger.info(f"Returning cached PDF for cadet {cadet_id}")
-            response = HttpResponse(cached_pdf, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="cadet_profile_{cadet_id}.pdf"'
-            return response
-        
         # Get cadet with grades
         try:
             cadet = Cadet.objects.select_related('grades').get(id=cadet_id)
@@ -66,13 +152,21 @@ def cadet_profile_pdf(request, cadet_id):
                 'message': f'Cadet with ID {cadet_id} not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
+        # The profile only changes when the cadet or its grades change
+        fingerprint = report_fingerprint('cadet_profile', {}, cadet_report_row(cadet))
+        cached_pdf = get_cached_report('cadet_profile', fingerprint)
+        
+        if cached_pdf:
+            logger.info(f"Returning cached PDF for cadet {cadet_id}")
+            response = HttpResponse(cached_pdf, content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="cadet_profile_{cadet.student_id}.pdf"'
+            return response
+        
         # Generate PDF
         generator = CadetProfilePDFGenerator()
         pdf_buffer = generator.generate(cadet)
         pdf_bytes = pdf_buffer.getvalue()
-        
-        # Cache the PDF for 1 hour
-        cache.set(cache_key, pdf_bytes, 3600)
+        store_report('cadet_profile', fingerprint, pdf_bytes)
         
         # Log the operation
         AuditLog.objects.create(
@@ -109,12 +203,13 @@ def grade_report_pdf(request):
     """
     Generate a PDF report for grades.
     
-    GET /api/reports/grades?company=&platoon=&limit=50
+    GET /api/reports/grades?company=&platoon=&limit=50&full=false
     
     Query Parameters:
         - company: Filter by company
         - platoon: Filter by platoon
         - limit: Maximum number of cadets (default: 50)
+        - full: Include every matching cadet, ignoring limit (default: false)
     
     Returns:
         PDF file with grades report
@@ -125,16 +220,6 @@ def grade_report_pdf(request):
         platoon = request.GET.get('platoon')
         limit = int(request.GET.get('limit', 50))
         
-        # Build cache key
-        cache_key = get_cache_key('grades', company=company, platoon=platoon, limit=limit)
-        cached_pdf = cache.get(cache_key)
-        
-        if cached_pdf:
-            logger.info("Returning cached grades report PDF")
-            response = HttpResponse(cached_pdf, content_type='application/pdf')
-            response['Content-Disposition'] = 'attachment; filename="grades_report.pdf"'
-            return response
-        
         # Query cadets with filters
         queryset = Cadet.objects.select_related('grades').filter(is_archived=False)
         
@@ -143,22 +228,36 @@ def grade_report_pdf(request):
         if platoon:
             queryset = queryset.filter(platoon=platoon)
         
-        cadets = queryset[:limit]
+        filters = {'company': company, 'platoon': platoon}
+        
+        if is_full_report(request):
+            return full_report_pdf(request, 'grades', filters, 'No cadets found matching the filters')
+        if is_async_report(request):
+            return queue_report_job(request, 'grades', {**filters, 'limit': limit})
+        
+        # Fingerprint the rows the report is rendered from
+        rows = list(queryset.order_by('id').values_list(*GRADE_REPORT_FIELDS)[:limit])
         
-        if not cadets:
+        if not rows:
             return JsonResponse({
                 'error': True,
                 'message': 'No cadets found matching the filters'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Generate PDF
-        filters = {'company': company, 'platoon': platoon}
+        fingerprint = report_fingerprint('grades', filters, rows)
+        cached_pdf = get_cached_report('grades', fingerprint)
+        
+        if cached_pdf:
+            logger.info("Returning cached grades report PDF")
+            response = HttpResponse(cached_pdf, content_type='application/pdf')
+            response['Content-Disposition'] = 'attachment; filename="grades_report.pdf"'
+            return response
+        
+        # Render from the same rows so the PDF matches its fingerprint
         generator = GradeReportPDFGenerator()
-        pdf_buffer = generator.generate(cadets, filters)
+        pdf_buffer = generator.generate_from_rows(rows, filters)
         pdf_bytes = pdf_buffer.getvalue()
-        
-        # Cache the PDF for 1 hour
-        cache.set(cache_key, pdf_bytes, 3600)
+        store_report('grades', fingerprint, pdf_bytes)
         
         # Log the operation
         AuditLog.objects.create(
@@ -169,7 +268,7 @@ def grade_report_pdf(request):
             payload={
                 'report_type': 'grades',
                 'filters': filters,
-                'cadet_count': len(cadets),
+                'cadet_count': len(rows),
                 'generated_at': timezone.now().isoformat()
             }
         )
@@ -179,7 +278,7 @@ def grade_report_pdf(request):
         response = HttpResponse(pdf_bytes, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         
-        logger.info(f"Generated grades report PDF with {len(cadets)} cadets")
+        logger.info(f"Generated grades report PDF with {len(rows)} cadets")
         return response
         
     except Exception as e:
@@ -191,18 +290,65 @@ def grade_report_pdf(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def full_report_pdf(request, report_type, params, not_found_message):
+    """
+    Report over every matching row, rendered in table blocks.
+    
+    Rows are read with iterator() (once to fingerprint, once to render on
+    a cache miss), so they are never held in memory as a whole. Reports
+    with more than REPORT_ASYNC_THRESHOLD rows, or requested with
+    ?async=true, are handed to a report job and answered with 202.
+    """
+    params = normalize_report_params(report_type, params)
+    spec = get_report_spec(report_type, params)
+    record_count = spec['record_count']()
+    
+    if not record_count:
+        return JsonResponse({
+            'error': True,
+            'message': not_found_message
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if is_async_report(request) or record_count > settings.REPORT_ASYNC_THRESHOLD:
+        return queue_report_job(request, report_type, params)
+    
+    fingerprint = fingerprint_report_spec(report_type, spec)
+    response, rendered = stream_chunked_report(report_type, fingerprint, spec['render'], spec['file_name'])
+    
+    if rendered:
+        AuditLog.objects.create(
+            table_name='reports',
+            operation='CREATE',
+            record_id=0,
+            user_id=request.user.id,
+            payload={
+                'report_type': report_type,
+                'filters': params,
+                'full': True,
+                'record_count': record_count,
+                'generated_at': timezone.now().isoformat()
+            }
+        )
+        logger.info(f"Generated full {report_type} report PDF with {record_count} rows")
+    else:
+        logger.info(f"Returning cached full {report_type} report PDF")
+    
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdmin | IsTrainingStaff])
 def attendance_report_pdf(request):
     """
     Generate a PDF report for attendance.
     
-    GET /api/reports/attendance?date_from=&date_to=&limit=30
+    GET /api/reports/attendance?date_from=&date_to=&limit=30&full=false
     
     Query Parameters:
         - date_from: Start date (YYYY-MM-DD)
         - date_to: End date (YYYY-MM-DD)
         - limit: Maximum number of training days (default: 30)
+        - full: Include every matching training day, ignoring limit (default: false)
     
     Returns:
         PDF file with attendance report
@@ -213,40 +359,45 @@ def attendance_report_pdf(request):
         date_to = request.GET.get('date_to')
         limit = int(request.GET.get('limit', 30))
         
-        # Build cache key
-        cache_key = get_cache_key('attendance', date_from=date_from, date_to=date_to, limit=limit)
-        cached_pdf = cache.get(cache_key)
-        
-        if cached_pdf:
-            logger.info("Returning cached attendance report PDF")
-            response = HttpResponse(cached_pdf, content_type='application/pdf')
-            response['Content-Disposition'] = 'attachment; filename="attendance_report.pdf"'
-            return response
-        
         # Query training days with filters
-        queryset = TrainingDay.objects.all().order_by('-date')
+        queryset = TrainingDay.objects.all().order_by('-date', 'id')
         
         if date_from:
             queryset = queryset.filter(date__gte=date_from)
         if date_to:
             queryset = queryset.filter(date__lte=date_to)
         
-        training_days = queryset[:limit]
+        filters = {'date_from': date_from, 'date_to': date_to}
+        
+        if is_full_report(request):
+            return full_report_pdf(request, 'attendance', filters, 'No training days found matching the filters')
+        if is_async_report(request):
+            return queue_report_job(request, 'attendance', {**filters, 'limit': limit})
         
-        if not training_days:
+        # Fingerprint the per-day attendance counts the report shows
+        rows = attendance_report_rows(queryset, limit)
+        
+        if not rows:
             return JsonResponse({
                 'error': True,
                 'message': 'No training days found matching the filters'
             }, status=status.HTTP_404_NOT_FOUND)
         
+        fingerprint = report_fingerprint('attendance', filters, rows)
+        cached_pdf = get_cached_report('attendance', fingerprint)
+        
+        if cached_pdf:
+            logger.info("Returning cached attendance report PDF")
+            response = HttpResponse(cached_pdf, content_type='application/pdf')
+            response['Content-Disposition'] = 'attachment; filename="attendance_report.pdf"'
+            return response
+        
         # Generate PDF
-        filters = {'date_from': date_from, 'date_to': date_to}
+        # Render from the same rows so the PDF matches its fingerprint
         generator = AttendanceReportPDFGenerator()
-        pdf_buffer = generator.generate(training_days, filters)
+        pdf_buffer = generator.generate_from_rows(rows, filters)
         pdf_bytes = pdf_buffer.getvalue()
-        
-        # Cache the PDF for 1 hour
-        cache.set(cache_key, pdf_bytes, 3600)
+        store_report('attendance', fingerprint, pdf_bytes)
         
         # Log the operation
         AuditLog.objects.create(
@@ -257,7 +408,7 @@ def attendance_report_pdf(request):
             payload={
                 'report_type': 'attendance',
                 'filters': filters,
-                'training_day_count': len(training_days),
+                'training_day_count': len(rows),
                 'generated_at': timezone.now().isoformat()
             }
         )
@@ -267,7 +418,7 @@ def attendance_report_pdf(request):
         response = HttpResponse(pdf_bytes, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         
-        logger.info(f"Generated attendance report PDF with {len(training_days)} training days")
+        logger.info(f"Generated attendance report PDF with {len(rows)} training days")
         return response
         
     except Exception as e:
@@ -303,16 +454,6 @@ def achievement_certificate_pdf(request, activity_id):
                 'message': 'cadet_name query parameter is required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check cache first
-        cache_key = get_cache_key('certificate', activity_id=activity_id, cadet_name=cadet_name)
-        cached_pdf = cache.get(cache_key)
-        
-        if cached_pdf:
-            logger.info(f"Returning cached certificate for activity {activity_id}")
-            response = HttpResponse(cached_pdf, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="certificate_{activity_id}.pdf"'
-            return response
-        
         # Get activity
         try:
             activity = Activity.objects.get(id=activity_id)
@@ -322,17 +463,27 @@ def achievement_certificate_pdf(request, activity_id):
                 'message': f'Activity with ID {activity_id} not found'
             }, status=status.HTTP_404_NOT_FOUND)
         
+        fingerprint = report_fingerprint(
+            'certificate',
+            {'cadet_name': cadet_name},
+            [activity.id, activity.title, activity.date, activity.description]
+        )
+        cached_pdf = get_cached_report('certificate', fingerprint)
+        
+        if cached_pdf:
+            logger.info(f"Returning cached certificate for activity {activity_id}")
+            response = HttpResponse(cached_pdf, content_type='application/pdf')
+            response['Content-Disposition'] = f'attachment; filename="certificate_{activity_id}.pdf"'
+            return response
+        
         # Generate verification code
-        verification_data = f"{activity_id}:{cadet_name}:{activity.date}"
-        verification_code = hashlib.sha256(verification_data.encode()).hexdigest()[:16].upper()
+        verification_code = certificate_verification_code(activity, cadet_name)
         
         # Generate PDF
         generator = CertificatePDFGenerator()
         pdf_buffer = generator.generate(activity, cadet_name, verification_code)
         pdf_bytes = pdf_buffer.getvalue()
-        
-        # Cache the PDF for 1 hour
-        cache.set(cache_key, pdf_bytes, 3600)
+        store_report('certificate', fingerprint, pdf_bytes)
         
         # Log the operation
         AuditLog.objects.create(
@@ -477,3 +628,108 @@ def batch_certificates(request):
             'message': 'Failed to queue batch certificate generation',
             'details': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdmin | IsTrainingStaff])
+def report_jobs(request):
+    """
+    Submit a report job.
+    
+    POST /api/reports/jobs
+    
+    Request Body:
+        {
+            "report_type": "grades",
+            "params": {"company": "Alpha"}
+        }
+    
+    Report types and params:
+        - cadet_profile: cadet_id
+        - grades: company, platoon, limit
+        - attendance: date_from, date_to, limit
+        - certificate: activity_id, cadet_name
+    
+    Identical requests made while a job is queued or running share that
+    job. Each user can have REPORT_JOBS_PER_USER jobs running at once.
+    
+    Returns:
+        202 with the job ID and status URL
+    """
+    try:
+        report_type = request.data.get('report_type')
+        params = request.data.get('params') or {}
+        
+        if not isinstance(params, dict):
+            return JsonResponse({
+                'error': True,
+                'message': 'params must be an object'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return queue_report_job(request, report_type, params)
+        
+    except Exception as e:
+        logger.error(f"Error queuing report job: {str(e)}", exc_info=True)
+        return JsonResponse({
+            'error': True,
+            'message': 'Failed to queue report job',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin | IsTrainingStaff])
+def report_job_status(request, job_id):
+    """
+    Get the status of a report job.
+    
+    GET /api/reports/jobs/:job_id
+    
+    Returns:
+        Job status (queued, processing, completed or failed) with a
+        download URL once completed
+    """
+    job = get_report_job(job_id)
+    
+    if not job:
+        return JsonResponse({
+            'error': True,
+            'message': 'Report job not found or expired'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    response_data = {
+        key: value for key, value in job.items()
+        if key not in ('fingerprint', 'request_key')
+    }
+    if job['status'] == 'completed':
+        response_data['download_url'] = reverse('report-job-download', args=[job_id])
+    
+    return JsonResponse(response_data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdmin | IsTrainingStaff])
+def report_job_download(request, job_id):
+    """
+    Download the PDF produced by a report job.
+    
+    GET /api/reports/jobs/:job_id/download
+    
+    Returns:
+        PDF file
+    """
+    job = get_report_job(job_id)
+    report_file = open_report_job_file(job)
+    
+    if report_file is None:
+        return JsonResponse({
+            'error': True,
+            'message': 'Report not found, expired or not finished'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    return FileResponse(
+        report_file,
+        as_attachment=True,
+        filename=job['file_name'],
+        content_type='application/pdf'
+    )
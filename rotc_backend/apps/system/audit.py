@@ -0,0 +1,85 @@
+"""
+Buffered audit log writer.
+
+Audit entries recorded by model signals are collected per transaction and
+inserted with a single bulk_create after it commits, instead of one INSERT
+per saved row inside the request. Entries of a rolled back transaction are
+dropped together with the change they describe.
+
+Set AUDIT_LOG_GUARANTEED_DELIVERY = True to write each entry immediately in
+the same transaction as the change, so the audit row commits (or rolls
+back) atomically with it.
+"""
+import logging
+from django.conf import settings
+from apps.system.models import AuditLog
+from core.commit_buffer import CommitBuffer
+
+logger = logging.getLogger(__name__)
+
+AUDIT_LOG_BATCH_SIZE = 500
+
+
+def _write_audit_logs(entries):
+    """Insert buffered audit entries in one bulk_create."""
+    AuditLog.objects.bulk_create(
+        [AuditLog(**entry) for entry in entries],
+        batch_size=AUDIT_LOG_BATCH_SIZE
+    )
+    logger.debug(f"Wrote {len(entries)} audit log entries")
+
+
+audit_buffer = CommitBuffer(_write_audit_logs, name='audit log writer')
+
+
+def record_audit(table_name, operation, record_id, user_id=None, payload=None):
+    """
+    Record an audit log entry for a data modification.
+    
+    Args:
+        table_name: Name of the table that was modified
+        operation: Operation performed (CREATE, UPDATE, DELETE, ...)
+        record_id: ID of the modified record
+        user_id: ID of the user who made the change (if known)
+        payload: Sanitized snapshot of the record
+    """
+    entry = {
+        'table_name': table_name,
+        'operation': operation,
+        'record_id': record_id,
+        'user_id': user_id,
+        'payload': payload if payload is not None else {},
+    }
+    
+    if getattr(settings, 'AUDIT_LOG_GUARANTEED_DELIVERY', False):
+        AuditLog.objects.create(**entry)
+        return
+    
+    audit_buffer.add(entry)
+
+
+def _json_value(value):
+    """Convert a field value to something JSONField can store."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (str, int, float, bool, dict, list, type(None))):
+        return value
+    return str(value)
+
+
+def serialize_changes(instance):
+    """
+    Build the audit diff of a model instance using FieldTrackingMixin.
+    
+    Args:
+        instance: Model instance, usually inside a post_save handler
+    
+    Returns:
+        Dict mapping changed field attname to {'old': ..., 'new': ...}; empty
+        for models without field tracking
+    """
+    changes = getattr(instance, 'changed_fields', None) or {}
+    return {
+        attname: {'old': _json_value(old), 'new': _json_value(new)}
+        for attname, (old, new) in changes.items()
+    }
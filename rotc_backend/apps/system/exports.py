@@ -0,0 +1,73 @@
+"""
+Streaming audit log exports.
+
+Audit logs are read with a server-side cursor (QuerySet.iterator) and
+written out row by row, so memory use stays constant no matter how many
+rows are exported: CSV is streamed straight to the client, XLSX is built
+with openpyxl's write-only mode into a temporary file that is then
+streamed from disk.
+"""
+import json
+from apps.integration.exporters import StreamingCSVExporter, StreamingExcelExporter
+
+AUDIT_EXPORT_HEADERS = ['ID', 'Table Name', 'Operation', 'Record ID', 'User ID', 'Payload', 'Created At']
+AUDIT_EXPORT_FIELDS = ['id', 'table_name', 'operation', 'record_id', 'user_id', 'payload', 'created_at']
+AUDIT_EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_audit_log_rows(queryset, chunk_size=AUDIT_EXPORT_CHUNK_SIZE):
+    """
+    Yield export rows for audit logs without loading them all.
+    
+    Args:
+        queryset: AuditLog queryset (filtered and ordered)
+        chunk_size: Rows fetched per round trip from the server-side cursor
+    
+    Yields:
+        List of cell values in AUDIT_EXPORT_HEADERS order
+    """
+    rows = queryset.values_list(*AUDIT_EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for log_id, table_name, operation, record_id, user_id, payload, created_at in rows:
+        yield [
+            log_id,
+            table_name,
+            operation,
+            record_id,
+            user_id or '',
+            json.dumps(payload),
+            created_at.strftime('%Y-%m-%d %H:%M:%S')
+        ]
+
+
+def stream_audit_logs_csv(queryset, filename):
+    """
+    Stream audit logs as a CSV download.
+    
+    Args:
+        queryset: AuditLog queryset to export
+        filename: Download file name
+    
+    Returns:
+        StreamingHttpResponse producing one CSV line per audit log
+    """
+    return StreamingCSVExporter.export_to_response(iter_audit_log_rows(queryset), filename, AUDIT_EXPORT_HEADERS)
+
+
+def audit_logs_xlsx_response(queryset, filename):
+    """
+    Export audit logs as an XLSX download using openpyxl write-only mode.
+    
+    Rows are appended straight from the database cursor and the workbook is
+    saved to a temporary file, which is streamed and removed once the
+    response is closed.
+    
+    Args:
+        queryset: AuditLog queryset to export
+        filename: Download file name
+    
+    Returns:
+        FileResponse streaming the workbook
+    """
+    return StreamingExcelExporter.export_to_response(
+        iter_audit_log_rows(queryset), filename, AUDIT_EXPORT_HEADERS, sheet_name="Audit Logs"
+    )
@@ -0,0 +1,461 @@
+"""
+In-process request metrics aggregation for ROTC Backend.
+
+Each worker accumulates counters and fixed-bucket histograms (latency, DB
+time and query count per route template) in memory and flushes them to the
+shared cache in one batch every METRICS_FLUSH_INTERVAL seconds. Counters are
+merged with atomic increments (one pipelined round trip on Redis, skipping
+empty buckets), so concurrent workers never overwrite each other's numbers.
+
+The same observations are also recorded as Prometheus histograms. When
+PROMETHEUS_MULTIPROC_DIR is set (see gunicorn.conf.py) prometheus_client
+aggregates them across all worker processes.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import prometheus_client
+except ImportError:  # pragma: no cover - prometheus-client is optional at runtime
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the latency histogram buckets; the last
+# bucket catches everything slower
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+# Upper bounds of the queries-per-request histogram buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, float('inf'))
+
+# Histogram name -> bucket upper bounds
+HISTOGRAM_BUCKETS = {
+    'latency': LATENCY_BUCKETS_MS,
+    'db_time': LATENCY_BUCKETS_MS,
+    'query_count': QUERY_COUNT_BUCKETS,
+}
+
+# Endpoint label used for requests that did not resolve to a route
+UNMATCHED_ENDPOINT = '<unmatched>'
+
+# Slow request threshold in milliseconds
+SLOW_REQUEST_MS = 1000
+
+# Bounded history lengths kept in the shared cache
+MAX_RESPONSE_TIME_SAMPLES = 1000
+MAX_SLOW_REQUESTS = 100
+
+METRICS_TIMEOUT = 3600  # 1 hour
+ACTIVE_SESSION_TIMEOUT = 1800  # 30 minutes
+
+
+def bucket_index(value, bounds=LATENCY_BUCKETS_MS):
+    """Return the index of the histogram bucket a value falls into."""
+    for index, upper_bound in enumerate(bounds):
+        if value <= upper_bound:
+            return index
+    return len(bounds) - 1
+
+
+def histogram_quantile(quantile, buckets, bounds=LATENCY_BUCKETS_MS):
+    """
+    Estimate a quantile from histogram bucket counts.
+    
+    Interpolates linearly inside the bucket containing the quantile, like
+    Prometheus' histogram_quantile(). Values in the overflow bucket are
+    reported as the highest finite bound.
+    
+    Args:
+        quantile: Quantile between 0 and 1 (e.g. 0.99)
+        buckets: Per-bucket (non-cumulative) counts
+        bounds: Bucket upper bounds
+    
+    Returns:
+        Estimated value, or 0 if the histogram is empty
+    """
+    total = sum(buckets)
+    if total == 0:
+        return 0
+    
+    rank = quantile * total
+    cumulative = 0
+    for index, count in enumerate(buckets):
+        if count and cumulative + count >= rank:
+            upper = bounds[index]
+            lower = bounds[index - 1] if index > 0 else 0
+            if upper == float('inf'):
+                return lower
+            return lower + (upper - lower) * ((rank - cumulative) / count)
+        cumulative += count
+    return bounds[-2]
+
+
+def _histogram_prefix(name, endpoint=None):
+    """Shared cache key prefix of a histogram."""
+    if endpoint is None:
+        return f'metrics:{name}'
+    return f'metrics:{name}:endpoint:{endpoint}'
+
+
+def incr_counter(key, delta=1, timeout=None):
+    """
+    Atomically increment a shared counter, creating it if missing.
+    """
+    if delta == 0:
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Key missing: the first writer creates it, a racing writer increments
+        if not cache.add(key, delta, timeout):
+            cache.incr(key, delta)
+
+
+def _django_redis_client():
+    """django-redis client of the shared cache, or None for other backends."""
+    client = getattr(cache, 'client', None)
+    if client is None or not hasattr(client, 'get_client'):
+        return None
+    return client
+
+
+def incr_counters(deltas):
+    """
+    Atomically increment several shared counters in one batch.
+    
+    With django-redis the increments go out as a single pipelined round trip
+    (INCRBY creates missing keys); other backends fall back to incr_counter()
+    per key. Zero deltas are skipped.
+    
+    Args:
+        deltas: Mapping of cache key to increment
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    
+    client = _django_redis_client()
+    if client is None:
+        for key, delta in deltas.items():
+            incr_counter(key, delta)
+        return
+    
+    pipeline = client.get_client(write=True).pipeline(transaction=False)
+    for key, delta in deltas.items():
+        pipeline.incrby(client.make_key(key), delta)
+    pipeline.execute()
+
+
+class _Histogram:
+    """Fixed-bucket histogram with count and sum."""
+
+    __slots__ = ('bounds', 'buckets', 'count', 'total')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.buckets = [0] * len(bounds)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.buckets[bucket_index(value, self.bounds)] += 1
+        self.count += 1
+        self.total += value
+
+
+class _PrometheusMetrics:
+    """
+    Process-global Prometheus collectors.
+    
+    Created once per process in the default registry; in multiprocess mode
+    prometheus_client writes them to PROMETHEUS_MULTIPROC_DIR instead.
+    """
+
+    def __init__(self):
+        latency_buckets = [bound / 1000 for bound in LATENCY_BUCKETS_MS]
+        self.requests = prometheus_client.Counter(
+            'http_requests_total',
+            'Total HTTP requests',
+            ['method', 'endpoint', 'status'],
+        )
+        self.errors = prometheus_client.Counter(
+            'http_errors_total',
+            'Total HTTP error responses (4xx/5xx) and unhandled exceptions',
+            ['method', 'endpoint'],
+        )
+        self.latency = prometheus_client.Histogram(
+            'http_request_duration_seconds',
+            'HTTP request duration in seconds',
+            ['method', 'endpoint'],
+            buckets=latency_buckets,
+        )
+        self.db_time = prometheus_client.Histogram(
+            'http_request_db_duration_seconds',
+            'Time spent in database queries per HTTP request, in seconds',
+            ['method', 'endpoint'],
+            buckets=latency_buckets,
+        )
+        self.query_count = prometheus_client.Histogram(
+            'http_request_db_queries',
+            'Number of database queries per HTTP request',
+            ['method', 'endpoint'],
+            buckets=list(QUERY_COUNT_BUCKETS),
+        )
+
+    def observe(self, endpoint, method, status_code, response_time, db_time, query_count):
+        self.requests.labels(method, endpoint, str(status_code)).inc()
+        if status_code >= 400:
+            self.errors.labels(method, endpoint).inc()
+        self.latency.labels(method, endpoint).observe(response_time / 1000)
+        if query_count is not None:
+            self.db_time.labels(method, endpoint).observe(db_time / 1000)
+            self.query_count.labels(method, endpoint).observe(query_count)
+
+
+prometheus_metrics = _PrometheusMetrics() if prometheus_client is not None else None
+
+
+class MetricsAggregator:
+    """
+    Per-worker request metrics buffer.
+
+    Recording only touches local memory under a short lock; flush() swaps
+    the buffer out and merges it into the shared cache.
+    """
+
+    def __init__(self, flush_interval=None):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._known_endpoints = set()
+        self._reset()
+
+    def _reset(self):
+        """Start an empty buffer."""
+        self._counters = defaultdict(int)
+        # (histogram name, endpoint or None) -> _Histogram
+        self._histograms = {}
+        self._response_times = []
+        self._slow_requests = []
+        self._active_users = set()
+
+    def _get_flush_interval(self):
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+
+    def _observe(self, name, endpoint, value):
+        """Add a value to the overall and per-endpoint histogram (lock held)."""
+        for key in ((name, None), (name, endpoint)):
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(HISTOGRAM_BUCKETS[name])
+            histogram.observe(value)
+
+    def record_request(self, endpoint, method, status_code, response_time, user_id=None,
+                       db_time=None, query_count=None):
+        """
+        Record one completed request.
+
+        Args:
+            endpoint: Route template used to group metrics (e.g. '/api/cadets/<int:cadet_id>')
+            method: HTTP method
+            status_code: Response status code
+            response_time: Response time in milliseconds
+            user_id: Authenticated user ID (optional)
+            db_time: Time spent in database queries in milliseconds (optional)
+            query_count: Number of database queries (optional)
+        """
+        if prometheus_metrics is not None:
+            prometheus_metrics.observe(
+                endpoint, method, status_code, response_time, db_time, query_count
+            )
+
+        with self._lock:
+            counters = self._counters
+            counters['metrics:request_count'] += 1
+            counters[f'metrics:status:{status_code}'] += 1
+            if status_code >= 400:
+                counters['metrics:error_count'] += 1
+
+            self._observe('latency', endpoint, response_time)
+            if query_count is not None:
+                self._observe('db_time', endpoint, db_time)
+                self._observe('query_count', endpoint, query_count)
+
+            if len(self._response_times) < MAX_RESPONSE_TIME_SAMPLES:
+                self._response_times.append(response_time)
+
+            if response_time > SLOW_REQUEST_MS and len(self._slow_requests) < MAX_SLOW_REQUESTS:
+                self._slow_requests.append({
+                    'path': endpoint,
+                    'method': method,
+                    'response_time': response_time,
+                    'timestamp': time.time()
+                })
+
+            if user_id is not None:
+                self._active_users.add(user_id)
+
+        self.maybe_flush()
+
+    def record_exception(self, endpoint=UNMATCHED_ENDPOINT, method=''):
+        """Record an unhandled view exception."""
+        if prometheus_metrics is not None:
+            prometheus_metrics.errors.labels(method, endpoint).inc()
+        with self._lock:
+            self._counters['metrics:error_count'] += 1
+
+    def maybe_flush(self):
+        """Flush if the flush interval has elapsed."""
+        if time.monotonic() - self._last_flush >= self._get_flush_interval():
+            self.flush()
+
+    def flush(self):
+        """
+        Merge the buffered metrics into the shared cache.
+        """
+        with self._lock:
+            self._last_flush = time.monotonic()
+            counters = self._counters
+            histograms = self._histograms
+            response_times = self._response_times
+            slow_requests = self._slow_requests
+            active_users = self._active_users
+            self._reset()
+
+        if not counters and not active_users:
+            return
+
+        try:
+            deltas = dict(counters)
+            for (name, endpoint), histogram in histograms.items():
+                self._add_histogram_deltas(deltas, name, endpoint, histogram)
+            incr_counters(deltas)
+
+            new_endpoints = {endpoint for _, endpoint in histograms} - self._known_endpoints - {None}
+            if new_endpoints:
+                self._merge_set('metrics:endpoints', new_endpoints, None)
+                self._known_endpoints |= new_endpoints
+
+            if response_times:
+                self._merge_list('metrics:response_times', response_times, MAX_RESPONSE_TIME_SAMPLES)
+            if slow_requests:
+                self._merge_list('metrics:slow_requests', slow_requests, MAX_SLOW_REQUESTS)
+            if active_users:
+                self._merge_set('metrics:active_sessions', active_users, ACTIVE_SESSION_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Error flushing performance metrics: {e}")
+
+    @staticmethod
+    def _add_histogram_deltas(deltas, name, endpoint, histogram):
+        """Add a local histogram's count, sum and non-empty buckets to a batch."""
+        prefix = _histogram_prefix(name, endpoint)
+        deltas[f'{prefix}:count'] = histogram.count
+        deltas[f'{prefix}:sum'] = int(round(histogram.total))
+        for index, bucket_count in enumerate(histogram.buckets):
+            if bucket_count:
+                deltas[f'{prefix}:bucket:{index}'] = bucket_count
+
+    @staticmethod
+    def _merge_list(key, items, max_length):
+        """Append a batch to a bounded shared list (one read-modify-write per flush)."""
+        merged = (cache.get(key) or []) + items
+        cache.set(key, merged[-max_length:], timeout=METRICS_TIMEOUT)
+
+    @staticmethod
+    def _merge_set(key, items, timeout):
+        """Union a batch into a shared set (one read-modify-write per flush)."""
+        current = cache.get(key) or set()
+        cache.set(key, set(current) | items, timeout=timeout)
+
+
+def get_histogram(name='latency', endpoint=None):
+    """
+    Read a merged histogram from the shared cache.
+
+    Args:
+        name: Histogram name ('latency', 'db_time' or 'query_count')
+        endpoint: Route template, or None for all requests
+
+    Returns:
+        Dict with 'buckets' (list of counts), 'count' and 'sum'
+    """
+    prefix = _histogram_prefix(name, endpoint)
+    keys = [f'{prefix}:bucket:{index}' for index in range(len(HISTOGRAM_BUCKETS[name]))]
+    values = cache.get_many(keys + [f'{prefix}:count', f'{prefix}:sum'])
+    return {
+        'buckets': [values.get(key, 0) for key in keys],
+        'count': values.get(f'{prefix}:count', 0),
+        'sum': values.get(f'{prefix}:sum', 0),
+    }
+
+
+def summarize_histogram(name='latency', endpoint=None):
+    """
+    Summarize a shared histogram with count, average and p50/p90/p99.
+
+    Args:
+        name: Histogram name ('latency', 'db_time' or 'query_count')
+        endpoint: Route template, or None for all requests
+
+    Returns:
+        Dictionary of summary statistics
+    """
+    histogram = get_histogram(name, endpoint)
+    bounds = HISTOGRAM_BUCKETS[name]
+    count = histogram['count']
+    return {
+        'count': count,
+        'avg': round(histogram['sum'] / count, 2) if count else 0,
+        'p50': round(histogram_quantile(0.5, histogram['buckets'], bounds), 2),
+        'p90': round(histogram_quantile(0.9, histogram['buckets'], bounds), 2),
+        'p99': round(histogram_quantile(0.99, histogram['buckets'], bounds), 2),
+    }
+
+
+def get_endpoint_summaries():
+    """
+    Summarize latency, DB time and query count per route template.
+
+    Returns:
+        Dict mapping route template to its histogram summaries
+    """
+    endpoints = cache.get('metrics:endpoints') or set()
+    return {
+        endpoint: {
+            name: summarize_histogram(name, endpoint)
+            for name in HISTOGRAM_BUCKETS
+        }
+        for endpoint in sorted(endpoints)
+    }
+
+
+def get_prometheus_registry():
+    """
+    Get the registry to expose at the Prometheus endpoint.
+
+    In multiprocess mode a collector reading every worker's files is
+    attached to a fresh registry (the documented prometheus_client pattern);
+    otherwise the process' persistent default registry is used.
+    """
+    from prometheus_client import multiprocess
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+# One aggregator per worker process
+metrics_aggregator = MetricsAggregator()
+
+# Do not lose the last partial batch when a worker shuts down
+atexit.register(metrics_aggregator.flush)
@@ -4,10 +4,11 @@ Tracks request/response timing, counts, and error rates.
 """
 import time
 import logging
-from django.core.cache import cache
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
 from django.db import connection
+from apps.system.metrics import metrics_aggregator, UNMATCHED_ENDPOINT
+from core.query_monitor import QueryTimer
 
 logger = logging.getLogger(__name__)
 slow_query_logger = logging.getLogger('django.db.backends')
@@ -17,9 +18,22 @@ request_logger = logging.getLogger('apps')
 class PerformanceMonitoringMiddleware(MiddlewareMixin):
     """
     Middleware to track request/response timing and metrics.
-    Stores metrics in Redis for aggregation.
+    Metrics are buffered per worker and flushed to Redis in batches.
     """
     
+    def __call__(self, request):
+        """
+        Time database queries for the whole request.
+        Async requests are handled by MiddlewareMixin without query timing,
+        since their queries run on other threads.
+        """
+        if self.async_mode:
+            return super().__call__(request)
+        
+        request._query_timer = QueryTimer()
+        with connection.execute_wrapper(request._query_timer):
+            return super().__call__(request)
+    
     def process_request(self, request):
         """
         Called before view processing.
@@ -79,7 +93,7 @@ class PerformanceMonitoringMiddleware(MiddlewareMixin):
                             f"{query['sql'][:200]}"
                         )
             
-            # Update metrics in Redis
+            # Record metrics (flushed to Redis in batches)
             try:
                 self._update_metrics(request, response, response_time)
             except Exception as e:
@@ -94,7 +108,7 @@ class PerformanceMonitoringMiddleware(MiddlewareMixin):
         """
         try:
             # Increment error count
-            cache.incr('metrics:error_count', delta=1)
+            metrics_aggregator.record_exception(self._get_endpoint(request), request.method)
             
             # Log the error
             logger.error(f"Request error: {exception}", exc_info=True)
@@ -105,74 +119,35 @@ class PerformanceMonitoringMiddleware(MiddlewareMixin):
     
     def _update_metrics(self, request, response, response_time):
         """
-        Update performance metrics in Redis.
+        Record performance metrics in the per-worker aggregator.
+        The aggregator flushes to the shared cache in batches.
         """
-        # Increment total request count
-        cache.incr('metrics:request_count', delta=1)
-        
-        # Track active sessions
+        user_id = None
         if hasattr(request, 'user') and request.user.is_authenticated:
             user_id = request.user.id
-            active_sessions_key = 'metrics:active_sessions'
-            active_sessions = cache.get(active_sessions_key, set())
-            
-            # Convert to set if it's a list (for compatibility)
-            if isinstance(active_sessions, list):
-                active_sessions = set(active_sessions)
-            
-            active_sessions.add(user_id)
-            cache.set(active_sessions_key, active_sessions, timeout=1800)  # 30 minutes
-        
-        # Track response times (store last 1000 response times)
-        response_times_key = 'metrics:response_times'
-        response_times = cache.get(response_times_key, [])
-        response_times.append(response_time)
-        
-        # Keep only last 1000 entries
-        if len(response_times) > 1000:
-            response_times = response_times[-1000:]
-        
-        cache.set(response_times_key, response_times, timeout=3600)  # 1 hour
-        
-        # Track status code counts
-        status_code = response.status_code
-        status_key = f'metrics:status:{status_code}'
-        cache.incr(status_key, delta=1)
         
-        # Track error rates (4xx and 5xx)
-        if status_code >= 400:
-            cache.incr('metrics:error_count', delta=1)
+        db_time = query_count = None
+        query_timer = getattr(request, '_query_timer', None)
+        if query_timer is not None:
+            db_time = query_timer.total_ms
+            query_count = query_timer.count
         
-        # Track endpoint-specific metrics
-        endpoint = request.path
-        endpoint_key = f'metrics:endpoint:{endpoint}:count'
-        cache.incr(endpoint_key, delta=1)
-        
-        endpoint_time_key = f'metrics:endpoint:{endpoint}:times'
-        endpoint_times = cache.get(endpoint_time_key, [])
-        endpoint_times.append(response_time)
-        
-        # Keep only last 100 entries per endpoint
-        if len(endpoint_times) > 100:
-            endpoint_times = endpoint_times[-100:]
-        
-        cache.set(endpoint_time_key, endpoint_times, timeout=3600)  # 1 hour
-        
-        # Track slow requests (>1000ms)
-        if response_time > 1000:
-            slow_requests_key = 'metrics:slow_requests'
-            slow_requests = cache.get(slow_requests_key, [])
-            slow_requests.append({
-                'path': endpoint,
-                'method': request.method,
-                'response_time': response_time,
-                'timestamp': time.time()
-            })
-            
-            # Keep only last 100 slow requests
-            if len(slow_requests) > 100:
-                slow_requests = slow_requests[-100:]
-            
-            cache.set(slow_requests_key, slow_requests, timeout=3600)  # 1 hour
-
-
+        metrics_aggregator.record_request(
+            endpoint=self._get_endpoint(request),
+            method=request.method,
+            status_code=response.status_code,
+            response_time=response_time,
+            user_id=user_id,
+            db_time=db_time,
+            query_count=query_count,
+        )
+    
+    def _get_endpoint(self, request):
+        """
+        Get the route template of the request (e.g. '/api/cadets/<int:cadet_id>').
+        Grouping by template instead of raw path keeps metric cardinality bounded.
+        """
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None or resolver_match.route is None:
+            return UNMATCHED_ENDPOINT
+        return '/' + resolver_match.route
@@ -1,15 +1,18 @@
 """
 Generic signal handlers for audit logging across all tracked models.
 """
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from apps.system.models import AuditLog, SyncEvent
+from apps.system.models import SyncEvent
+from apps.system.audit import record_audit, serialize_changes
 from apps.cadets.models import Cadet
 from apps.attendance.models import TrainingDay, AttendanceRecord, StaffAttendanceRecord, ExcuseLetter
 from apps.activities.models import Activity, ActivityImage
 from apps.staff.models import TrainingStaff
 from apps.messaging.models import AdminMessage, StaffMessage, Notification
 from apps.authentication.models import User
+from apps.messaging.websocket_utils import publish_sync_event
 import json
 
 
@@ -73,20 +76,23 @@ def sanitize_payload(model_instance, exclude_fields=None):
 def audit_cadet_save(sender, instance, created, **kwargs):
     """Create audit log when Cadet is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
+    payload = sanitize_payload(instance)
+    if not created:
+        payload['changed_fields'] = serialize_changes(instance)
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='cadets',
         operation=operation,
         record_id=instance.id,
         user_id=get_user_id_from_context(),
-        payload=sanitize_payload(instance)
+        payload=payload
     )
 
 
 @receiver(post_delete, sender=Cadet)
 def audit_cadet_delete(sender, instance, **kwargs):
     """Create audit log when Cadet is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='cadets',
         operation='DELETE',
         record_id=instance.id,
@@ -101,7 +107,7 @@ def audit_user_save(sender, instance, created, **kwargs):
     """Create audit log when User is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='users',
         operation=operation,
         record_id=instance.id,
@@ -113,7 +119,7 @@ def audit_user_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=User)
 def audit_user_delete(sender, instance, **kwargs):
     """Create audit log when User is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='users',
         operation='DELETE',
         record_id=instance.id,
@@ -128,7 +134,7 @@ def audit_training_day_save(sender, instance, created, **kwargs):
     """Create audit log when TrainingDay is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='training_days',
         operation=operation,
         record_id=instance.id,
@@ -140,7 +146,7 @@ def audit_training_day_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=TrainingDay)
 def audit_training_day_delete(sender, instance, **kwargs):
     """Create audit log when TrainingDay is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='training_days',
         operation='DELETE',
         record_id=instance.id,
@@ -154,20 +160,23 @@ def audit_training_day_delete(sender, instance, **kwargs):
 def audit_attendance_record_save(sender, instance, created, **kwargs):
     """Create audit log when AttendanceRecord is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
+    payload = sanitize_payload(instance)
+    if not created:
+        payload['changed_fields'] = serialize_changes(instance)
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='attendance_records',
         operation=operation,
         record_id=instance.id,
         user_id=get_user_id_from_context(),
-        payload=sanitize_payload(instance)
+        payload=payload
     )
 
 
 @receiver(post_delete, sender=AttendanceRecord)
 def audit_attendance_record_delete(sender, instance, **kwargs):
     """Create audit log when AttendanceRecord is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='attendance_records',
         operation='DELETE',
         record_id=instance.id,
@@ -182,7 +191,7 @@ def audit_staff_attendance_save(sender, instance, created, **kwargs):
     """Create audit log when StaffAttendanceRecord is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='staff_attendance_records',
         operation=operation,
         record_id=instance.id,
@@ -194,7 +203,7 @@ def audit_staff_attendance_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=StaffAttendanceRecord)
 def audit_staff_attendance_delete(sender, instance, **kwargs):
     """Create audit log when StaffAttendanceRecord is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='staff_attendance_records',
         operation='DELETE',
         record_id=instance.id,
@@ -209,7 +218,7 @@ def audit_excuse_letter_save(sender, instance, created, **kwargs):
     """Create audit log when ExcuseLetter is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='excuse_letters',
         operation=operation,
         record_id=instance.id,
@@ -221,7 +230,7 @@ def audit_excuse_letter_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=ExcuseLetter)
 def audit_excuse_letter_delete(sender, instance, **kwargs):
     """Create audit log when ExcuseLetter is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='excuse_letters',
         operation='DELETE',
         record_id=instance.id,
@@ -236,7 +245,7 @@ def audit_activity_save(sender, instance, created, **kwargs):
     """Create audit log when Activity is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='activities',
         operation=operation,
         record_id=instance.id,
@@ -248,7 +257,7 @@ def audit_activity_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=Activity)
 def audit_activity_delete(sender, instance, **kwargs):
     """Create audit log when Activity is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='activities',
         operation='DELETE',
         record_id=instance.id,
@@ -263,7 +272,7 @@ def audit_training_staff_save(sender, instance, created, **kwargs):
     """Create audit log when TrainingStaff is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='training_staff',
         operation=operation,
         record_id=instance.id,
@@ -275,7 +284,7 @@ def audit_training_staff_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=TrainingStaff)
 def audit_training_staff_delete(sender, instance, **kwargs):
     """Create audit log when TrainingStaff is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='training_staff',
         operation='DELETE',
         record_id=instance.id,
@@ -290,7 +299,7 @@ def audit_admin_message_save(sender, instance, created, **kwargs):
     """Create audit log when AdminMessage is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='admin_messages',
         operation=operation,
         record_id=instance.id,
@@ -302,7 +311,7 @@ def audit_admin_message_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=AdminMessage)
 def audit_admin_message_delete(sender, instance, **kwargs):
     """Create audit log when AdminMessage is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='admin_messages',
         operation='DELETE',
         record_id=instance.id,
@@ -317,7 +326,7 @@ def audit_staff_message_save(sender, instance, created, **kwargs):
     """Create audit log when StaffMessage is created or updated."""
     operation = 'CREATE' if created else 'UPDATE'
     
-    AuditLog.objects.create(
+    record_audit(
         table_name='staff_messages',
         operation=operation,
         record_id=instance.id,
@@ -329,10 +338,18 @@ def audit_staff_message_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=StaffMessage)
 def audit_staff_message_delete(sender, instance, **kwargs):
     """Create audit log when StaffMessage is deleted."""
-    AuditLog.objects.create(
+    record_audit(
         table_name='staff_messages',
         operation='DELETE',
         record_id=instance.id,
         user_id=get_user_id_from_context(),
         payload=sanitize_payload(instance)
     )
+
+
+# Push new sync events to SSE subscribers once the row is visible
+@receiver(post_save, sender=SyncEvent)
+def publish_sync_event_on_commit(sender, instance, created, **kwargs):
+    """Publish a SyncEvent to the channel layer after its transaction commits."""
+    if created:
+        transaction.on_commit(lambda: publish_sync_event(instance))
@@ -5,58 +5,94 @@ Processes unprocessed sync_events and broadcasts them via WebSocket.
 import logging
 from django.db import transaction
 from apps.system.models import SyncEvent
-from apps.messaging.websocket_utils import broadcast_sync_event
+from apps.messaging.websocket_utils import broadcast_sync_events
 
 logger = logging.getLogger(__name__)
 
+# Event types whose payload is a full snapshot, so a newer event supersedes
+# an older one, mapped to the payload fields that scope the snapshot below
+# the cadet (an attendance payload covers one training day). Other events
+# carry per-event details such as merit/demerit type and points or changed
+# exam scores, and are never merged.
+COALESCE_SCOPE_FIELDS = {
+    'attendance_update': ('training_day_id',),
+}
+
+
+def _coalesce_key(event):
+    if not event.cadet_id or event.event_type not in COALESCE_SCOPE_FIELDS:
+        return ('', event.id)
+    payload = event.payload if isinstance(event.payload, dict) else {}
+    scope = tuple(payload.get(field) for field in COALESCE_SCOPE_FIELDS[event.event_type])
+    return (event.event_type, event.cadet_id) + scope
+
+
+def coalesce_sync_events(events):
+    """
+    Collapse superseded snapshot events in a batch of sync events.
+    
+    For snapshot event types (see COALESCE_SCOPE_FIELDS) later events for
+    the same cadet and scope supersede earlier ones, so only the newest
+    payload is sent. All other events, and events without a cadet, are
+    kept as-is.
+    
+    Args:
+        events: SyncEvent instances in creation order
+        
+    Returns:
+        List of (event_type, cadet_id, payload) tuples in first-seen order
+    """
+    coalesced = {}
+    for event in events:
+        key = _coalesce_key(event)
+        # Re-insert so the entry moves to the position of its newest event
+        coalesced.pop(key, None)
+        coalesced[key] = (event.event_type, event.cadet_id, event.payload)
+    return list(coalesced.values())
+
 
 def process_sync_events(batch_size=100):
     """
     Process unprocessed sync events and broadcast them via WebSocket.
     
+    Claims a batch with SELECT ... FOR UPDATE SKIP LOCKED so several workers
+    can drain the queue in parallel without broadcasting the same event twice,
+    then marks the whole batch processed with a single UPDATE.
+    
     Args:
         batch_size: Number of events to process in one batch
         
     Returns:
         Number of events processed
     """
-    processed_count = 0
-    
     try:
-        # Get unprocessed sync events
-        sync_events = SyncEvent.objects.filter(
-            processed=False
-        ).order_by('created_at')[:batch_size]
-        
-        for event in sync_events:
-            try:
-                # Broadcast the event via WebSocket
-                broadcast_sync_event(
-                    event_type=event.event_type,
-                    cadet_id=event.cadet_id,
-                    payload=event.payload
-                )
-                
-                # Mark as processed
-                event.processed = True
-                event.save()
-                
-                processed_count += 1
-                logger.debug(f"Processed sync event {event.id}: {event.event_type}")
+        with transaction.atomic():
+            # Claim a batch of unprocessed sync events
+            sync_events = list(
+                SyncEvent.objects.select_for_update(skip_locked=True).filter(
+                    processed=False
+                ).order_by('created_at')[:batch_size]
+            )
             
-            except Exception as e:
-                logger.error(f"Error processing sync event {event.id}: {e}")
-                # Continue processing other events
-                continue
-        
-        if processed_count > 0:
-            logger.info(f"Processed {processed_count} sync events")
+            if not sync_events:
+                return 0
+            
+            messages = coalesce_sync_events(sync_events)
+            broadcast_sync_events(messages)
+            
+            processed_count = SyncEvent.objects.filter(
+                id__in=[event.id for event in sync_events]
+            ).update(processed=True)
         
+        logger.info(
+            f"Processed {processed_count} sync events ({len(messages)} broadcasts)"
+        )
         return processed_count
     
     except Exception as e:
+        # The batch stays unprocessed and is retried on the next run
         logger.error(f"Error in sync event processing: {e}")
-        return processed_count
+        return 0
 
 
 def cleanup_old_sync_events(days=7):
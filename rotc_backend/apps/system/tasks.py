@@ -36,267 +36,33 @@ def cleanup_old_sync_events_task():
         raise
 
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def generate_pdf_report(self, report_type, filters, user_id):
+@shared_task
+def generate_pdf_report(report_type, filters, user_id):
     """
-    Generate a PDF report based on the report type and filters.
+    Generate a PDF report through the report job subsystem.
+    
+    Kept for callers of the old task; new code should use
+    apps.reports.jobs.submit_report_job (POST /api/reports/jobs).
+    Rendering is done by the generators in apps.reports.generators.
     
     Args:
         report_type: Type of report (cadet_profile, grades, attendance, certificate)
-        filters: Dictionary of filters (cadet_id, date_range, company, platoon, etc.)
+        filters: Report parameters (cadet_id, company, platoon, date_from, date_to,
+            activity_id, cadet_name, limit)
         user_id: ID of the user requesting the report
     
     Returns:
-        dict: Report generation result with file URL
+        dict: The report job (job_id, status, ...)
     """
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image as RLImage
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT
-    from django.core.files.base import ContentFile
-    from django.utils import timezone
-    import io
-    import cloudinary.uploader
+    from apps.reports.jobs import submit_report_job
     
-    try:
-        logger.info(f"Generating {report_type} report for user {user_id}")
-        
-        # Create a buffer for the PDF
-        buffer = io.BytesIO()
-        
-        # Create the PDF document
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Title style
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1a237e'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        
-        # Generate report based on type
-        if report_type == 'cadet_profile':
-            from apps.cadets.models import Cadet
-            cadet_id = filters.get('cadet_id')
-            cadet = Cadet.objects.select_related('grades').get(id=cadet_id)
-            
-            # Title
-            elements.append(Paragraph(f"Cadet Profile Report", title_style))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Cadet information table
-            data = [
-                ['Student ID:', cadet.student_id],
-                ['Name:', f"{cadet.first_name} {cadet.middle_name or ''} {cadet.last_name}"],
-                ['Company:', cadet.company or 'N/A'],
-                ['Platoon:', cadet.platoon or 'N/A'],
-                ['Course:', cadet.course or 'N/A'],
-                ['Year Level:', str(cadet.year_level) if cadet.year_level else 'N/A'],
-                ['Status:', cadet.status],
-            ]
-            
-            table = Table(data, colWidths=[2*inch, 4*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.grey),
-                ('TEXTCOLOR', (0, 0), (0, -1), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('BACKGROUND', (1, 0), (1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(table)
-            elements.append(Spacer(1, 0.3*inch))
-            
-            # Grades information
-            if hasattr(cadet, 'grades'):
-                elements.append(Paragraph("Academic Performance", styles['Heading2']))
-                elements.append(Spacer(1, 0.1*inch))
-                
-                grades_data = [
-                    ['Metric', 'Value'],
-                    ['Attendance Present', str(cadet.grades.attendance_present)],
-                    ['Merit Points', str(cadet.grades.merit_points)],
-                    ['Demerit Points', str(cadet.grades.demerit_points)],
-                    ['Prelim Score', str(cadet.grades.prelim_score or 'N/A')],
-                    ['Midterm Score', str(cadet.grades.midterm_score or 'N/A')],
-                    ['Final Score', str(cadet.grades.final_score or 'N/A')],
-                ]
-                
-                grades_table = Table(grades_data, colWidths=[3*inch, 3*inch])
-                grades_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                elements.append(grades_table)
-        
-        elif report_type == 'grades':
-            from apps.cadets.models import Cadet
-            
-            # Title
-            elements.append(Paragraph("Grades Report", title_style))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Apply filters
-            queryset = Cadet.objects.select_related('grades').filter(is_archived=False)
-            if filters.get('company'):
-                queryset = queryset.filter(company=filters['company'])
-            if filters.get('platoon'):
-                queryset = queryset.filter(platoon=filters['platoon'])
-            
-            # Create grades table
-            data = [['Student ID', 'Name', 'Attendance', 'Merit', 'Demerit', 'Prelim', 'Midterm', 'Final']]
-            
-            for cadet in queryset[:50]:  # Limit to 50 for performance
-                if hasattr(cadet, 'grades'):
-                    data.append([
-                        cadet.student_id,
-                        f"{cadet.first_name} {cadet.last_name}",
-                        str(cadet.grades.attendance_present),
-                        str(cadet.grades.merit_points),
-                        str(cadet.grades.demerit_points),
-                        str(cadet.grades.prelim_score or '-'),
-                        str(cadet.grades.midterm_score or '-'),
-                        str(cadet.grades.final_score or '-'),
-                    ])
-            
-            table = Table(data, colWidths=[1*inch, 1.5*inch, 0.8*inch, 0.6*inch, 0.7*inch, 0.6*inch, 0.7*inch, 0.6*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(table)
-        
-        elif report_type == 'attendance':
-            from apps.attendance.models import TrainingDay, AttendanceRecord
-            from django.db.models import Count, Q
-            
-            # Title
-            elements.append(Paragraph("Attendance Report", title_style))
-            elements.append(Spacer(1, 0.2*inch))
-            
-            # Get training days
-            queryset = TrainingDay.objects.all()
-            if filters.get('date_from'):
-                queryset = queryset.filter(date__gte=filters['date_from'])
-            if filters.get('date_to'):
-                queryset = queryset.filter(date__lte=filters['date_to'])
-            
-            # Create attendance summary table
-            data = [['Date', 'Title', 'Present', 'Absent', 'Late', 'Excused', 'Total']]
-            
-            for training_day in queryset[:30]:  # Limit to 30 days
-                attendance_stats = AttendanceRecord.objects.filter(training_day=training_day).aggregate(
-                    present=Count('id', filter=Q(status='present')),
-                    absent=Count('id', filter=Q(status='absent')),
-                    late=Count('id', filter=Q(status='late')),
-                    excused=Count('id', filter=Q(status='excused')),
-                    total=Count('id')
-                )
-                
-                data.append([
-                    training_day.date.strftime('%Y-%m-%d'),
-                    training_day.title[:30],
-                    str(attendance_stats['present']),
-                    str(attendance_stats['absent']),
-                    str(attendance_stats['late']),
-                    str(attendance_stats['excused']),
-                    str(attendance_stats['total']),
-                ])
-            
-            table = Table(data, colWidths=[1*inch, 2*inch, 0.8*inch, 0.8*inch, 0.6*inch, 0.8*inch, 0.7*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(table)
-        
-        elif report_type == 'certificate':
-            from apps.activities.models import Activity
-            activity_id = filters.get('activity_id')
-            activity = Activity.objects.get(id=activity_id)
-            cadet_name = filters.get('cadet_name', 'Cadet Name')
-            
-            # Certificate title
-            elements.append(Spacer(1, 1*inch))
-            elements.append(Paragraph("CERTIFICATE OF ACHIEVEMENT", title_style))
-            elements.append(Spacer(1, 0.5*inch))
-            
-            # Certificate body
-            cert_text = f"""
-            <para align=center>
-            This is to certify that<br/>
-            <b><font size=18>{cadet_name}</font></b><br/>
-            has successfully participated in<br/>
-            <b><font size=14>{activity.title}</font></b><br/>
-            held on {activity.date.strftime('%B %d, %Y')}<br/><br/>
-            {activity.description[:200]}
-            </para>
-            """
-            elements.append(Paragraph(cert_text, styles['Normal']))
-            elements.append(Spacer(1, 1*inch))
-            
-            # Signature line
-            sig_style = ParagraphStyle('Signature', parent=styles['Normal'], alignment=TA_CENTER)
-            elements.append(Paragraph("_________________________", sig_style))
-            elements.append(Paragraph("Authorized Signature", sig_style))
-        
-        # Add footer
-        elements.append(Spacer(1, 0.5*inch))
-        footer_style = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, alignment=TA_CENTER)
-        elements.append(Paragraph(f"Generated on {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}", footer_style))
-        
-        # Build PDF
-        doc.build(elements)
-        
-        # Upload to Cloudinary
-        buffer.seek(0)
-        upload_result = cloudinary.uploader.upload(
-            buffer,
-            folder=f"rotc/reports",
-            resource_type='raw',
-            public_id=f"{report_type}_{user_id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}",
-            format='pdf'
-        )
-        
-        logger.info(f"Successfully generated PDF report: {upload_result['secure_url']}")
-        
-        return {
-            'url': upload_result['secure_url'],
-            'public_id': upload_result['public_id'],
-            'report_type': report_type,
-            'generated_at': timezone.now().isoformat()
-        }
-        
-    except Exception as exc:
-        logger.error(f"Error generating PDF report: {str(exc)}")
-        raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+    job, created = submit_report_job(report_type, filters, user_id, enforce_limit=False)
+    logger.info(f"generate_pdf_report routed to report job {job['job_id']} (new: {created})")
+    return {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'report_type': report_type
+    }
 
 
 @shared_task(name='cleanup_old_audit_logs')
@@ -326,20 +92,24 @@ def cleanup_old_audit_logs(days=90):
 
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=120)
-def import_rotcmis_data(self, json_data, user_id):
+def import_rotcmis_data(self, json_data, user_id, batch_size=500):
     """
     Import cadet data from ROTCMIS JSON format.
     
+    Cadets are upserted in batches (one INSERT ... ON CONFLICT per batch)
+    and progress is published through the task state as PROGRESS.
+    
     Args:
         json_data: Dictionary or list of cadet data from ROTCMIS
         user_id: ID of the user who initiated the import
+        batch_size: Number of cadets upserted per statement
     
     Returns:
         dict: Import results with success/failure counts
     """
-    from apps.cadets.models import Cadet, Grades
-    from apps.authentication.models import User
-    from django.db import transaction
+    from apps.integration.bulk_import import upsert_rotcmis_cadets
+    from apps.integration.importers import ImportResult
+    from core.cache import invalidate_cadet_cache
     import json
     
     try:
@@ -352,60 +122,28 @@ def import_rotcmis_data(self, json_data, user_id):
         if not isinstance(json_data, list):
             json_data = [json_data]
         
-        success_count = 0
-        error_count = 0
-        errors = []
+        total = len(json_data)
+        import_result = ImportResult()
+        
+        for start in range(0, total, batch_size):
+            upsert_rotcmis_cadets(json_data[start:start + batch_size], import_result, start_row=start + 1)
+            
+            self.update_state(state='PROGRESS', meta={
+                'current': min(start + batch_size, total),
+                'total': total,
+                'success_count': import_result.success_count,
+                'error_count': import_result.error_count
+            })
+        
+        if import_result.success_count:
+            invalidate_cadet_cache()
         
-        for cadet_data in json_data:
-            try:
-                with transaction.atomic():
-                    # Check if cadet already exists
-                    student_id = cadet_data.get('student_id')
-                    if not student_id:
-                        raise ValueError("Missing student_id")
-                    
-                    # Create or update cadet
-                    cadet, created = Cadet.objects.update_or_create(
-                        student_id=student_id,
-                        defaults={
-                            'first_name': cadet_data.get('first_name', ''),
-                            'last_name': cadet_data.get('last_name', ''),
-                            'middle_name': cadet_data.get('middle_name'),
-                            'suffix_name': cadet_data.get('suffix_name'),
-                            'company': cadet_data.get('company'),
-                            'platoon': cadet_data.get('platoon'),
-                            'course': cadet_data.get('course'),
-                            'year_level': cadet_data.get('year_level'),
-                            'status': cadet_data.get('status', 'Ongoing'),
-                            'email': cadet_data.get('email'),
-                            'contact_number': cadet_data.get('contact_number'),
-                            'birthdate': cadet_data.get('birthdate'),
-                            'birthplace': cadet_data.get('birthplace'),
-                            'age': cadet_data.get('age'),
-                            'height': cadet_data.get('height'),
-                            'weight': cadet_data.get('weight'),
-                            'blood_type': cadet_data.get('blood_type'),
-                            'address': cadet_data.get('address'),
-                            'civil_status': cadet_data.get('civil_status'),
-                            'nationality': cadet_data.get('nationality'),
-                            'gender': cadet_data.get('gender'),
-                            'rotc_unit': cadet_data.get('rotc_unit'),
-                            'mobilization_center': cadet_data.get('mobilization_center'),
-                        }
-                    )
-                    
-                    # Create grades record if it doesn't exist
-                    if created:
-                        Grades.objects.create(cadet=cadet)
-                    
-                    success_count += 1
-                    logger.info(f"{'Created' if created else 'Updated'} cadet: {student_id}")
-                    
-            except Exception as e:
-                error_count += 1
-                error_msg = f"Error importing cadet {cadet_data.get('student_id', 'unknown')}: {str(e)}"
-                logger.error(error_msg)
-                errors.append(error_msg)
+        success_count = import_result.success_count
+        error_count = import_result.error_count
+        errors = [
+            f"Error importing cadet at position {error['row']}: {error['message']}"
+            for error in import_result.errors
+        ]
         
         # Create notification for the user
         from apps.messaging.models import Notification
@@ -443,75 +181,260 @@ def import_rotcmis_data(self, json_data, user_id):
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
 
 
+# Cadet updates applied per chunk task of a bulk update job
+BULK_UPDATE_CHUNK_SIZE = 500
+
+# How long bulk update job state is kept for progress and retries (seconds)
+BULK_UPDATE_STATE_TIMEOUT = 86400
+
+
+def _bulk_update_key(job_id, chunk_index=None):
+    if chunk_index is None:
+        return f'bulk_update_{job_id}'
+    return f'bulk_update_{job_id}_chunk_{chunk_index}'
+
+
+def get_bulk_update_progress(job_id):
+    """
+    Get the progress of a chunked bulk cadet update.
+    
+    Each chunk task stores its own result, so progress is derived from the
+    chunk results present in the cache rather than a shared counter.
+    
+    Args:
+        job_id: ID returned by bulk_update_cadets
+    
+    Returns:
+        dict: Job state with chunk, success and error counts, or None
+    """
+    from django.core.cache import cache
+    
+    job = cache.get(_bulk_update_key(job_id))
+    if job is None:
+        return None
+    
+    keys = [_bulk_update_key(job_id, index) for index in range(job['chunks'])]
+    results = cache.get_many(keys).values()
+    completed = [result for result in results if result['status'] == 'completed']
+    
+    return {
+        **job,
+        'chunks_completed': len(completed),
+        'chunks_failed': len(results) - len(completed),
+        'progress': int(len(results) * 100 / job['chunks']) if job['chunks'] else 100,
+        'success_count': sum(result['success_count'] for result in completed),
+        'error_count': sum(result['error_count'] for result in completed),
+    }
+
+
+def _dispatch_bulk_update_chunks(job_id, chunks, user_id):
+    """Run the given (index, updates) chunks as a chord with the summary callback."""
+    from celery import chord, group
+    
+    header = group(
+        bulk_update_cadet_chunk.s(job_id, index, updates, user_id)
+        for index, updates in chunks
+    )
+    return chord(header)(bulk_update_cadets_summary.s(job_id, user_id))
+
+
 @shared_task(bind=True, max_retries=3)
-def bulk_update_cadets(self, updates_data, user_id):
+def bulk_update_cadets(self, updates_data, user_id, chunk_size=BULK_UPDATE_CHUNK_SIZE):
     """
     Perform bulk updates on cadet records.
     
+    The updates are split into chunks that run in parallel as a chord;
+    bulk_update_cadets_summary aggregates the chunk results, notifies the
+    user and invalidates the cadet cache once. Progress is available from
+    get_bulk_update_progress(job_id).
+    
     Args:
         updates_data: List of dicts with cadet_id and fields to update
         user_id: ID of the user who initiated the update
+        chunk_size: Number of updates applied per chunk task
     
     Returns:
-        dict: Update results
+        dict: Job ID and chunk count
     """
-    from apps.cadets.models import Cadet
-    from django.db import transaction
+    from django.core.cache import cache
     
     try:
-        logger.info(f"Starting bulk cadet update for user {user_id}")
+        job_id = self.request.id
+        chunks = [
+            (index, updates_data[start:start + chunk_size])
+            for index, start in enumerate(range(0, len(updates_data), chunk_size))
+        ]
+        logger.info(f"Starting bulk cadet update {job_id} for user {user_id}: {len(chunks)} chunks")
         
-        success_count = 0
-        error_count = 0
-        errors = []
-        
-        for update in updates_data:
-            try:
-                with transaction.atomic():
-                    cadet_id = update.get('cadet_id')
-                    if not cadet_id:
-                        raise ValueError("Missing cadet_id")
-                    
-                    cadet = Cadet.objects.get(id=cadet_id)
-                    
-                    # Update fields
-                    for field, value in update.items():
-                        if field != 'cadet_id' and hasattr(cadet, field):
-                            setattr(cadet, field, value)
-                    
-                    cadet.save()
-                    success_count += 1
-                    
-            except Exception as e:
-                error_count += 1
-                error_msg = f"Error updating cadet {update.get('cadet_id', 'unknown')}: {str(e)}"
-                logger.error(error_msg)
-                errors.append(error_msg)
-        
-        # Create notification
-        from apps.messaging.models import Notification
-        notification_message = f"Bulk update completed: {success_count} successful, {error_count} failed"
-        Notification.objects.create(
-            user_id=user_id,
-            message=notification_message,
-            type='bulk_update_complete'
-        )
-        
-        result = {
-            'success_count': success_count,
-            'error_count': error_count,
+        cache.set(_bulk_update_key(job_id), {
+            'job_id': job_id,
+            'status': 'processing',
             'total': len(updates_data),
-            'errors': errors[:10]
-        }
+            'chunks': len(chunks),
+            'failed_chunks': [],
+        }, timeout=BULK_UPDATE_STATE_TIMEOUT)
         
-        logger.info(f"Bulk update completed: {result}")
-        return result
+        if chunks:
+            _dispatch_bulk_update_chunks(job_id, chunks, user_id)
+        else:
+            bulk_update_cadets_summary.delay([], job_id, user_id)
+        
+        return {'job_id': job_id, 'total': len(updates_data), 'chunks': len(chunks)}
         
     except Exception as exc:
         logger.error(f"Error in bulk update: {str(exc)}")
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
 
 
+@shared_task(bind=True, max_retries=3)
+def bulk_update_cadet_chunk(self, job_id, chunk_index, updates, user_id):
+    """
+    Apply one chunk of a bulk cadet update with a single bulk_update.
+    
+    Row-level problems are reported as errors. If the chunk as a whole
+    fails (e.g. a database error) it is retried; once retries are
+    exhausted it is reported as failed so the rest of the job can finish
+    and the chunk can be retried on its own later.
+    
+    Args:
+        job_id: Bulk update job ID
+        chunk_index: Position of this chunk in the job
+        updates: Cadet updates for this chunk
+        user_id: ID of the user who initiated the update
+    
+    Returns:
+        dict: Chunk result
+    """
+    from django.core.cache import cache
+    from apps.cadets.bulk import apply_cadet_updates
+    
+    try:
+        outcome = apply_cadet_updates(updates, user_id=user_id)
+        result = {
+            'chunk_index': chunk_index,
+            'status': 'completed',
+            'success_count': len(outcome['updated_ids']),
+            'error_count': len(outcome['errors']),
+            'errors': outcome['errors'],
+        }
+    except Exception as exc:
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+        
+        logger.error(f"Bulk update {job_id} chunk {chunk_index} failed: {str(exc)}")
+        result = {
+            'chunk_index': chunk_index,
+            'status': 'failed',
+            'success_count': 0,
+            'error_count': len(updates),
+            'errors': [f"Chunk {chunk_index} failed: {str(exc)}"],
+            'updates': updates,
+        }
+    
+    cache.set(_bulk_update_key(job_id, chunk_index), result, timeout=BULK_UPDATE_STATE_TIMEOUT)
+    return result
+
+
+@shared_task
+def bulk_update_cadets_summary(chunk_results, job_id, user_id):
+    """
+    Chord callback for a bulk cadet update.
+    
+    Totals are computed from every chunk result stored for the job, so a
+    retry of failed chunks produces an up-to-date summary.
+    
+    Args:
+        chunk_results: Results of the chunk tasks that just ran
+        job_id: Bulk update job ID
+        user_id: ID of the user who initiated the update
+    
+    Returns:
+        dict: Update results
+    """
+    from django.core.cache import cache
+    from apps.messaging.models import Notification
+    from core.cache import invalidate_cadet_cache
+    
+    job = cache.get(_bulk_update_key(job_id)) or {
+        'job_id': job_id, 'total': 0, 'chunks': len(chunk_results)
+    }
+    keys = [_bulk_update_key(job_id, index) for index in range(job['chunks'])]
+    stored = cache.get_many(keys)
+    results = [stored.get(key) for key in keys]
+    
+    # Fall back to the callback arguments for results evicted from the cache
+    for result in chunk_results:
+        if results[result['chunk_index']] is None:
+            results[result['chunk_index']] = result
+    results = [result for result in results if result is not None]
+    
+    failed_chunks = [
+        {'index': result['chunk_index'], 'updates': result['updates']}
+        for result in results if result['status'] == 'failed'
+    ]
+    success_count = sum(result['success_count'] for result in results if result['status'] == 'completed')
+    error_count = sum(result['error_count'] for result in results)
+    errors = [error for result in results for error in result['errors']]
+    
+    cache.set(_bulk_update_key(job_id), {
+        **job,
+        'status': 'partial' if failed_chunks else 'completed',
+        'failed_chunks': failed_chunks,
+    }, timeout=BULK_UPDATE_STATE_TIMEOUT)
+    
+    if success_count:
+        invalidate_cadet_cache()
+    
+    notification_message = f"Bulk update completed: {success_count} successful, {error_count} failed"
+    Notification.objects.create(
+        user_id=user_id,
+        message=notification_message,
+        type='bulk_update_complete'
+    )
+    
+    result = {
+        'job_id': job_id,
+        'success_count': success_count,
+        'error_count': error_count,
+        'total': job['total'],
+        'failed_chunks': [chunk['index'] for chunk in failed_chunks],
+        'errors': errors[:10]
+    }
+    
+    logger.info(f"Bulk update completed: {result}")
+    return result
+
+
+@shared_task
+def retry_failed_bulk_update_chunks(job_id, user_id):
+    """
+    Re-run only the chunks of a bulk cadet update that failed.
+    
+    Args:
+        job_id: Bulk update job ID
+        user_id: ID of the user who initiated the retry
+    
+    Returns:
+        dict: Job ID and number of chunks retried
+    """
+    from django.core.cache import cache
+    
+    job = cache.get(_bulk_update_key(job_id))
+    if not job or not job['failed_chunks']:
+        return {'job_id': job_id, 'chunks': 0}
+    
+    chunks = [(chunk['index'], chunk['updates']) for chunk in job['failed_chunks']]
+    cache.set(_bulk_update_key(job_id), {
+        **job,
+        'status': 'processing',
+        'failed_chunks': [],
+    }, timeout=BULK_UPDATE_STATE_TIMEOUT)
+    cache.delete_many([_bulk_update_key(job_id, index) for index, _ in chunks])
+    
+    logger.info(f"Retrying {len(chunks)} failed chunks of bulk update {job_id}")
+    _dispatch_bulk_update_chunks(job_id, chunks, user_id)
+    return {'job_id': job_id, 'chunks': len(chunks)}
+
 
 @shared_task(name='check_performance_alerts')
 def check_performance_alerts_task():
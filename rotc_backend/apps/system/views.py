@@ -3,22 +3,36 @@ Views for system settings and admin endpoints.
 """
 import json
 import time
+import asyncio
 import logging
-from django.http import StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
 from django.core.cache import cache
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import api_view, permission_classes, authentication_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from apps.system.models import SystemSettings, SyncEvent, AuditLog
-from apps.authentication.permissions import IsAdmin
+from apps.authentication.permissions import IsAdmin, IsApproved
+from core.pagination import KeysetPagination
 from apps.system.serializers import SystemSettingsSerializer, AuditLogSerializer, SyncEventSerializer
-from apps.messaging.websocket_utils import broadcast_system_settings_update
+from apps.system.exports import stream_audit_logs_csv, audit_logs_xlsx_response
+from apps.messaging.websocket_utils import broadcast_system_settings_update, get_sse_groups
+from apps.system.metrics import (
+    metrics_aggregator,
+    summarize_histogram,
+    get_endpoint_summaries,
+    get_prometheus_registry,
+)
 from core.cache import (
     generate_cache_key,
-    get_cached_data,
-    set_cached_data,
     get_cache_ttl,
+    get_or_set_cached_data,
+    get_hot_cached_data,
     invalidate_system_settings_cache,
     get_cache_stats,
     clear_all_cache,
@@ -36,18 +50,11 @@ def system_settings_list(request):
     """
     cache_key = generate_cache_key('system:settings:all')
     
-    # Try to get from cache
-    cached_response = get_cached_data(cache_key)
-    if cached_response is not None:
-        return Response(cached_response, status=status.HTTP_200_OK)
-    
-    # Cache miss - fetch from database
-    settings = SystemSettings.objects.all()
-    settings_dict = {s.key: s.value for s in settings}
+    def build_settings_dict():
+        return {s.key: s.value for s in SystemSettings.objects.all()}
     
-    # Cache the response
-    ttl = get_cache_ttl('system_settings')
-    set_cached_data(cache_key, settings_dict, ttl)
+    # Read-through cache: only one worker rebuilds an expired listing
+    settings_dict = get_or_set_cached_data(cache_key, build_settings_dict, 'system_settings')
     
     return Response(settings_dict, status=status.HTTP_200_OK)
 
@@ -61,27 +68,23 @@ def system_settings_detail(request, key):
     PUT /api/system-settings/:key
     """
     if request.method == 'GET':
-        cache_key = generate_cache_key('system:settings', key=key)
+        cache_key = generate_cache_key('system:settings:value', tags=(), key=key)
         
-        # Try to get from cache
-        cached_response = get_cached_data(cache_key)
-        if cached_response is not None:
-            return Response({'key': key, 'value': cached_response}, status=status.HTTP_200_OK)
+        def build_setting_value():
+            setting = SystemSettings.objects.filter(key=key).only('value').first()
+            return setting.value if setting is not None else None
         
-        # Cache miss - fetch from database
-        try:
-            setting = SystemSettings.objects.get(key=key)
-            
-            # Cache the response
-            ttl = get_cache_ttl('system_settings')
-            set_cached_data(cache_key, setting.value, ttl)
-            
-            return Response({'key': setting.key, 'value': setting.value}, status=status.HTTP_200_OK)
-        except SystemSettings.DoesNotExist:
+        # Two-tier lookup: in-process first, then shared cache, then database
+        value = get_hot_cached_data(
+            cache_key, build_setting_value, 'system_settings', get_cache_ttl('system_settings')
+        )
+        if value is None:
             return Response(
                 {'error': f'Setting with key "{key}" not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        return Response({'key': key, 'value': value}, status=status.HTTP_200_OK)
     
     elif request.method == 'PUT':
         value = request.data.get('value')
@@ -238,82 +241,172 @@ def cache_clear_view(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-def event_stream_generator(user, last_event_id=None):
+class EventStreamRenderer(BaseRenderer):
     """
-    Generator function for Server-Sent Events.
-    Polls sync_events and yields new events.
+    Renderer for text/event-stream clients.
+    
+    Lets EventSource requests pass content negotiation; error responses
+    (e.g. 401) are sent as a single SSE data message.
     """
-    # Track the last event ID we've sent
-    if last_event_id:
-        try:
-            last_id = int(last_event_id)
-        except (ValueError, TypeError):
-            last_id = 0
-    else:
-        last_id = 0
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
     
-    # Send initial connection message
-    yield f"data: {json.dumps({'type': 'connected', 'message': 'SSE connection established'})}\n\n"
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f"data: {json.dumps(data)}\n\n".encode(self.charset)
+
+
+def parse_last_event_id(value):
+    """Parse a Last-Event-ID value, treating anything invalid as 0."""
+    try:
+        return int(value) if value else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def format_sse_event(event_id, event_type, cadet_id, data, timestamp):
+    """Format one sync event as an SSE message with its resume ID."""
+    event_data = {
+        'type': event_type,
+        'cadet_id': cadet_id,
+        'data': data,
+        'timestamp': timestamp
+    }
+    return f"id: {event_id}\ndata: {json.dumps(event_data)}\n\n"
+
+
+def get_missed_sync_events(user, last_id, limit=50):
+    """
+    Get sync events a reconnecting SSE client missed.
     
-    # Poll for new events
-    while True:
-        try:
-            # Get new sync events since last_id
-            new_events = SyncEvent.objects.filter(
-                id__gt=last_id,
-                processed=False
-            ).order_by('id')[:10]
-            
-            for event in new_events:
-                # Check if user should receive this event
-                should_send = False
-                
-                # Send to admins and training staff
-                if user.role in ['admin', 'training_staff']:
-                    should_send = True
-                # Send to cadet if it's their event
-                elif user.role == 'cadet' and event.cadet_id == user.cadet_id:
-                    should_send = True
-                
-                if should_send:
-                    event_data = {
-                        'type': event.event_type,
-                        'cadet_id': event.cadet_id,
-                        'data': event.payload,
-                        'timestamp': event.created_at.isoformat()
-                    }
-                    
-                    yield f"id: {event.id}\n"
-                    yield f"data: {json.dumps(event_data)}\n\n"
-                    
-                    last_id = event.id
+    Args:
+        user: Connected user
+        last_id: Last event ID the client received (Last-Event-ID)
+        limit: Maximum number of events to replay
+        
+    Returns:
+        List of event dictionaries in ID order
+    """
+    queryset = SyncEvent.objects.filter(id__gt=last_id)
+    
+    if user.role == 'cadet':
+        if not user.cadet_id:
+            return []
+        queryset = queryset.filter(cadet_id=user.cadet_id)
+    elif user.role not in ['admin', 'training_staff']:
+        return []
+    
+    return list(
+        queryset.order_by('id').values('id', 'event_type', 'cadet_id', 'payload', 'created_at')[:limit]
+    )
+
+
+async def event_stream_generator(user, last_event_id=None):
+    """
+    Async generator for Server-Sent Events.
+    
+    Subscribes to the user's channel layer groups, replays events after
+    Last-Event-ID with a single query, then waits for events pushed by the
+    SyncEvent post-commit signal. No polling queries are issued while idle.
+    """
+    last_id = parse_last_event_id(last_event_id)
+    
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        logger.warning("Channel layer not configured, SSE stream unavailable")
+        yield f"data: {json.dumps({'type': 'error', 'message': 'Event stream unavailable'})}\n\n"
+        return
+    
+    groups = get_sse_groups(user.role, user.cadet_id)
+    channel_name = await channel_layer.new_channel()
+    
+    try:
+        # Subscribe before replaying so nothing committed in between is lost
+        for group in groups:
+            await channel_layer.group_add(group, channel_name)
+        
+        # Send initial connection message
+        yield f"data: {json.dumps({'type': 'connected', 'message': 'SSE connection established'})}\n\n"
+        
+        replayed_ids = set()
+        if last_id:
+            missed_events = await sync_to_async(get_missed_sync_events)(user, last_id)
+            for event in missed_events:
+                replayed_ids.add(event['id'])
+                yield format_sse_event(
+                    event['id'],
+                    event['event_type'],
+                    event['cadet_id'],
+                    event['payload'],
+                    event['created_at'].isoformat()
+                )
+        
+        heartbeat_interval = getattr(settings, 'SSE_HEARTBEAT_INTERVAL', 15)
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    channel_layer.receive(channel_name),
+                    timeout=heartbeat_interval
+                )
+            except asyncio.TimeoutError:
+                # Send heartbeat to keep connection alive
+                yield ": heartbeat\n\n"
+                continue
             
-            # Send heartbeat to keep connection alive
-            if not new_events:
-                yield f": heartbeat\n\n"
+            # Skip events already delivered by the replay
+            if message['id'] in replayed_ids:
+                continue
             
-            # Wait before polling again
-            time.sleep(2)
-        
-        except Exception as e:
-            # Log error and continue
-            logger.error(f"Error in SSE stream: {e}")
-            time.sleep(5)
+            yield format_sse_event(
+                message['id'],
+                message['event_type'],
+                message['cadet_id'],
+                message['data'],
+                message['timestamp']
+            )
+    
+    finally:
+        for group in groups:
+            try:
+                await channel_layer.group_discard(group, channel_name)
+            except Exception as e:
+                logger.error(f"Error leaving SSE group {group}: {e}")
 
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, IsApproved])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
 def events_sse_view(request):
     """
     Server-Sent Events endpoint for real-time updates.
     Provides backward compatibility with SSE clients.
     GET /api/events
+    
+    Streams are only served by the ASGI (Daphne) service, where the async
+    generator is consumed without holding a worker. Under WSGI the stream
+    would never be sent, so the WSGI service answers with the events missed
+    since Last-Event-ID and closes the response; EventSource reconnects
+    after the retry interval, which turns the endpoint into short polling.
     """
-    # Get Last-Event-ID header if present
+    user = request.auth_user
     last_event_id = request.META.get('HTTP_LAST_EVENT_ID')
     
-    # Get the authenticated user
-    user = request.user
+    if not isinstance(request._request, ASGIRequest):
+        missed_events = get_missed_sync_events(user, parse_last_event_id(last_event_id))
+        retry_ms = int(settings.SSE_POLL_INTERVAL * 1000)
+        body = f"retry: {retry_ms}\n\n" + ''.join(
+            format_sse_event(
+                event['id'],
+                event['event_type'],
+                event['cadet_id'],
+                event['payload'],
+                event['created_at'].isoformat()
+            )
+            for event in missed_events
+        )
+        response = HttpResponse(body, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        return response
     
     # Create streaming response
     response = StreamingHttpResponse(
@@ -532,6 +625,8 @@ def audit_logs_list(request):
     - end_date: Filter by end date (YYYY-MM-DD)
     - page: Page number (default: 1)
     - limit: Items per page (default: 50)
+    - cursor: Keyset cursor (empty for the first page); replaces page
+    - include_total: Exact total instead of an estimate in cursor mode
     """
     # Get query parameters
     table_name = request.GET.get('table_name')
@@ -539,8 +634,6 @@ def audit_logs_list(request):
     user_id = request.GET.get('user_id')
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
-    page = int(request.GET.get('page', 1))
-    limit = int(request.GET.get('limit', 50))
     
     # Build query
     queryset = AuditLog.objects.all()
@@ -560,6 +653,19 @@ def audit_logs_list(request):
     if end_date:
         queryset = queryset.filter(created_at__lte=end_date)
     
+    # Keyset pagination avoids OFFSET scans and COUNT(*) on deep pages
+    paginator = KeysetPagination()
+    if paginator.cursor_query_param in request.GET:
+        logs = paginator.paginate_queryset(queryset, request)
+        serializer = AuditLogSerializer(logs, many=True)
+        return Response({
+            'logs': serializer.data,
+            'pagination': paginator.get_cursor_metadata()
+        }, status=status.HTTP_200_OK)
+    
+    page = int(request.GET.get('page', 1))
+    limit = int(request.GET.get('limit', 50))
+    
     # Order by most recent first
     queryset = queryset.order_by('-created_at')
     
@@ -600,8 +706,6 @@ def audit_logs_export(request):
     - end_date: Filter by end date (YYYY-MM-DD)
     - format: Export format (csv or excel, default: csv)
     """
-    import csv
-    from django.http import HttpResponse
     from datetime import datetime
     
     # Get query parameters
@@ -632,70 +736,15 @@ def audit_logs_export(request):
     
     # Order by most recent first
     queryset = queryset.order_by('-created_at')
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     
+    # Both formats stream from a server-side cursor with constant memory
     if export_format == 'csv':
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        response['Content-Disposition'] = f'attachment; filename="audit_logs_{timestamp}.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['ID', 'Table Name', 'Operation', 'Record ID', 'User ID', 'Payload', 'Created At'])
-        
-        for log in queryset:
-            writer.writerow([
-                log.id,
-                log.table_name,
-                log.operation,
-                log.record_id,
-                log.user_id or '',
-                json.dumps(log.payload),
-                log.created_at.strftime('%Y-%m-%d %H:%M:%S')
-            ])
-        
-        return response
+        return stream_audit_logs_csv(queryset, f'audit_logs_{timestamp}.csv')
     
     elif export_format == 'excel':
-        # Excel export using openpyxl
         try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font
-            from django.http import HttpResponse
-            
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Audit Logs"
-            
-            # Header row
-            headers = ['ID', 'Table Name', 'Operation', 'Record ID', 'User ID', 'Payload', 'Created At']
-            ws.append(headers)
-            
-            # Make header bold
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
-            
-            # Data rows
-            for log in queryset:
-                ws.append([
-                    log.id,
-                    log.table_name,
-                    log.operation,
-                    log.record_id,
-                    log.user_id or '',
-                    json.dumps(log.payload),
-                    log.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                ])
-            
-            # Create response
-            response = HttpResponse(
-                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            response['Content-Disposition'] = f'attachment; filename="audit_logs_{timestamp}.xlsx"'
-            
-            wb.save(response)
-            return response
-            
+            return audit_logs_xlsx_response(queryset, f'audit_logs_{timestamp}.xlsx')
         except ImportError:
             return Response({
                 'error': 'Excel export requires openpyxl package'
@@ -779,8 +828,13 @@ def metrics_view(request):
     - error_rate: Percentage of requests that resulted in errors
     - status_codes: Breakdown of status codes
     - slow_requests: List of slow requests (>1000ms)
+    - latency/db_time/query_count: Histogram summaries (count, avg, p50, p90, p99)
+    - endpoints: The same histogram summaries per route template
     """
     try:
+        # Include this worker's not-yet-flushed metrics
+        metrics_aggregator.flush()
+        
         # Get metrics from cache
         request_count = cache.get('metrics:request_count', 0)
         error_count = cache.get('metrics:error_count', 0)
@@ -794,10 +848,8 @@ def metrics_view(request):
         else:
             active_session_count = len(active_sessions) if active_sessions else 0
         
-        # Calculate average response time
-        avg_response_time = 0
-        if response_times:
-            avg_response_time = sum(response_times) / len(response_times)
+        # Latency statistics come from the race-free histograms
+        latency = summarize_histogram('latency')
         
         # Calculate error rate
         error_rate = 0
@@ -811,32 +863,28 @@ def metrics_view(request):
             if count > 0:
                 status_codes[str(code)] = count
         
-        # Calculate min/max response times
+        # Min/max are taken from the bounded sample of recent response times
         min_response_time = min(response_times) if response_times else 0
         max_response_time = max(response_times) if response_times else 0
         
-        # Calculate median response time
-        median_response_time = 0
-        if response_times:
-            sorted_times = sorted(response_times)
-            mid = len(sorted_times) // 2
-            if len(sorted_times) % 2 == 0:
-                median_response_time = (sorted_times[mid - 1] + sorted_times[mid]) / 2
-            else:
-                median_response_time = sorted_times[mid]
-        
         metrics_data = {
             'request_count': request_count,
             'error_count': error_count,
             'active_sessions': active_session_count,
-            'avg_response_time': round(avg_response_time, 2),
+            'avg_response_time': latency['avg'],
             'min_response_time': round(min_response_time, 2),
             'max_response_time': round(max_response_time, 2),
-            'median_response_time': round(median_response_time, 2),
+            'median_response_time': latency['p50'],
+            'p90_response_time': latency['p90'],
+            'p99_response_time': latency['p99'],
             'error_rate': round(error_rate, 2),
             'status_codes': status_codes,
             'slow_requests_count': len(slow_requests),
             'slow_requests': slow_requests[-10:],  # Last 10 slow requests
+            'latency': latency,
+            'db_time': summarize_histogram('db_time'),
+            'query_count': summarize_histogram('query_count'),
+            'endpoints': get_endpoint_summaries(),
             'timestamp': time.time()
         }
         
@@ -1113,22 +1161,26 @@ def prometheus_metrics_view(request):
     Prometheus-compatible metrics export endpoint.
     GET /api/metrics/prometheus
     
-    Returns metrics in Prometheus text format.
+    Returns metrics in Prometheus text format. Request counters and the
+    latency, DB time and query count histograms come from the persistent
+    registry (aggregated across gunicorn workers in multiprocess mode);
+    session and error-rate gauges are computed from the shared cache.
     """
     from prometheus_client import (
-        CollectorRegistry, Gauge, Counter, Histogram,
+        CollectorRegistry, Gauge,
         generate_latest, CONTENT_TYPE_LATEST
     )
     from django.http import HttpResponse
     
     try:
-        # Create a custom registry
-        registry = CollectorRegistry()
+        # Include this worker's not-yet-flushed metrics
+        metrics_aggregator.flush()
+        
+        # Gauges derived from the shared cache, rebuilt on every scrape
+        gauge_registry = CollectorRegistry()
         
-        # Get metrics from cache
         request_count = cache.get('metrics:request_count', 0)
         error_count = cache.get('metrics:error_count', 0)
-        response_times = cache.get('metrics:response_times', [])
         active_sessions = cache.get('metrics:active_sessions', set())
         
         # Convert set to count
@@ -1137,59 +1189,26 @@ def prometheus_metrics_view(request):
         else:
             active_session_count = len(active_sessions) if active_sessions else 0
         
-        # Calculate metrics
-        avg_response_time = sum(response_times) / len(response_times) if response_times else 0
         error_rate = (error_count / request_count * 100) if request_count > 0 else 0
         
-        # Define Prometheus metrics
-        http_requests_total = Counter(
-            'http_requests_total',
-            'Total HTTP requests',
-            registry=registry
-        )
-        http_requests_total.inc(request_count)
-        
-        http_errors_total = Counter(
-            'http_errors_total',
-            'Total HTTP errors',
-            registry=registry
-        )
-        http_errors_total.inc(error_count)
-        
-        http_request_duration_seconds = Gauge(
-            'http_request_duration_seconds',
-            'Average HTTP request duration in seconds',
-            registry=registry
-        )
-        http_request_duration_seconds.set(avg_response_time / 1000)  # Convert ms to seconds
-        
         http_active_sessions = Gauge(
             'http_active_sessions',
             'Number of active user sessions',
-            registry=registry
+            registry=gauge_registry
         )
         http_active_sessions.set(active_session_count)
         
         http_error_rate = Gauge(
             'http_error_rate',
             'HTTP error rate percentage',
-            registry=registry
+            registry=gauge_registry
         )
         http_error_rate.set(error_rate)
         
-        # Get status code breakdown
-        for code in [200, 201, 204, 400, 401, 403, 404, 500, 502, 503]:
-            count = cache.get(f'metrics:status:{code}', 0)
-            if count > 0:
-                status_counter = Counter(
-                    f'http_status_{code}_total',
-                    f'Total HTTP {code} responses',
-                    registry=registry
-                )
-                status_counter.inc(count)
-        
         # Generate Prometheus format output
-        metrics_output = generate_latest(registry)
+        metrics_output = (
+            generate_latest(get_prometheus_registry()) + generate_latest(gauge_registry)
+        )
         
         return HttpResponse(
             metrics_output,
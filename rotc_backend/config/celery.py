@@ -34,6 +34,10 @@ app.conf.beat_schedule = {
         'task': 'apps.attendance.tasks.generate_daily_attendance_report',
         'schedule': crontab(hour=18, minute=0),  # Run daily at 6 PM
     },
+    'prune-report-cache': {
+        'task': 'prune_report_cache',
+        'schedule': crontab(hour=4, minute=0),  # Run daily at 4 AM
+    },
 }
 
 @app.task(bind=True, ignore_result=True)
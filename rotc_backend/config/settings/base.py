@@ -111,6 +111,31 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# 'data_files' holds CSV import uploads and background export files. They
+# are written by one process and read by another (web and Celery worker),
+# so production points it at shared storage that accepts any file type.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'data_files': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+}
+
+# Rendered PDF reports, keyed by a fingerprint of their data (see
+# apps.reports.cache). Configure STORAGES['reports'] to use object storage;
+# the local directory is for development only.
+REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', str(BASE_DIR / 'report_cache'))
+
+# Cached reports older than this, or beyond the size limit (oldest first),
+# are deleted by the prune_report_cache task
+REPORT_CACHE_MAX_AGE_DAYS = int(os.environ.get('REPORT_CACHE_MAX_AGE_DAYS', '30'))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', str(1024 * 1024 * 1024)))
+
 # Cloudinary configuration
 CLOUDINARY_STORAGE = {
     'CLOUD_NAME': os.environ.get('CLOUDINARY_CLOUD_NAME', ''),
@@ -143,7 +168,7 @@ ASGI_APPLICATION = 'config.asgi.application'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -227,6 +252,49 @@ CACHE_TTL = {
     'system_settings': 1800,  # 30 minutes
 }
 
+# Fraction of the TTL applied as random jitter to read-through cache entries
+CACHE_TTL_JITTER = 0.1
+
+# Seconds an expired read-through entry may still be served while one worker rebuilds it
+CACHE_STALE_TTL = 60
+
+# In-process (per worker) cache for hot, tiny objects
+LOCAL_CACHE_MAX_ENTRIES = 2048
+LOCAL_CACHE_TTL = 60  # seconds
+LOCAL_CACHE_VERSION_CHECK_INTERVAL = 2  # seconds between shared version checks
+
+# Seconds between flushes of per-worker request metrics to the shared cache
+METRICS_FLUSH_INTERVAL = 10
+
+# Write audit log rows in the same transaction as the change instead of
+# buffering them until commit (slower, but never lost after a commit)
+AUDIT_LOG_GUARANTEED_DELIVERY = os.environ.get('AUDIT_LOG_GUARANTEED_DELIVERY', 'False') == 'True'
+
+# Exports with more rows than this are generated by a Celery task and
+# downloaded later instead of being streamed in the request
+EXPORT_ASYNC_THRESHOLD = int(os.environ.get('EXPORT_ASYNC_THRESHOLD', '50000'))
+
+# CSV uploads larger than this (bytes) are imported by a Celery task that
+# streams the file; progress is reported through the import status endpoint
+CSV_IMPORT_ASYNC_BYTES = int(os.environ.get('CSV_IMPORT_ASYNC_BYTES', str(5 * 1024 * 1024)))
+
+# Processes used to render batch PDF reports (defaults to CPU count, up to 4)
+PDF_RENDER_WORKERS = int(os.environ['PDF_RENDER_WORKERS']) if os.environ.get('PDF_RENDER_WORKERS') else None
+
+# Full grade/attendance reports with more rows than this are rendered as a
+# report job (202 + status URL) instead of inside the request
+REPORT_ASYNC_THRESHOLD = int(os.environ.get('REPORT_ASYNC_THRESHOLD', '2000'))
+
+# Report jobs one user can have queued or running at the same time
+REPORT_JOBS_PER_USER = int(os.environ.get('REPORT_JOBS_PER_USER', '3'))
+
+# Seconds of silence before an SSE connection sends a heartbeat comment
+SSE_HEARTBEAT_INTERVAL = 15
+
+# Seconds between reconnects when /api/events/ is served by the WSGI
+# service, which answers with missed events instead of a stream
+SSE_POLL_INTERVAL = 10
+
 # Celery Configuration
 CELERY_BROKER_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
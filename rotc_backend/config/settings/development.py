@@ -87,6 +87,9 @@ CACHES = {
     }
 }
 
+# Flush request metrics on every request so they are visible immediately
+METRICS_FLUSH_INTERVAL = 0
+
 # Channel layers for Django Channels (development)
 CHANNEL_LAYERS = {
     'default': {
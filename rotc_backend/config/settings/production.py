@@ -152,6 +152,15 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
     },
+    # MediaCloudinaryStorage only accepts images; imports/exports are raw files
+    "data_files": {
+        "BACKEND": "cloudinary_storage.storage.RawMediaCloudinaryStorage",
+    },
+    # Rendered report cache; shared so the web service can serve PDFs that
+    # report jobs rendered on the worker
+    "reports": {
+        "BACKEND": "cloudinary_storage.storage.RawMediaCloudinaryStorage",
+    },
 }
 
 # WhiteNoise configuration for serving static files in production
@@ -135,7 +135,7 @@ def bulk_create_attendance_records(
             status='present'
         )
     """
-    from apps.attendance.models import AttendanceRecord
+    from apps.attendance.bulk import bulk_upsert_attendance
     from apps.cadets.models import Cadet
     
     # Verify cadets exist
@@ -143,24 +143,16 @@ def bulk_create_attendance_records(
         Cadet.objects.filter(id__in=cadet_ids).values_list('id', flat=True)
     )
     
-    # Create attendance records
-    records = []
-    for cadet_id in cadet_ids:
-        if cadet_id in existing_cadets:
-            records.append(
-                AttendanceRecord(
-                    training_day_id=training_day_id,
-                    cadet_id=cadet_id,
-                    status=status
-                )
-            )
-    
-    # Bulk create with ignore_conflicts to handle duplicates
-    created_records = AttendanceRecord.objects.bulk_create(
-        records,
-        batch_size=batch_size,
-        ignore_conflicts=True
+    # Existing records are skipped; grades and sync events are updated in bulk
+    result = bulk_upsert_attendance(
+        (
+            {'training_day_id': training_day_id, 'cadet_id': cadet_id, 'status': status}
+            for cadet_id in cadet_ids
+            if cadet_id in existing_cadets
+        ),
+        batch_size=batch_size
     )
+    created_records = result['created']
     
     return created_records
 
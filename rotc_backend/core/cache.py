@@ -1,16 +1,98 @@
 """
 Cache utility functions for ROTC Backend.
 Provides helper functions for cache key generation and invalidation.
+
+Invalidation is generation based: every cached namespace is tagged with one
+or more entities, and each entity has a monotonically increasing generation
+counter that is folded into the cache key. Invalidating an entity bumps its
+counter, so all keys built from the old generation simply stop being read
+and expire on their own TTL. This is O(1) and works on every cache backend.
 """
 import hashlib
 import json
 import logging
-from typing import Any, Optional, Dict, List
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Dict, List
 from django.core.cache import cache
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Entity tags whose generations are folded into keys under each namespace.
+# The namespace is the first segment of the key prefix ('cadets:list' -> 'cadets').
+CACHE_NAMESPACE_TAGS = {
+    'cadets': ('cadets', 'grades'),
+    'grades': ('grades', 'cadets'),
+    'training_days': ('training_days',),
+    'system': ('system_settings',),
+}
+
+GENERATION_KEY_PREFIX = 'cache:gen:'
+
+
+class LocalLRUCache:
+    """
+    Bounded, thread-safe in-process LRU cache with per-entry TTL.
+    
+    Values are shared between threads of the worker, so callers must store
+    immutable snapshots (dicts/tuples of plain values), not live objects.
+    """
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> tuple:
+        """
+        Look up a key.
+        
+        Returns:
+            (hit, value) tuple so that None can be cached
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return False, None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+    
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value, evicting the least recently used entries when full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+    
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Per-worker first tier for hot, tiny objects (see get_hot_cached_data)
+local_cache = LocalLRUCache(getattr(settings, 'LOCAL_CACHE_MAX_ENTRIES', 2048))
+
+# Per-worker snapshot of tag generations, refreshed from the shared cache
+_local_generations = LocalLRUCache(getattr(settings, 'LOCAL_CACHE_MAX_ENTRIES', 2048))
+
 
 def get_cache_ttl(cache_type: str) -> int:
     """
@@ -25,26 +107,144 @@ def get_cache_ttl(cache_type: str) -> int:
     return settings.CACHE_TTL.get(cache_type, 300)  # Default 5 minutes
 
 
-def generate_cache_key(prefix: str, **kwargs) -> str:
+def get_jittered_ttl(cache_type: str) -> int:
+    """
+    Get the TTL for a cache type with random jitter applied.
+    
+    Spreading expiry times keeps entries written together (e.g. after a
+    deploy or an invalidation) from all expiring in the same second.
+    
+    Args:
+        cache_type: Type of cache (cadet_list, grades, training_days, system_settings)
+    
+    Returns:
+        TTL in seconds
+    """
+    ttl = get_cache_ttl(cache_type)
+    jitter = getattr(settings, 'CACHE_TTL_JITTER', 0.1)
+    return max(1, int(ttl * random.uniform(1 - jitter, 1 + jitter)))
+
+
+def _generation_key(tag: str) -> str:
+    """Return the cache key holding the generation counter for a tag."""
+    return f"{settings.CACHE_KEY_PREFIX}{GENERATION_KEY_PREFIX}{tag}"
+
+
+def _new_generation() -> int:
+    """
+    Seed value for a missing generation counter.
+    
+    Counters are seeded from the clock rather than 1 so that a counter which
+    was evicted can never fall back to a generation that is still cached.
+    """
+    return time.time_ns() // 1000
+
+
+def get_tags_for_prefix(prefix: str) -> tuple:
+    """
+    Get the entity tags a cache key prefix depends on.
+    
+    Args:
+        prefix: Cache key prefix (e.g., 'cadets:list')
+    
+    Returns:
+        Tuple of tag names (empty if the namespace is untagged)
+    """
+    namespace = prefix.split(':', 1)[0]
+    return CACHE_NAMESPACE_TAGS.get(namespace, ())
+
+
+def get_cache_generations(tags) -> Dict[str, int]:
+    """
+    Get the current generation for each tag, seeding missing counters.
+    
+    Args:
+        tags: Iterable of tag names
+    
+    Returns:
+        Dictionary mapping tag name to generation
+    """
+    tags = list(tags)
+    if not tags:
+        return {}
+    
+    keys = {_generation_key(tag): tag for tag in tags}
+    try:
+        found = cache.get_many(list(keys))
+    except Exception as e:
+        logger.warning(f"Cache generation lookup error for {tags}: {str(e)}")
+        return {tag: 0 for tag in tags}
+    
+    generations = {}
+    for key, tag in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            try:
+                # add() keeps the first writer's seed if workers race here
+                cache.add(key, _new_generation(), None)
+                generation = cache.get(key, 0)
+            except Exception as e:
+                logger.warning(f"Cache generation seed error for {tag}: {str(e)}")
+                generation = 0
+        generations[tag] = generation
+    return generations
+
+
+def bump_cache_generation(*tags: str) -> None:
+    """
+    Invalidate every cache entry tagged with any of the given tags.
+    
+    Args:
+        *tags: Tag names to invalidate
+    """
+    for tag in tags:
+        key = _generation_key(tag)
+        # Drop this worker's snapshot so its own writes are visible immediately
+        _local_generations.delete(tag)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Counter missing (never read or evicted) - any fresh seed is newer
+            cache.set(key, _new_generation() + 1, None)
+        except Exception as e:
+            logger.warning(f"Cache generation bump error for {tag}: {str(e)}")
+            continue
+        logger.debug(f"Cache generation bumped: {tag}")
+
+
+def generate_cache_key(prefix: str, tags: Optional[tuple] = None, **kwargs) -> str:
     """
     Generate a cache key with the given prefix and parameters.
     
+    The current generation of every tag the key depends on is folded into
+    the key, so bumping a tag makes all existing keys for it unreachable.
+    
     Args:
         prefix: Cache key prefix (e.g., 'cadets:list', 'grades')
+        tags: Entity tags to fold in (defaults to the prefix namespace tags)
         **kwargs: Additional parameters to include in the key
     
     Returns:
         Generated cache key
     """
+    if tags is None:
+        tags = get_tags_for_prefix(prefix)
+    
+    key = f"{settings.CACHE_KEY_PREFIX}{prefix}"
+    
+    if tags:
+        generations = get_cache_generations(tags)
+        key += ':g' + '.'.join(str(generations[tag]) for tag in tags)
+    
     if not kwargs:
-        return f"{settings.CACHE_KEY_PREFIX}{prefix}"
+        return key
     
     # Sort kwargs for consistent key generation
     sorted_params = sorted(kwargs.items())
     params_str = json.dumps(sorted_params, sort_keys=True)
     params_hash = hashlib.md5(params_str.encode()).hexdigest()[:8]
     
-    return f"{settings.CACHE_KEY_PREFIX}{prefix}:{params_hash}"
+    return f"{key}:{params_hash}"
 
 
 def get_cached_data(key: str, default: Any = None) -> Optional[Any]:
@@ -110,10 +310,155 @@ def delete_cached_data(key: str) -> bool:
         return False
 
 
+def _release_lock(lock_key: str, token: str) -> None:
+    """Release a rebuild lock if it is still held by the given token."""
+    try:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    except Exception as e:
+        logger.warning(f"Cache lock release error for key {lock_key}: {str(e)}")
+
+
+def _build_and_store(key: str, builder: Callable[[], Any], cache_type: str) -> Any:
+    """Run the builder and store its result with freshness metadata."""
+    value = builder()
+    ttl = get_jittered_ttl(cache_type)
+    stale_ttl = getattr(settings, 'CACHE_STALE_TTL', 60)
+    entry = {'value': value, 'fresh_until': time.time() + ttl}
+    # Keep the entry physically longer than its fresh window so it can be
+    # served stale while a single worker rebuilds it
+    set_cached_data(key, entry, ttl + stale_ttl)
+    return value
+
+
+def get_or_set_cached_data(
+    key: str,
+    builder: Callable[[], Any],
+    cache_type: str,
+    lock_timeout: int = 30,
+    wait_timeout: float = 5.0,
+) -> Any:
+    """
+    Read-through cache lookup with stampede protection.
+    
+    On a miss only one worker (the holder of the rebuild lock) runs the
+    builder; the others wait for its result. Once an entry's fresh window
+    passes it is still served to everyone except the single worker that
+    rebuilds it (stale-while-revalidate). TTLs are jittered per cache type.
+    
+    Args:
+        key: Cache key
+        builder: Zero-argument callable producing the value on a miss
+        cache_type: CACHE_TTL entry used for the TTL
+        lock_timeout: Seconds before an abandoned rebuild lock expires
+        wait_timeout: Seconds a worker waits for another worker's rebuild
+    
+    Returns:
+        Cached or freshly built value
+    """
+    lock_key = f"{key}:lock"
+    entry = get_cached_data(key)
+    
+    if entry is not None and entry['fresh_until'] > time.time():
+        return entry['value']
+    
+    token = uuid.uuid4().hex
+    try:
+        acquired = cache.add(lock_key, token, lock_timeout)
+    except Exception as e:
+        logger.warning(f"Cache lock error for key {key}: {str(e)}")
+        acquired = False
+        token = None
+    
+    if acquired:
+        try:
+            return _build_and_store(key, builder, cache_type)
+        finally:
+            _release_lock(lock_key, token)
+    
+    if entry is not None:
+        # Another worker is already rebuilding - serve the stale value
+        logger.debug(f"Cache stale hit: {key}")
+        return entry['value']
+    
+    if token is not None:
+        # Cold miss while another worker rebuilds - wait for its result
+        deadline = time.time() + wait_timeout
+        while time.time() < deadline:
+            time.sleep(0.05)
+            entry = get_cached_data(key)
+            if entry is not None:
+                return entry['value']
+    
+    # Rebuilder took too long or the cache is unavailable - build locally
+    logger.debug(f"Cache rebuild wait expired: {key}")
+    return _build_and_store(key, builder, cache_type)
+
+
+def _get_local_generation(tag: str) -> int:
+    """
+    Get a tag's generation, re-reading the shared counter at most once per
+    LOCAL_CACHE_VERSION_CHECK_INTERVAL seconds per worker.
+    """
+    hit, generation = _local_generations.get(tag)
+    if hit:
+        return generation
+    generation = get_cache_generations([tag])[tag]
+    interval = getattr(settings, 'LOCAL_CACHE_VERSION_CHECK_INTERVAL', 2)
+    _local_generations.set(tag, generation, interval)
+    return generation
+
+
+def get_hot_cached_data(
+    key: str,
+    builder: Callable[[], Any],
+    tag: str,
+    ttl: Optional[int] = None,
+) -> Any:
+    """
+    Two-tier lookup for small objects read on nearly every request.
+    
+    The first tier is an in-process LRU, the second the shared Django cache,
+    and the builder (normally a DB query) runs only when both miss. Entries
+    are keyed by the current generation of ``tag``; other workers notice a
+    bump_cache_generation() within LOCAL_CACHE_VERSION_CHECK_INTERVAL seconds,
+    the worker that made the change immediately.
+    
+    Args:
+        key: Cache key (should not fold in generations itself)
+        builder: Zero-argument callable returning an immutable snapshot
+        tag: Entity tag whose generation invalidates this entry
+        ttl: Per-entry TTL in seconds (defaults to LOCAL_CACHE_TTL)
+    
+    Returns:
+        Cached or freshly built value (may be None)
+    """
+    if ttl is None:
+        ttl = getattr(settings, 'LOCAL_CACHE_TTL', 60)
+    
+    versioned_key = f"{key}:g{_get_local_generation(tag)}"
+    
+    hit, value = local_cache.get(versioned_key)
+    if hit:
+        return value
+    
+    # Wrapped in a tuple so a cached None is distinguishable from a miss
+    entry = get_cached_data(versioned_key)
+    if entry is None:
+        entry = (builder(),)
+        set_cached_data(versioned_key, entry, ttl)
+    
+    local_cache.set(versioned_key, entry[0], ttl)
+    return entry[0]
+
+
 def delete_pattern(pattern: str) -> bool:
     """
     Delete all cache keys matching a pattern.
     
+    This scans the keyspace on Redis and is a no-op on other backends;
+    prefer bump_cache_generation() for invalidating tagged namespaces.
+    
     Args:
         pattern: Pattern to match (e.g., 'cadets:*')
     
@@ -142,39 +487,26 @@ def invalidate_cadet_cache(cadet_id: Optional[int] = None) -> None:
     Invalidate cadet-related cache entries.
     
     Args:
-        cadet_id: Specific cadet ID to invalidate (optional)
+        cadet_id: Specific cadet ID that changed (optional, for logging)
     """
     try:
-        # Invalidate all cadet lists
-        delete_pattern('cadets:*')
-        
-        # Invalidate specific cadet if provided
-        if cadet_id:
-            delete_cached_data(f"cadets:detail:{cadet_id}")
-            delete_cached_data(f"grades:{cadet_id}")
-        
+        # Cadet lists and details embed grades, so both namespaces depend on 'cadets'
+        bump_cache_generation('cadets')
         logger.info(f"Invalidated cadet cache (cadet_id: {cadet_id})")
     except Exception as e:
         logger.error(f"Error invalidating cadet cache: {str(e)}")
 
 
-def invalidate_grades_cache(cadet_id: int) -> None:
+def invalidate_grades_cache(cadet_id: Optional[int] = None) -> None:
     """
     Invalidate grades-related cache entries.
     
     Args:
-        cadet_id: Cadet ID whose grades cache should be invalidated
+        cadet_id: Cadet ID whose grades changed (None for bulk changes)
     """
     try:
-        # Invalidate specific cadet's grades
-        delete_cached_data(f"grades:{cadet_id}")
-        
-        # Invalidate cadet detail (includes grades)
-        delete_cached_data(f"cadets:detail:{cadet_id}")
-        
-        # Invalidate all grades lists
-        delete_pattern('grades:list*')
-        
+        # Invalidates grades lists/details and cadet lists that embed grades
+        bump_cache_generation('grades')
         logger.info(f"Invalidated grades cache for cadet {cadet_id}")
     except Exception as e:
         logger.error(f"Error invalidating grades cache: {str(e)}")
@@ -185,25 +517,55 @@ def invalidate_training_day_cache() -> None:
     Invalidate training day cache entries.
     """
     try:
-        delete_pattern('training_days:*')
+        bump_cache_generation('training_days')
         logger.info("Invalidated training day cache")
     except Exception as e:
         logger.error(f"Error invalidating training day cache: {str(e)}")
 
 
+def invalidate_user_cache(username: str) -> None:
+    """
+    Invalidate the cached row of a single user.
+    
+    Args:
+        username: Username of the user that changed
+    """
+    try:
+        bump_cache_generation(f'users:{username}')
+        logger.info(f"Invalidated user cache (username: {username})")
+    except Exception as e:
+        logger.error(f"Error invalidating user cache: {str(e)}")
+
+
+def invalidate_auth_user_cache(user_id: int) -> None:
+    """
+    Invalidate cached JWT user resolutions for a Django auth user.
+    
+    Args:
+        user_id: Django auth user ID that changed
+    """
+    try:
+        bump_cache_generation(f'auth_users:{user_id}')
+        logger.info(f"Invalidated auth user cache (user_id: {user_id})")
+    except Exception as e:
+        logger.error(f"Error invalidating auth user cache: {str(e)}")
+
+
 def invalidate_system_settings_cache(key: Optional[str] = None) -> None:
     """
     Invalidate system settings cache entries.
     
+    Any change also invalidates the cached 'all settings' dictionary, so a
+    single generation covers both the per-key and the full listing.
+    
     Args:
-        key: Specific setting key to invalidate (optional)
+        key: Specific setting key that changed (optional, for logging)
     """
     try:
+        bump_cache_generation('system_settings')
         if key:
-            delete_cached_data(f"system:settings:{key}")
             logger.info(f"Invalidated system setting cache: {key}")
         else:
-            delete_pattern('system:settings:*')
             logger.info("Invalidated all system settings cache")
     except Exception as e:
         logger.error(f"Error invalidating system settings cache: {str(e)}")
@@ -272,6 +634,8 @@ def clear_all_cache() -> bool:
     """
     try:
         cache.clear()
+        local_cache.clear()
+        _local_generations.clear()
         logger.info("Cleared all cache entries")
         return True
     except Exception as e:
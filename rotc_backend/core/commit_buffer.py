@@ -0,0 +1,116 @@
+"""
+Per-transaction buffers flushed once on commit.
+
+Side effects of a write (broadcasts, audit rows, ...) are collected while
+the transaction is open and handed to a flush function in one batch after
+it commits. Items are batched per savepoint: Django discards the on_commit
+callbacks registered inside a savepoint when it rolls back, so a rollback
+(of the transaction or of a nested atomic block) discards exactly the
+items added inside it. Outside a transaction items are flushed immediately.
+"""
+import logging
+import threading
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class CommitBuffer:
+    """
+    Collect items for the current transaction and flush them once on commit.
+    
+    Batches are kept per thread and per database alias, so concurrent
+    requests never share a batch.
+    """
+    
+    def __init__(self, flush, name='commit buffer'):
+        """
+        Args:
+            flush: Callable receiving the list of buffered items
+            name: Name used in log messages
+        """
+        self.flush = flush
+        self.name = name
+        self._local = threading.local()
+    
+    def _batches(self):
+        if not hasattr(self._local, 'batches'):
+            self._local.batches = {}
+        return self._local.batches
+    
+    def _pending_batch(self, connection, using):
+        """Return the batch registered for the current savepoint, if any."""
+        batches = self._batches()
+        current = self._batch_key(connection, using)
+        hooks = [hook[1] for hook in connection.run_on_commit]
+        released = []
+        
+        for key in [key for key in batches if key[0] == using]:
+            # A rollback removes the callbacks of its batches from the
+            # connection's commit hooks; forget those batches
+            if not any(hook is batches[key]['callback'] for hook in hooks):
+                del batches[key]
+            # Batches of savepoints opened inside the current one and since
+            # released now commit or roll back with it
+            elif len(key[1]) > len(current[1]) and key[1][:len(current[1])] == current[1]:
+                released.append(key)
+        
+        batch = batches.get(current)
+        if released:
+            if batch is None:
+                batch = self._new_batch(connection, current)
+            for key in released:
+                # The released batch's callback stays registered but flushes nothing
+                released_batch = batches.pop(key)
+                batch['items'].extend(released_batch['items'])
+                released_batch['items'] = []
+        
+        return batch
+    
+    @staticmethod
+    def _batch_key(connection, using):
+        # atomic(savepoint=False) blocks push None; they cannot roll back alone
+        return (using, tuple(sid for sid in connection.savepoint_ids if sid is not None))
+    
+    def _new_batch(self, connection, key):
+        """Register a batch (and its on_commit callback) for the current savepoint."""
+        batch = {'items': []}
+        batch['callback'] = lambda: self._flush_batch(batch, key)
+        self._batches()[key] = batch
+        transaction.on_commit(batch['callback'], using=key[0])
+        return batch
+    
+    def add(self, *items, using=DEFAULT_DB_ALIAS):
+        """
+        Buffer items until the current transaction commits.
+        
+        Args:
+            *items: Items to pass to the flush function
+            using: Database alias of the transaction
+        """
+        connection = transaction.get_connection(using)
+        
+        if not connection.in_atomic_block:
+            self._run_flush(list(items))
+            return
+        
+        batch = self._pending_batch(connection, using)
+        if batch is None:
+            batch = self._new_batch(connection, self._batch_key(connection, using))
+        
+        batch['items'].extend(items)
+    
+    def _flush_batch(self, batch, key):
+        """Flush a committed batch."""
+        if self._batches().get(key) is batch:
+            del self._batches()[key]
+        self._run_flush(batch['items'])
+    
+    def _run_flush(self, items):
+        """Run the flush function, logging instead of raising on failure."""
+        if not items:
+            return
+        try:
+            self.flush(items)
+        except Exception as e:
+            logger.error(f"Error flushing {len(items)} item(s) from {self.name}: {e}")
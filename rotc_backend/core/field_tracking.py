@@ -0,0 +1,93 @@
+"""
+In-memory field change tracking for models.
+
+FieldTrackingMixin snapshots the values a model instance was loaded with
+(in from_db) and after every save, so signal handlers and audit payloads
+can see what changed without re-fetching the row.
+"""
+from django.db.models import DEFERRED
+
+
+class FieldTrackingMixin:
+    """
+    Track changes to concrete fields since the instance was loaded or saved.
+    
+    Usage:
+        class Grades(FieldTrackingMixin, models.Model):
+            ...
+        
+        grades.changed_fields  # {'merit_points': (10, 15)}
+    """
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            attname: value
+            for attname, value in zip(field_names, values)
+            if value is not DEFERRED
+        }
+        return instance
+    
+    def _snapshot(self, attnames=None):
+        """Record the current values of the given (or all loaded) fields."""
+        if attnames is None:
+            attnames = [field.attname for field in self._meta.concrete_fields]
+            deferred = self.get_deferred_fields()
+            attnames = [attname for attname in attnames if attname not in deferred]
+            self._loaded_values = {}
+        elif not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        
+        for attname in attnames:
+            self._loaded_values[attname] = getattr(self, attname)
+    
+    @property
+    def is_tracked(self):
+        """True if the instance has a snapshot to diff against."""
+        return hasattr(self, '_loaded_values')
+    
+    def get_previous_value(self, attname, default=None):
+        """
+        Get a field's value as of the last load or save.
+        
+        Args:
+            attname: Field attribute name (e.g. 'status' or 'cadet_id')
+            default: Returned if the field was not loaded
+        
+        Returns:
+            The previous value, or default
+        """
+        return getattr(self, '_loaded_values', {}).get(attname, default)
+    
+    @property
+    def changed_fields(self):
+        """
+        Fields whose value differs from the last load or save.
+        
+        Returns:
+            Dict mapping attname to (previous value, current value); empty for
+            instances that were never loaded or saved
+        """
+        loaded_values = getattr(self, '_loaded_values', {})
+        return {
+            attname: (previous, getattr(self, attname))
+            for attname, previous in loaded_values.items()
+            if getattr(self, attname) != previous
+        }
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save handlers have already seen the diff; start a new one
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            self._snapshot([self._meta.get_field(name).attname for name in update_fields])
+        else:
+            self._snapshot()
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        if fields is not None:
+            self._snapshot([self._meta.get_field(name).attname for name in fields])
+        else:
+            self._snapshot()
@@ -2,9 +2,16 @@
 Custom pagination classes for Node.js backend compatibility.
 Ensures pagination format matches: {page, limit, total, data}
 """
+import base64
+import binascii
+import json
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from collections import OrderedDict
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
 
 
 class NodeJSCompatiblePagination(PageNumberPagination):
@@ -55,3 +62,194 @@ class NodeJSCompatiblePagination(PageNumberPagination):
                 'data': schema,
             },
         }
+
+
+def estimate_count(queryset):
+    """
+    Estimate the number of rows a queryset returns without counting them.
+    
+    Uses the PostgreSQL planner's row estimate (EXPLAIN), which costs the
+    same on page 1 and page 10,000.
+    
+    Args:
+        queryset: QuerySet to estimate
+    
+    Returns:
+        Estimated row count, or None if the database cannot estimate
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    
+    sql, params = queryset.order_by().query.get_compiler(queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(NodeJSCompatiblePagination):
+    """
+    Keyset (cursor) pagination on (created_at, id), with page-number fallback.
+    
+    Requests that pass ?cursor= (empty for the first page) are paginated
+    with WHERE (created_at, id) < (last seen) instead of OFFSET, so deep
+    pages cost the same as the first one. Cursors are opaque; use the
+    next_cursor/previous_cursor values from the previous response.
+    
+    The total is the planner's estimate on PostgreSQL (exact COUNT elsewhere);
+    pass ?include_total=true for an exact count. Requests without a cursor
+    keep the Node.js page/limit behaviour.
+    
+    Cursor responses:
+    {
+        page: null,
+        limit: 50,
+        total: 12345,
+        total_is_estimate: true,
+        next_cursor: "...",
+        previous_cursor: null,
+        data: [...]
+    }
+    """
+    cursor_query_param = 'cursor'
+    include_total_query_param = 'include_total'
+    ordering = ('-created_at', '-id')
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Paginate by keyset when a cursor is given, otherwise by page number.
+        """
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        
+        self.request = request
+        self.limit = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request.query_params.get(self.cursor_query_param), queryset.model)
+        self.total, self.total_is_estimate = self.get_total(queryset, request)
+        
+        if values is not None:
+            queryset = queryset.filter(self._keyset_filter(values, reverse))
+        
+        order_by = [self._flip(name) for name in self.ordering] if reverse else list(self.ordering)
+        rows = list(queryset.order_by(*order_by)[:self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = bool(rows), has_more
+        else:
+            has_next, has_previous = has_more, values is not None and bool(rows)
+        
+        self.next_cursor = self.encode_cursor(rows[-1], reverse=False) if has_next else None
+        self.previous_cursor = self.encode_cursor(rows[0], reverse=True) if has_previous else None
+        return rows
+    
+    def get_total(self, queryset, request):
+        """
+        Get the total row count for a cursor page.
+        
+        Returns:
+            Tuple of (total, is_estimate)
+        """
+        include_total = request.query_params.get(self.include_total_query_param, '').lower() in ('1', 'true')
+        if not include_total:
+            estimate = estimate_count(queryset)
+            if estimate is not None:
+                return estimate, True
+        return queryset.count(), False
+    
+    def get_cursor_metadata(self):
+        """
+        Get the pagination fields of a cursor page.
+        
+        Returns:
+            OrderedDict with limit, total, total_is_estimate and the cursors
+        """
+        return OrderedDict([
+            ('limit', self.limit),
+            ('total', self.total),
+            ('total_is_estimate', self.total_is_estimate),
+            ('next_cursor', self.next_cursor),
+            ('previous_cursor', self.previous_cursor),
+        ])
+    
+    def get_paginated_response(self, data):
+        """
+        Return paginated response in Node.js format, with cursors in cursor mode.
+        """
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        
+        response = OrderedDict([('page', None)])
+        response.update(self.get_cursor_metadata())
+        response['data'] = data
+        return Response(response)
+    
+    def encode_cursor(self, instance, reverse=False):
+        """Build an opaque cursor pointing at an instance's ordering values."""
+        values = []
+        for name in self.ordering:
+            value = getattr(instance, name.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+    
+    def decode_cursor(self, cursor, model):
+        """
+        Decode a cursor into ordering values and direction.
+        
+        Args:
+            cursor: Cursor from the query string
+            model: Model whose fields the cursor values belong to
+        
+        Returns:
+            Tuple of (values or None for the first page, reverse)
+        
+        Raises:
+            NotFound: If the cursor is malformed
+        """
+        if not cursor:
+            return None, False
+        
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            raw_values = payload['v']
+            if len(raw_values) != len(self.ordering):
+                raise ValueError('cursor does not match ordering')
+            
+            values = [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, raw_values)
+            ]
+            return values, bool(payload.get('r'))
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            raise NotFound('Invalid cursor')
+    
+    def _keyset_filter(self, values, reverse):
+        """Rows strictly after the cursor position in the requested direction."""
+        condition = Q()
+        for index, name in enumerate(self.ordering):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            clause = Q(**{f"{name.lstrip('-')}__{lookup}": values[index]})
+            for previous_name, previous_value in zip(self.ordering[:index], values[:index]):
+                clause &= Q(**{previous_name.lstrip('-'): previous_value})
+            condition |= clause
+        
+        # Redundant bound on the leading field so its index can serve a range scan
+        first = self.ordering[0]
+        lookup = 'lte' if first.startswith('-') != reverse else 'gte'
+        return Q(**{f"{first.lstrip('-')}__{lookup}": values[0]}) & condition
+    
+    @staticmethod
+    def _flip(name):
+        """Reverse the direction of an ordering field."""
+        return name[1:] if name.startswith('-') else f'-{name}'
@@ -68,6 +68,33 @@ class QueryMonitor:
 query_monitor = QueryMonitor(threshold_ms=100)
 
 
+class QueryTimer:
+    """
+    Database execute wrapper that counts and times queries.
+    
+    Unlike connection.queries this works with DEBUG off, so it can be used
+    for per-request metrics in production.
+    
+    Usage:
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            ...
+        timer.count, timer.total_ms
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+    
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.total_ms += (time.perf_counter() - start) * 1000
+
+
 def monitor_query_performance(func):
     """
     Decorator to monitor query performance of a function.
@@ -70,3 +70,10 @@ def worker_int(worker):
 def worker_abort(worker):
     """Called when a worker received the SIGABRT signal."""
     worker.log.info(f"Worker received SIGABRT signal (pid: {worker.pid})")
+
+def child_exit(server, worker):
+    """Called just after a worker has exited, in the master process."""
+    # Drop the dead worker's live Prometheus gauges in multiprocess mode
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,53 @@
+"""
+Tests for streaming audit log exports.
+"""
+import csv
+import io
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from openpyxl import load_workbook
+from apps.system.exports import (
+    AUDIT_EXPORT_HEADERS,
+    audit_logs_xlsx_response,
+    iter_audit_log_rows,
+    stream_audit_logs_csv,
+)
+from apps.system.models import AuditLog
+
+
+class AuditLogExportTests(TestCase):
+    """Test that CSV and XLSX exports stream rows from the database."""
+    
+    def setUp(self):
+        AuditLog.objects.bulk_create([
+            AuditLog(table_name='cadets', operation='UPDATE', record_id=index, payload={'index': index})
+            for index in range(5)
+        ])
+        self.queryset = AuditLog.objects.order_by('id')
+    
+    def test_rows_are_read_lazily(self):
+        """Rows come from an iterator, not a materialised list."""
+        rows = iter_audit_log_rows(self.queryset, chunk_size=2)
+        self.assertEqual(next(rows)[1:4], ['cadets', 'UPDATE', 0])
+    
+    def test_csv_is_streamed(self):
+        """CSV export is a streaming response with a header and one line per log."""
+        response = stream_audit_logs_csv(self.queryset, 'audit.csv')
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertIn('audit.csv', response['Content-Disposition'])
+        
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.reader(io.StringIO(content)))
+        self.assertEqual(rows[0], AUDIT_EXPORT_HEADERS)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][5], '{"index": 0}')
+    
+    def test_xlsx_written_in_write_only_mode(self):
+        """XLSX export produces a valid workbook with all rows."""
+        response = audit_logs_xlsx_response(self.queryset, 'audit.xlsx')
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        sheet = workbook['Audit Logs']
+        
+        self.assertEqual([cell.value for cell in sheet[1]], AUDIT_EXPORT_HEADERS)
+        self.assertTrue(sheet['A1'].font.bold)
+        self.assertEqual(sheet.max_row, 6)
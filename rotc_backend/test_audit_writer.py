@@ -0,0 +1,70 @@
+"""
+Tests for the buffered audit log writer.
+"""
+from django.db import transaction
+from django.test import TestCase, override_settings
+from apps.cadets.models import Cadet
+from apps.system.models import AuditLog
+
+
+class BufferedAuditWriterTests(TestCase):
+    """Test that audit rows are written in one batch after commit."""
+    
+    def _create_cadets(self, count):
+        for index in range(count):
+            Cadet.objects.create(
+                student_id=f'AUD-{index}',
+                first_name='Audit',
+                last_name=f'Cadet{index}',
+                company='Alpha',
+                platoon='1st'
+            )
+    
+    def test_entries_written_with_one_insert_on_commit(self):
+        """Audit rows are deferred to commit and inserted together."""
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self._create_cadets(3)
+            self.assertEqual(AuditLog.objects.filter(table_name='cadets').count(), 0)
+        
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+        
+        self.assertEqual(AuditLog.objects.filter(table_name='cadets', operation='CREATE').count(), 3)
+    
+    def test_rolled_back_changes_are_not_audited(self):
+        """Entries of a rolled back savepoint are discarded."""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self._create_cadets(1)
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+        
+        self.assertEqual(AuditLog.objects.filter(table_name='cadets').count(), 0)
+    
+    def test_rolled_back_inner_atomic_is_not_audited(self):
+        """Entries of a rolled back nested atomic block are dropped; the rest are written."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Cadet.objects.create(student_id='AUD-OUTER', first_name='Audit', last_name='Outer')
+                try:
+                    with transaction.atomic():
+                        Cadet.objects.create(student_id='AUD-INNER', first_name='Audit', last_name='Inner')
+                        raise RuntimeError('rollback')
+                except RuntimeError:
+                    pass
+                Cadet.objects.create(student_id='AUD-AFTER', first_name='Audit', last_name='After')
+        
+        audited = AuditLog.objects.filter(table_name='cadets', operation='CREATE')
+        self.assertEqual(
+            sorted(entry.payload['student_id'] for entry in audited),
+            ['AUD-AFTER', 'AUD-OUTER']
+        )
+    
+    @override_settings(AUDIT_LOG_GUARANTEED_DELIVERY=True)
+    def test_guaranteed_delivery_writes_in_transaction(self):
+        """Guaranteed mode inserts each entry immediately."""
+        self._create_cadets(2)
+        self.assertEqual(AuditLog.objects.filter(table_name='cadets').count(), 2)
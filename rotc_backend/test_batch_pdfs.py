@@ -0,0 +1,100 @@
+"""
+Tests for parallel batch PDF generation bundled into a ZIP archive.
+"""
+import io
+import multiprocessing
+import zipfile
+from unittest.mock import patch
+from django.test import TestCase
+from apps.authentication.models import User
+from apps.cadets.models import Cadet
+from apps.reports.batch import render_cadet_profiles, write_profiles_zip
+from apps.reports.tasks import batch_generate_cadet_pdfs
+
+
+def render_in_daemon(cadets, connection):
+    # Stands in for a Celery prefork child, which is a daemonic process
+    connection.send([
+        (cadet.student_id, pdf_bytes is not None and pdf_bytes.startswith(b'%PDF'), repr(error) if error else None)
+        for cadet, pdf_bytes, error in render_cadet_profiles(cadets, workers=2)
+    ])
+    connection.close()
+
+
+class BatchRenderTests(TestCase):
+    """Test rendering cadet profiles serially and across a process pool."""
+    
+    def setUp(self):
+        for index in range(3):
+            Cadet.objects.create(student_id=f'PDF-{index}', first_name='Batch', last_name=f'Cadet{index}')
+        self.cadets = list(Cadet.objects.select_related('grades').order_by('id'))
+    
+    def test_process_pool_renders_every_cadet(self):
+        """Rendering in worker processes returns one PDF per cadet."""
+        rendered = list(render_cadet_profiles(self.cadets, workers=2))
+        
+        self.assertEqual(sorted(cadet.student_id for cadet, _, _ in rendered), ['PDF-0', 'PDF-1', 'PDF-2'])
+        for _, pdf_bytes, error in rendered:
+            self.assertIsNone(error)
+            self.assertTrue(pdf_bytes.startswith(b'%PDF'))
+    
+    def test_process_pool_from_daemonic_process(self):
+        """The pool can be started from a daemonic process such as a prefork worker child."""
+        context = multiprocessing.get_context('fork')
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=render_in_daemon, args=(self.cadets, sender), daemon=True)
+        process.start()
+        sender.close()
+        
+        self.assertTrue(receiver.poll(60))
+        rendered = receiver.recv()
+        process.join(10)
+        
+        self.assertEqual(sorted(rendered), [('PDF-0', True, None), ('PDF-1', True, None), ('PDF-2', True, None)])
+    
+    def test_zip_bundle_and_progress(self):
+        """Each PDF is written into the archive and progress is reported."""
+        output = io.BytesIO()
+        progress = []
+        rendered, errors = write_profiles_zip(
+            self.cadets, output, workers=1, on_progress=lambda done, total: progress.append((done, total))
+        )
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+        with zipfile.ZipFile(io.BytesIO(output.getvalue())) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                ['cadet_profile_PDF-0.pdf', 'cadet_profile_PDF-1.pdf', 'cadet_profile_PDF-2.pdf']
+            )
+        self.assertEqual(rendered[0]['file_name'], 'cadet_profile_PDF-0.pdf')
+
+
+class BatchPDFTaskTests(TestCase):
+    """Test the batch task loads cadets once and uploads a single bundle."""
+    
+    def setUp(self):
+        self.user = User.objects.create(
+            username='pdf_admin', email='pdf_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        self.cadet_ids = [
+            Cadet.objects.create(student_id=f'PDF-T{index}', first_name='Task', last_name=f'Cadet{index}').id
+            for index in range(2)
+        ]
+    
+    @patch('apps.reports.tasks.cloudinary.uploader.upload')
+    def test_single_upload_for_batch(self, upload):
+        """All PDFs go into one ZIP upload; missing cadets are reported."""
+        upload.return_value = {'secure_url': 'https://example.com/batch.zip', 'public_id': 'batch'}
+        
+        with self.settings(PDF_RENDER_WORKERS=1), \
+                patch.object(batch_generate_cadet_pdfs, 'update_state') as update_state:
+            result = batch_generate_cadet_pdfs.apply(args=(self.cadet_ids + [999999], self.user.id)).get()
+        
+        self.assertEqual(upload.call_count, 1)
+        self.assertEqual(upload.call_args.kwargs['format'], 'zip')
+        self.assertEqual(result['success_count'], 2)
+        self.assertEqual(result['errors'], ['Cadet 999999 not found'])
+        self.assertEqual(result['bundle']['url'], 'https://example.com/batch.zip')
+        self.assertEqual(update_state.call_args.kwargs['meta'], {'current': 2, 'total': 2})
@@ -0,0 +1,75 @@
+"""
+Tests for the coalesced on-commit WebSocket broadcast dispatcher.
+"""
+from unittest.mock import AsyncMock, MagicMock, patch
+from django.db import transaction
+from django.test import TestCase
+from apps.messaging.websocket_utils import (
+    broadcast_grade_update,
+    broadcast_system_settings_update,
+    send_group_messages,
+)
+
+
+@patch('apps.messaging.websocket_utils.send_group_messages', return_value=0)
+class BroadcastDispatcherTests(TestCase):
+    """Test that broadcasts are queued per transaction and flushed once."""
+    
+    def test_messages_flushed_once_on_commit(self, mock_send):
+        """All broadcasts in a transaction go out in a single batch after commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            broadcast_grade_update(1, {'merit_points': 5})
+            broadcast_grade_update(2, {'merit_points': 3})
+            mock_send.assert_not_called()
+        
+        mock_send.assert_called_once()
+        groups = [group for group, _ in mock_send.call_args[0][0]]
+        self.assertEqual(groups, [
+            'cadet_1', 'role_admin', 'role_training_staff',
+            'cadet_2', 'role_admin', 'role_training_staff',
+        ])
+    
+    def test_identical_payloads_deduplicated(self, mock_send):
+        """The same message to the same group is only sent once per batch."""
+        with self.captureOnCommitCallbacks(execute=True):
+            broadcast_system_settings_update('theme', 'dark')
+            broadcast_system_settings_update('theme', 'dark')
+        
+        channel_layer = MagicMock(group_send=AsyncMock())
+        with patch('apps.messaging.websocket_utils.get_channel_layer', return_value=channel_layer):
+            sent = send_group_messages(mock_send.call_args[0][0])
+        
+        self.assertEqual(sent, 3)
+        self.assertEqual(channel_layer.group_send.await_count, 3)
+    
+    def test_rolled_back_messages_dropped(self, mock_send):
+        """Broadcasts queued in a rolled back savepoint are never sent."""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    broadcast_grade_update(1, {'merit_points': 5})
+                    raise RuntimeError('rollback')
+            except RuntimeError:
+                pass
+            broadcast_grade_update(2, {'merit_points': 3})
+        
+        mock_send.assert_called_once()
+        groups = [group for group, _ in mock_send.call_args[0][0]]
+        self.assertNotIn('cadet_1', groups)
+        self.assertIn('cadet_2', groups)
+    
+    def test_rolled_back_inner_atomic_messages_dropped(self, mock_send):
+        """A nested atomic block that rolls back inside a committed transaction sends nothing."""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                broadcast_grade_update(1, {'merit_points': 5})
+                try:
+                    with transaction.atomic():
+                        broadcast_grade_update(2, {'merit_points': 3})
+                        raise RuntimeError('rollback')
+                except RuntimeError:
+                    pass
+        
+        groups = [group for call in mock_send.call_args_list for group, _ in call[0][0]]
+        self.assertIn('cadet_1', groups)
+        self.assertNotIn('cadet_2', groups)
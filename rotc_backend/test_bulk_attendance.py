@@ -0,0 +1,137 @@
+"""
+Tests for the bulk attendance engine.
+"""
+from datetime import date
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from apps.attendance import bulk
+from apps.attendance.bulk import bulk_upsert_attendance, recompute_attendance_present
+from apps.attendance.models import AttendanceRecord, TrainingDay
+from apps.cadets.models import Cadet, Grades
+from apps.system.models import SyncEvent
+from core.bulk_operations import bulk_create_attendance_records
+
+
+class BulkAttendanceEngineTests(TestCase):
+    """Test set-based attendance writes and grade recomputation."""
+    
+    def setUp(self):
+        self.days = [
+            TrainingDay.objects.create(date=date(2024, 1, day), title=f'Day {day}')
+            for day in (1, 2)
+        ]
+        self.cadets = [
+            Cadet.objects.create(student_id=f'BULK-{index}', first_name='Bulk', last_name=f'Cadet{index}')
+            for index in range(3)
+        ]
+    
+    def _rows(self, day, status='present'):
+        return [
+            {'training_day_id': day.id, 'cadet_id': cadet.id, 'status': status}
+            for cadet in self.cadets
+        ]
+    
+    def _attendance_present(self, cadet):
+        return Grades.objects.get(cadet=cadet).attendance_present
+    
+    def test_bulk_insert_updates_grades(self):
+        """Grades.attendance_present reflects bulk inserted records."""
+        result = bulk_upsert_attendance(self._rows(self.days[0]) + self._rows(self.days[1]))
+        
+        self.assertEqual(len(result['created']), 6)
+        for cadet in self.cadets:
+            self.assertEqual(self._attendance_present(cadet), 2)
+    
+    def test_update_existing_recomputes_counts(self):
+        """Changing present to absent lowers the count instead of drifting."""
+        bulk_upsert_attendance(self._rows(self.days[0]))
+        
+        result = bulk_upsert_attendance(self._rows(self.days[0], status='absent'), update_existing=True)
+        
+        self.assertEqual(len(result['updated']), 3)
+        self.assertEqual(self._attendance_present(self.cadets[0]), 0)
+    
+    def test_existing_records_skipped_by_default(self):
+        """Without update_existing, existing records are left unchanged."""
+        bulk_upsert_attendance(self._rows(self.days[0]))
+        
+        result = bulk_upsert_attendance(self._rows(self.days[0], status='absent'))
+        
+        self.assertEqual(len(result['skipped']), 3)
+        self.assertFalse(AttendanceRecord.objects.filter(status='absent').exists())
+    
+    def test_one_sync_event_per_cadet_and_day(self):
+        """A multi-day batch emits an event for every changed training day."""
+        bulk_upsert_attendance(self._rows(self.days[0]) + self._rows(self.days[1]))
+        
+        events = SyncEvent.objects.filter(event_type='attendance_update')
+        self.assertEqual(events.count(), 6)
+        self.assertEqual(
+            {event.payload['training_day_id'] for event in events.filter(cadet_id=self.cadets[0].id)},
+            {self.days[0].id, self.days[1].id}
+        )
+    
+    def test_recompute_is_a_single_update(self):
+        """Recomputing counts for existing grades is one SELECT and one UPDATE."""
+        bulk_upsert_attendance(self._rows(self.days[0]))
+        cadet_ids = [cadet.id for cadet in self.cadets]
+        
+        with self.assertNumQueries(2):
+            updated = recompute_attendance_present(cadet_ids)
+        
+        self.assertEqual(updated, 3)
+    
+    def test_bulk_operations_helper_uses_engine(self):
+        """core.bulk_operations keeps grades in sync too."""
+        records = bulk_create_attendance_records(self.days[0].id, [cadet.id for cadet in self.cadets])
+        self.assertEqual(len(records), 3)
+        self.assertEqual(self._attendance_present(self.cadets[1]), 1)
+    
+    def _race(self, status='late'):
+        """Insert a conflicting record right before the bulk INSERT, as a concurrent writer would."""
+        insert = bulk._insert_ignoring_conflicts
+        
+        def racing_insert(records, batch_size):
+            AttendanceRecord.objects.create(training_day=self.days[0], cadet=self.cadets[0], status=status)
+            return insert(records, batch_size)
+        
+        return patch.object(bulk, '_insert_ignoring_conflicts', side_effect=racing_insert)
+    
+    def test_concurrent_insert_is_updated(self):
+        """A record created concurrently is updated instead of failing the batch."""
+        with self._race():
+            result = bulk_upsert_attendance(self._rows(self.days[0]), update_existing=True)
+        
+        self.assertEqual(len(result['created']), 2)
+        self.assertEqual(len(result['updated']), 1)
+        self.assertEqual(AttendanceRecord.objects.filter(training_day=self.days[0], status='present').count(), 3)
+    
+    def test_concurrent_insert_is_skipped(self):
+        """Without update_existing the concurrently created record is left alone."""
+        with self._race():
+            result = bulk_upsert_attendance(self._rows(self.days[0]))
+        
+        self.assertEqual(len(result['created']), 2)
+        self.assertEqual(len(result['skipped']), 1)
+        self.assertEqual(
+            AttendanceRecord.objects.get(training_day=self.days[0], cadet=self.cadets[0]).status, 'late'
+        )
+    
+    def test_identical_concurrent_insert_is_not_created(self):
+        """A concurrent record with the same values is still someone else's insert."""
+        with self._race(status='present'):
+            result = bulk_upsert_attendance(self._rows(self.days[0]))
+        
+        self.assertEqual(len(result['created']), 2)
+        self.assertEqual(len(result['skipped']), 1)
+        self.assertNotIn(self.cadets[0].id, [record.cadet_id for record in result['created']])
+    
+    def test_concurrent_insert_without_returning(self):
+        """Backends without INSERT ... RETURNING detect conflicts per row."""
+        with patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False), self._race():
+            result = bulk_upsert_attendance(self._rows(self.days[0]), update_existing=True)
+        
+        self.assertEqual(len(result['created']), 2)
+        self.assertTrue(all(record.pk for record in result['created']))
+        self.assertEqual(len(result['updated']), 1)
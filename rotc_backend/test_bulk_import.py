@@ -0,0 +1,155 @@
+"""
+Tests for the set-based CSV import engine.
+"""
+from datetime import date
+from unittest.mock import patch
+from django.test import TestCase
+from apps.attendance.models import AttendanceRecord, TrainingDay
+from apps.cadets.models import Cadet, Grades
+from apps.integration.bulk_import import IMPORT_CHUNK_SIZE, import_csv_chunks
+from apps.integration.importers import DataMergeStrategy
+from apps.system.models import SyncEvent
+
+
+def import_rows(entity_type, rows, merge_strategy, chunk_size=IMPORT_CHUNK_SIZE):
+    chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+    return import_csv_chunks(entity_type, chunks, merge_strategy)
+
+
+class BulkImportEngineTests(TestCase):
+    """Test chunked, in-memory validated CSV imports."""
+    
+    def _cadet_rows(self, count, **extra):
+        return [
+            {'student_id': f'IMP-{index}', 'first_name': 'Import', 'last_name': f'Cadet{index}', **extra}
+            for index in range(count)
+        ]
+    
+    def test_cadet_import_query_count_is_independent_of_rows(self):
+        """A chunk of cadets is looked up and inserted with a fixed number of queries."""
+        with self.assertNumQueries(8):
+            result = import_rows('cadets', self._cadet_rows(40), DataMergeStrategy.SKIP)
+        
+        self.assertEqual(result.success_count, 40)
+        self.assertEqual(Cadet.objects.count(), 40)
+        self.assertEqual(Grades.objects.count(), 40)
+    
+    def test_existing_cadets_follow_merge_strategy(self):
+        """Existing cadets are skipped, updated or reported as duplicates."""
+        import_rows('cadets', self._cadet_rows(2), DataMergeStrategy.SKIP)
+        
+        skipped = import_rows('cadets', self._cadet_rows(2, company='Bravo'), DataMergeStrategy.SKIP)
+        self.assertEqual(len(skipped.warnings), 2)
+        
+        updated = import_rows('cadets', self._cadet_rows(2, company='Bravo'), DataMergeStrategy.UPDATE)
+        self.assertEqual(len(updated.updated_ids), 2)
+        self.assertEqual(Cadet.objects.filter(company='Bravo').count(), 2)
+        
+        duplicates = import_rows('cadets', self._cadet_rows(2), DataMergeStrategy.ERROR)
+        self.assertEqual(duplicates.error_count, 2)
+    
+    def _race(self, student_id):
+        """Create a conflicting cadet right before the first INSERT, as a concurrent import would."""
+        bulk_create = Cadet.objects.bulk_create
+        
+        def racing_bulk_create(objs, **kwargs):
+            if not Cadet.objects.filter(student_id=student_id).exists():
+                Cadet.objects.create(student_id=student_id, first_name='Other', last_name='Import')
+            return bulk_create(objs, **kwargs)
+        
+        return patch.object(Cadet.objects, 'bulk_create', side_effect=racing_bulk_create)
+    
+    def test_concurrently_created_cadet_is_skipped(self):
+        """A cadet inserted after the lookup is skipped without failing the chunk."""
+        with self._race('IMP-1'):
+            result = import_rows('cadets', self._cadet_rows(3), DataMergeStrategy.SKIP)
+        
+        self.assertEqual(result.success_count, 2)
+        self.assertEqual(result.warnings, ['Skipped existing cadet: IMP-1'])
+        self.assertEqual(Cadet.objects.get(student_id='IMP-1').first_name, 'Other')
+        self.assertEqual(Cadet.objects.count(), 3)
+    
+    def test_concurrently_created_cadet_is_a_duplicate_error(self):
+        """With the error strategy the lost row is reported as a duplicate."""
+        with self._race('IMP-1'):
+            result = import_rows('cadets', self._cadet_rows(3), DataMergeStrategy.ERROR)
+        
+        self.assertEqual(result.success_count, 2)
+        self.assertEqual([error['row'] for error in result.errors], [2])
+        self.assertIn('Duplicate record found', result.errors[0]['message'])
+    
+    def test_invalid_rows_are_reported_per_row(self):
+        """Bad rows get their own error and do not stop the rest of the chunk."""
+        rows = self._cadet_rows(3)
+        rows[1]['year_level'] = 'third'
+        rows[2]['email'] = 'not-an-email'
+        
+        result = import_rows('cadets', rows, DataMergeStrategy.SKIP)
+        
+        self.assertEqual(result.success_count, 1)
+        self.assertEqual([error['row'] for error in result.errors], [2, 3])
+        self.assertEqual(result.errors[1]['field'], 'email')
+    
+    def test_rows_are_processed_in_chunks(self):
+        """Row numbers stay correct across chunks."""
+        rows = self._cadet_rows(5)
+        rows[3]['student_id'] = ''
+        
+        result = import_rows('cadets', rows, DataMergeStrategy.SKIP, chunk_size=2)
+        
+        self.assertEqual(result.success_count, 4)
+        self.assertEqual(result.errors[0]['row'], 4)
+    
+    def test_grades_import_emits_exam_score_events(self):
+        """Changed exam scores produce sync events like a regular save."""
+        import_rows('cadets', self._cadet_rows(2), DataMergeStrategy.SKIP)
+        
+        result = import_rows('grades', [
+            {'student_id': 'IMP-0', 'prelim_score': '91.5'},
+            {'student_id': 'IMP-1', 'merit_points': '3'},
+            {'student_id': 'MISSING'},
+        ], DataMergeStrategy.UPDATE)
+        
+        self.assertEqual(result.success_count, 2)
+        self.assertEqual(result.errors[0]['message'], 'Cadet not found: MISSING')
+        self.assertEqual(Grades.objects.get(cadet__student_id='IMP-0').prelim_score, 91.5)
+        self.assertEqual(Grades.objects.get(cadet__student_id='IMP-1').merit_points, 3)
+        self.assertEqual(SyncEvent.objects.filter(event_type='exam_score_update').count(), 1)
+    
+    def test_attendance_import(self):
+        """Attendance rows are resolved in bulk and written through the attendance engine."""
+        import_rows('cadets', self._cadet_rows(2), DataMergeStrategy.SKIP)
+        day = TrainingDay.objects.create(date=date(2024, 4, 1), title='Drill')
+        
+        result = import_rows('attendance', [
+            {'student_id': 'IMP-0', 'training_day_id': str(day.id), 'status': 'present'},
+            {'student_id': 'IMP-1', 'training_day_id': '999999', 'status': 'present'},
+        ], DataMergeStrategy.SKIP)
+        
+        self.assertEqual(result.success_count, 1)
+        self.assertEqual(result.errors[0]['field'], 'training_day_id')
+        self.assertEqual(AttendanceRecord.objects.count(), 1)
+    
+    def test_invalid_attendance_values_are_reported_per_row(self):
+        """A bad status or time fails its own row, not the whole chunk."""
+        import_rows('cadets', self._cadet_rows(4), DataMergeStrategy.SKIP)
+        day = TrainingDay.objects.create(date=date(2024, 4, 2), title='Drill')
+        
+        result = import_rows('attendance', [
+            {'student_id': 'IMP-0', 'training_day_id': str(day.id), 'status': 'present', 'time_in': '07:30'},
+            {'student_id': 'IMP-1', 'training_day_id': str(day.id), 'status': 'present', 'time_in': 'bogus'},
+            {'student_id': 'IMP-2', 'training_day_id': str(day.id), 'status': 'asleep'},
+            {'student_id': 'IMP-3', 'training_day_id': str(day.id), 'status': 'late', 'time_out': '11:00'},
+        ], DataMergeStrategy.SKIP)
+        
+        self.assertEqual(result.success_count, 2)
+        self.assertEqual([error['row'] for error in result.errors], [2, 3])
+        self.assertEqual([error['field'] for error in result.errors], ['time_in', 'status'])
+        self.assertEqual(
+            set(AttendanceRecord.objects.values_list('cadet__student_id', flat=True)), {'IMP-0', 'IMP-3'}
+        )
+    
+    def test_missing_headers(self):
+        """Required headers are checked before any row is processed."""
+        result = import_rows('attendance', [{'student_id': 'IMP-0'}], DataMergeStrategy.SKIP)
+        self.assertEqual(result.errors[0]['field'], 'headers')
@@ -0,0 +1,128 @@
+"""
+Tests for the chunked bulk cadet update workflow.
+"""
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from apps.authentication.models import User
+from apps.cadets.bulk import apply_cadet_updates
+from apps.cadets.models import Cadet
+from apps.system.models import AuditLog
+from apps.system.tasks import (
+    bulk_update_cadet_chunk,
+    bulk_update_cadets,
+    bulk_update_cadets_summary,
+    get_bulk_update_progress,
+    retry_failed_bulk_update_chunks,
+)
+
+
+class ApplyCadetUpdatesTests(TestCase):
+    """Test the set-based update applied by each chunk."""
+    
+    def setUp(self):
+        self.cadets = [
+            Cadet.objects.create(student_id=f'BU-{index}', first_name='Bulk', last_name=f'Cadet{index}')
+            for index in range(10)
+        ]
+    
+    def test_chunk_is_written_with_one_bulk_update(self):
+        """A chunk is loaded with one query and written with one UPDATE."""
+        updates = [{'cadet_id': cadet.id, 'company': 'Bravo'} for cadet in self.cadets]
+        with self.assertNumQueries(4):
+            outcome = apply_cadet_updates(updates, user_id=None)
+        
+        self.assertEqual(outcome['fields'], ['company'])
+        self.assertEqual(Cadet.objects.filter(company='Bravo').count(), 10)
+    
+    def test_audit_log_records_changed_fields(self):
+        """Each updated cadet gets an UPDATE audit entry with its diff."""
+        with override_settings(AUDIT_LOG_GUARANTEED_DELIVERY=True):
+            apply_cadet_updates([{'cadet_id': self.cadets[0].id, 'platoon': '2'}])
+        
+        log = AuditLog.objects.filter(table_name='cadets', operation='UPDATE').latest('id')
+        self.assertEqual(log.payload['changed_fields']['platoon'], {'old': None, 'new': '2'})
+    
+    def test_row_errors_do_not_fail_the_chunk(self):
+        """Unknown cadets and invalid values are reported per row."""
+        outcome = apply_cadet_updates([
+            {'cadet_id': self.cadets[0].id, 'year_level': 'two'},
+            {'cadet_id': 999999, 'company': 'Bravo'},
+            {'company': 'Bravo'},
+            {'cadet_id': self.cadets[1].id, 'company': 'Bravo'},
+        ])
+        
+        self.assertEqual(outcome['updated_ids'], [self.cadets[1].id])
+        self.assertEqual(len(outcome['errors']), 3)
+
+
+class BulkUpdateWorkflowTests(TestCase):
+    """Test chunk dispatch, progress, summary and partial retries."""
+    
+    def setUp(self):
+        self.user = User.objects.create(
+            username='bulk_admin', email='bulk_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        self.cadets = [
+            Cadet.objects.create(student_id=f'BW-{index}', first_name='Bulk', last_name=f'Cadet{index}')
+            for index in range(5)
+        ]
+    
+    def test_updates_are_split_into_chunks(self):
+        """The entry task dispatches one chord member per chunk."""
+        updates = [{'cadet_id': cadet.id, 'company': 'Bravo'} for cadet in self.cadets]
+        with patch('apps.system.tasks._dispatch_bulk_update_chunks') as dispatch:
+            result = bulk_update_cadets.apply(args=(updates, self.user.id), kwargs={'chunk_size': 2}).get()
+        
+        chunks = dispatch.call_args.args[1]
+        self.assertEqual([index for index, _ in chunks], [0, 1, 2])
+        self.assertEqual([len(chunk) for _, chunk in chunks], [2, 2, 1])
+        self.assertEqual(get_bulk_update_progress(result['job_id'])['progress'], 0)
+    
+    def test_chunks_report_progress_and_summary_aggregates(self):
+        """Chunk results drive progress and the summary totals."""
+        with patch('apps.system.tasks._dispatch_bulk_update_chunks'):
+            job_id = bulk_update_cadets.apply(
+                args=([{'cadet_id': cadet.id, 'company': 'Bravo'} for cadet in self.cadets], self.user.id),
+                kwargs={'chunk_size': 3}
+            ).get()['job_id']
+        
+        first = bulk_update_cadet_chunk.apply(
+            args=(job_id, 0, [{'cadet_id': cadet.id, 'company': 'Bravo'} for cadet in self.cadets[:3]], self.user.id)
+        ).get()
+        self.assertEqual(get_bulk_update_progress(job_id)['progress'], 50)
+        
+        second = bulk_update_cadet_chunk.apply(
+            args=(job_id, 1, [{'cadet_id': cadet.id, 'company': 'Bravo'} for cadet in self.cadets[3:]], self.user.id)
+        ).get()
+        summary = bulk_update_cadets_summary.apply(args=([first, second], job_id, self.user.id)).get()
+        
+        self.assertEqual(summary['success_count'], 5)
+        self.assertEqual(summary['failed_chunks'], [])
+        self.assertEqual(get_bulk_update_progress(job_id)['status'], 'completed')
+    
+    def test_only_failed_chunks_are_retried(self):
+        """A chunk that keeps failing is recorded and can be retried alone."""
+        with patch('apps.system.tasks._dispatch_bulk_update_chunks'):
+            job_id = bulk_update_cadets.apply(
+                args=([{'cadet_id': cadet.id, 'company': 'Bravo'} for cadet in self.cadets], self.user.id),
+                kwargs={'chunk_size': 3}
+            ).get()['job_id']
+        
+        ok = bulk_update_cadet_chunk.apply(
+            args=(job_id, 0, [{'cadet_id': cadet.id, 'company': 'Bravo'} for cadet in self.cadets[:3]], self.user.id)
+        ).get()
+        failing_updates = [{'cadet_id': cadet.id, 'company': 'Bravo'} for cadet in self.cadets[3:]]
+        with patch('apps.cadets.bulk.apply_cadet_updates', side_effect=RuntimeError('database is down')):
+            failed = bulk_update_cadet_chunk.apply(args=(job_id, 1, failing_updates, self.user.id)).get()
+        self.assertEqual(failed['status'], 'failed')
+        
+        summary = bulk_update_cadets_summary.apply(args=([ok, failed], job_id, self.user.id)).get()
+        self.assertEqual(summary['failed_chunks'], [1])
+        self.assertEqual(get_bulk_update_progress(job_id)['status'], 'partial')
+        
+        with patch('apps.system.tasks._dispatch_bulk_update_chunks') as dispatch:
+            retry_failed_bulk_update_chunks.apply(args=(job_id, self.user.id))
+        self.assertEqual(dispatch.call_args.args[1], [(1, failing_updates)])
+        self.assertIsNone(cache.get(f'bulk_update_{job_id}_chunk_1'))
@@ -0,0 +1,189 @@
+"""
+Tests for generation-based cache invalidation and read-through caching in core.cache.
+"""
+import time
+from django.test import TestCase
+from django.core.cache import cache
+from core.cache import (
+    generate_cache_key,
+    get_cached_data,
+    set_cached_data,
+    get_or_set_cached_data,
+    get_hot_cached_data,
+    bump_cache_generation,
+    clear_all_cache,
+    LocalLRUCache,
+    invalidate_cadet_cache,
+    invalidate_grades_cache,
+    invalidate_training_day_cache,
+    invalidate_system_settings_cache,
+)
+
+
+class GenerationInvalidationTests(TestCase):
+    """Test that invalidation works without key scans."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_key_is_stable_until_invalidated(self):
+        """Same prefix and params produce the same key."""
+        key1 = generate_cache_key('cadets:list', page='1')
+        key2 = generate_cache_key('cadets:list', page='1')
+        self.assertEqual(key1, key2)
+
+    def test_invalidate_cadet_cache_changes_list_key(self):
+        """Cadet invalidation makes the cached list unreachable."""
+        key = generate_cache_key('cadets:list', page='1')
+        set_cached_data(key, {'results': []}, 300)
+
+        invalidate_cadet_cache(1)
+
+        new_key = generate_cache_key('cadets:list', page='1')
+        self.assertNotEqual(key, new_key)
+        self.assertIsNone(get_cached_data(new_key))
+
+    def test_grades_invalidation_covers_cadet_lists(self):
+        """Cadet lists embed grades, so grade changes invalidate them too."""
+        cadet_key = generate_cache_key('cadets:list')
+        grades_key = generate_cache_key('grades:list')
+
+        invalidate_grades_cache(1)
+
+        self.assertNotEqual(cadet_key, generate_cache_key('cadets:list'))
+        self.assertNotEqual(grades_key, generate_cache_key('grades:list'))
+
+    def test_invalidation_is_scoped_to_tag(self):
+        """Training day invalidation leaves other namespaces alone."""
+        cadet_key = generate_cache_key('cadets:list')
+        training_key = generate_cache_key('training_days:list')
+
+        invalidate_training_day_cache()
+
+        self.assertEqual(cadet_key, generate_cache_key('cadets:list'))
+        self.assertNotEqual(training_key, generate_cache_key('training_days:list'))
+
+    def test_system_setting_invalidation_covers_listing(self):
+        """Updating one setting invalidates the all-settings key as well."""
+        all_key = generate_cache_key('system:settings:all')
+        detail_key = generate_cache_key('system:settings', key='theme')
+
+        invalidate_system_settings_cache('theme')
+
+        self.assertNotEqual(all_key, generate_cache_key('system:settings:all'))
+        self.assertNotEqual(detail_key, generate_cache_key('system:settings', key='theme'))
+
+    def test_bump_recovers_from_evicted_counter(self):
+        """A missing counter is reseeded to a generation that was never used."""
+        key = generate_cache_key('training_days:list')
+        cache.clear()
+
+        bump_cache_generation('training_days')
+
+        self.assertNotEqual(key, generate_cache_key('training_days:list'))
+
+    def test_untagged_prefix_has_no_generation(self):
+        """Namespaces without tags keep the plain key format."""
+        key = generate_cache_key('user:settings', user_id=1)
+        self.assertNotIn(':g', key)
+
+
+class ReadThroughCacheTests(TestCase):
+    """Test the stampede-protected read-through helper."""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def builder(self):
+        self.calls += 1
+        return {'value': self.calls}
+
+    def test_builds_once_then_serves_cached(self):
+        """The builder only runs on the first lookup."""
+        first = get_or_set_cached_data('rt:test', self.builder, 'grades')
+        second = get_or_set_cached_data('rt:test', self.builder, 'grades')
+        self.assertEqual(first, second)
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_entry_served_while_locked(self):
+        """A stale entry is returned when another worker holds the lock."""
+        get_or_set_cached_data('rt:stale', self.builder, 'grades')
+        entry = cache.get('rt:stale')
+        entry['fresh_until'] = time.time() - 1
+        cache.set('rt:stale', entry, 60)
+        cache.add('rt:stale:lock', 'other-worker', 30)
+
+        value = get_or_set_cached_data('rt:stale', self.builder, 'grades')
+
+        self.assertEqual(value, {'value': 1})
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_entry_rebuilt_by_lock_holder(self):
+        """The worker that takes the lock refreshes a stale entry."""
+        get_or_set_cached_data('rt:refresh', self.builder, 'grades')
+        entry = cache.get('rt:refresh')
+        entry['fresh_until'] = time.time() - 1
+        cache.set('rt:refresh', entry, 60)
+
+        value = get_or_set_cached_data('rt:refresh', self.builder, 'grades')
+
+        self.assertEqual(value, {'value': 2})
+        self.assertIsNone(cache.get('rt:refresh:lock'))
+
+    def test_cold_miss_falls_back_after_wait(self):
+        """A worker waiting on an abandoned lock eventually builds itself."""
+        cache.add('rt:cold:lock', 'other-worker', 30)
+        value = get_or_set_cached_data('rt:cold', self.builder, 'grades', wait_timeout=0.1)
+        self.assertEqual(value, {'value': 1})
+
+
+class TwoTierCacheTests(TestCase):
+    """Test the in-process LRU tier in front of the shared cache."""
+
+    def setUp(self):
+        clear_all_cache()
+        self.calls = 0
+
+    def builder(self):
+        self.calls += 1
+        return ('row', self.calls)
+
+    def test_local_lru_evicts_oldest(self):
+        """The local tier never grows past its size limit."""
+        lru = LocalLRUCache(max_entries=2)
+        lru.set('a', 1, 60)
+        lru.set('b', 2, 60)
+        lru.get('a')
+        lru.set('c', 3, 60)
+        self.assertEqual(lru.get('b'), (False, None))
+        self.assertEqual(lru.get('a'), (True, 1))
+        self.assertEqual(len(lru), 2)
+
+    def test_local_lru_respects_ttl(self):
+        """Expired local entries are treated as misses."""
+        lru = LocalLRUCache()
+        lru.set('a', 1, -1)
+        self.assertEqual(lru.get('a'), (False, None))
+
+    def test_hot_lookup_served_from_local_tier(self):
+        """Repeated reads do not touch the shared cache."""
+        get_hot_cached_data('hot:test', self.builder, 'system_settings')
+        cache.clear()
+        value = get_hot_cached_data('hot:test', self.builder, 'system_settings')
+        self.assertEqual(value, ('row', 1))
+        self.assertEqual(self.calls, 1)
+
+    def test_hot_lookup_caches_none(self):
+        """Missing rows are cached too."""
+        get_hot_cached_data('hot:none', lambda: None, 'system_settings')
+        value = get_hot_cached_data('hot:none', self.builder, 'system_settings')
+        self.assertIsNone(value)
+        self.assertEqual(self.calls, 0)
+
+    def test_invalidation_reaches_local_tier(self):
+        """Bumping the tag makes the local entry unreachable in this worker."""
+        get_hot_cached_data('hot:inv', self.builder, 'system_settings')
+        invalidate_system_settings_cache('theme')
+        value = get_hot_cached_data('hot:inv', self.builder, 'system_settings')
+        self.assertEqual(value, ('row', 2))
@@ -0,0 +1,152 @@
+"""
+Tests for full (chunked) grade and attendance PDF reports.
+"""
+import io
+import os
+import tempfile
+from datetime import date, timedelta
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from reportlab.platypus import Table
+from apps.authentication.models import User
+from apps.attendance.models import AttendanceRecord, TrainingDay
+from apps.cadets.models import Cadet, Grades
+from apps.reports.generators import (
+    AttendanceReportPDFGenerator,
+    GradeReportPDFGenerator,
+    PDFGenerator,
+)
+from apps.reports.views import attendance_report_pdf, grade_report_pdf
+
+
+def grade_row(index):
+    return (index, f'FULL-{index:05d}', 'Cadet', str(index), 10, 2, 0, 85, None, 90)
+
+
+class TableBlockTests(SimpleTestCase):
+    """Test splitting table rows into fixed-size blocks."""
+    
+    def test_rows_split_into_blocks_with_header(self):
+        generator = PDFGenerator()
+        generator.create_document()
+        
+        count = generator.add_table_blocks(['A', 'B'], ([i, i] for i in range(25)), 10)
+        
+        tables = [element for element in generator.elements if isinstance(element, Table)]
+        self.assertEqual(count, 25)
+        self.assertEqual([len(table._cellvalues) for table in tables], [11, 11, 6])
+        for table in tables:
+            self.assertEqual(table._cellvalues[0], ['A', 'B'])
+            self.assertEqual(table.repeatRows, 1)
+    
+    def test_no_rows_adds_header_only_table(self):
+        generator = PDFGenerator()
+        generator.create_document()
+        
+        self.assertEqual(generator.add_table_blocks(['A'], iter(()), 10), 0)
+        
+        tables = [element for element in generator.elements if isinstance(element, Table)]
+        self.assertEqual(len(tables), 1)
+    
+    def test_grade_rows_render_to_output_file(self):
+        output = io.BytesIO()
+        rows = [grade_row(i) for i in range(200)]
+        # Cadet without grades is skipped
+        rows.append((999, 'NO-GRADES', 'No', 'Grades', None, None, None, None, None, None))
+        
+        result = GradeReportPDFGenerator(output=output).generate_from_rows(iter(rows), {'company': 'Alpha'})
+        
+        self.assertIs(result, output)
+        pdf_bytes = output.getvalue()
+        self.assertTrue(pdf_bytes.startswith(b'%PDF'))
+        self.assertGreater(pdf_bytes.count(b'/Type /Page\n'), 3)
+    
+    def test_attendance_rows_render(self):
+        rows = [
+            (i, date(2024, 1, 1) + timedelta(days=i), f'Day {i}', 5, 1, 0, 0, 6)
+            for i in range(80)
+        ]
+        
+        pdf_bytes = AttendanceReportPDFGenerator().generate_from_rows(iter(rows)).getvalue()
+        
+        self.assertTrue(pdf_bytes.startswith(b'%PDF'))
+
+
+class FullReportViewTests(TestCase):
+    """Test the ?full=true report endpoints."""
+    
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(REPORT_CACHE_DIR=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create(
+            username='full_report_admin', email='full_report_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        for index in range(75):
+            cadet = Cadet.objects.create(
+                student_id=f'FR-{index:03d}', first_name='Full', last_name=str(index), company='Alpha'
+            )
+            Grades.objects.get_or_create(cadet=cadet)
+    
+    def _get(self, view, path, **params):
+        # Call the view function itself; authentication is not under test
+        request = self.factory.get(path, params)
+        request.user = self.admin
+        return view.cls().get(request)
+    
+    def _cached_files(self):
+        return sum(len(files) for _, _, files in os.walk(self.media.name))
+    
+    def test_full_grade_report_ignores_limit_and_streams(self):
+        response = self._get(grade_report_pdf, '/api/reports/grades', full='true', limit=5)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('_full.pdf', response['Content-Disposition'])
+        pdf_bytes = b''.join(response.streaming_content)
+        self.assertTrue(pdf_bytes.startswith(b'%PDF'))
+        # 75 cadets at 30 rows per block
+        self.assertEqual(pdf_bytes.count(b'/Type /Page\n'), 3)
+        self.assertEqual(self._cached_files(), 1)
+    
+    def test_full_grade_report_served_from_cache(self):
+        first = b''.join(self._get(grade_report_pdf, '/api/reports/grades', full='true').streaming_content)
+        
+        # exists() and the fingerprint iterator; nothing is rendered or audited
+        with self.assertNumQueries(2):
+            second = self._get(grade_report_pdf, '/api/reports/grades', full='true')
+        
+        self.assertEqual(b''.join(second.streaming_content), first)
+        self.assertEqual(self._cached_files(), 1)
+    
+    def test_full_grade_report_changes_with_data(self):
+        b''.join(self._get(grade_report_pdf, '/api/reports/grades', full='true').streaming_content)
+        Grades.objects.filter(cadet__student_id='FR-010').update(merit_points=7)
+        
+        response = self._get(grade_report_pdf, '/api/reports/grades', full='true')
+        b''.join(response.streaming_content)
+        
+        self.assertEqual(self._cached_files(), 2)
+    
+    def test_full_grade_report_empty(self):
+        response = self._get(grade_report_pdf, '/api/reports/grades', full='true', company='Nobody')
+        
+        self.assertEqual(response.status_code, 404)
+    
+    def test_full_attendance_report(self):
+        cadet = Cadet.objects.first()
+        for offset in range(40):
+            training_day = TrainingDay.objects.create(
+                date=date(2024, 1, 1) + timedelta(days=offset), title=f'Drill {offset}'
+            )
+            AttendanceRecord.objects.create(training_day=training_day, cadet=cadet, status='present')
+        
+        response = self._get(attendance_report_pdf, '/api/reports/attendance', full='1', limit=3)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
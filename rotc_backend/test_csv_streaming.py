@@ -0,0 +1,114 @@
+"""
+Tests for streaming, chunked CSV imports.
+"""
+import io
+import tempfile
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.parsers import MultiPartParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.authentication.models import User
+from apps.cadets.models import Cadet
+from apps.integration.bulk_import import import_csv_chunks
+from apps.integration.importers import CSVChunkReader, DataMergeStrategy
+from apps.integration.storage import get_data_file_storage
+from apps.integration.tasks import import_csv_file
+from apps.integration.views import import_csv
+
+
+def cadet_csv(count, bom=False):
+    lines = ['student_id,first_name,last_name,company']
+    lines += [f'CSV-{index},Stream,Cadet{index},Alpha' for index in range(count)]
+    content = '\n'.join(lines).encode()
+    return (b'\xef\xbb\xbf' + content) if bom else content
+
+
+class CSVChunkReaderTests(TestCase):
+    """Test incremental decoding and chunking of uploaded CSV files."""
+    
+    def test_rows_are_yielded_in_chunks(self):
+        """Rows arrive in lists of at most chunk_size with progress counters."""
+        upload = SimpleUploadedFile('cadets.csv', cadet_csv(5))
+        reader = CSVChunkReader(upload, chunk_size=2)
+        chunks = list(reader)
+        
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(reader.rows_read, 5)
+        self.assertEqual(reader.fieldnames, ['student_id', 'first_name', 'last_name', 'company'])
+        self.assertEqual(reader.percent, 100)
+    
+    def test_bom_is_stripped(self):
+        """A UTF-8 byte order mark does not end up in the first header."""
+        reader = CSVChunkReader(SimpleUploadedFile('cadets.csv', cadet_csv(1, bom=True)))
+        rows = next(iter(reader))
+        self.assertEqual(rows[0]['student_id'], 'CSV-0')
+    
+    def test_underlying_file_stays_open(self):
+        """Reading does not close the caller's file object."""
+        source = io.BytesIO(cadet_csv(1))
+        list(CSVChunkReader(source))
+        self.assertFalse(source.closed)
+    
+    def test_chunks_feed_the_import_engine(self):
+        """import_csv_chunks reports progress after every chunk."""
+        progress = []
+        reader = CSVChunkReader(SimpleUploadedFile('cadets.csv', cadet_csv(5)), chunk_size=2)
+        result = import_csv_chunks(
+            'cadets', reader, DataMergeStrategy.SKIP,
+            on_chunk=lambda rows, chunk_result: progress.append((rows, chunk_result.success_count))
+        )
+        
+        self.assertEqual(result.success_count, 5)
+        self.assertEqual(progress, [(2, 2), (4, 4), (5, 5)])
+
+
+class CSVImportTaskTests(TestCase):
+    """Test large CSV uploads imported by the Celery task."""
+    
+    def test_task_imports_stored_file(self):
+        """The task streams the stored file, records progress and removes it."""
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            storage_name = get_data_file_storage().save('imports/cadets.csv', ContentFile(cadet_csv(3)))
+            result = import_csv_file.apply(args=(storage_name, 'cadets', DataMergeStrategy.SKIP, 1))
+            task_data = cache.get(f'import_task_{result.id}')
+            
+            self.assertEqual(task_data['status'], 'completed')
+            self.assertEqual(task_data['success_count'], 3)
+            self.assertEqual(task_data['total'], 3)
+            self.assertFalse(get_data_file_storage().exists(storage_name))
+        self.assertEqual(Cadet.objects.filter(student_id__startswith='CSV-').count(), 3)
+    
+    def test_missing_headers_are_reported(self):
+        """Header errors surface in the result rather than failing the task."""
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            storage_name = get_data_file_storage().save('imports/bad.csv', ContentFile(b'name\nX\n'))
+            result = import_csv_file.apply(args=(storage_name, 'cadets', DataMergeStrategy.SKIP, 1))
+            
+            self.assertEqual(cache.get(f'import_task_{result.id}')['error_count'], 1)
+    
+    @override_settings(CSV_IMPORT_ASYNC_BYTES=10)
+    def test_large_upload_is_stored_for_the_worker(self):
+        """The upload view hands large files to the task through the data file storage."""
+        admin = User.objects.create(
+            username='csv_admin', email='csv_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        upload = SimpleUploadedFile('cadets.csv', cadet_csv(3), content_type='text/csv')
+        request = Request(
+            APIRequestFactory().post('/api/import/csv', {'file': upload, 'entity_type': 'cadets'}, format='multipart'),
+            parsers=[MultiPartParser()]
+        )
+        request.user = admin
+        
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with patch('apps.integration.views.import_csv_file.delay') as delay:
+                response = import_csv.cls().post(request)
+            
+            self.assertEqual(response.status_code, 202)
+            storage_name = delay.call_args.args[0]
+            with get_data_file_storage().open(storage_name) as stored:
+                self.assertEqual(stored.read(), cadet_csv(3))
@@ -0,0 +1,79 @@
+"""
+Tests for in-memory field change tracking.
+"""
+from datetime import date
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from apps.attendance.models import AttendanceRecord, TrainingDay
+from apps.cadets.models import Cadet, Grades
+from apps.system.audit import serialize_changes
+
+
+class FieldTrackingTests(TestCase):
+    """Test FieldTrackingMixin snapshots and the signals that rely on them."""
+    
+    def setUp(self):
+        self.cadet = Cadet.objects.create(student_id='TRK-1', first_name='Track', last_name='Cadet')
+        Grades.objects.get_or_create(cadet=self.cadet)
+        self.day = TrainingDay.objects.create(date=date(2024, 3, 1), title='Drill')
+    
+    def test_loaded_instance_reports_changes(self):
+        """changed_fields diffs against the values loaded from the database."""
+        grades = Grades.objects.get(cadet=self.cadet)
+        self.assertEqual(grades.changed_fields, {})
+        
+        grades.prelim_score = 88
+        self.assertEqual(grades.changed_fields, {'prelim_score': (None, 88)})
+    
+    def test_save_resets_snapshot(self):
+        """After save the saved values become the new baseline."""
+        grades = Grades.objects.get(cadet=self.cadet)
+        grades.prelim_score = 88
+        grades.save()
+        
+        self.assertEqual(grades.changed_fields, {})
+        self.assertEqual(grades.get_previous_value('prelim_score'), 88)
+    
+    def test_deferred_fields_are_not_tracked(self):
+        """Fields left out by only() are not reported as changed."""
+        cadet = Cadet.objects.only('id', 'first_name').get(pk=self.cadet.pk)
+        self.assertNotIn('last_name', cadet._loaded_values)
+        self.assertEqual(cadet.changed_fields, {})
+    
+    def test_status_change_does_not_refetch_record(self):
+        """Saving a loaded record does not SELECT it again in pre_save."""
+        AttendanceRecord.objects.create(training_day=self.day, cadet=self.cadet, status='present')
+        record = AttendanceRecord.objects.get(training_day=self.day, cadet=self.cadet)
+        
+        record.status = 'absent'
+        with CaptureQueriesContext(connection) as queries:
+            record.save()
+        
+        selects = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'attendance_records' in query['sql']
+        ]
+        self.assertEqual(selects, [])
+        self.assertEqual(record._previous_status, 'present')
+        self.assertEqual(Grades.objects.get(cadet=self.cadet).attendance_present, 0)
+    
+    def test_exam_score_change_uses_snapshot(self):
+        """Exam score diffs come from the snapshot; hand-built instances fall back to a query."""
+        grades = Grades.objects.get(cadet=self.cadet)
+        grades.midterm_score = 75
+        grades.save()
+        self.assertIsNone(grades._previous_midterm)
+        
+        # A hand-built instance with a pk falls back to reading the row
+        detached = Grades(pk=grades.pk, cadet=self.cadet, midterm_score=80)
+        detached.save()
+        self.assertEqual(detached._previous_midterm, 75)
+    
+    def test_serialize_changes(self):
+        """Audit diffs are JSON-friendly old/new pairs."""
+        record = AttendanceRecord.objects.create(training_day=self.day, cadet=self.cadet, status='present')
+        record = AttendanceRecord.objects.get(pk=record.pk)
+        record.status = 'late'
+        
+        self.assertEqual(serialize_changes(record), {'status': {'old': 'present', 'new': 'late'}})
@@ -0,0 +1,68 @@
+"""
+Tests for atomic Grades counter maintenance.
+"""
+from datetime import date
+from unittest.mock import patch
+from django.test import TestCase
+from apps.attendance.models import AttendanceRecord, TrainingDay
+from apps.cadets.models import Cadet, Grades
+from apps.grading.counters import update_grade_counters, increment, decrement
+from apps.grading.models import MeritDemeritLog
+
+
+class GradeCounterTests(TestCase):
+    """Test F()-based counter updates and the signals that use them."""
+    
+    def setUp(self):
+        self.cadet = Cadet.objects.create(student_id='CNT-1', first_name='Count', last_name='Cadet')
+        Grades.objects.get_or_create(cadet=self.cadet)
+    
+    def test_update_returns_new_values_in_one_query(self):
+        """The counter change and the read-back are a single UPDATE ... RETURNING."""
+        with self.assertNumQueries(1):
+            grades = update_grade_counters(self.cadet.id, merit_points=increment('merit_points', 5))
+        
+        self.assertEqual(grades['merit_points'], 5)
+        self.assertEqual(grades['cadet_id'], self.cadet.id)
+        self.assertEqual(Grades.objects.get(cadet=self.cadet).merit_points, 5)
+    
+    def test_update_without_returning_reads_row_back(self):
+        """Databases without UPDATE ... RETURNING read the row back in the same transaction."""
+        with patch('apps.grading.counters.supports_update_returning', return_value=False):
+            with self.assertNumQueries(4):
+                # SAVEPOINT, UPDATE, SELECT, RELEASE SAVEPOINT
+                grades = update_grade_counters(self.cadet.id, merit_points=increment('merit_points', 2))
+            missing = update_grade_counters(0, merit_points=increment('merit_points', 2))
+        
+        self.assertEqual(grades['merit_points'], 2)
+        self.assertIsNone(missing)
+    
+    def test_decrement_never_goes_below_zero(self):
+        """Reversing more points than were awarded clamps at zero."""
+        grades = update_grade_counters(self.cadet.id, demerit_points=decrement('demerit_points', 3))
+        self.assertEqual(grades['demerit_points'], 0)
+    
+    def test_missing_grades_row_returns_none(self):
+        """Cadets without a Grades row are reported, not created."""
+        Grades.objects.filter(cadet=self.cadet).delete()
+        self.assertIsNone(update_grade_counters(self.cadet.id, merit_points=increment('merit_points', 1)))
+    
+    def test_merit_log_updates_points(self):
+        """Creating and deleting a merit log adjusts merit points atomically."""
+        log = MeritDemeritLog.objects.create(
+            cadet=self.cadet, type='merit', points=4, reason='Drill', issued_by_user_id=1
+        )
+        self.assertEqual(Grades.objects.get(cadet=self.cadet).merit_points, 4)
+        
+        log.delete()
+        self.assertEqual(Grades.objects.get(cadet=self.cadet).merit_points, 0)
+    
+    def test_attendance_status_changes_adjust_count(self):
+        """Moving into and out of 'present' increments and decrements the count."""
+        day = TrainingDay.objects.create(date=date(2024, 2, 1), title='Drill')
+        record = AttendanceRecord.objects.create(training_day=day, cadet=self.cadet, status='present')
+        self.assertEqual(Grades.objects.get(cadet=self.cadet).attendance_present, 1)
+        
+        record.status = 'absent'
+        record.save()
+        self.assertEqual(Grades.objects.get(cadet=self.cadet).attendance_present, 0)
@@ -0,0 +1,73 @@
+"""
+Tests for keyset (cursor) pagination.
+"""
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.system.models import AuditLog
+from core.pagination import KeysetPagination
+
+
+class KeysetPaginationTests(TestCase):
+    """Test cursor pages over (created_at, id)."""
+    
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        AuditLog.objects.bulk_create([
+            AuditLog(table_name='cadets', operation='UPDATE', record_id=index, payload={})
+            for index in range(7)
+        ])
+        # Identical timestamps: the id tie-breaker must keep pages disjoint
+        AuditLog.objects.update(created_at=timezone.now())
+        self.queryset = AuditLog.objects.order_by('-created_at', '-id')
+    
+    def _page(self, **params):
+        request = Request(self.factory.get('/api/audit-logs/', params))
+        paginator = KeysetPagination()
+        rows = paginator.paginate_queryset(self.queryset, request)
+        return paginator, [row.record_id for row in rows]
+    
+    def test_walks_all_rows_without_overlap(self):
+        """Following next_cursor visits every row exactly once, newest first."""
+        seen = []
+        paginator, ids = self._page(cursor='', limit=3)
+        seen.extend(ids)
+        while paginator.next_cursor:
+            paginator, ids = self._page(cursor=paginator.next_cursor, limit=3)
+            seen.extend(ids)
+        
+        self.assertEqual(seen, [6, 5, 4, 3, 2, 1, 0])
+    
+    def test_previous_cursor_returns_previous_page(self):
+        """previous_cursor leads back to the page before."""
+        first, first_ids = self._page(cursor='', limit=3)
+        second, _ = self._page(cursor=first.next_cursor, limit=3)
+        self.assertIsNone(first.previous_cursor)
+        
+        _, ids = self._page(cursor=second.previous_cursor, limit=3)
+        self.assertEqual(ids, first_ids)
+    
+    def test_response_shape_and_total(self):
+        """Cursor responses keep the Node.js page/limit/total/data keys."""
+        paginator, _ = self._page(cursor='', limit=5, include_total='true')
+        response = paginator.get_paginated_response(['row'])
+        
+        self.assertIsNone(response.data['page'])
+        self.assertEqual(response.data['limit'], 5)
+        self.assertEqual(response.data['total'], 7)
+        self.assertFalse(response.data['total_is_estimate'])
+        self.assertEqual(response.data['data'], ['row'])
+    
+    def test_page_number_mode_without_cursor(self):
+        """Requests without a cursor still use page numbers."""
+        paginator, ids = self._page(page=2, limit=5)
+        self.assertFalse(paginator.cursor_mode)
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(paginator.get_paginated_response([]).data['page'], 2)
+    
+    def test_invalid_cursor(self):
+        """Malformed cursors are rejected with 404 like DRF's CursorPagination."""
+        with self.assertRaises(NotFound):
+            self._page(cursor='not-a-cursor')
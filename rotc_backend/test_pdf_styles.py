@@ -0,0 +1,43 @@
+"""
+Tests for the shared ReportLab style registry.
+"""
+import io
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from apps.reports.generators import CadetProfilePDFGenerator, GradeReportPDFGenerator
+from apps.reports.management.commands.benchmark_pdf_generation import sample_cadet
+from apps.reports.styles import get_style_registry
+
+
+class StyleRegistryTests(SimpleTestCase):
+    """Test that styles are built once and shared by generators."""
+    
+    def test_generators_share_styles(self):
+        """Two generators use the same style objects instead of rebuilding them."""
+        first, second = CadetProfilePDFGenerator(), GradeReportPDFGenerator()
+        
+        self.assertIs(first.title_style, second.title_style)
+        self.assertIs(first.styles['Normal'], second.styles['Normal'])
+        self.assertIs(first.registry, get_style_registry())
+    
+    def test_registry_is_read_only(self):
+        """Shared mappings cannot be changed by one generator."""
+        registry = get_style_registry()
+        with self.assertRaises(TypeError):
+            registry.table_styles['default'] = None
+        with self.assertRaises(AttributeError):
+            registry.stylesheet = {}
+    
+    def test_profile_renders_with_shared_styles(self):
+        """A cadet profile still renders to a PDF."""
+        pdf = CadetProfilePDFGenerator().generate(sample_cadet()).getvalue()
+        self.assertTrue(pdf.startswith(b'%PDF'))
+    
+    def test_benchmark_command(self):
+        """The benchmark reports a timing line per generator."""
+        out = io.StringIO()
+        call_command('benchmark_pdf_generation', iterations=1, grade_rows=2, stdout=out)
+        
+        output = out.getvalue()
+        for name in ('Cadet profile', 'Grade report', 'Certificate'):
+            self.assertIn(name, output)
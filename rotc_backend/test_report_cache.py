@@ -0,0 +1,146 @@
+"""
+Tests for the content-addressed PDF report cache.
+"""
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from apps.authentication.models import User
+from apps.attendance.models import AttendanceRecord, TrainingDay
+from apps.cadets.models import Cadet, Grades
+from apps.reports.cache import get_cached_report, prune_report_cache, report_fingerprint, store_report
+from apps.reports.generators import GradeReportPDFGenerator
+from apps.reports.views import attendance_report_pdf, grade_report_pdf
+
+
+class ReportCacheTests(TestCase):
+    """Test that reports are keyed on their data, not on request filters."""
+    
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(REPORT_CACHE_DIR=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create(
+            username='report_admin', email='report_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        self.cadet = Cadet.objects.create(student_id='RC-1', first_name='Report', last_name='Cadet', company='Alpha')
+        Grades.objects.get_or_create(cadet=self.cadet)
+    
+    def _get(self, view, path, **params):
+        # Call the view function itself; authentication is not under test
+        request = self.factory.get(path, params)
+        request.user = self.admin
+        return view.cls().get(request)
+    
+    def _cached_files(self):
+        return sum(len(files) for _, _, files in os.walk(self.media.name))
+    
+    def test_fingerprint_depends_on_rows(self):
+        """Same rows give the same key; any changed value gives a new one."""
+        first = report_fingerprint('grades', {'company': 'Alpha'}, [(1, 'RC-1', 90.0)])
+        
+        self.assertEqual(first, report_fingerprint('grades', {'company': 'Alpha'}, [(1, 'RC-1', 90.0)]))
+        self.assertNotEqual(first, report_fingerprint('grades', {'company': 'Alpha'}, [(1, 'RC-1', 91.0)]))
+    
+    def test_incomplete_file_is_a_miss(self):
+        """A partially written PDF is never served."""
+        store_report('grades', 'ab' * 32, b'%PDF-1.4 truncated')
+        self.assertIsNone(get_cached_report('grades', 'ab' * 32))
+    
+    def test_unchanged_grades_report_is_served_from_storage(self):
+        """Repeating a request returns the stored bytes without rendering again."""
+        first = self._get(grade_report_pdf, '/api/reports/grades', company='Alpha')
+        second = self._get(grade_report_pdf, '/api/reports/grades', company='Alpha')
+        
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(self._cached_files(), 1)
+    
+    def test_grade_edit_invalidates_report(self):
+        """After a grade change the report is rendered again under a new key."""
+        self._get(grade_report_pdf, '/api/reports/grades', company='Alpha')
+        Grades.objects.filter(cadet=self.cadet).update(prelim_score=95)
+        self._get(grade_report_pdf, '/api/reports/grades', company='Alpha')
+        
+        self.assertEqual(self._cached_files(), 2)
+    
+    def test_attendance_report_keyed_on_counts(self):
+        """Marking attendance changes the attendance report fingerprint."""
+        training_day = TrainingDay.objects.create(date='2024-03-01', title='Drill')
+        self._get(attendance_report_pdf, '/api/reports/attendance')
+        self._get(attendance_report_pdf, '/api/reports/attendance')
+        self.assertEqual(self._cached_files(), 1)
+        
+        AttendanceRecord.objects.create(training_day=training_day, cadet=self.cadet, status='present')
+        self._get(attendance_report_pdf, '/api/reports/attendance')
+        self.assertEqual(self._cached_files(), 2)
+    
+    def test_limited_grade_report_renders_fingerprinted_rows(self):
+        """The PDF is rendered from the same ordered rows that were fingerprinted."""
+        for index in range(2, 6):
+            cadet = Cadet.objects.create(student_id=f'RC-{index}', first_name='Report', last_name=str(index), company='Alpha')
+            Grades.objects.get_or_create(cadet=cadet)
+        
+        with patch.object(GradeReportPDFGenerator, 'generate_from_rows', autospec=True,
+                          side_effect=GradeReportPDFGenerator.generate_from_rows) as generate_from_rows:
+            response = self._get(grade_report_pdf, '/api/reports/grades', company='Alpha', limit=3)
+        
+        self.assertEqual(response.status_code, 200)
+        rows = generate_from_rows.call_args.args[1]
+        self.assertEqual([row[1] for row in rows], ['RC-1', 'RC-2', 'RC-3'])
+
+
+class ReportCachePruneTests(TestCase):
+    """Test age- and size-based pruning of the report cache."""
+    
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(REPORT_CACHE_DIR=self.media.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+    
+    def _store(self, fingerprint, days_old, size=100):
+        store_report('grades', fingerprint, b'%PDF' + b'x' * (size - 10) + b'%%EOF\n')
+        path = os.path.join(self.media.name, 'report_cache', 'grades', fingerprint[:2], f'{fingerprint}.pdf')
+        modified = time.time() - days_old * 86400
+        os.utime(path, (modified, modified))
+    
+    def test_old_reports_are_deleted(self):
+        """Reports older than the maximum age are removed."""
+        self._store('aa' * 32, days_old=40)
+        self._store('bb' * 32, days_old=5)
+        
+        result = prune_report_cache(max_age_days=30, max_bytes=10 ** 6)
+        
+        self.assertEqual(result['deleted'], 1)
+        self.assertIsNone(get_cached_report('grades', 'aa' * 32))
+        self.assertIsNotNone(get_cached_report('grades', 'bb' * 32))
+    
+    def test_oldest_reports_are_deleted_over_size_limit(self):
+        """Over the size limit, the oldest reports go first."""
+        self._store('aa' * 32, days_old=4)
+        self._store('bb' * 32, days_old=3)
+        self._store('cc' * 32, days_old=2)
+        
+        result = prune_report_cache(max_age_days=30, max_bytes=250)
+        
+        self.assertEqual(result, {'deleted': 1, 'freed_bytes': 100, 'remaining_bytes': 200})
+        self.assertIsNone(get_cached_report('grades', 'aa' * 32))
+    
+    def test_recent_reports_are_kept(self):
+        """Reports a job may still be serving are kept even over the size limit."""
+        self._store('aa' * 32, days_old=0)
+        
+        self.assertEqual(prune_report_cache(max_age_days=0, max_bytes=0)['deleted'], 0)
+    
+    def test_empty_cache(self):
+        """Pruning before anything was cached is a no-op."""
+        self.assertEqual(prune_report_cache()['deleted'], 0)
@@ -0,0 +1,182 @@
+"""
+Tests for asynchronous report jobs (submit, deduplicate, poll, download).
+"""
+import json
+import tempfile
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.authentication.models import User
+from apps.cadets.models import Cadet, Grades
+from apps.messaging.models import Notification
+from apps.reports.jobs import (
+    ReportJobError,
+    ReportJobLimitExceeded,
+    get_report_job,
+    run_report_job,
+    submit_report_job,
+)
+from apps.reports.views import (
+    cadet_profile_pdf,
+    grade_report_pdf,
+    report_job_download,
+    report_job_status,
+    report_jobs,
+)
+
+
+@patch('apps.reports.tasks.generate_report_job.apply_async')
+class ReportJobTests(TestCase):
+    """Test the report job subsystem."""
+    
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        settings_override = override_settings(REPORT_CACHE_DIR=self.media.name, REPORT_JOBS_PER_USER=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create(
+            username='jobs_admin', email='jobs_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        for index in range(15):
+            cadet = Cadet.objects.create(
+                student_id=f'RJ-{index:03d}', first_name='Job', last_name=str(index), company='Alpha'
+            )
+            Grades.objects.get_or_create(cadet=cadet)
+        self.cadet = Cadet.objects.get(student_id='RJ-000')
+    
+    def _get(self, view, path, *args, **params):
+        # Call the view function itself; authentication is not under test
+        request = self.factory.get(path, params)
+        request.user = self.admin
+        return view.cls().get(request, *args)
+    
+    def _post_job(self, payload):
+        request = Request(
+            self.factory.post('/api/reports/jobs', payload, format='json'),
+            parsers=[JSONParser()]
+        )
+        request.user = self.admin
+        return report_jobs.cls().post(request)
+    
+    def test_submit_run_and_download(self, apply_async):
+        job, created = submit_report_job('grades', {'company': 'Alpha'}, self.admin.id)
+        
+        self.assertTrue(created)
+        self.assertEqual(job['status'], 'queued')
+        apply_async.assert_called_once_with(args=[job['job_id']], task_id=job['job_id'])
+        
+        finished = run_report_job(job['job_id'])
+        
+        self.assertEqual(finished['status'], 'completed')
+        self.assertTrue(finished['rendered'])
+        self.assertEqual(Notification.objects.filter(user=self.admin, type='report_ready').count(), 1)
+        
+        status_data = json.loads(self._get(report_job_status, '/', job['job_id']).content)
+        self.assertEqual(status_data['status'], 'completed')
+        self.assertIn('download_url', status_data)
+        self.assertNotIn('fingerprint', status_data)
+        
+        response = self._get(report_job_download, '/', job['job_id'])
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+    
+    def test_identical_requests_share_job(self, apply_async):
+        first, created_first = submit_report_job('grades', {'company': 'Alpha', 'limit': '10'}, self.admin.id)
+        # Same request with equivalent parameters
+        second, created_second = submit_report_job(
+            'grades', {'limit': 10, 'company': 'Alpha', 'platoon': ''}, self.admin.id
+        )
+        
+        self.assertTrue(created_first)
+        self.assertFalse(created_second)
+        self.assertEqual(first['job_id'], second['job_id'])
+        self.assertEqual(apply_async.call_count, 1)
+        
+        # Once the job has finished, the request starts a new job
+        run_report_job(first['job_id'])
+        third, created_third = submit_report_job('grades', {'company': 'Alpha', 'limit': 10}, self.admin.id)
+        
+        self.assertTrue(created_third)
+        self.assertNotEqual(third['job_id'], first['job_id'])
+    
+    def test_finished_job_reuses_rendered_report(self, apply_async):
+        self._get(cadet_profile_pdf, '/', self.cadet.id)
+        job, _ = submit_report_job('cadet_profile', {'cadet_id': self.cadet.id}, self.admin.id)
+        
+        finished = run_report_job(job['job_id'])
+        
+        self.assertEqual(finished['status'], 'completed')
+        self.assertFalse(finished['rendered'])
+    
+    def test_per_user_limit(self, apply_async):
+        submit_report_job('grades', {}, self.admin.id)
+        submit_report_job('attendance', {}, self.admin.id)
+        
+        with self.assertRaises(ReportJobLimitExceeded):
+            submit_report_job('grades', {'company': 'Alpha'}, self.admin.id)
+        
+        # Joining a running job does not count against the limit
+        _, created = submit_report_job('grades', {}, self.admin.id)
+        self.assertFalse(created)
+        
+        response = self._post_job({'report_type': 'cadet_profile', 'params': {'cadet_id': self.cadet.id}})
+        self.assertEqual(response.status_code, 429)
+    
+    def test_invalid_requests(self, apply_async):
+        with self.assertRaises(ReportJobError):
+            submit_report_job('unknown', {}, self.admin.id)
+        with self.assertRaises(ReportJobError):
+            submit_report_job('certificate', {'activity_id': 1}, self.admin.id)
+        with self.assertRaises(ReportJobError):
+            submit_report_job('cadet_profile', {'cadet_id': 999999}, self.admin.id)
+        
+        response = self._post_job({'report_type': 'grades', 'params': {'limit': 'many'}})
+        self.assertEqual(response.status_code, 400)
+        apply_async.assert_not_called()
+    
+    def test_failed_job_releases_request(self, apply_async):
+        job, _ = submit_report_job('cadet_profile', {'cadet_id': self.cadet.id}, self.admin.id)
+        
+        with patch('apps.reports.jobs.render_report_spec', side_effect=RuntimeError('disk full')):
+            finished = run_report_job(job['job_id'])
+        
+        self.assertEqual(finished['status'], 'failed')
+        self.assertEqual(finished['error'], 'disk full')
+        self.assertEqual(get_report_job(job['job_id'])['status'], 'failed')
+        self.assertEqual(self._get(report_job_download, '/', job['job_id']).status_code, 404)
+        
+        # The failed job is not joined by a retry
+        _, created = submit_report_job('cadet_profile', {'cadet_id': self.cadet.id}, self.admin.id)
+        self.assertTrue(created)
+    
+    def test_post_endpoint_returns_202(self, apply_async):
+        response = self._post_job({'report_type': 'attendance', 'params': {'date_from': '2024-01-01'}})
+        
+        self.assertEqual(response.status_code, 202)
+        data = json.loads(response.content)
+        self.assertFalse(data['deduplicated'])
+        self.assertEqual(data['status_url'], f"/api/reports/jobs/{data['job_id']}")
+    
+    @override_settings(REPORT_ASYNC_THRESHOLD=10)
+    def test_large_full_report_is_queued(self, apply_async):
+        response = self._get(grade_report_pdf, '/api/reports/grades', full='true')
+        
+        self.assertEqual(response.status_code, 202)
+        job = get_report_job(json.loads(response.content)['job_id'])
+        self.assertEqual(job['report_type'], 'grades')
+        self.assertEqual(job['params'], {})
+    
+    def test_async_limited_report_is_queued(self, apply_async):
+        response = self._get(grade_report_pdf, '/api/reports/grades', company='Alpha', limit=5, **{'async': 'true'})
+        
+        self.assertEqual(response.status_code, 202)
+        job = get_report_job(json.loads(response.content)['job_id'])
+        self.assertEqual(job['params'], {'company': 'Alpha', 'limit': 5})
@@ -0,0 +1,65 @@
+"""
+Tests for the batched ROTCMIS upsert import.
+"""
+from unittest.mock import patch
+from django.test import TestCase
+from apps.authentication.models import User
+from apps.cadets.models import Cadet, Grades
+from apps.integration.bulk_import import upsert_rotcmis_cadets
+from apps.integration.importers import ImportResult
+from apps.system.tasks import import_rotcmis_data
+
+
+def rotcmis_records(count, company='Alpha'):
+    return [
+        {'studentId': f'RT-{index}', 'firstName': 'Sync', 'lastName': f'Cadet{index}',
+         'company': company, 'yearLevel': '2', 'rotcUnit': 'MSU'}
+        for index in range(count)
+    ]
+
+
+class ROTCMISUpsertTests(TestCase):
+    """Test that ROTCMIS records are upserted per batch."""
+    
+    def test_batch_query_count_is_independent_of_size(self):
+        """A batch is validated in memory and written with a fixed number of queries."""
+        with self.assertNumQueries(6):
+            upsert_rotcmis_cadets(rotcmis_records(20), ImportResult())
+        
+        self.assertEqual(Cadet.objects.filter(student_id__startswith='RT-').count(), 20)
+        self.assertEqual(Grades.objects.filter(cadet__student_id__startswith='RT-').count(), 20)
+    
+    def test_existing_cadets_are_updated(self):
+        """Re-running a sync updates cadets in place and reports them as updated."""
+        upsert_rotcmis_cadets(rotcmis_records(3), ImportResult())
+        result = ImportResult()
+        upsert_rotcmis_cadets(rotcmis_records(3, company='Bravo'), result)
+        
+        self.assertEqual(len(result.updated_ids), 3)
+        self.assertEqual(Cadet.objects.get(student_id='RT-1').company, 'Bravo')
+        self.assertEqual(Cadet.objects.get(student_id='RT-1').rotc_unit, 'MSU')
+        self.assertEqual(Grades.objects.filter(cadet__student_id__startswith='RT-').count(), 3)
+    
+    def test_invalid_records_are_reported(self):
+        """Records without a student_id or with bad values are skipped per record."""
+        records = rotcmis_records(2) + [{'first_name': 'No'}, {'student_id': 'RT-X', 'year_level': 'two'}]
+        result = ImportResult()
+        upsert_rotcmis_cadets(records, result)
+        
+        self.assertEqual(result.success_count, 2)
+        self.assertEqual([error['row'] for error in result.errors], [3, 4])
+    
+    def test_task_reports_progress_per_batch(self):
+        """The task upserts in batches and publishes PROGRESS state."""
+        user = User.objects.create(
+            username='rotcmis_admin', email='rotcmis_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        with patch.object(import_rotcmis_data, 'update_state') as update_state:
+            result = import_rotcmis_data.apply(args=(rotcmis_records(5), user.id), kwargs={'batch_size': 2}).get()
+        
+        self.assertEqual(result['success_count'], 5)
+        self.assertEqual(
+            [call.kwargs['meta']['current'] for call in update_state.call_args_list],
+            [2, 4, 5]
+        )
@@ -0,0 +1,128 @@
+"""
+Tests for the push-based Server-Sent Events stream.
+"""
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User as DjangoUser
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.authentication.models import User
+from apps.system.models import SyncEvent
+from apps.system.views import event_stream_generator, events_sse_view
+
+
+TEST_CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+
+
+def _parse(chunk):
+    """Extract the JSON payload of an SSE data chunk."""
+    data_line = [line for line in chunk.splitlines() if line.startswith('data: ')][0]
+    return json.loads(data_line[len('data: '):])
+
+
+@override_settings(CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, SSE_HEARTBEAT_INTERVAL=0.05)
+class EventStreamTests(TestCase):
+    """Test the SSE generator fed by the channel layer."""
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='sse_admin', email='sse_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        self.cadet = User.objects.create(
+            username='sse_cadet', email='sse_cadet@test.com',
+            password='hashed', role='cadet', is_approved=True, cadet_id=7
+        )
+
+    def _create_event(self, cadet_id, event_type='grade_updated'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return SyncEvent.objects.create(event_type=event_type, cadet_id=cadet_id, payload={'cadet_id': cadet_id})
+
+    async def test_pushed_event_reaches_subscriber(self):
+        """Events are delivered as soon as they are committed."""
+        stream = event_stream_generator(self.admin)
+        self.assertEqual(_parse(await stream.__anext__())['type'], 'connected')
+
+        event = await sync_to_async(self._create_event)(7)
+        chunk = await asyncio.wait_for(stream.__anext__(), timeout=1)
+        await stream.aclose()
+
+        self.assertIn(f'id: {event.id}\n', chunk)
+        self.assertEqual(_parse(chunk)['cadet_id'], 7)
+
+    async def test_cadet_only_receives_own_events(self):
+        """Fan-out filtering keeps other cadets' events off the stream."""
+        stream = event_stream_generator(self.cadet)
+        await stream.__anext__()
+
+        await sync_to_async(self._create_event)(8)
+        chunk = await asyncio.wait_for(stream.__anext__(), timeout=1)
+        await stream.aclose()
+
+        self.assertEqual(chunk, ': heartbeat\n\n')
+
+    async def test_resume_from_last_event_id(self):
+        """Missed events after Last-Event-ID are replayed on reconnect."""
+        first = await sync_to_async(self._create_event)(7)
+        second = await sync_to_async(self._create_event)(7)
+
+        stream = event_stream_generator(self.cadet, last_event_id=str(first.id))
+        await stream.__anext__()
+        chunk = await asyncio.wait_for(stream.__anext__(), timeout=1)
+        await stream.aclose()
+
+        self.assertIn(f'id: {second.id}\n', chunk)
+
+
+@override_settings(CHANNEL_LAYERS=TEST_CHANNEL_LAYERS, SSE_HEARTBEAT_INTERVAL=0.05, SSE_POLL_INTERVAL=5)
+class EventStreamViewTests(TestCase):
+    """Test /api/events/ under the WSGI and ASGI handlers."""
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username='sse_view_admin', email='sse_view_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        self.django_user = DjangoUser.objects.create(username='sse_view_admin')
+
+    def _authenticate(self, request):
+        force_authenticate(request, user=self.django_user)
+        request.auth_user = self.admin
+        return request
+
+    def test_wsgi_answers_with_missed_events(self):
+        """Without ASGI the view returns missed events and a retry hint instead of a stream."""
+        first = SyncEvent.objects.create(event_type='grade_updated', cadet_id=7, payload={})
+        second = SyncEvent.objects.create(event_type='grade_updated', cadet_id=7, payload={})
+        request = self._authenticate(APIRequestFactory().get(
+            '/api/events/', HTTP_ACCEPT='text/event-stream', HTTP_LAST_EVENT_ID=str(first.id)
+        ))
+
+        response = events_sse_view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.streaming)
+        body = response.content.decode()
+        self.assertTrue(body.startswith('retry: 5000\n\n'))
+        self.assertIn(f'id: {second.id}\n', body)
+        self.assertNotIn(f'id: {first.id}\n', body)
+
+    def test_unauthenticated_request_is_rejected(self):
+        """DRF authentication applies to EventSource requests too."""
+        request = APIRequestFactory().get('/api/events/', HTTP_ACCEPT='text/event-stream')
+
+        response = events_sse_view(request)
+
+        self.assertEqual(response.status_code, 401)
+
+    async def test_asgi_request_is_streamed(self):
+        """Under ASGI the view returns the async event stream."""
+        request = self._authenticate(AsyncRequestFactory().get('/api/events/', HTTP_ACCEPT='text/event-stream'))
+
+        response = await sync_to_async(events_sse_view)(request)
+
+        self.assertTrue(response.is_async)
+        stream = response.streaming_content
+        self.assertEqual(_parse((await stream.__anext__()).decode())['type'], 'connected')
+        await stream.aclose()
@@ -0,0 +1,148 @@
+"""
+Tests for streaming (constant-memory) exporters and background exports.
+"""
+import io
+import json
+import tempfile
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from openpyxl import load_workbook
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from apps.authentication.models import User
+from apps.cadets.models import Cadet, Grades
+from apps.integration.exporters import NDJSONExporter, StreamingCSVExporter, StreamingExcelExporter
+from apps.integration.exports import get_export_rows
+from apps.integration.storage import get_data_file_storage
+from apps.integration.tasks import generate_export_file
+from apps.integration.views import export_csv, export_download, export_excel, export_ndjson
+from apps.system.models import AuditLog
+
+
+class StreamingExporterTests(TestCase):
+    """Test generator-based CSV, NDJSON and write-only XLSX exporters."""
+    
+    def setUp(self):
+        for index in range(3):
+            cadet = Cadet.objects.create(
+                student_id=f'EXP-{index}', first_name='Export', last_name=f'Cadet{index}', company='Alpha'
+            )
+            Grades.objects.get_or_create(cadet=cadet)
+    
+    def test_csv_lines_are_generated_lazily(self):
+        """The CSV exporter yields the header before any row is consumed."""
+        lines = StreamingCSVExporter.iter_lines(iter([(1, 'a')]), ['id', 'name'])
+        self.assertEqual(next(lines), 'id,name\r\n')
+        self.assertEqual(next(lines), '1,a\r\n')
+    
+    def test_grades_rows_come_from_values_list(self):
+        """Grades export rows are tuples with the cadet name concatenated in SQL."""
+        rows, headers, _ = get_export_rows('grades', {'company': 'Alpha'})
+        first = dict(zip(headers, next(rows.iterator())))
+        
+        self.assertEqual(first['student_id'], 'EXP-0')
+        self.assertEqual(first['name'], 'Export Cadet0')
+    
+    def test_ndjson_response(self):
+        """NDJSON export writes one JSON object per row."""
+        rows, headers, _ = get_export_rows('cadets', {})
+        response = NDJSONExporter.export_to_response(rows.iterator(), 'cadets.ndjson', headers)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])['student_id'], 'EXP-0')
+    
+    def test_write_only_workbook(self):
+        """The write-only XLSX exporter styles the header and counts rows."""
+        output = io.BytesIO()
+        rows, headers, _ = get_export_rows('cadets', {})
+        count = StreamingExcelExporter.write_workbook(rows.iterator(), output, headers, sheet_name='Cadets')
+        
+        self.assertEqual(count, 3)
+        sheet = load_workbook(io.BytesIO(output.getvalue()))['Cadets']
+        self.assertEqual(sheet['B1'].value, 'student_id')
+        self.assertTrue(sheet['B1'].font.bold)
+        self.assertEqual(sheet.max_row, 4)
+
+
+class BackgroundExportTaskTests(TestCase):
+    """Test exports handed off to Celery."""
+    
+    def setUp(self):
+        Cadet.objects.create(student_id='BG-1', first_name='Back', last_name='Ground')
+    
+    def test_task_stores_file_for_download(self):
+        """The task writes the export to storage and records where it is."""
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            result = generate_export_file.apply(args=({'entity_type': 'cadets'}, 'csv', 1))
+            task_data = cache.get(f'export_task_{result.id}')
+            
+            self.assertEqual(task_data['status'], 'completed')
+            self.assertEqual(task_data['record_count'], 1)
+            with get_data_file_storage().open(task_data['storage_name']) as export_file:
+                self.assertIn(b'BG-1', export_file.read())
+    
+    def test_invalid_filters_mark_task_failed(self):
+        """Validation errors are reported through the task status."""
+        result = generate_export_file.apply(args=({'entity_type': 'unknown'}, 'csv', 1))
+        self.assertEqual(cache.get(f'export_task_{result.id}')['status'], 'failed')
+
+
+class ExportEndpointTests(TestCase):
+    """Test the export endpoints end to end (audit log included)."""
+    
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.admin = User.objects.create(
+            username='export_admin', email='export_admin@test.com',
+            password='hashed', role='admin', is_approved=True
+        )
+        for index in range(2):
+            Cadet.objects.create(student_id=f'EP-{index}', first_name='End', last_name=f'Point{index}')
+    
+    def _get(self, view, *args, **params):
+        # Call the view function itself; authentication is not under test
+        request = Request(self.factory.get('/api/export', params))
+        request.user = self.admin
+        return view.cls().get(request, *args)
+    
+    def _content(self, response):
+        return b''.join(response.streaming_content)
+    
+    def test_csv_export(self):
+        response = self._get(export_csv, entity_type='cadets')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'EP-1', self._content(response))
+        audit = AuditLog.objects.get(operation='EXPORT')
+        self.assertEqual(audit.record_id, 0)
+        self.assertEqual(audit.payload['format'], 'csv')
+    
+    def test_excel_export(self):
+        response = self._get(export_excel, entity_type='cadets')
+        
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(io.BytesIO(self._content(response))).active
+        self.assertEqual(sheet.max_row, 3)
+        self.assertEqual(AuditLog.objects.get(operation='EXPORT').payload['format'], 'excel')
+    
+    def test_ndjson_export(self):
+        response = self._get(export_ndjson, entity_type='cadets')
+        
+        self.assertEqual(response.status_code, 200)
+        lines = self._content(response).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(AuditLog.objects.get(operation='EXPORT').payload['format'], 'ndjson')
+    
+    def test_async_export_and_download(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            # Run the task inline instead of sending it to the broker
+            with patch('apps.integration.views.generate_export_file.delay',
+                       side_effect=lambda *args: generate_export_file.apply(args=args)):
+                response = self._get(export_csv, entity_type='cadets', **{'async': 'true'})
+            
+            self.assertEqual(response.status_code, 202)
+            download = self._get(export_download, response.data['task_id'])
+            self.assertEqual(download.status_code, 200)
+            self.assertIn(b'EP-0', self._content(download))
@@ -0,0 +1,79 @@
+"""
+Tests for batched sync event processing.
+"""
+from unittest.mock import patch
+from django.test import TestCase
+from apps.system.models import SyncEvent
+from apps.system.sync_processor import process_sync_events, coalesce_sync_events
+
+
+class ProcessSyncEventsTests(TestCase):
+    """Test that sync events are claimed, coalesced and marked in batches."""
+
+    def setUp(self):
+        self.first = SyncEvent.objects.create(
+            event_type='attendance_update', cadet_id=1, payload={'training_day_id': 1, 'status': 'late'}
+        )
+        self.second = SyncEvent.objects.create(
+            event_type='attendance_update', cadet_id=1, payload={'training_day_id': 1, 'status': 'present'}
+        )
+        self.other = SyncEvent.objects.create(
+            event_type='attendance_update', cadet_id=2, payload={'training_day_id': 1, 'status': 'absent'}
+        )
+
+    def test_coalesces_snapshot_events_per_cadet(self):
+        """Only the newest snapshot per cadet is broadcast."""
+        messages = coalesce_sync_events([self.first, self.second, self.other])
+        self.assertEqual(messages, [
+            ('attendance_update', 1, {'training_day_id': 1, 'status': 'present'}),
+            ('attendance_update', 2, {'training_day_id': 1, 'status': 'absent'}),
+        ])
+
+    def test_merit_events_are_not_coalesced(self):
+        """Each merit/demerit event keeps its own type and points."""
+        events = [
+            SyncEvent.objects.create(event_type='grade_update', cadet_id=7, payload={'type': 'merit', 'points': 2}),
+            SyncEvent.objects.create(event_type='grade_update', cadet_id=7, payload={'type': 'merit', 'points': 3}),
+        ]
+        self.assertEqual(coalesce_sync_events(events), [
+            ('grade_update', 7, {'type': 'merit', 'points': 2}),
+            ('grade_update', 7, {'type': 'merit', 'points': 3}),
+        ])
+
+    def test_attendance_events_coalesced_per_training_day(self):
+        """Attendance for different training days is not merged."""
+        events = [
+            SyncEvent.objects.create(event_type='attendance_update', cadet_id=5, payload={'training_day_id': 1, 'status': 'late'}),
+            SyncEvent.objects.create(event_type='attendance_update', cadet_id=5, payload={'training_day_id': 2, 'status': 'present'}),
+            SyncEvent.objects.create(event_type='attendance_update', cadet_id=5, payload={'training_day_id': 1, 'status': 'present'}),
+        ]
+        self.assertEqual(coalesce_sync_events(events), [
+            ('attendance_update', 5, {'training_day_id': 2, 'status': 'present'}),
+            ('attendance_update', 5, {'training_day_id': 1, 'status': 'present'}),
+        ])
+
+    def test_events_without_cadet_are_not_coalesced(self):
+        """Global events are each broadcast."""
+        events = [
+            SyncEvent.objects.create(event_type='settings', payload={}),
+            SyncEvent.objects.create(event_type='settings', payload={}),
+        ]
+        self.assertEqual(len(coalesce_sync_events(events)), 2)
+
+    @patch('apps.system.sync_processor.broadcast_sync_events')
+    def test_batch_marked_processed(self, mock_broadcast):
+        """The whole batch is broadcast once and marked processed."""
+        count = process_sync_events(batch_size=10)
+
+        self.assertEqual(count, 3)
+        mock_broadcast.assert_called_once()
+        self.assertEqual(len(mock_broadcast.call_args[0][0]), 2)
+        self.assertFalse(SyncEvent.objects.filter(processed=False).exists())
+
+    @patch('apps.system.sync_processor.broadcast_sync_events', side_effect=RuntimeError('layer down'))
+    def test_failed_broadcast_leaves_batch_for_retry(self, mock_broadcast):
+        """A failed broadcast does not mark the batch processed."""
+        count = process_sync_events(batch_size=10)
+
+        self.assertEqual(count, 0)
+        self.assertEqual(SyncEvent.objects.filter(processed=False).count(), 3)
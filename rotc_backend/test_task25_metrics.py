@@ -2,11 +2,16 @@
 Test suite for Task 25: Performance monitoring and metrics.
 Tests all metrics endpoints and functionality.
 """
+from unittest import mock
 from django.test import TestCase, Client
 from django.core.cache import cache
 from apps.authentication.models import User
 from apps.system.middleware import PerformanceMonitoringMiddleware
 from apps.system.performance_alerts import PerformanceAlertManager
+from apps.system.metrics import (
+    MetricsAggregator, get_histogram, bucket_index, histogram_quantile, summarize_histogram,
+    incr_counters,
+)
 import json
 
 
@@ -102,6 +107,97 @@ class PerformanceMonitoringTests(TestCase):
         self.assertEqual(tracked_slow_requests[0]['response_time'], 1500)
 
 
+class MetricsAggregatorTests(TestCase):
+    """Test the per-worker metrics aggregator."""
+    
+    def setUp(self):
+        """Clear shared metrics."""
+        cache.clear()
+    
+    def test_buffers_until_flush(self):
+        """Requests are only written to the shared cache on flush."""
+        aggregator = MetricsAggregator(flush_interval=3600)
+        aggregator.record_request('/api/test', 'GET', 200, 12.5)
+        self.assertIsNone(cache.get('metrics:request_count'))
+        
+        aggregator.flush()
+        self.assertEqual(cache.get('metrics:request_count'), 1)
+        self.assertEqual(cache.get('metrics:status:200'), 1)
+    
+    def test_workers_do_not_lose_updates(self):
+        """Counters from several workers are merged, not overwritten."""
+        workers = [MetricsAggregator(flush_interval=3600) for _ in range(3)]
+        for worker in workers:
+            for _ in range(5):
+                worker.record_request('/api/test', 'GET', 500, 1500)
+        for worker in workers:
+            worker.flush()
+        
+        self.assertEqual(cache.get('metrics:request_count'), 15)
+        self.assertEqual(cache.get('metrics:error_count'), 15)
+        self.assertEqual(len(cache.get('metrics:slow_requests')), 15)
+    
+    def test_latency_histogram(self):
+        """Latencies land in fixed buckets per endpoint and overall."""
+        aggregator = MetricsAggregator(flush_interval=3600)
+        aggregator.record_request('/api/a', 'GET', 200, 3)
+        aggregator.record_request('/api/a', 'GET', 200, 300)
+        aggregator.record_request('/api/b', 'GET', 200, 300)
+        aggregator.flush()
+        
+        endpoint_histogram = get_histogram('latency', '/api/a')
+        self.assertEqual(endpoint_histogram['count'], 2)
+        self.assertEqual(endpoint_histogram['buckets'][bucket_index(3)], 1)
+        self.assertEqual(endpoint_histogram['buckets'][bucket_index(300)], 1)
+        self.assertEqual(get_histogram()['count'], 3)
+        self.assertEqual(cache.get('metrics:endpoints'), {'/api/a', '/api/b'})
+    
+    def test_histogram_quantile_interpolates_within_bucket(self):
+        """Percentiles are interpolated inside the bucket holding the rank."""
+        buckets = [0] * 12
+        buckets[bucket_index(300)] = 10
+        p50 = histogram_quantile(0.5, buckets)
+        self.assertGreater(p50, 250)
+        self.assertLessEqual(p50, 500)
+        self.assertEqual(histogram_quantile(0.5, [0] * 12), 0)
+    
+    def test_db_time_and_query_count_histograms(self):
+        """Per-request database time and query counts are aggregated."""
+        aggregator = MetricsAggregator(flush_interval=3600)
+        aggregator.record_request('/api/a', 'GET', 200, 50, db_time=20, query_count=3)
+        aggregator.record_request('/api/a', 'GET', 200, 50, db_time=40, query_count=7)
+        aggregator.flush()
+        
+        self.assertEqual(get_histogram('query_count', '/api/a')['count'], 2)
+        self.assertEqual(get_histogram('query_count', '/api/a')['sum'], 10)
+        self.assertEqual(summarize_histogram('db_time', '/api/a')['avg'], 30)
+    
+    def test_flush_skips_empty_buckets(self):
+        """Only buckets that received observations are written."""
+        aggregator = MetricsAggregator(flush_interval=3600)
+        aggregator.record_request('/api/a', 'GET', 200, 300)
+        aggregator.flush()
+        
+        self.assertEqual(cache.get(f'metrics:latency:bucket:{bucket_index(300)}'), 1)
+        self.assertIsNone(cache.get(f'metrics:latency:bucket:{bucket_index(3)}'))
+        self.assertEqual(get_histogram('latency')['buckets'][bucket_index(3)], 0)
+    
+    def test_increments_are_pipelined_on_django_redis(self):
+        """With django-redis all increments go out in one pipeline."""
+        client = mock.Mock()
+        client.make_key.side_effect = lambda key: f':1:{key}'
+        pipeline = client.get_client.return_value.pipeline.return_value
+        
+        with mock.patch('apps.system.metrics._django_redis_client', return_value=client):
+            incr_counters({'metrics:request_count': 3, 'metrics:error_count': 0, 'metrics:status:200': 3})
+        
+        self.assertEqual(pipeline.incrby.call_args_list, [
+            mock.call(':1:metrics:request_count', 3),
+            mock.call(':1:metrics:status:200', 3),
+        ])
+        pipeline.execute.assert_called_once_with()
+
+
 class PerformanceAlertsTests(TestCase):
     """Test performance alert system."""
     